@@ -6,29 +6,40 @@ class Backprop:
 
     Orchestre le forward (model + loss) et le backward
     (loss -> model) en une interface simple.
+
+    Si model.config.fused_loss est actif, le forward passe par
+    model.forward_loss() : les logits complets ne sont jamais construits
+    (forward retourne alors logits=None).
     """
 
     def __init__(self, model, loss_fn):
         self.model = model
         self.loss_fn = loss_fn
+        self.fused = model.config.fused_loss
 
-    def forward(self, x: np.ndarray, targets: np.ndarray):
+    def forward(self, x: np.ndarray, targets: np.ndarray, segment_ids: np.ndarray | None = None):
         """Forward pass complet : model + loss.
 
+        Args:
+            segment_ids: documents packés (DataLoader.segment_ids), ou None
         Returns:
             (loss, logits)
         """
-        logits = self.model.forward(x)
+        if self.fused:
+            return self.model.forward_loss(x, targets, segment_ids=segment_ids), None
+        logits = self.model.forward(x, segment_ids=segment_ids)
         loss = self.loss_fn.forward(logits, targets)
         return loss, logits
 
     def backward(self):
         """Backward pass complet : loss -> model."""
+        if self.fused:
+            self.model.backward_loss()
+            return
         grad = self.loss_fn.backward()
         self.model.backward(grad)
 
     def zero_grad(self):
         """Remet tous les gradients à zéro."""
         for module in self.model.all_modules():
-            for name in module.gradients:
-                module.gradients[name] *= 0
+            module.zero_grad()
@@ -0,0 +1,19 @@
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from api.services.payload_encoding import pack_ws_message, wants_msgpack
+
+
+class DataConsumer(AsyncWebsocketConsumer):
+    """WebSocket pour suivre l'extraction des fichiers uploadés."""
+
+    async def connect(self):
+        self._msgpack = wants_msgpack(self.scope)
+        await self.channel_layer.group_add("data", self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard("data", self.channel_name)
+
+    async def data_message(self, event):
+        """Reçoit un message du channel layer et l'envoie au client."""
+        await self.send(**pack_ws_message(event["message"], self._msgpack))
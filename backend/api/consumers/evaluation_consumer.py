@@ -0,0 +1,19 @@
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from api.services.payload_encoding import pack_ws_message, wants_msgpack
+
+
+class EvaluationConsumer(AsyncWebsocketConsumer):
+    """WebSocket pour suivre la progression des jobs d'évaluation longue."""
+
+    async def connect(self):
+        self._msgpack = wants_msgpack(self.scope)
+        await self.channel_layer.group_add("evaluation", self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        await self.channel_layer.group_discard("evaluation", self.channel_name)
+
+    async def evaluation_message(self, event):
+        """Reçoit un message du channel layer et l'envoie au client."""
+        await self.send(**pack_ws_message(event["message"], self._msgpack))
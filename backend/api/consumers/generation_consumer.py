@@ -1,68 +1,80 @@
-import json
-
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
 from api.services.engine_service import EngineService
+from api.services.payload_encoding import pack_ws_message, unpack_ws_message, wants_msgpack
+from generation.logits_processors import processor_options
 
 
 class GenerationConsumer(AsyncWebsocketConsumer):
     """WebSocket pour le streaming de génération token par token."""
 
     async def connect(self):
+        self._msgpack = wants_msgpack(self.scope)
         await self.accept()
 
     async def disconnect(self, close_code):
         pass
 
     async def receive(self, text_data=None, bytes_data=None):
-        data = json.loads(text_data)
+        try:
+            data = unpack_ws_message(text_data, bytes_data)
+        except ValueError as e:
+            await self.send(**pack_ws_message({"type": "error", "message": str(e)}, self._msgpack))
+            return
         prompt = data.get("prompt", "")
         max_tokens = int(data.get("max_tokens", 200))
         temperature = float(data.get("temperature", 0.8))
 
         if not prompt:
-            await self.send(text_data=json.dumps({"error": "prompt requis"}))
+            await self.send(**pack_ws_message({"error": "prompt requis"}, self._msgpack))
             return
 
         engine = EngineService()
         if not engine.is_ready:
-            await self.send(text_data=json.dumps({"error": "Aucun modèle chargé"}))
+            await self.send(**pack_ws_message({"error": "Aucun modèle chargé"}, self._msgpack))
             return
 
         # Stream tokens
         generated = ""
         try:
             for token in await database_sync_to_async(
-                lambda: list(engine.generate_streaming(prompt, max_tokens, temperature))
+                lambda: list(
+                    engine.generate_streaming(
+                        prompt, max_tokens, temperature, **processor_options(data)
+                    )
+                )
             )():
                 generated += token
                 await self.send(
-                    text_data=json.dumps(
+                    **pack_ws_message(
                         {
                             "type": "token",
                             "token": token,
                             "generated_so_far": generated,
-                        }
+                        },
+                        self._msgpack,
                     )
                 )
 
             await self.send(
-                text_data=json.dumps(
+                **pack_ws_message(
                     {
                         "type": "complete",
                         "prompt": prompt,
                         "generated_text": prompt + generated,
                         "generated_length": len(generated),
-                    }
+                    },
+                    self._msgpack,
                 )
             )
         except Exception as e:
             await self.send(
-                text_data=json.dumps(
+                **pack_ws_message(
                     {
                         "type": "error",
                         "message": str(e),
-                    }
+                    },
+                    self._msgpack,
                 )
             )
@@ -1,12 +1,14 @@
-import json
-
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+from api.services.payload_encoding import pack_ws_message, wants_msgpack
+
 
 class TrainingConsumer(AsyncWebsocketConsumer):
     """WebSocket pour recevoir les updates d'entraînement en temps réel."""
 
     async def connect(self):
+        # ?encoding=msgpack → frames binaires msgpack au lieu de JSON texte
+        self._msgpack = wants_msgpack(self.scope)
         await self.channel_layer.group_add("training", self.channel_name)
         await self.accept()
 
@@ -20,4 +22,4 @@ class TrainingConsumer(AsyncWebsocketConsumer):
 
     async def training_message(self, event):
         """Reçoit un message du channel layer et l'envoie au client."""
-        await self.send(text_data=json.dumps(event["message"]))
+        await self.send(**pack_ws_message(event["message"], self._msgpack))
@@ -0,0 +1,80 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.services.engine_service import EngineService
+from api.services.payload_encoding import ENCODINGS, msgpack
+from api.services.training_service import TrainingService
+from config import Config
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare taille et temps de sérialisation des payloads de visualisation "
+        "(json vs base64 f16/f32, texte vs msgpack) sur un modèle 4 couches, d_model=256."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--d-model", type=int, default=256)
+        parser.add_argument("--n-layers", type=int, default=4)
+        parser.add_argument("--seq-len", type=int, default=64)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--data", default="le_chat.txt", help="Fichier de data/")
+
+    def handle(self, *args, **opts):
+        data_dir = os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", "data")
+        with open(os.path.join(data_dir, opts["data"]), encoding="utf-8") as f:
+            corpus = f.read()
+
+        d_model = opts["d_model"]
+        config = Config(
+            d_model=d_model,
+            n_heads=max(1, d_model // 64),
+            n_layers=opts["n_layers"],
+            d_ff=4 * d_model,
+            seq_len=opts["seq_len"],
+        )
+        engine = EngineService()
+        engine.initialize(config, corpus)
+        svc = TrainingService()
+        text = corpus[: config.seq_len].replace("\n", " ")
+
+        payloads = {
+            "weight_matrices": lambda enc: engine.get_weight_matrices(enc),
+            "attention_weights": lambda enc: engine.get_attention_weights(text, enc),
+            "weight_snapshot": lambda enc: svc._get_weight_snapshot(engine.model, enc),
+            "generation_weights": lambda enc: engine.get_generation_weights(
+                text[:8], max_tokens=32, sampling_strategy="greedy", encoding=enc
+            ),
+        }
+
+        self.stdout.write(
+            f"Modèle : {config.n_layers} couches, d_model={d_model}, "
+            f"{engine.model.count_parameters():,} paramètres\n"
+        )
+        header = f"{'payload':<20}{'encoding':<10}{'build ms':>10}{'json ms':>10}{'json KB':>10}"
+        if msgpack is not None:
+            header += f"{'msgpack KB':>12}"
+        self.stdout.write(header)
+
+        for name, build in payloads.items():
+            for enc in ENCODINGS:
+                build_s = dump_s = 0.0
+                for _ in range(opts["repeat"]):
+                    t0 = time.perf_counter()
+                    obj = build(enc)
+                    t1 = time.perf_counter()
+                    raw = json.dumps(obj)
+                    t2 = time.perf_counter()
+                    build_s += t1 - t0
+                    dump_s += t2 - t1
+                n = opts["repeat"]
+                line = (
+                    f"{name:<20}{enc:<10}{1000 * build_s / n:>10.2f}"
+                    f"{1000 * dump_s / n:>10.2f}{len(raw) / 1024:>10.1f}"
+                )
+                if msgpack is not None:
+                    line += f"{len(msgpack.packb(obj, use_bin_type=True)) / 1024:>12.1f}"
+                self.stdout.write(line)
@@ -117,7 +117,15 @@ class Command(BaseCommand):
                 data_obj.extracted_text = text
                 data_obj.file_size = len(text.encode("utf-8"))
                 data_obj.char_count = len(text)
-                data_obj.save(update_fields=["extracted_text", "file_size", "char_count"])
+                data_obj.save(
+                    update_fields=[
+                        "extracted_text",
+                        "file_size",
+                        "char_count",
+                        "unique_chars",
+                        "charset",
+                    ]
+                )
 
             # Link training data to config via through model (active by default)
             if data_obj:
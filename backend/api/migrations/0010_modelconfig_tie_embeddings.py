@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0009_config_training_data_through"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="modelconfig",
+            name="tie_embeddings",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0010_modelconfig_tie_embeddings"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="modelconfig",
+            name="fused_loss",
+            field=models.BooleanField(default=False),
+        ),
+    ]
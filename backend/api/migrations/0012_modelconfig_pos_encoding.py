@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0011_modelconfig_fused_loss"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="modelconfig",
+            name="pos_encoding",
+            field=models.CharField(
+                choices=[
+                    ("sinusoidal", "Sinusoïdal (table ajoutée)"),
+                    ("rope", "RoPE (rotation de Q/K)"),
+                    ("alibi", "ALiBi (biais linéaire)"),
+                ],
+                default="sinusoidal",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="modelconfig",
+            name="max_context",
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0014_modelconfig_bucketed_batches"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="modelconfig",
+            name="n_kv_heads",
+            field=models.IntegerField(default=0),
+        ),
+    ]
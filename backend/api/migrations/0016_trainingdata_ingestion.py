@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0015_modelconfig_n_kv_heads"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trainingdata",
+            name="text_file",
+            field=models.FileField(blank=True, null=True, upload_to="extracted/"),
+        ),
+        migrations.AddField(
+            model_name="trainingdata",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("processing", "Processing"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                default="ready",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="trainingdata",
+            name="progress",
+            field=models.FloatField(default=1.0),
+        ),
+        migrations.AddField(
+            model_name="trainingdata",
+            name="error_message",
+            field=models.TextField(blank=True, default=""),
+        ),
+    ]
@@ -0,0 +1,47 @@
+"""Statistiques par fichier (unique_chars, charset) calculées à l'ingestion.
+
+Les données existantes sont relues une fois pour remplir les nouveaux
+champs et recaler char_count.
+"""
+
+import os
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_stats(apps, schema_editor):
+    TrainingData = apps.get_model("api", "TrainingData")
+    db_alias = schema_editor.connection.alias
+    for data in TrainingData.objects.using(db_alias).all():
+        text = data.extracted_text
+        if data.text_file:
+            path = os.path.join(settings.MEDIA_ROOT, data.text_file.name)
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8", newline="") as f:
+                text = f.read()
+        charset = "".join(sorted(set(text)))
+        TrainingData.objects.using(db_alias).filter(pk=data.pk).update(
+            char_count=len(text), unique_chars=len(charset), charset=charset
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0016_trainingdata_ingestion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trainingdata",
+            name="unique_chars",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="trainingdata",
+            name="charset",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
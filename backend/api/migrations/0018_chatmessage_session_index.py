@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("api", "0017_trainingdata_charset"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="chatmessage",
+            index=models.Index(
+                fields=["config", "user", "session_id", "created_at"],
+                name="chatmsg_cfg_user_session_idx",
+            ),
+        ),
+    ]
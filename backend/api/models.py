@@ -13,22 +13,37 @@ class ModelConfig(models.Model):
     # Dimensions du modèle
     d_model = models.IntegerField(default=64)
     n_heads = models.IntegerField(default=4)
+    n_kv_heads = models.IntegerField(default=0)
     n_layers = models.IntegerField(default=2)
     d_ff = models.IntegerField(default=256)
     seq_len = models.IntegerField(default=64)
+    POS_ENCODING_CHOICES = [
+        ("sinusoidal", "Sinusoïdal (table ajoutée)"),
+        ("rope", "RoPE (rotation de Q/K)"),
+        ("alibi", "ALiBi (biais linéaire)"),
+    ]
+    pos_encoding = models.CharField(
+        max_length=20, choices=POS_ENCODING_CHOICES, default="sinusoidal"
+    )
+    max_context = models.IntegerField(default=0)
     vocab_size = models.IntegerField(default=0)
+    tie_embeddings = models.BooleanField(default=False)
 
     # Entraînement
     batch_size = models.IntegerField(default=16)
     learning_rate = models.FloatField(default=1e-3)
     max_epochs = models.IntegerField(default=100)
     grad_clip = models.FloatField(default=1.0)
+    fused_loss = models.BooleanField(default=False)
+    packed_batches = models.BooleanField(default=False)
+    bucketed_batches = models.BooleanField(default=False)
 
     # Adam
     beta1 = models.FloatField(default=0.9)
     beta2 = models.FloatField(default=0.999)
     epsilon = models.FloatField(default=1e-8)
     weight_decay = models.FloatField(default=0.0)
+    lazy_adam = models.BooleanField(default=False)
 
     # LR Schedule
     LR_SCHEDULE_CHOICES = [
@@ -90,18 +105,26 @@ class ModelConfig(models.Model):
         return Config(
             d_model=self.d_model,
             n_heads=self.n_heads,
+            n_kv_heads=self.n_kv_heads,
             n_layers=self.n_layers,
             d_ff=self.d_ff,
             seq_len=self.seq_len,
+            pos_encoding=self.pos_encoding,
+            max_context=self.max_context,
             vocab_size=self.vocab_size,
+            tie_embeddings=self.tie_embeddings,
             batch_size=self.batch_size,
             learning_rate=self.learning_rate,
             max_epochs=self.max_epochs,
             grad_clip=self.grad_clip,
+            fused_loss=self.fused_loss,
+            packed_batches=self.packed_batches,
+            bucketed_batches=self.bucketed_batches,
             beta1=self.beta1,
             beta2=self.beta2,
             epsilon=self.epsilon,
             weight_decay=self.weight_decay,
+            lazy_adam=self.lazy_adam,
             lr_schedule=self.lr_schedule,
             tokenizer_type=self.tokenizer_type,
             max_gen_len=self.max_gen_len,
@@ -143,11 +166,39 @@ class ModelConfig(models.Model):
             errors.append("weight_decay doit être >= 0")
         if self.lr_schedule not in ("constant", "cosine", "cosine_restarts"):
             errors.append("lr_schedule doit être constant, cosine ou cosine_restarts")
+        if self.pos_encoding not in ("sinusoidal", "rope", "alibi"):
+            errors.append("pos_encoding doit être sinusoidal, rope ou alibi")
+        elif (
+            self.pos_encoding == "rope"
+            and self.n_heads > 0
+            and (self.d_model // self.n_heads) % 2 != 0
+        ):
+            errors.append("rope demande une dimension par tête (d_model / n_heads) paire")
+        if self.max_context < 0:
+            errors.append("max_context doit être >= 0")
+        if self.n_kv_heads < 0 or (
+            self.n_kv_heads > 0 and self.n_heads > 0 and self.n_heads % self.n_kv_heads != 0
+        ):
+            errors.append("n_kv_heads doit diviser n_heads (0 = autant que n_heads)")
+        if self.packed_batches and self.bucketed_batches:
+            errors.append("packed_batches et bucketed_batches sont exclusifs")
         return errors
 
 
 class TrainingData(models.Model):
-    """Fichiers de données d'entraînement uploadés."""
+    """Fichiers de données d'entraînement uploadés.
+
+    Le texte des fichiers uploadés est extrait en arrière-plan
+    (services/ingestion.py) dans text_file, sur disque ; extracted_text
+    ne sert qu'aux textes courts créés directement (exemple, presets) et
+    aux anciennes données.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        PROCESSING = "processing"
+        READY = "ready"
+        FAILED = "failed"
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=255)
@@ -156,7 +207,14 @@ class TrainingData(models.Model):
     file_type = models.CharField(max_length=20)
     file_size = models.IntegerField()
     extracted_text = models.TextField(blank=True, default="")
+    text_file = models.FileField(upload_to="extracted/", blank=True, null=True)
+    # Statistiques calculées une fois à l'extraction (cf. corpus_view)
     char_count = models.IntegerField(default=0)
+    unique_chars = models.IntegerField(default=0)
+    charset = models.TextField(blank=True, default="")  # caractères distincts, triés
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.READY)
+    progress = models.FloatField(default=1.0)  # fraction extraite, 0..1
+    error_message = models.TextField(blank=True, default="")
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -166,6 +224,28 @@ class TrainingData(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Texte stocké en base : statistiques recalculées à l'écriture
+        if not self.text_file and self.extracted_text:
+            self.char_count = len(self.extracted_text)
+            self.charset = "".join(sorted(set(self.extracted_text)))
+            self.unique_chars = len(self.charset)
+        super().save(*args, **kwargs)
+
+    def read_text(self) -> str:
+        """Texte extrait (vide tant que l'extraction n'est pas terminée)."""
+        return "".join(self.iter_text())
+
+    def iter_text(self, chunk_size: int = 1 << 16):
+        """Texte extrait par morceaux d'au plus chunk_size caractères."""
+        if self.text_file:
+            with open(self.text_file.path, encoding="utf-8", newline="") as f:
+                while chunk := f.read(chunk_size):
+                    yield chunk
+        else:
+            for i in range(0, len(self.extracted_text), chunk_size):
+                yield self.extracted_text[i : i + chunk_size]
+
 
 class TrainedModel(models.Model):
     """Modèle entraîné sauvegardé sur disque."""
@@ -248,6 +328,13 @@ class ChatMessage(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            # Liste des sessions (GROUP BY session_id) filtrée par config et utilisateur
+            models.Index(
+                fields=["config", "user", "session_id", "created_at"],
+                name="chatmsg_cfg_user_session_idx",
+            ),
+        ]
 
 
 class ConfigTrainingData(models.Model):
@@ -1,9 +1,13 @@
 from django.urls import re_path
 
+from api.consumers.data_consumer import DataConsumer
+from api.consumers.evaluation_consumer import EvaluationConsumer
 from api.consumers.generation_consumer import GenerationConsumer
 from api.consumers.training_consumer import TrainingConsumer
 
 websocket_urlpatterns = [
     re_path(r"ws/training/$", TrainingConsumer.as_asgi()),
     re_path(r"ws/generation/$", GenerationConsumer.as_asgi()),
+    re_path(r"ws/evaluation/$", EvaluationConsumer.as_asgi()),
+    re_path(r"ws/data/$", DataConsumer.as_asgi()),
 ]
@@ -45,7 +45,26 @@ class TrainingDataSerializer(serializers.ModelSerializer):
     class Meta:
         model = TrainingData
         fields = "__all__"
-        read_only_fields = ["id", "extracted_text", "char_count", "created_at"]
+        read_only_fields = [
+            "id",
+            "extracted_text",
+            "text_file",
+            "char_count",
+            "unique_chars",
+            "charset",
+            "status",
+            "progress",
+            "error_message",
+            "created_at",
+        ]
+
+
+class TrainingDataListSerializer(TrainingDataSerializer):
+    """Liste data/ : sans charset (jusqu'à des milliers de caractères par fichier)."""
+
+    class Meta(TrainingDataSerializer.Meta):
+        fields = None
+        exclude = ["charset"]
 
 
 class TrainedModelSerializer(serializers.ModelSerializer):
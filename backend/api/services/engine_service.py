@@ -1,8 +1,12 @@
+import itertools
 import threading
+from contextlib import ExitStack, contextmanager
 from typing import Optional
 
 import numpy as np
 
+from api.services.payload_encoding import encode_array
+from api.services.prefix_cache import prefix_cache
 from api.services.serialization import (
     load_model_weights,
     reconstruct_tokenizer,
@@ -11,12 +15,18 @@ from api.services.serialization import (
 )
 from config import Config
 from modules.loss import CrossEntropyLoss
+from modules.quantization import is_quantized, quantize_model
 from modules.softmax import softmax
 from modules.tokenizers.base import BaseTokenizer
 from modules.tokenizers.factory import create_tokenizer
 from modules.transformer_model import TransformerModel
 from optim.adam import Adam
 from training.data_loader import DataLoader
+from training.metrics import GenerationTimer, metrics
+from training.perplexity import count_windows, masked_nll, sliding_windows, summarize_nll
+
+# Compteur global : deux engines (ou un engine recréé) n'ont jamais la même version
+_weight_versions = itertools.count(1)
 
 
 class EngineService:
@@ -26,7 +36,8 @@ class EngineService:
     (ex: API request pendant l'entraînement).
     """
 
-    def __init__(self):
+    def __init__(self, config_id: str = ""):
+        self.config_id = config_id
         self.config: Optional[Config] = None
         self.tokenizer: Optional[BaseTokenizer] = None
         self.model: Optional[TransformerModel] = None
@@ -35,8 +46,13 @@ class EngineService:
         self.data_loader: Optional[DataLoader] = None
         self._corpus_text: str = ""
         self._is_training: bool = False
+        self._weight_version: int = 0
         self.model_lock = threading.Lock()
         self._init_lock = threading.Lock()
+        # Verrou propre au pool : executor est lu sur la boucle asyncio, il ne
+        # doit jamais attendre _init_lock (tenu pendant initialize/load_weights)
+        self._executor_lock = threading.Lock()
+        self._executor = None
 
     @property
     def is_ready(self) -> bool:
@@ -46,6 +62,39 @@ class EngineService:
     def is_training(self) -> bool:
         return self._is_training
 
+    @property
+    def is_quantized(self) -> bool:
+        """Poids int8 (inférence uniquement, cf. modules/quantization.py)."""
+        return self.model is not None and is_quantized(self.model)
+
+    @property
+    def executor(self):
+        """Pool d'inférence borné de cet engine (cf. inference_pool), créé au premier usage."""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    from api.services.inference_pool import make_executor
+
+                    self._executor = make_executor(f"inference-{self.config_id}")
+        return self._executor
+
+    def shutdown_executor(self) -> None:
+        """Arrête le pool d'inférence (déchargement du modèle)."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    @property
+    def weight_version(self) -> int:
+        """Version courante des poids (change à chaque init, load ou pas d'optimizer)."""
+        return self._weight_version
+
+    def bump_weight_version(self) -> int:
+        """Signale que les poids ont changé (invalide les résultats en cache)."""
+        self._weight_version = next(_weight_versions)
+        return self._weight_version
+
     def _encode_corpus_with_special_tokens(self, corpus_text: str) -> np.ndarray:
         """Encode le corpus en encadrant chaque ligne avec BOS/EOS."""
         lines = corpus_text.split("\n")
@@ -61,6 +110,18 @@ class EngineService:
                 data_tokens.append(self.tokenizer.eos_id)
         return np.array(data_tokens, dtype=np.int64)
 
+    def _make_data_loader(self, data: np.ndarray, config: Config) -> DataLoader:
+        """DataLoader du corpus ; en mode packed/bucketed, les documents sont les lignes (BOS...EOS)."""
+        return DataLoader(
+            data,
+            config.seq_len,
+            config.batch_size,
+            packed=config.packed_batches,
+            bos_id=self.tokenizer.bos_id,
+            bucketed=config.bucketed_batches,
+            pad_id=self.tokenizer.eos_id,
+        )
+
     def initialize(self, config: Config, corpus_text: str):
         """Initialise le modèle, tokenizer, optimizer et data loader."""
         with self._init_lock:
@@ -79,10 +140,12 @@ class EngineService:
                 beta2=config.beta2,
                 eps=config.epsilon,
                 weight_decay=config.weight_decay,
+                lazy=config.lazy_adam,
             )
 
             data = self._encode_corpus_with_special_tokens(corpus_text)
-            self.data_loader = DataLoader(data, config.seq_len, config.batch_size)
+            self.data_loader = self._make_data_loader(data, config)
+            self.bump_weight_version()
 
     def update_corpus(self, corpus_text: str, config: Config):
         """Met à jour le corpus et le data loader sans toucher au modèle.
@@ -94,7 +157,7 @@ class EngineService:
             self._corpus_text = corpus_text
             # Recréer le data loader avec le corpus actuel
             data = self._encode_corpus_with_special_tokens(corpus_text)
-            self.data_loader = DataLoader(data, config.seq_len, config.batch_size)
+            self.data_loader = self._make_data_loader(data, config)
             # Mettre à jour les epochs dans la config
             if config.max_epochs:
                 self.config.max_epochs = config.max_epochs
@@ -104,8 +167,13 @@ class EngineService:
         save_model_weights(self.model, path)
         return save_tokenizer_vocab(self.tokenizer)
 
-    def load_weights(self, path: str, vocab_json: dict, config: Config):
-        """Charge un modèle sauvegardé."""
+    def load_weights(self, path: str, vocab_json: dict, config: Config, quantize: bool = False):
+        """Charge un modèle sauvegardé.
+
+        Args:
+            quantize: quantifie les poids en int8 après chargement (un
+                checkpoint déjà quantifié l'est dans tous les cas)
+        """
         with self._init_lock:
             self.tokenizer = reconstruct_tokenizer(vocab_json)
             config.vocab_size = self.tokenizer.vocab_size
@@ -113,15 +181,261 @@ class EngineService:
             np.random.seed(config.seed)
             self.model = TransformerModel(config)
             load_model_weights(self.model, path)
+            if quantize:
+                quantize_model(self.model)
             self.loss_fn = CrossEntropyLoss()
-            self.optimizer = Adam(
-                self.model.all_modules(),
-                lr=config.learning_rate,
-                beta1=config.beta1,
-                beta2=config.beta2,
-                eps=config.epsilon,
-                weight_decay=config.weight_decay,
+            self.optimizer = None
+            if not is_quantized(self.model):
+                self.optimizer = Adam(
+                    self.model.all_modules(),
+                    lr=config.learning_rate,
+                    beta1=config.beta1,
+                    beta2=config.beta2,
+                    eps=config.epsilon,
+                    weight_decay=config.weight_decay,
+                    lazy=config.lazy_adam,
+                )
+            self.bump_weight_version()
+
+    def quantize(self) -> int:
+        """Passe le modèle chargé en inférence int8 (attention, FFN, tête de sortie).
+
+        Irréversible pour cette instance : l'optimizer est abandonné et le
+        modèle ne peut plus être entraîné (recharger les poids flottants).
+
+        Returns:
+            nombre de couches quantifiées
+        """
+        if not self.is_ready:
+            raise ValueError("Aucun modèle chargé")
+        if self._is_training:
+            raise ValueError("Entraînement en cours : quantification impossible")
+        with self.model_lock:
+            n = quantize_model(self.model)
+            self.optimizer = None
+            if n:
+                self.bump_weight_version()
+        return n
+
+    def _decode_steps(
+        self,
+        tokens: list[int],
+        max_tokens: int,
+        processors,
+        sampling_strategy: str,
+        temperature: float,
+        top_k: int,
+        top_p: float,
+        first_step: int = 0,
+    ):
+        """Boucle autorégressive commune aux trois chemins de génération.
+
+        Yield (token, logits traités) à chaque pas ; tokens est complété en
+        place. S'arrête après avoir produit EOS (non ajouté à tokens).
+        first_step : tokens déjà générés (reprise après _speculative_steps).
+
+        Le prompt est traité par _prefill() (préfixe repris du cache), puis
+        chaque pas ne calcule que le nouveau token grâce au cache K/V. Au-delà
+        de context_length, la fenêtre glisse et les positions se décalent :
+        retour au forward complet sur la fenêtre.
+        """
+        from generation.sampling import sample_token
+
+        past = None  # K/V par bloc des tokens déjà traités
+        for n_generated in range(first_step, max_tokens):
+            if len(tokens) > self.model.context_length:
+                past = None
+                context = tokens[-self.model.context_length :]
+                logits = self.model.forward(np.array([context]), last_only=True)
+            elif past is None:
+                logits, past = self._prefill(tokens)
+            else:
+                logits, past = self.model.forward_cached(np.array([tokens[-1:]]), past)
+            next_logits = logits[:, -1, :].copy()  # (1, V)
+            if processors:
+                next_logits = processors(np.array([tokens]), n_generated, next_logits)
+            next_token = sample_token(
+                next_logits[0],
+                strategy=sampling_strategy,
+                temperature=temperature,
+                top_k=top_k,
+                top_p=top_p,
             )
+            yield next_token, next_logits[0]
+            if next_token == self.tokenizer.eos_id:
+                return
+            tokens.append(next_token)
+
+    def _prefill(self, tokens: list[int]):
+        """Forward du prompt en reprenant le plus long préfixe en cache.
+
+        Le dernier token est toujours recalculé (il faut ses logits). Les
+        K/V du prompt complet sont ensuite mis en cache pour les requêtes
+        suivantes qui le partagent.
+        """
+        n, past = self._cached_prefix(tokens)
+        logits, present = self.model.forward_cached(np.array([tokens[n:]]), past)
+        self._store_prefix(tokens, present, n)
+        return logits, present
+
+    def _cached_prefix(self, tokens: list[int]) -> tuple[int, list | None]:
+        """(n, K/V) du plus long préfixe en cache, au plus len(tokens) - 1 tokens."""
+        n, past = prefix_cache.lookup(self.config_id, self.weight_version, tokens)
+        if n >= len(tokens):
+            n = len(tokens) - 1
+            past = [(K[:, :, :n], V[:, :, :n]) for K, V in past] if n else None
+        return n, past
+
+    def _store_prefix(self, tokens: list[int], present: list, n_cached: int) -> None:
+        """Met en cache les K/V de tokens (present peut couvrir plus loin)."""
+        L = len(tokens)
+        prefix_cache.insert(
+            self.config_id,
+            self.weight_version,
+            tokens,
+            [(K[:, :, :L], V[:, :, :L]) for K, V in present],
+        )
+        metrics.inc(
+            "minillm_generation_cached_prefix_tokens_total", n_cached, config_id=self.config_id
+        )
+        metrics.inc(
+            "minillm_generation_prefill_tokens_total", L - n_cached, config_id=self.config_id
+        )
+
+    def check_draft(self, draft: "EngineService") -> None:
+        """Vérifie qu'un engine peut servir de brouillon (ValueError sinon)."""
+        if draft is self:
+            raise ValueError("Le modèle brouillon doit être différent du modèle cible")
+        if not draft.is_ready:
+            raise ValueError("Le modèle brouillon n'est pas chargé")
+        ours, theirs = self.tokenizer, draft.tokenizer
+        sample = self._corpus_text[:200] or "abc"
+        if (
+            type(ours) is not type(theirs)
+            or ours.vocab_size != theirs.vocab_size
+            or ours.encode(sample) != theirs.encode(sample)
+        ):
+            raise ValueError("Le modèle brouillon doit partager le tokenizer du modèle cible")
+
+    @contextmanager
+    def _generation_lock(self, draft: "EngineService | None" = None):
+        """model_lock de la cible (et du brouillon), pris dans un ordre fixe."""
+        engines = sorted({self, draft} - {None}, key=id)
+        with ExitStack() as stack:
+            for engine in engines:
+                stack.enter_context(engine.model_lock)
+            yield
+
+    def _speculative_steps(
+        self,
+        tokens: list[int],
+        max_tokens: int,
+        processors,
+        sampling_strategy: str,
+        temperature: float,
+        top_k: int,
+        top_p: float,
+        draft: "EngineService",
+        num_draft_tokens: int = 4,
+        stats: dict | None = None,
+    ):
+        """Comme _decode_steps(), mais k tokens proposés par draft à chaque tour.
+
+        Le brouillon échantillonne k tokens (cache K/V, un token par pas) ;
+        la cible les vérifie en un forward_cached sur les k + 1 positions, et
+        verify_draft() garde la distribution exacte de la cible. Les caches
+        K/V sont ensuite tronqués aux tokens acceptés. Processeurs de logits
+        appliqués aux deux modèles avec l'historique de chaque position.
+        Retour à _decode_steps() quand le contexte approche context_length.
+
+        stats (dict, optionnel) reçoit draft_tokens, accepted_tokens,
+        target_forwards et acceptance_rate.
+        """
+        from generation.sampling import strategy_probs
+        from generation.speculative import sample_from, verify_draft
+
+        if stats is None:
+            stats = {}
+        stats.update(draft_tokens=0, accepted_tokens=0, target_forwards=0, acceptance_rate=0.0)
+        limit = min(self.model.context_length, draft.model.context_length)
+        sampling = (sampling_strategy, temperature, top_k, top_p)
+
+        def distributions(logits, seq, step):
+            """Logits traités et distributions (P, V) des P dernières positions de seq."""
+            logits = logits.copy()
+            base = len(seq) - len(logits) + 1  # historique de la position 0
+            if processors:
+                for i in range(len(logits)):
+                    processors(np.array([seq[: base + i]]), step + i, logits[i : i + 1])
+            return logits, strategy_probs(logits, *sampling)
+
+        n_prompt = len(tokens)
+        n_target, target_past = self._cached_prefix(tokens)
+        n_draft, draft_past = draft._cached_prefix(tokens)
+        n_draft_cached = n_draft
+        n_generated = 0
+        while n_generated < max_tokens:
+            k = min(num_draft_tokens, max_tokens - n_generated - 1)
+            if k < 1 or len(tokens) + k > limit:
+                yield from self._decode_steps(
+                    tokens, max_tokens, processors, *sampling, first_step=n_generated
+                )
+                return
+
+            # 1. Le brouillon propose k tokens
+            proposed, q = [], []
+            for i in range(k):
+                new = (tokens + proposed)[n_draft:]
+                logits, draft_past = draft.model.forward_cached(np.array([new]), draft_past)
+                n_draft += len(new)
+                _, q_i = distributions(logits[0], tokens + proposed, n_generated + i)
+                q.append(q_i[0])
+                proposed.append(sample_from(q_i[0]))
+
+            # 2. La cible évalue les k + 1 positions en un forward
+            new = (tokens + proposed)[n_target:]
+            logits, target_past = self.model.forward_cached(
+                np.array([new]), target_past, last_only=False
+            )
+            if stats["target_forwards"] == 0:
+                self._store_prefix(tokens[:n_prompt], target_past, n_target)
+                draft._store_prefix(tokens[:n_prompt], draft_past, n_draft_cached)
+            stats["target_forwards"] += 1
+            target_logits, p = distributions(logits[0, -(k + 1) :], tokens + proposed, n_generated)
+
+            # 3. Rejet : n tokens acceptés + un token de correction (ou bonus)
+            n_accepted, next_token = verify_draft(p, np.array(q), proposed)
+            stats["draft_tokens"] += k
+            stats["accepted_tokens"] += n_accepted
+            stats["acceptance_rate"] = stats["accepted_tokens"] / stats["draft_tokens"]
+
+            n_valid = len(tokens) + n_accepted  # positions dont les K/V sont justes
+            n_target, n_draft = n_valid, min(n_draft, n_valid)
+            target_past = [(K[:, :, :n_target], V[:, :, :n_target]) for K, V in target_past]
+            draft_past = [(K[:, :, :n_draft], V[:, :, :n_draft]) for K, V in draft_past]
+
+            for i, token in enumerate(proposed[:n_accepted] + [next_token]):
+                yield token, target_logits[i]
+                n_generated += 1
+                if token == self.tokenizer.eos_id:
+                    return
+                tokens.append(token)
+
+    def _generation_steps(
+        self, tokens, max_tokens, processors, sampling, draft, num_draft_tokens, stats
+    ):
+        """_decode_steps(), ou _speculative_steps() si un brouillon est donné."""
+        if draft is None:
+            return self._decode_steps(tokens, max_tokens, processors, *sampling)
+        return self._speculative_steps(
+            tokens, max_tokens, processors, *sampling, draft, num_draft_tokens, stats
+        )
+
+    def _prompt_tokens(self, prompt: str) -> list[int]:
+        tokens = [self.tokenizer.bos_id] + self.tokenizer.encode(prompt)
+        if len(tokens) == 1:
+            tokens.append(np.random.randint(0, self.tokenizer.bos_id))
+        return tokens
 
     def generate_text(
         self,
@@ -132,39 +446,62 @@ class EngineService:
         top_k: int = 10,
         top_p: float = 0.9,
         min_new_tokens: int = 0,
+        stop: list[str] | None = None,
+        repetition_penalty: float = 1.0,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        bad_words: list[str] | None = None,
+        draft: "EngineService | None" = None,
+        num_draft_tokens: int = 4,
+        stats: dict | None = None,
     ) -> str:
         """Génération synchrone complète.
 
-        S'arrête sur EOS seulement après min_new_tokens tokens générés.
-        Tant que le seuil n'est pas atteint, le logit EOS est masqué (-1e9)
-        pour que le modèle continue à prédire des caractères utiles.
-        """
-        from generation.sampling import sample_token
+        S'arrête sur EOS seulement après min_new_tokens tokens générés
+        (EOS est masqué avant), ou dès qu'une chaîne de stop apparaît :
+        le texte retourné s'arrête alors juste avant elle.
 
-        with self.model_lock:
-            tokens = [self.tokenizer.bos_id] + self.tokenizer.encode(prompt)
-            if len(tokens) == 1:
-                tokens.append(np.random.randint(0, self.tokenizer.bos_id))
-            generated = 0
-            for _ in range(max_tokens):
-                context = tokens[-self.config.seq_len :]
-                x = np.array([context])
-                logits = self.model.forward(x)
-                next_logits = logits[0, -1, :].copy()
-                # Masquer EOS tant qu'on n'a pas atteint min_new_tokens
-                if generated < min_new_tokens:
-                    next_logits[self.tokenizer.eos_id] = -1e9
-                next_token = sample_token(
-                    next_logits,
-                    strategy=sampling_strategy,
-                    temperature=temperature,
-                    top_k=top_k,
-                    top_p=top_p,
-                )
+        Avec draft (engine d'un modèle plus petit, même tokenizer) : décodage
+        spéculatif, num_draft_tokens proposés par tour ; stats reçoit le
+        taux d'acceptation (cf. _speculative_steps).
+        """
+        from generation.logits_processors import StopSequences, build_processors
+
+        processors = build_processors(
+            self.tokenizer,
+            min_new_tokens,
+            repetition_penalty,
+            frequency_penalty,
+            presence_penalty,
+            bad_words,
+        )
+        stops = StopSequences(stop or [])
+        if draft is not None:
+            self.check_draft(draft)
+        timer = GenerationTimer(metrics, config_id=self.config_id)
+        with self._generation_lock(draft):
+            timer.lock_acquired()
+            tokens = self._prompt_tokens(prompt)
+            n_prompt = len(tokens)
+            steps = self._generation_steps(
+                tokens,
+                max_tokens,
+                processors,
+                (sampling_strategy, temperature, top_k, top_p),
+                draft,
+                num_draft_tokens,
+                stats,
+            )
+            for next_token, _ in steps:
+                timer.token()
                 if next_token == self.tokenizer.eos_id:
                     break
-                tokens.append(next_token)
-                generated += 1
+                stops.push(0, self.tokenizer.decode([next_token]))
+                if stops.stopped[0]:
+                    break
+            timer.finish()
+            if stops.stopped[0]:
+                return self.tokenizer.decode(tokens[:n_prompt]) + stops.output(0)
             return self.tokenizer.decode(tokens)
 
     def generate_streaming(
@@ -176,40 +513,143 @@ class EngineService:
         top_k: int = 10,
         top_p: float = 0.9,
         min_new_tokens: int = 0,
+        stop: list[str] | None = None,
+        repetition_penalty: float = 1.0,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        bad_words: list[str] | None = None,
+        draft: "EngineService | None" = None,
+        num_draft_tokens: int = 4,
+        stats: dict | None = None,
     ):
-        """Yield chaque token généré (pour WebSocket streaming).
+        """Yield chaque morceau de texte généré (pour WebSocket streaming).
 
-        S'arrête sur EOS seulement après min_new_tokens tokens générés.
+        Mêmes règles d'arrêt (et même décodage spéculatif avec draft) que
+        generate_text(). Le texte qui pourrait commencer une chaîne de stop
+        est retenu jusqu'à être levé, donc la chaîne de stop elle-même
+        n'est jamais émise.
         """
-        from generation.sampling import sample_token
+        from generation.logits_processors import StopSequences, build_processors
+
+        processors = build_processors(
+            self.tokenizer,
+            min_new_tokens,
+            repetition_penalty,
+            frequency_penalty,
+            presence_penalty,
+            bad_words,
+        )
+        stops = StopSequences(stop or [])
+        if draft is not None:
+            self.check_draft(draft)
+        timer = GenerationTimer(metrics, config_id=self.config_id)
+        with self._generation_lock(draft):
+            timer.lock_acquired()
+            tokens = self._prompt_tokens(prompt)
+            steps = self._generation_steps(
+                tokens,
+                max_tokens,
+                processors,
+                (sampling_strategy, temperature, top_k, top_p),
+                draft,
+                num_draft_tokens,
+                stats,
+            )
+            for next_token, _ in steps:
+                timer.token()
+                if next_token == self.tokenizer.eos_id:
+                    break
+                piece = stops.push(0, self.tokenizer.decode([next_token]))
+                if piece or not stops.stops:  # sans stop : un yield par token
+                    yield piece
+                if stops.stopped[0]:
+                    break
+            rest = stops.flush(0)
+            if rest:
+                yield rest
+            timer.finish()
 
+    def generate_sequences(
+        self,
+        prompt: str,
+        max_tokens: int = 200,
+        temperature: float = 0.8,
+        sampling_strategy: str = "temperature",
+        top_k: int = 10,
+        top_p: float = 0.9,
+        num_beams: int = 1,
+        length_penalty: float = 1.0,
+        num_return_sequences: int = 1,
+        min_new_tokens: int = 0,
+        stop: list[str] | None = None,
+        repetition_penalty: float = 1.0,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        bad_words: list[str] | None = None,
+    ) -> list[dict]:
+        """Plusieurs générations en un batch : beam search n-best ou n échantillons.
+
+        num_beams > 1 : beam search (la stratégie d'échantillonnage est
+        ignorée), les num_return_sequences meilleures hypothèses avec leur
+        score normalisé par la longueur. Sinon, num_return_sequences
+        échantillons indépendants (score None). Chaque texte est coupé
+        avant la première chaîne de stop.
+        """
+        from generation.decoding import beam_search, sample_sequences
+        from generation.logits_processors import StopSequences, build_processors
+
+        processors = build_processors(
+            self.tokenizer,
+            min_new_tokens,
+            repetition_penalty,
+            frequency_penalty,
+            presence_penalty,
+            bad_words,
+        )
+        eos_id = self.tokenizer.eos_id
         with self.model_lock:
-            tokens = [self.tokenizer.bos_id] + self.tokenizer.encode(prompt)
-            if len(tokens) == 1:
-                tokens.append(np.random.randint(0, self.tokenizer.bos_id))
-            generated = 0
-            for _ in range(max_tokens):
-                context = tokens[-self.config.seq_len :]
-                x = np.array([context])
-                logits = self.model.forward(x)
-                next_logits = logits[0, -1, :].copy()
-                if generated < min_new_tokens:
-                    next_logits[self.tokenizer.eos_id] = -1e9
-                next_token = sample_token(
-                    next_logits,
-                    strategy=sampling_strategy,
-                    temperature=temperature,
-                    top_k=top_k,
-                    top_p=top_p,
+            tokens = self._prompt_tokens(prompt)
+            if num_beams > 1:
+                results = beam_search(
+                    self.model,
+                    tokens,
+                    eos_id,
+                    max_tokens,
+                    num_beams,
+                    length_penalty,
+                    num_return_sequences,
+                    processors,
                 )
-                if next_token == self.tokenizer.eos_id:
-                    break
-                tokens.append(next_token)
-                generated += 1
-                yield self.tokenizer.decode([next_token])
+            else:
+                results = [
+                    (generated, None)
+                    for generated in sample_sequences(
+                        self.model,
+                        tokens,
+                        eos_id,
+                        num_return_sequences,
+                        max_tokens,
+                        sampling_strategy,
+                        temperature,
+                        top_k,
+                        top_p,
+                        processors,
+                    )
+                ]
 
-    def get_attention_weights(self, text: str) -> list[dict]:
-        """Exécute un forward pass et retourne les poids d'attention par couche."""
+        stops = StopSequences(stop or [], len(results))
+        prefix = self.tokenizer.decode(tokens)
+        sequences = []
+        for row, (generated, score) in enumerate(results):
+            stops.push(row, self.tokenizer.decode(generated))
+            sequences.append({"text": prefix + stops.output(row), "score": score})
+        return sequences
+
+    def get_attention_weights(self, text: str, encoding: str = "json") -> list[dict]:
+        """Exécute un forward pass et retourne les poids d'attention par couche.
+
+        encoding : "json" (listes imbriquées) ou "f16"/"f32" (base64, voir payload_encoding).
+        """
         with self.model_lock:
             tokens = self.tokenizer.encode(text)
             seq_len = min(len(tokens), self.config.seq_len)
@@ -227,7 +667,9 @@ class EngineService:
                             {
                                 "layer": layer_idx,
                                 "head": head_idx,
-                                "weights": weights[0, head_idx, :seq_len, :seq_len].tolist(),
+                                "weights": encode_array(
+                                    weights[0, head_idx, :seq_len, :seq_len], encoding
+                                ),
                                 "tokens": chars,
                             }
                         )
@@ -250,6 +692,74 @@ class EngineService:
         loss = self.compute_loss_on_text(text)
         return float(np.exp(loss))
 
+    def compute_sliding_perplexity(
+        self, text: str, stride: int = None, batch_size: int = 8, progress=None
+    ) -> dict:
+        """Perplexité d'un texte de longueur quelconque par fenêtres glissantes.
+
+        Le texte est encodé comme le corpus d'entraînement (BOS/EOS par ligne),
+        puis scoré par batches (B, seq_len) décalés de `stride` tokens.
+        Le model_lock est repris à chaque batch pour ne pas bloquer
+        l'entraînement pendant une longue évaluation : des pas d'optimizer
+        peuvent donc s'intercaler. result["weight_version"] est la version
+        des poids vue par tous les batches, ou None si elle a changé en cours.
+
+        Args:
+            progress: callable optionnel (windows_done, windows_total)
+        """
+        tokens = self._encode_corpus_with_special_tokens(text)
+        seq_len = self.config.seq_len
+        total = count_windows(len(tokens), seq_len, stride)
+        nll_sum, n_scored, done = 0.0, 0, 0
+        versions = {self._weight_version}
+        for x, y, mask in sliding_windows(tokens, seq_len, stride, batch_size):
+            with self.model_lock:
+                versions.add(self._weight_version)
+                logits = self.model.forward(x)
+            s, c = masked_nll(logits, y, mask)
+            nll_sum += s
+            n_scored += c
+            done += x.shape[0]
+            if progress is not None:
+                progress(done, total)
+        result = summarize_nll(nll_sum, n_scored, total)
+        result["weight_version"] = versions.pop() if len(versions) == 1 else None
+        return result
+
+    def profile_modules(self, steps: int = 3) -> list[dict]:
+        """Temps, FLOPs et mémoire par module sur quelques forward/backward.
+
+        Les gradients sont remis à zéro et aucun pas d'optimizer n'est fait :
+        les poids ne sont pas modifiés. Les batches viennent d'un DataLoader
+        privé sur le même corpus et dans le même mode : le curseur, l'ordre
+        d'epoch et les stats de padding de l'entraînement ne bougent pas.
+        """
+        from autograd.backprop import Backprop
+        from modules.profiler import ModuleProfiler
+
+        if self.is_quantized:
+            raise ValueError("Modèle quantifié : le profil forward/backward est indisponible")
+        backprop = Backprop(self.model, self.loss_fn)
+        loader = None
+        if self.data_loader is not None:
+            loader = self._make_data_loader(self.data_loader.data, self.config)
+        with self.model_lock:
+            with ModuleProfiler(self.model) as prof:
+                for _ in range(steps):
+                    segment_ids = None
+                    if loader is not None:
+                        x, y = loader.next_batch()
+                        segment_ids = loader.segment_ids
+                    else:
+                        # Modèle chargé sans corpus : batch aléatoire de même shape
+                        shape = (self.config.batch_size, self.config.seq_len)
+                        x = np.random.randint(0, self.tokenizer.vocab_size, size=shape)
+                        y = np.random.randint(0, self.tokenizer.vocab_size, size=shape)
+                    backprop.forward(x, y, segment_ids)
+                    backprop.backward()
+            backprop.zero_grad()
+        return prof.report()
+
     def get_embedding_vectors_2d(self) -> list[dict]:
         """Retourne les embeddings projetés en 2D par PCA."""
         W = self.model.embedding.W.copy()  # copy to avoid race
@@ -272,10 +782,11 @@ class EngineService:
             )
         return results
 
-    def get_weight_matrices(self) -> list[dict]:
+    def get_weight_matrices(self, encoding: str = "json") -> list[dict]:
         """Retourne les matrices de poids pour visualisation dot-matrix.
 
         Safe to call during training — reads weight copies.
+        encoding : "json" (listes imbriquées) ou "f16"/"f32" (base64).
         """
         MAX_DIM = 64
         matrices = []
@@ -312,7 +823,7 @@ class EngineService:
                         "shape": list(param.shape),
                         "rows": sampled.shape[0],
                         "cols": sampled.shape[1],
-                        "values": sampled.tolist(),
+                        "values": encode_array(sampled, encoding),
                         "min": float(np.min(sampled)),
                         "max": float(np.max(sampled)),
                         "mean": float(np.mean(sampled)),
@@ -339,26 +850,46 @@ class EngineService:
         sampling_strategy: str = "temperature",
         top_k: int = 10,
         top_p: float = 0.9,
+        encoding: str = "json",
+        min_new_tokens: int = 0,
+        stop: list[str] | None = None,
+        repetition_penalty: float = 1.0,
+        frequency_penalty: float = 0.0,
+        presence_penalty: float = 0.0,
+        bad_words: list[str] | None = None,
     ) -> dict:
-        """Génère du texte et retourne les poids d'attention à chaque step."""
-        from generation.sampling import sample_token
+        """Génère du texte et retourne les poids d'attention à chaque step.
 
+        Les probabilités affichées sont celles des logits après la chaîne
+        de processeurs (pénalités, min_new_tokens, mots interdits).
+        """
+        from generation.logits_processors import StopSequences, build_processors
+
+        processors = build_processors(
+            self.tokenizer,
+            min_new_tokens,
+            repetition_penalty,
+            frequency_penalty,
+            presence_penalty,
+            bad_words,
+        )
+        stops = StopSequences(stop or [])
         with self.model_lock:
             tokens = [self.tokenizer.bos_id] + self.tokenizer.encode(prompt)
             generated_tokens = []
             attention_snapshots = []
 
-            for step in range(max_tokens):
-                context = tokens[-self.config.seq_len :]
-                x = np.array([context])
-                logits = self.model.forward(x)
-
+            steps = self._decode_steps(
+                tokens, max_tokens, processors, sampling_strategy, temperature, top_k, top_p
+            )
+            for next_token, next_logits in steps:
+                context = tokens[-self.model.context_length :]
                 step_attention = []
                 for layer_idx, block in enumerate(self.model.blocks):
                     weights = block.attention.get_attention_weights()
                     if weights is not None:
                         avg_weights = weights[0].mean(axis=0)
-                        last_row = avg_weights[-1, : len(context)].tolist()
+                        last_row = encode_array(avg_weights[-1, : len(context)], encoding)
                         step_attention.append(
                             {
                                 "layer": layer_idx,
@@ -366,15 +897,7 @@ class EngineService:
                             }
                         )
 
-                next_logits = logits[0, -1, :]
                 probs = softmax(next_logits / max(temperature, 1e-8))
-                next_token = sample_token(
-                    logits[0, -1, :],
-                    strategy=sampling_strategy,
-                    temperature=temperature,
-                    top_k=top_k,
-                    top_p=top_p,
-                )
 
                 if next_token == self.tokenizer.eos_id:
                     generated_tokens.append(
@@ -392,7 +915,6 @@ class EngineService:
                     attention_snapshots.append(step_attention)
                     break
 
-                tokens.append(next_token)
                 token_char = self.tokenizer.decode([next_token])
                 generated_tokens.append(
                     {
@@ -406,6 +928,9 @@ class EngineService:
                     }
                 )
                 attention_snapshots.append(step_attention)
+                stops.push(0, token_char)
+                if stops.stopped[0]:
+                    break
 
             context_chars = [
                 self._token_label(t) for t in tokens[: len(self.tokenizer.encode(prompt)) + 1]
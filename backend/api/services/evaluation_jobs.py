@@ -0,0 +1,135 @@
+"""Jobs d'évaluation longue (perplexité par fenêtres glissantes) en background.
+
+Un job score un texte long ou un TrainingData complet, diffuse sa
+progression sur le groupe WebSocket 'evaluation' et met le résultat en
+cache sous (config_id, weight_version, "perplexity", (source, stride)).
+"""
+
+import logging
+import threading
+import traceback
+import uuid
+
+from api.services.result_cache import ResultCache, eval_cache
+
+logger = logging.getLogger(__name__)
+
+
+class PerplexityJobService:
+    """Registre thread-safe des jobs de perplexité (un thread par job)."""
+
+    MAX_JOBS = 100  # au-delà, les jobs terminés les plus anciens sont oubliés
+
+    def __init__(self):
+        self._jobs: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(config_id, engine, source_key: str, stride) -> tuple:
+        return ResultCache.make_key(
+            config_id, engine.weight_version, "perplexity", (source_key, stride)
+        )
+
+    def start(
+        self, engine, config_id, source_key: str, text: str, stride=None, batch_size: int = 8
+    ) -> dict:
+        """Lance (ou réutilise) un job pour cette source et cette version des poids."""
+        key = self.cache_key(config_id, engine, source_key, stride)
+        with self._lock:
+            for job in self._jobs.values():
+                if job["_key"] == key and job["status"] == "running":
+                    return self._public(job)
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "config_id": str(config_id),
+                "source": source_key,
+                "stride": stride,
+                "status": "running",
+                "windows_done": 0,
+                "windows_total": 0,
+                "result": None,
+                "error": None,
+                "_key": key,
+            }
+            self._jobs[job["job_id"]] = job
+            finished = [jid for jid, j in self._jobs.items() if j["status"] != "running"]
+            for jid in finished[: max(0, len(self._jobs) - self.MAX_JOBS)]:
+                del self._jobs[jid]
+
+        threading.Thread(
+            target=self._run,
+            args=(job, engine, text, stride, batch_size),
+            daemon=True,
+        ).start()
+        return self._public(job)
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._public(job) if job else None
+
+    def _run(self, job, engine, text, stride, batch_size):
+        version = job["_key"][1]
+        last_sent = [0]
+
+        def progress(done, total):
+            job["windows_done"], job["windows_total"] = done, total
+            # ~20 messages max par job, quelle que soit la taille du texte
+            if done < total and done - last_sent[0] < max(1, total // 20):
+                return
+            last_sent[0] = done
+            self._broadcast(
+                {
+                    "type": "evaluation.progress",
+                    "job_id": job["job_id"],
+                    "windows_done": done,
+                    "windows_total": total,
+                }
+            )
+
+        try:
+            result = engine.compute_sliding_perplexity(text, stride, batch_size, progress)
+            # Mis en cache seulement si tous les batches ont vu la version du
+            # lancement : sinon le résultat mélange plusieurs états des poids
+            if result.pop("weight_version") == version == engine.weight_version:
+                eval_cache.put(job["_key"], result)
+            else:
+                result["weights_changed"] = True
+            job["result"] = result
+            job["status"] = "completed"
+            self._broadcast(
+                {"type": "evaluation.complete", "job_id": job["job_id"], "result": result}
+            )
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+            self._broadcast(
+                {"type": "evaluation.failed", "job_id": job["job_id"], "message": str(e)}
+            )
+            logger.error("Perplexity job %s failed:\n%s", job["job_id"], traceback.format_exc())
+
+    @staticmethod
+    def _public(job: dict) -> dict:
+        return {k: v for k, v in job.items() if not k.startswith("_")}
+
+    def _broadcast(self, message):
+        """Envoie un message au groupe WebSocket 'evaluation' (non-bloquant)."""
+
+        def _send():
+            try:
+                from asgiref.sync import async_to_sync
+                from channels.layers import get_channel_layer
+
+                channel_layer = get_channel_layer()
+                if channel_layer:
+                    async_to_sync(channel_layer.group_send)(
+                        "evaluation",
+                        {"type": "evaluation.message", "message": message},
+                    )
+            except Exception:
+                pass
+
+        threading.Thread(target=_send, daemon=True).start()
+
+
+perplexity_jobs = PerplexityJobService()
@@ -1,5 +1,11 @@
 import csv
 import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+READ_CHUNK = 1 << 20  # caractères lus à la fois dans un .txt
+PDF_PAGES_PER_TASK = 8  # pages extraites par tâche du pool de processus
 
 
 def extract_text(file_obj, file_type: str) -> str:
@@ -32,6 +38,93 @@ def extract_text(file_obj, file_type: str) -> str:
         raise ValueError(f"Format non supporté : {file_type}")
 
 
+def iter_text(path: str, file_type: str, progress=None, pdf_workers: int = 1):
+    """Extrait le texte d'un fichier sur disque, morceau par morceau.
+
+    Même texte que extract_text() (pages, paragraphes et lignes CSV joints
+    par "\n"), sans jamais le garder en entier en mémoire.
+
+    Args:
+        progress: callable optionnel (done, total) ; unités : octets lus
+            (txt, csv), pages (pdf) ou paragraphes (docx)
+        pdf_workers: processus d'extraction des pages d'un PDF
+    Yields:
+        morceaux de texte à concaténer tels quels
+    """
+    progress = progress or (lambda done, total: None)
+    if file_type == "txt":
+        total = os.path.getsize(path)
+        with open(path, "rb") as raw, io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+            while chunk := f.read(READ_CHUNK):
+                yield chunk
+                progress(raw.tell(), total)
+
+    elif file_type == "csv":
+        total = os.path.getsize(path)
+        with open(path, "rb") as raw, io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+            for i, row in enumerate(csv.reader(f)):
+                yield ("\n" if i else "") + " ".join(row)
+                if i % 1000 == 0:
+                    progress(raw.tell(), total)
+        progress(total, total)
+
+    elif file_type == "pdf":
+        for i, page in enumerate(_iter_pdf_pages(path, progress, pdf_workers)):
+            yield ("\n" if i else "") + page
+
+    elif file_type == "docx":
+        import docx
+
+        paragraphs = docx.Document(path).paragraphs
+        for i, para in enumerate(paragraphs):
+            yield ("\n" if i else "") + para.text
+            progress(i + 1, len(paragraphs))
+
+    else:
+        raise ValueError(f"Format non supporté : {file_type}")
+
+
+def _pdf_pages(path: str, start: int, stop: int) -> list[str]:
+    """Texte des pages [start, stop) (exécuté dans un processus du pool)."""
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def _iter_pdf_pages(path: str, progress, workers: int, pages_per_task: int = PDF_PAGES_PER_TASK):
+    """Pages d'un PDF dans l'ordre, extraites en parallèle par blocs.
+
+    PyPDF2 est du Python pur : seuls des processus (pas des threads)
+    parallélisent l'extraction. Chaque processus rouvre le fichier ; les
+    blocs sont rendus dans l'ordre dès qu'ils sont prêts.
+    """
+    import PyPDF2
+
+    n_pages = len(PyPDF2.PdfReader(path).pages)
+    ranges = [(a, min(a + pages_per_task, n_pages)) for a in range(0, n_pages, pages_per_task)]
+    if workers <= 1 or len(ranges) <= 1:
+        blocks = (_pdf_pages(path, a, b) for a, b in ranges)
+        pool = None
+    else:
+        # spawn : un fork depuis un serveur multi-thread peut hériter de verrous pris
+        pool = ProcessPoolExecutor(
+            max_workers=min(workers, len(ranges)),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        futures = [pool.submit(_pdf_pages, path, a, b) for a, b in ranges]
+        blocks = (f.result() for f in futures)
+    try:
+        done = 0
+        for pages in blocks:
+            yield from pages
+            done += len(pages)
+            progress(done, n_pages)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
 def get_file_type(filename: str) -> str:
     """Détermine le type de fichier à partir de l'extension."""
     ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
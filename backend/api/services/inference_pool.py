@@ -0,0 +1,107 @@
+"""Exécution des calculs d'inférence hors de la boucle ASGI.
+
+Sous Daphne, une vue synchrone occupe le thread unique des vues sync :
+quelques générations lentes suffisent à bloquer toutes les autres requêtes
+(health checks, docs, listes). Les vues d'inférence sont donc async et
+délèguent le travail NumPy à un InferenceExecutor propre à chaque engine :
+- nombre de workers borné (les appels au modèle se sérialisent de toute
+  façon sur model_lock) ;
+- profondeur de file bornée : au-delà, QueueFullError (HTTP 429 + Retry-After,
+  estimé à partir de la durée moyenne des derniers calculs) ;
+- délai max par requête : InferenceTimeoutError (HTTP 504). Un calcul déjà
+  démarré ne peut pas être interrompu ; seul un calcul encore en file
+  est annulé.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class QueueFullError(Exception):
+    """File d'inférence pleine ; retry_after en secondes."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"File d'inférence pleine, réessayer dans {retry_after} s")
+        self.retry_after = retry_after
+
+
+class InferenceTimeoutError(Exception):
+    """Le calcul n'a pas abouti dans le délai de la requête."""
+
+
+class InferenceExecutor:
+    """Pool de threads borné, avec file d'attente limitée.
+
+    Args:
+        max_workers: calculs simultanés
+        max_queue: calculs admis au total (en cours + en attente)
+        name: préfixe des noms de threads (débogage)
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 8, name: str = "inference"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.depth = 0  # calculs en cours + en attente
+        self.avg_seconds = 1.0  # moyenne mobile de la durée d'un calcul
+
+    def submit(self, fn, *args, **kwargs):
+        """Soumet fn ; lève QueueFullError si max_queue calculs sont déjà admis."""
+        with self._lock:
+            if self.depth >= self.max_queue:
+                raise QueueFullError(self.retry_after())
+            self.depth += 1
+
+        def run():
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * (time.perf_counter() - t0)
+
+        future = self._pool.submit(run)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future) -> None:
+        with self._lock:
+            self.depth -= 1
+
+    def retry_after(self) -> int:
+        """Secondes avant qu'une place se libère probablement (au moins 1)."""
+        return max(1, math.ceil(self.avg_seconds * self.depth / self.max_workers))
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def make_executor(name: str = "inference") -> InferenceExecutor:
+    """Executor configuré par INFERENCE_WORKERS / INFERENCE_MAX_QUEUE."""
+    return InferenceExecutor(
+        max_workers=getattr(settings, "INFERENCE_WORKERS", 2),
+        max_queue=getattr(settings, "INFERENCE_MAX_QUEUE", 8),
+        name=name,
+    )
+
+
+async def run_inference(engine, fn, *args, timeout: float | None = None, **kwargs):
+    """Exécute fn(*args, **kwargs) dans l'executor de l'engine et attend le résultat.
+
+    timeout par défaut : settings.INFERENCE_TIMEOUT (secondes, None = illimité).
+    Lève QueueFullError ou InferenceTimeoutError.
+    """
+    if timeout is None:
+        timeout = getattr(settings, "INFERENCE_TIMEOUT", None)
+    future = engine.executor.submit(fn, *args, **kwargs)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+    except asyncio.TimeoutError:
+        future.cancel()
+        raise InferenceTimeoutError(f"Délai d'inférence dépassé ({timeout} s)") from None
@@ -0,0 +1,198 @@
+"""Extraction en arrière-plan du texte des fichiers uploadés.
+
+L'upload ne fait qu'enregistrer le fichier (TrainingData en statut
+"pending") ; un pool de threads borné extrait ensuite le texte avec
+file_processor.iter_text() et l'écrit au fil de l'eau dans
+MEDIA_ROOT/extracted/<id>.txt. char_count et l'ensemble des caractères
+(charset) sont cumulés morceau par morceau : le texte n'est jamais
+entièrement en mémoire ni stocké en base.
+
+Suivi : statut et progress (0..1) en base, lisibles sur
+GET /api/data/<id>/, et messages data.progress / data.ready / data.failed
+diffusés sur le groupe WebSocket 'data' (ws/data/).
+
+La file n'existe qu'en mémoire : au démarrage du serveur (asgi.py /
+wsgi.py), resume() reprogramme les fichiers restés "pending" ou
+"processing". Un fichier "failed" se relance via POST /api/data/<id>/retry/.
+"""
+
+import logging
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+from api.services.file_processor import iter_text
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionService:
+    """Pool d'extraction : un job par TrainingData uploadé."""
+
+    def __init__(self):
+        self._pool = None
+        self._futures: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, data_id):
+        """Programme l'extraction du fichier de data_id ; retourne le Future."""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "INGESTION_WORKERS", 2),
+                    thread_name_prefix="ingestion",
+                )
+            future = self._pool.submit(self._run_and_close, str(data_id))
+            self._futures[str(data_id)] = future
+        future.add_done_callback(lambda _: self._forget(str(data_id), future))
+        return future
+
+    def resume(self) -> int:
+        """Reprogramme les extractions interrompues (redémarrage du serveur).
+
+        Returns:
+            nombre de fichiers reprogrammés
+        """
+        from api.models import TrainingData
+
+        unfinished = (TrainingData.Status.PENDING, TrainingData.Status.PROCESSING)
+        rows = TrainingData.objects.filter(status__in=unfinished).exclude(file="")
+        ids = [str(pk) for pk in rows.values_list("pk", flat=True)]
+        with self._lock:
+            ids = [data_id for data_id in ids if data_id not in self._futures]
+        TrainingData.objects.filter(pk__in=ids).update(
+            status=TrainingData.Status.PENDING, progress=0.0
+        )
+        for data_id in ids:
+            self.submit(data_id)
+        if ids:
+            logger.info("Ingestion : %d extraction(s) reprise(s)", len(ids))
+        return len(ids)
+
+    def retry(self, data) -> bool:
+        """Relance l'extraction d'un TrainingData en échec ; False s'il n'a pas échoué."""
+        from api.models import TrainingData
+
+        updated = TrainingData.objects.filter(pk=data.pk, status=TrainingData.Status.FAILED).update(
+            status=TrainingData.Status.PENDING, progress=0.0, error_message=""
+        )
+        if not updated:
+            return False
+        self.submit(data.pk)
+        return True
+
+    def wait(self, data_id, timeout: float | None = None) -> None:
+        """Attend la fin de l'extraction de data_id (si elle est en cours)."""
+        with self._lock:
+            future = self._futures.get(str(data_id))
+        if future is not None:
+            future.result(timeout)
+
+    def _forget(self, data_id: str, future) -> None:
+        with self._lock:
+            if self._futures.get(data_id) is future:
+                del self._futures[data_id]
+
+    def _run_and_close(self, data_id: str) -> None:
+        from django.db import connection
+
+        try:
+            self._run(data_id)
+        finally:
+            connection.close()  # connexion propre à ce thread du pool
+
+    def _run(self, data_id: str) -> None:
+        from api.models import TrainingData
+
+        rows = TrainingData.objects.filter(pk=data_id)
+        data = rows.first()
+        if data is None:  # supprimé avant le début de l'extraction
+            return
+        rows.update(status=TrainingData.Status.PROCESSING, progress=0.0)
+        self._broadcast({"type": "data.progress", "data_id": data_id, "progress": 0.0})
+
+        name = f"extracted/{data_id}.txt"
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        last_sent = [0.0]
+
+        def progress(done, total):
+            fraction = done / total if total else 1.0
+            # ~20 mises à jour max par fichier
+            if fraction < 1.0 and fraction - last_sent[0] < 0.05:
+                return
+            last_sent[0] = fraction
+            rows.update(progress=fraction)
+            self._broadcast({"type": "data.progress", "data_id": data_id, "progress": fraction})
+
+        try:
+            char_count, chars = 0, set()
+            with open(path, "w", encoding="utf-8", newline="") as out:
+                for piece in iter_text(
+                    data.file.path,
+                    data.file_type,
+                    progress,
+                    pdf_workers=getattr(settings, "INGESTION_PDF_WORKERS", 1),
+                ):
+                    out.write(piece)
+                    char_count += len(piece)
+                    chars.update(piece)
+            charset = "".join(sorted(chars))
+            updated = rows.update(
+                status=TrainingData.Status.READY,
+                text_file=name,
+                char_count=char_count,
+                unique_chars=len(charset),
+                charset=charset,
+                progress=1.0,
+            )
+            if not updated:  # supprimé pendant l'extraction
+                os.unlink(path)
+                return
+            self._broadcast({"type": "data.ready", "data_id": data_id, "char_count": char_count})
+        except Exception as e:
+            if os.path.exists(path):
+                os.unlink(path)
+            rows.update(
+                status=TrainingData.Status.FAILED, error_message=f"Erreur d'extraction : {e}"
+            )
+            self._broadcast({"type": "data.failed", "data_id": data_id, "message": str(e)})
+            logger.error("Ingestion %s failed:\n%s", data_id, traceback.format_exc())
+
+    def _broadcast(self, message):
+        """Envoie un message au groupe WebSocket 'data' (non-bloquant)."""
+
+        def _send():
+            try:
+                from asgiref.sync import async_to_sync
+                from channels.layers import get_channel_layer
+
+                channel_layer = get_channel_layer()
+                if channel_layer:
+                    async_to_sync(channel_layer.group_send)(
+                        "data",
+                        {"type": "data.message", "message": message},
+                    )
+            except Exception:
+                pass
+
+        threading.Thread(target=_send, daemon=True).start()
+
+
+ingestion = IngestionService()
+
+
+def resume_on_startup() -> None:
+    """Appelé par asgi.py / wsgi.py : reprend les extractions interrompues.
+
+    Ignoré (avec un avertissement) si la base n'est pas encore migrée.
+    """
+    from django.db import DatabaseError
+
+    try:
+        ingestion.resume()
+    except DatabaseError as e:
+        logger.warning("Reprise des extractions impossible : %s", e)
@@ -9,6 +9,8 @@ import os
 import threading
 
 from api.services.engine_service import EngineService
+from api.services.prefix_cache import prefix_cache
+from api.services.result_cache import eval_cache
 from api.services.training_service import TrainingService
 
 logger = logging.getLogger(__name__)
@@ -57,7 +59,7 @@ class ModelRegistry:
                         f"Nombre maximum de modèles atteint ({self.MAX_MODELS}). "
                         "Déchargez un modèle avant d'en charger un nouveau."
                     )
-                engine = EngineService()
+                engine = EngineService(config_id)
                 self._engines[config_id] = engine
                 self._training_services[config_id] = TrainingService(config_id)
                 # Try to auto-load the most recent saved weights
@@ -144,9 +146,11 @@ class ModelRegistry:
                     svc.stop()
                 del self._training_services[config_id]
             if config_id in self._engines:
-                del self._engines[config_id]
+                self._engines.pop(config_id).shutdown_executor()
             if self._active_config_id == config_id:
                 self._active_config_id = None
+        eval_cache.invalidate(config_id)
+        prefix_cache.invalidate(config_id)
 
     def list_active(self) -> list[dict]:
         """Liste les modèles actifs avec leur état."""
@@ -170,6 +174,7 @@ class ModelRegistry:
                             engine.model.count_parameters() if engine.model else 0
                         ),
                         "last_loss": (svc.loss_history[-1] if svc and svc.loss_history else None),
+                        "quantized": engine.is_quantized,
                     }
                 )
             return result
@@ -180,6 +185,10 @@ class ModelRegistry:
             for svc in self._training_services.values():
                 if svc.is_running:
                     svc.stop()
+            for engine in self._engines.values():
+                engine.shutdown_executor()
             self._engines.clear()
             self._training_services.clear()
             self._active_config_id = None
+        eval_cache.invalidate()
+        prefix_cache.invalidate()
@@ -0,0 +1,119 @@
+"""Encodage compact des matrices (poids, attention) dans les réponses API.
+
+Par défaut les matrices sont renvoyées en listes imbriquées JSON
+(`encoding="json"`). En opt-in, elles peuvent être transmises comme
+typed arrays little-endian encodés en base64 :
+
+    {"dtype": "float16", "shape": [64, 64], "data": "<base64>"}
+
+Côté client : `new Float32Array(bytes.buffer)` (ou Float16Array).
+Le choix se fait par query param `?encoding=f16|f32|json` ou par
+l'en-tête `Accept: application/vnd.minillm.f16+json`.
+
+Sur WebSocket, `?encoding=msgpack` fait envoyer des frames binaires
+msgpack au lieu de texte JSON (si le paquet msgpack est installé).
+"""
+
+import base64
+import json
+
+import numpy as np
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+ENCODINGS = ("json", "f16", "f32")
+
+_DTYPES = {"f16": np.dtype("<f2"), "f32": np.dtype("<f4")}
+_ACCEPT_PREFIX = "application/vnd.minillm."
+
+try:
+    import msgpack
+except ImportError:  # optionnel (installé avec channels-redis)
+    msgpack = None
+
+
+class F16JSONRenderer(JSONRenderer):
+    media_type = "application/vnd.minillm.f16+json"
+
+
+class F32JSONRenderer(JSONRenderer):
+    media_type = "application/vnd.minillm.f32+json"
+
+
+# Renderers des vues qui acceptent l'encodage compact via l'en-tête Accept
+ENCODED_RENDERERS = [*api_settings.DEFAULT_RENDERER_CLASSES, F16JSONRenderer, F32JSONRenderer]
+
+
+def resolve_encoding(request) -> str:
+    """Détermine l'encodage demandé (query param prioritaire sur Accept)."""
+    encoding = request.query_params.get("encoding")
+    if encoding is None and request.method == "POST":
+        encoding = request.data.get("encoding")
+    if encoding is None:
+        accept = request.headers.get("Accept", "")
+        for part in accept.split(","):
+            media = part.split(";")[0].strip()
+            if media.startswith(_ACCEPT_PREFIX):
+                encoding = media[len(_ACCEPT_PREFIX) :].split("+")[0]
+                break
+    if encoding not in ENCODINGS:
+        return "json"
+    return encoding
+
+
+def encode_array(arr: np.ndarray, encoding: str = "json"):
+    """Encode un ndarray en listes JSON ou en typed array base64."""
+    if encoding == "json":
+        return np.asarray(arr).tolist()
+    typed = np.ascontiguousarray(arr, dtype=_DTYPES[encoding])
+    return {
+        "dtype": "float16" if encoding == "f16" else "float32",
+        "shape": list(typed.shape),
+        "data": base64.b64encode(typed.tobytes()).decode("ascii"),
+    }
+
+
+def decode_array(payload) -> np.ndarray:
+    """Inverse de encode_array (utile pour les tests et les clients Python)."""
+    if isinstance(payload, dict) and "data" in payload:
+        raw = base64.b64decode(payload["data"])
+        dtype = np.dtype("<f2") if payload["dtype"] == "float16" else np.dtype("<f4")
+        return np.frombuffer(raw, dtype=dtype).reshape(payload["shape"])
+    return np.asarray(payload, dtype=np.float64)
+
+
+def wants_msgpack(scope) -> bool:
+    """Le client WebSocket a-t-il demandé des frames msgpack ?"""
+    if msgpack is None:
+        return False
+    query = scope.get("query_string", b"").decode("latin-1")
+    return "encoding=msgpack" in query.split("&")
+
+
+def pack_ws_message(message: dict, use_msgpack: bool) -> dict:
+    """Arguments pour AsyncWebsocketConsumer.send() (text_data ou bytes_data)."""
+    if use_msgpack:
+        return {"bytes_data": msgpack.packb(message, use_bin_type=True)}
+    return {"text_data": json.dumps(message)}
+
+
+def unpack_ws_message(text_data=None, bytes_data=None) -> dict:
+    """Décode un message client WebSocket (JSON texte ou msgpack binaire).
+
+    Sans msgpack, une frame binaire est lue comme du JSON UTF-8.
+
+    Raises:
+        ValueError: message illisible (le consumer le renvoie en erreur)
+    """
+    if bytes_data is not None:
+        if msgpack is not None:
+            return msgpack.unpackb(bytes_data, raw=False)
+        try:
+            return json.loads(bytes_data.decode("utf-8"))
+        except ValueError:
+            raise ValueError(
+                "Frame binaire illisible : msgpack n'est pas installé sur le serveur"
+            ) from None
+    if text_data is None:
+        raise ValueError("Message WebSocket vide")
+    return json.loads(text_data)
@@ -0,0 +1,193 @@
+"""Cache de préfixes de prompt : clés/valeurs d'attention par couche.
+
+Beaucoup de requêtes de génération partagent un début (texte système,
+exemples few-shot, tours précédents d'une conversation). Après le
+traitement d'un prompt, les (K, V) de chaque bloc sont gardés sous la clé
+(config_id, weight_version, hash des tokens) ; un prompt suivant ne calcule
+que les tokens après le plus long préfixe déjà vu.
+
+L'attention étant causale, les K/V des m premiers tokens d'une séquence ne
+dépendent que de ces m tokens : n'importe quelle entrée qui commence par
+le même préfixe sert, tronquée à m. Un arbre radix (un par version des
+poids) sur les séquences de tokens trouve ce plus long préfixe commun en
+O(longueur du prompt). Éviction LRU sous un plafond mémoire en octets ; une
+nouvelle version des poids d'un modèle libère ses anciennes entrées.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class _Node:
+    """Nœud de l'arbre radix : arête (suite de tokens) depuis le parent."""
+
+    __slots__ = ("edge", "children", "parent", "key")
+
+    def __init__(self, edge: tuple = (), parent: "_Node | None" = None):
+        self.edge = edge
+        self.children: dict[int, _Node] = {}  # premier token de l'arête -> enfant
+        self.parent = parent
+        self.key = None  # clé de l'entrée qui se termine ici, s'il y en a une
+
+
+def _common_length(a, b) -> int:
+    n = min(len(a), len(b))
+    for i in range(n):
+        if a[i] != b[i]:
+            return i
+    return n
+
+
+class PrefixCache:
+    """Cache LRU thread-safe des K/V par préfixe de tokens.
+
+    Les valeurs sont des listes [(K, V), ...] par bloc, de shape
+    (1, n_kv_heads, longueur, d_k), traitées comme immuables.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 2**20):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: OrderedDict = OrderedDict()  # clé -> (tokens, kv, nbytes)
+        self._trees: dict[tuple, _Node] = {}  # (config_id, version) -> racine
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(config_id, version: int, tokens) -> tuple:
+        return (str(config_id), int(version), hash(tuple(tokens)))
+
+    def lookup(self, config_id, version: int, tokens: list[int]) -> tuple[int, list | None]:
+        """Plus long préfixe de tokens déjà en cache.
+
+        Returns:
+            (n, kv) : nombre de tokens couverts et K/V par bloc tronqués à
+            n positions ; (0, None) si aucun préfixe ne correspond
+        """
+        with self._lock:
+            root = self._trees.get((str(config_id), int(version)))
+            n, node = self._walk(root, tokens) if root is not None else (0, None)
+            key = self._any_entry(node) if n else None
+            if key is None:
+                self.misses += 1
+                return 0, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            kv = self._entries[key][1]
+        return n, [(K[:, :, :n], V[:, :, :n]) for K, V in kv]
+
+    def insert(self, config_id, version: int, tokens: list[int], kv: list) -> None:
+        """Ajoute les K/V d'une séquence (sans effet si elle est déjà couverte)."""
+        tokens = tuple(tokens)
+        nbytes = sum(K.nbytes + V.nbytes for K, V in kv)
+        if not tokens or nbytes > self.max_bytes:
+            return
+        config_id, version = str(config_id), int(version)
+        with self._lock:
+            # Nouvelle version des poids : les anciennes entrées sont obsolètes
+            for tree in [t for t in self._trees if t[0] == config_id and t[1] != version]:
+                self._drop_tree(tree)
+            root = self._trees.setdefault((config_id, version), _Node())
+            n, node = self._walk(root, tokens)
+            if n == len(tokens) and self._any_entry(node) is not None:
+                return
+            key = self.make_key(config_id, version, tokens)
+            if key in self._entries:  # collision de hash : on remplace
+                self._remove(key)
+                root = self._trees.setdefault((config_id, version), _Node())
+            self._insert_path(root, tokens).key = key
+            self._entries[key] = (tokens, kv, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, config_id=None) -> None:
+        """Supprime les entrées d'un modèle (ou toutes si config_id est None)."""
+        with self._lock:
+            for tree in list(self._trees):
+                if config_id is None or tree[0] == str(config_id):
+                    self._drop_tree(tree)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # --- Arbre radix (appelé sous self._lock) ---
+
+    @staticmethod
+    def _walk(root: _Node, tokens) -> tuple[int, _Node]:
+        """Descend l'arbre le long de tokens.
+
+        Returns:
+            (n, node) : n tokens en commun avec l'arbre ; toutes les
+            séquences du sous-arbre de node commencent par tokens[:n]
+        """
+        node, i = root, 0
+        while i < len(tokens):
+            child = node.children.get(tokens[i])
+            if child is None:
+                break
+            m = _common_length(child.edge, tokens[i : i + len(child.edge)])
+            i += m
+            node = child
+            if m < len(child.edge):
+                break
+        return i, node
+
+    @staticmethod
+    def _any_entry(node: _Node | None):
+        """Clé d'une entrée du sous-arbre de node (None si vide)."""
+        stack = [node] if node is not None else []
+        while stack:
+            n = stack.pop()
+            if n.key is not None:
+                return n.key
+            stack.extend(n.children.values())
+        return None
+
+    @staticmethod
+    def _insert_path(root: _Node, tokens: tuple) -> _Node:
+        """Nœud terminant exactement tokens, en coupant une arête si besoin."""
+        node, i = root, 0
+        while i < len(tokens):
+            child = node.children.get(tokens[i])
+            if child is None:
+                leaf = _Node(tokens[i:], node)
+                node.children[tokens[i]] = leaf
+                return leaf
+            m = _common_length(child.edge, tokens[i : i + len(child.edge)])
+            if m < len(child.edge):
+                # Coupe l'arête : node -> mid (edge[:m]) -> child (edge[m:])
+                mid = _Node(child.edge[:m], node)
+                node.children[tokens[i]] = mid
+                child.edge = child.edge[m:]
+                child.parent = mid
+                mid.children[child.edge[0]] = child
+                child = mid
+            node = child
+            i += m
+        return node
+
+    def _remove(self, key) -> None:
+        tokens, _, nbytes = self._entries.pop(key)
+        self.nbytes -= nbytes
+        root = self._trees.get(key[:2])
+        if root is None:
+            return
+        n, node = self._walk(root, tokens)
+        if n != len(tokens) or node.key != key:
+            return
+        node.key = None
+        # Élague les feuilles devenues vides
+        while node is not root and node.key is None and not node.children:
+            del node.parent.children[node.edge[0]]
+            node = node.parent
+
+    def _drop_tree(self, tree: tuple) -> None:
+        del self._trees[tree]
+        for key in [k for k in self._entries if k[:2] == tree]:
+            self.nbytes -= self._entries.pop(key)[2]
+
+
+# Instance partagée par les engines
+prefix_cache = PrefixCache()
@@ -0,0 +1,74 @@
+"""Cache des résultats d'évaluation, indexé par version des poids.
+
+Les endpoints de visualisation (embeddings PCA, matrices de poids, stats
+des paramètres) sont interrogés en boucle par le frontend. Tant que les
+poids n'ont pas changé, le résultat est identique : on le garde en mémoire
+sous la clé (config_id, weight_version, nom, args).
+"""
+
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+
+# Sel propre au processus : un ETag émis avant un redémarrage ne matche jamais
+_ETAG_SALT = uuid.uuid4().hex
+
+
+class ResultCache:
+    """Cache LRU thread-safe pour les résultats d'évaluation.
+
+    Les clés sont des tuples (config_id, weight_version, name, args).
+    Une nouvelle version des poids rend naturellement obsolètes les
+    entrées précédentes, qui sont évincées par l'ordre LRU.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(config_id, version: int, name: str, args: tuple = ()) -> tuple:
+        return (str(config_id), int(version), name, tuple(args))
+
+    @staticmethod
+    def etag_for(key: tuple) -> str:
+        """ETag HTTP (entre guillemets) dérivé de la clé de cache."""
+        digest = hashlib.sha1(f"{_ETAG_SALT}:{key!r}".encode("utf-8")).hexdigest()[:20]
+        return f'"{digest}"'
+
+    def get(self, key: tuple):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, config_id=None) -> None:
+        """Supprime les entrées d'un modèle (ou toutes si config_id est None)."""
+        with self._lock:
+            if config_id is None:
+                self._entries.clear()
+                return
+            config_id = str(config_id)
+            for key in [k for k in self._entries if k[0] == config_id]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Instance partagée par les vues d'évaluation
+eval_cache = ResultCache()
@@ -1,13 +1,24 @@
 import numpy as np
 
+from modules.quantization import is_quantized, quantize_model
+
+# Clé présente dans les .npz d'un modèle quantifié int8
+QUANTIZED_KEY = "__quantized_int8__"
+
 
 def save_model_weights(model, path: str):
-    """Sauvegarde tous les poids du modèle dans un fichier .npz."""
+    """Sauvegarde tous les poids du modèle dans un fichier .npz.
+
+    Un modèle quantifié est sauvegardé tel quel (W_int8 + W_scale par
+    couche, voir modules/quantization.py), avec la clé QUANTIZED_KEY.
+    """
     params = {}
     for idx, module in enumerate(model.all_modules()):
         for name, param in module.parameters.items():
             key = f"module_{idx}_{name}"
             params[key] = param
+    if is_quantized(model):
+        params[QUANTIZED_KEY] = np.array(True)
     np.savez_compressed(path, **params)
 
 
@@ -16,9 +27,15 @@ def load_model_weights(model, path: str):
 
     Le modèle doit avoir la même architecture (même config).
     La copie est in-place pour préserver les références.
-    Gère le mismatch de shape (ex: ancien modèle sans BOS/EOS).
+    Gère le mismatch de shape (ex: ancien modèle sans BOS/EOS), et
+    convertit via module.adapt_checkpoint() quand le module le propose
+    (ex: K/V multi-head moyennés vers un modèle grouped-query).
+    Un checkpoint quantifié int8 quantifie d'abord le modèle (flottant),
+    pour que ses couches aient les mêmes paramètres que le fichier.
     """
     data = np.load(path)
+    if QUANTIZED_KEY in data and not is_quantized(model):
+        quantize_model(model)
     for idx, module in enumerate(model.all_modules()):
         params = module.parameters
         for name in params:
@@ -26,8 +43,14 @@ def load_model_weights(model, path: str):
             if key in data:
                 saved = data[key]
                 current = params[name]
+                adapted = None
+                if saved.shape != current.shape and hasattr(module, "adapt_checkpoint"):
+                    # Ex. checkpoint multi-head chargé dans un modèle GQA
+                    adapted = module.adapt_checkpoint(name, saved)
                 if saved.shape == current.shape:
                     current[:] = saved
+                elif adapted is not None:
+                    current[:] = adapted
                 else:
                     # Shape mismatch (ex: vocab +2 pour BOS/EOS)
                     slices = tuple(slice(0, min(s, c)) for s, c in zip(saved.shape, current.shape))
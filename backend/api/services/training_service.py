@@ -5,8 +5,11 @@ import traceback
 import numpy as np
 from django.utils import timezone
 
+from api.services.payload_encoding import encode_array
 from autograd.backprop import Backprop
 from training.lr_scheduler import create_scheduler
+from training.metrics import PhaseTimer, metrics
+from training.regularization import apply_weight_decay, clip_gradients
 
 
 class TrainingService:
@@ -23,6 +26,8 @@ class TrainingService:
         self._thread = None
         self._current_run_id = None
         self._loss_history = []
+        # Encodage des weight_snapshot diffusés (json | f16 | f32)
+        self.snapshot_encoding = "json"
 
     @property
     def is_running(self) -> bool:
@@ -103,38 +108,51 @@ class TrainingService:
                 data_loader.reset()
                 epoch_loss = 0.0
                 steps_per_epoch = data_loader.num_batches
+                timer = PhaseTimer()
 
                 for step in range(steps_per_epoch):
                     if self._stop_flag.is_set():
                         break
-                    self._pause_flag.wait()
+                    with timer.phase("paused"):
+                        self._pause_flag.wait()
                     if self._stop_flag.is_set():
                         break
 
-                    x, y = data_loader.next_batch()
+                    with timer.phase("data"):
+                        x, y = data_loader.next_batch()
+                        segment_ids = data_loader.segment_ids
 
                     # Lock model during forward+backward to prevent
                     # concurrent API calls from corrupting cached values
                     # Get current LR from scheduler
                     current_lr = scheduler.step()
 
+                    wait_start = time.perf_counter()
                     with model_lock:
-                        loss, _ = backprop.forward(x, y)
-                        backprop.backward()
-
-                        if config.grad_clip > 0:
-                            self._clip_gradients(engine.model, config.grad_clip)
-
-                        # Update optimizer LR and step
-                        optimizer.lr = current_lr
-                        optimizer.step()
-
-                        # Decoupled weight decay (AdamW style)
-                        if config.weight_decay > 0:
-                            self._apply_weight_decay(engine.model, config.weight_decay, current_lr)
-
-                        backprop.zero_grad()
-
+                        timer.add("lock_wait", time.perf_counter() - wait_start)
+                        with timer.phase("forward"):
+                            loss, _ = backprop.forward(x, y, segment_ids)
+                        with timer.phase("backward"):
+                            backprop.backward()
+
+                        with timer.phase("optimizer"):
+                            if config.grad_clip > 0:
+                                clip_gradients(engine.model, config.grad_clip, optimizer.lazy)
+
+                            # Update optimizer LR and step
+                            optimizer.lr = current_lr
+                            optimizer.step()
+
+                            # Decoupled weight decay (AdamW style)
+                            if config.weight_decay > 0:
+                                apply_weight_decay(
+                                    engine.model, config.weight_decay, current_lr, optimizer.lazy
+                                )
+
+                            backprop.zero_grad()
+                        engine.bump_weight_version()
+
+                    timer.step_done(data_loader.batch_tokens or x.size)
                     epoch_loss += loss
 
                     # Broadcast toutes les 10 batches (pas chaque batch)
@@ -154,11 +172,14 @@ class TrainingService:
 
                 avg_loss = epoch_loss / max(steps_per_epoch, 1)
                 self._loss_history.append(avg_loss)
+                throughput = timer.publish(metrics, config_id=self.config_id)
 
                 # Snapshot des poids pour visualisation temps réel
                 weight_snapshot = None
                 if (epoch + 1) % 5 == 0 or epoch == 0 or epoch == num_epochs - 1:
-                    weight_snapshot = self._get_weight_snapshot(engine.model)
+                    weight_snapshot = self._get_weight_snapshot(
+                        engine.model, self.snapshot_encoding
+                    )
 
                 epoch_msg = {
                     "type": "training.epoch_complete",
@@ -167,7 +188,12 @@ class TrainingService:
                     "loss": float(avg_loss),
                     "loss_history": [float(l) for l in self._loss_history],
                     "elapsed_seconds": time.time() - start_time,
+                    "tokens_per_second": throughput["tokens_per_second"],
+                    "epoch_seconds": throughput["epoch_seconds"],
+                    "step_time_ms": throughput["step_time_ms"],
                 }
+                if data_loader.bucketed:
+                    epoch_msg["padding"] = data_loader.padding_stats(reset=True)
                 if weight_snapshot:
                     epoch_msg["weight_snapshot"] = weight_snapshot
                 self._broadcast(epoch_msg)
@@ -177,6 +203,8 @@ class TrainingService:
                     loss_history=[float(l) for l in self._loss_history],
                 )
 
+            self._flush_lazy(engine, optimizer)
+
             if not self._stop_flag.is_set():
                 TrainingRun.objects.filter(pk=run_id).update(
                     status="completed", completed_at=timezone.now()
@@ -187,6 +215,7 @@ class TrainingService:
 
         except Exception as e:
             error_msg = f"{e}\n{traceback.format_exc()}"
+            self._flush_lazy(engine, optimizer)
             TrainingRun.objects.filter(pk=run_id).update(status="failed", error_message=str(e))
             self._broadcast(
                 {
@@ -237,28 +266,16 @@ class TrainingService:
 
             logging.getLogger(__name__).warning("Auto-save failed: %s", e)
 
-    def _apply_weight_decay(self, model, weight_decay: float, lr: float):
-        """Decoupled weight decay (AdamW): w *= (1 - wd * lr)."""
-        decay_factor = 1.0 - weight_decay * lr
-        for module in model.all_modules():
-            for name, param in module.parameters.items():
-                param *= decay_factor
-
-    def _clip_gradients(self, model, max_norm):
-        all_grads = []
-        for module in model.all_modules():
-            for g in module.gradients.values():
-                all_grads.append(g.ravel())
-        if not all_grads:
+    @staticmethod
+    def _flush_lazy(engine, optimizer):
+        """Rattrape la décroissance différée des lignes d'embedding inactives (lazy Adam)."""
+        if optimizer is None or not optimizer.lazy:
             return
-        total_norm = np.sqrt(sum(np.sum(g**2) for g in all_grads))
-        if total_norm > max_norm:
-            scale = max_norm / (total_norm + 1e-8)
-            for module in model.all_modules():
-                for name in module.gradients:
-                    module.gradients[name] *= scale
-
-    def _get_weight_snapshot(self, model) -> list[dict]:
+        with engine.model_lock:
+            optimizer.flush()
+            engine.bump_weight_version()
+
+    def _get_weight_snapshot(self, model, encoding: str = "json") -> list[dict]:
         """Snapshot compact des poids pour visualisation dot-matrix temps réel."""
         MAX_DIM = 32
         snapshot = []
@@ -294,7 +311,7 @@ class TrainingService:
                         "param": pname,
                         "rows": sampled.shape[0],
                         "cols": sampled.shape[1],
-                        "values": sampled.tolist(),
+                        "values": encode_array(sampled, encoding),
                         "min": float(np.min(sampled)),
                         "max": float(np.max(sampled)),
                     }
@@ -115,7 +115,7 @@ class TestChatPerConfig(TestCase):
             f"/api/chat/sessions/?config_id={self.config1.pk}",
         )
         self.assertEqual(resp.status_code, 200)
-        session_ids = [s["session_id"] for s in resp.data]
+        session_ids = [s["session_id"] for s in resp.data["results"]]
         self.assertIn(str(sid1), session_ids)
         self.assertNotIn(str(sid2), session_ids)
 
@@ -123,7 +123,7 @@ class TestChatPerConfig(TestCase):
         resp = self.client.get(
             f"/api/chat/sessions/?config_id={self.config2.pk}",
         )
-        session_ids = [s["session_id"] for s in resp.data]
+        session_ids = [s["session_id"] for s in resp.data["results"]]
         self.assertIn(str(sid2), session_ids)
         self.assertNotIn(str(sid1), session_ids)
 
@@ -143,7 +143,7 @@ class TestChatPerConfig(TestCase):
             content="B",
         )
         resp = self.client.get("/api/chat/sessions/")
-        session_ids = [s["session_id"] for s in resp.data]
+        session_ids = [s["session_id"] for s in resp.data["results"]]
         self.assertIn(str(sid1), session_ids)
         self.assertIn(str(sid2), session_ids)
 
@@ -159,7 +159,7 @@ class TestChatPerConfig(TestCase):
         resp = self.client.get(
             f"/api/chat/sessions/?config_id={self.config1.pk}",
         )
-        session = resp.data[0]
+        session = resp.data["results"][0]
         self.assertEqual(session["config_id"], str(self.config1.pk))
 
     def test_new_message_endpoint(self):
@@ -228,7 +228,7 @@ class TestChatPerUser(TestCase):
         resp = client1.get(
             f"/api/chat/sessions/?config_id={self.config.pk}",
         )
-        session_ids = [s["session_id"] for s in resp.data]
+        session_ids = [s["session_id"] for s in resp.data["results"]]
         self.assertIn(str(sid1), session_ids)
         self.assertNotIn(str(sid2), session_ids)
 
@@ -238,7 +238,7 @@ class TestChatPerUser(TestCase):
         resp = client2.get(
             f"/api/chat/sessions/?config_id={self.config.pk}",
         )
-        session_ids = [s["session_id"] for s in resp.data]
+        session_ids = [s["session_id"] for s in resp.data["results"]]
         self.assertIn(str(sid2), session_ids)
         self.assertNotIn(str(sid1), session_ids)
 
@@ -266,6 +266,6 @@ class TestChatPerUser(TestCase):
         resp = client.get(
             f"/api/chat/sessions/?config_id={self.config.pk}",
         )
-        session_ids = [s["session_id"] for s in resp.data]
+        session_ids = [s["session_id"] for s in resp.data["results"]]
         # Anonymous user has user=None so filter is not applied
         self.assertIn(str(sid_anon), session_ids)
@@ -249,7 +249,7 @@ class TestConfigDataLink(TestCase):
             },
             format="multipart",
         )
-        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.status_code, 202)
 
         new_data_id = resp.data["id"]
         link = ConfigTrainingData.objects.get(
@@ -115,6 +115,20 @@ class TestConfigAPI(TestCase):
         self.assertFalse(resp.data["valid"])
         self.assertGreater(len(resp.data["errors"]), 0)
 
+    def test_validate_rope_odd_head_dim(self):
+        bad = ModelConfig.objects.create(
+            name="Bad RoPE", d_model=12, n_heads=4, pos_encoding="rope"
+        )
+        resp = self.client.post(f"/api/configs/{bad.pk}/validate/")
+        self.assertFalse(resp.data["valid"])
+        self.assertTrue(any("rope" in e for e in resp.data["errors"]))
+
+    def test_validate_kv_heads_must_divide_heads(self):
+        bad = ModelConfig.objects.create(name="Bad GQA", d_model=64, n_heads=4, n_kv_heads=3)
+        resp = self.client.post(f"/api/configs/{bad.pk}/validate/")
+        self.assertFalse(resp.data["valid"])
+        self.assertTrue(any("n_kv_heads" in e for e in resp.data["errors"]))
+
     def test_validate_not_found(self):
         fake_id = uuid.uuid4()
         resp = self.client.post(f"/api/configs/{fake_id}/validate/")
@@ -1,10 +1,12 @@
+import os
 import uuid
 
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from rest_framework.test import APIClient
 
 from api.models import TrainingData
+from api.services.ingestion import ingestion
 
 
 class TestDataAPI(TestCase):
@@ -26,22 +28,9 @@ class TestDataAPI(TestCase):
         resp = self.client.get("/api/data/")
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp.data["count"], 1)
-
-    def test_upload_txt_file(self):
-        content = b"Bonjour le monde. Le chat dort."
-        file = SimpleUploadedFile("test2.txt", content, content_type="text/plain")
-        resp = self.client.post("/api/data/upload/", {"file": file}, format="multipart")
-        self.assertEqual(resp.status_code, 201)
-        self.assertEqual(resp.data["file_type"], "txt")
-        self.assertIn("Bonjour", resp.data["extracted_text"])
-        self.assertEqual(resp.data["char_count"], len(content.decode("utf-8")))
-
-    def test_upload_csv_file(self):
-        content = b"col1,col2\nval1,val2"
-        file = SimpleUploadedFile("data.csv", content, content_type="text/csv")
-        resp = self.client.post("/api/data/upload/", {"file": file}, format="multipart")
-        self.assertEqual(resp.status_code, 201)
-        self.assertEqual(resp.data["file_type"], "csv")
+        item = resp.data["results"][0]
+        self.assertNotIn("charset", item)
+        self.assertEqual(item["unique_chars"], self.data.unique_chars)
 
     def test_upload_no_file(self):
         resp = self.client.post("/api/data/upload/", {}, format="multipart")
@@ -77,6 +66,47 @@ class TestDataAPI(TestCase):
         self.assertIn("file_count", resp.data)
         self.assertEqual(resp.data["file_count"], 1)
 
+    def test_corpus_stats_from_stored_fields(self):
+        TrainingData.objects.create(
+            name="b.txt",
+            original_filename="b.txt",
+            file_type="txt",
+            file_size=10,
+            extracted_text="Zut !",
+        )
+        corpus = "\n".join(d.extracted_text for d in TrainingData.objects.all())
+        resp = self.client.get("/api/data/corpus/")
+        self.assertEqual(resp.data["total_chars"], len(corpus))
+        self.assertEqual(resp.data["unique_chars"], len(set(corpus)))
+        self.assertEqual(resp.data["text"], corpus)
+        self.assertEqual(len(resp.data["files"]), 2)
+        self.assertNotIn("full_text", resp.data)
+
+    def test_corpus_text_paging(self):
+        TrainingData.objects.create(
+            name="b.txt",
+            original_filename="b.txt",
+            file_type="txt",
+            file_size=10,
+            extracted_text="Zut !",
+        )
+        corpus = "\n".join(d.extracted_text for d in TrainingData.objects.all())
+        resp = self.client.get("/api/data/corpus/text/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["X-Total-Chars"], str(len(corpus)))
+        self.assertEqual(b"".join(resp.streaming_content).decode(), corpus)
+
+        for offset, limit in [(0, 3), (20, 10), (25, 1), (26, 100), (40, 5)]:
+            resp = self.client.get(f"/api/data/corpus/text/?offset={offset}&limit={limit}")
+            page = b"".join(resp.streaming_content).decode()
+            self.assertEqual(page, corpus[offset : offset + limit], (offset, limit))
+        resp = self.client.get("/api/data/corpus/text/?offset=2&limit=3")
+        self.assertEqual(resp["Content-Range"], f"chars 2-4/{len(corpus)}")
+
+    def test_corpus_text_bad_offset(self):
+        resp = self.client.get("/api/data/corpus/text/?offset=abc")
+        self.assertEqual(resp.status_code, 400)
+
     def test_corpus_excludes_inactive(self):
         self.data.is_active = False
         self.data.save()
@@ -93,6 +123,7 @@ class TestDataAPI(TestCase):
         resp = self.client.get(f"/api/data/{self.data.pk}/")
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp.data["name"], "test.txt")
+        self.assertEqual(resp.data["charset"], self.data.charset)
 
     def test_sample_data_creates_entry(self):
         resp = self.client.post("/api/data/sample/")
@@ -108,3 +139,98 @@ class TestDataAPI(TestCase):
         self.assertEqual(resp2.status_code, 200)
         self.assertEqual(resp1.data["id"], resp2.data["id"])
         self.assertEqual(TrainingData.objects.filter(name="Données d'exemple").count(), 1)
+
+
+class TestDataUpload(TransactionTestCase):
+    """Upload : extraction en arrière-plan, texte écrit sur disque."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _upload(self, name: str, content: bytes):
+        file = SimpleUploadedFile(name, content)
+        resp = self.client.post("/api/data/upload/", {"file": file}, format="multipart")
+        self.assertEqual(resp.status_code, 202)
+        self.assertIn(resp.data["status"], ("pending", "processing", "ready"))
+        ingestion.wait(resp.data["id"], timeout=30)
+        data = TrainingData.objects.get(pk=resp.data["id"])
+        self.addCleanup(self._cleanup, data)
+        return resp, data
+
+    @staticmethod
+    def _cleanup(data):
+        for f in (data.file, data.text_file):
+            if f:
+                f.delete(save=False)
+
+    def test_upload_txt_file(self):
+        content = b"Bonjour le monde. Le chat dort."
+        resp, data = self._upload("test2.txt", content)
+        self.assertEqual(resp.data["file_type"], "txt")
+        self.assertEqual(data.status, "ready")
+        self.assertEqual(data.extracted_text, "")
+        self.assertEqual(data.read_text(), content.decode("utf-8"))
+        self.assertEqual(data.char_count, len(content.decode("utf-8")))
+
+        resp = self.client.get(f"/api/data/{data.pk}/")
+        self.assertEqual(resp.data["status"], "ready")
+        self.assertEqual(resp.data["progress"], 1.0)
+        resp = self.client.get("/api/data/corpus/")
+        self.assertEqual(resp.data["unique_chars"], len(set(content.decode("utf-8"))))
+        resp = self.client.get("/api/data/corpus/text/")
+        self.assertEqual(b"".join(resp.streaming_content), content)
+
+    def test_upload_csv_file(self):
+        resp, data = self._upload("data.csv", b"col1,col2\nval1,val2")
+        self.assertEqual(resp.data["file_type"], "csv")
+        self.assertEqual(data.read_text(), "col1 col2\nval1 val2")
+
+    def test_upload_extraction_failure(self):
+        _, data = self._upload("bad.txt", b"\xff\xfe\xfa invalide")
+        self.assertEqual(data.status, "failed")
+        self.assertIn("extraction", data.error_message)
+        self.assertFalse(data.text_file)
+        self.assertEqual(data.read_text(), "")
+
+    def test_delete_removes_extracted_text(self):
+        _, data = self._upload("gone.txt", b"texte")
+        path = data.text_file.path
+        self.assertTrue(os.path.exists(path))
+        self.client.delete(f"/api/data/{data.pk}/")
+        self.assertFalse(os.path.exists(path))
+
+    def test_retry_failed_upload(self):
+        _, data = self._upload("retry.txt", b"\xff\xfe\xfa invalide")
+        self.assertEqual(data.status, "failed")
+        with open(data.file.path, "wb") as f:
+            f.write(b"texte corrige")
+
+        resp = self.client.post(f"/api/data/{data.pk}/retry/")
+        self.assertEqual(resp.status_code, 202)
+        self.assertEqual(resp.data["error_message"], "")
+        ingestion.wait(data.pk, timeout=30)
+        data.refresh_from_db()
+        self.assertEqual(data.status, "ready")
+        self.assertEqual(data.read_text(), "texte corrige")
+
+        resp = self.client.post(f"/api/data/{data.pk}/retry/")
+        self.assertEqual(resp.status_code, 409)
+
+    def test_resume_requeues_unfinished(self):
+        """Après un redémarrage, les fichiers pending / processing sont reprogrammés."""
+        data = TrainingData.objects.create(
+            name="interrompu.txt",
+            original_filename="interrompu.txt",
+            file=SimpleUploadedFile("interrompu.txt", b"repris"),
+            file_type="txt",
+            file_size=6,
+            status=TrainingData.Status.PROCESSING,
+            progress=0.4,
+        )
+        self.addCleanup(self._cleanup, data)
+        self.assertEqual(ingestion.resume(), 1)
+        ingestion.wait(data.pk, timeout=30)
+        data.refresh_from_db()
+        self.assertEqual(data.status, "ready")
+        self.assertEqual(data.read_text(), "repris")
+        self.assertEqual(ingestion.resume(), 0)
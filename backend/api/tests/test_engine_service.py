@@ -47,6 +47,29 @@ class TestEngineService(TestCase):
         self.assertGreater(self.engine.config.vocab_size, 0)
         self.assertEqual(self.engine.config.vocab_size, self.engine.tokenizer.vocab_size)
 
+    def test_packed_batches_segment_lines(self):
+        """En mode packed, chaque ligne du corpus (BOS...EOS) est un segment."""
+        self.config.packed_batches = True
+        self.engine.initialize(self.config, "Le chat mange.\nLe chien dort.\nLa vache.")
+        x, _ = self.engine.data_loader.next_batch()
+        seg = self.engine.data_loader.segment_ids
+        self.assertEqual(seg.shape, x.shape)
+        starts = np.diff(seg, axis=1) == 1
+        np.testing.assert_array_equal(starts, x[:, 1:] == self.engine.tokenizer.bos_id)
+
+    def test_profile_leaves_training_loader_untouched(self):
+        """Le profil utilise un DataLoader privé : curseur et padding intacts."""
+        self.config.bucketed_batches = True
+        self.engine.initialize(self.config, "Le chat mange.\nLe chien dort.\nLa vache.")
+        loader = self.engine.data_loader
+        loader.next_batch()
+        cursor, order = loader._cursor, loader._batch_order.copy()
+        padding = loader.padding_stats()
+        self.engine.profile_modules(steps=2)
+        self.assertEqual(loader._cursor, cursor)
+        np.testing.assert_array_equal(loader._batch_order, order)
+        self.assertEqual(loader.padding_stats(), padding)
+
     def test_generate_text(self):
         """La génération produit du texte."""
         self.engine.initialize(self.config, self.corpus)
@@ -55,6 +78,17 @@ class TestEngineService(TestCase):
         self.assertTrue(result.startswith("Le "))
         self.assertGreater(len(result), len("Le "))
 
+    def test_generate_beyond_seq_len_with_rope(self):
+        """Avec RoPE, le contexte de génération dépasse seq_len (max_context)."""
+        self.config.pos_encoding = "rope"
+        self.config.max_context = 48
+        self.engine.initialize(self.config, self.corpus)
+        self.assertEqual(self.engine.model.context_length, 48)
+        result = self.engine.generate_text(
+            self.corpus[:30], max_tokens=20, min_new_tokens=20, temperature=0.8
+        )
+        self.assertGreater(len(result), 40)
+
     def test_generate_streaming(self):
         """Le streaming génère des tokens un par un."""
         self.engine.initialize(self.config, self.corpus)
@@ -63,6 +97,35 @@ class TestEngineService(TestCase):
         for t in tokens:
             self.assertIsInstance(t, str)
 
+    def test_stop_strings_shared_by_text_and_streaming(self):
+        """Arrêt sur chaîne de stop, identique en synchrone et en streaming."""
+        self.engine.initialize(self.config, self.corpus)
+        np.random.seed(0)
+        full = self.engine.generate_text("Le ", max_tokens=40, min_new_tokens=40)
+        stop = full[4:6]  # une chaîne présente dans la génération
+        np.random.seed(0)
+        text = self.engine.generate_text("Le ", max_tokens=40, min_new_tokens=40, stop=[stop])
+        np.random.seed(0)
+        streamed = "".join(
+            self.engine.generate_streaming("Le ", max_tokens=40, min_new_tokens=40, stop=[stop])
+        )
+        self.assertEqual(text, full[: full.index(stop, 3)])
+        self.assertEqual("Le " + streamed, text)
+
+    def test_bad_words_are_never_generated(self):
+        self.engine.initialize(self.config, self.corpus)
+        text = self.engine.generate_text(
+            "Le ", max_tokens=60, min_new_tokens=60, temperature=2.0, bad_words=["a", "e"]
+        )
+        self.assertNotIn("a", text[3:])
+        self.assertNotIn("e", text[3:])
+
+    def test_generation_weights_respects_min_new_tokens(self):
+        self.engine.initialize(self.config, self.corpus)
+        result = self.engine.get_generation_weights("Le ", max_tokens=8, min_new_tokens=8)
+        self.assertEqual(len(result["generated_tokens"]), 8)
+        self.assertFalse(any(t.get("is_eos") for t in result["generated_tokens"]))
+
     def test_get_attention_weights(self):
         """Retourne les poids d'attention par couche et tête."""
         self.engine.initialize(self.config, self.corpus)
@@ -148,3 +211,45 @@ class TestEngineService(TestCase):
             self.assertIn("token", tok)
             self.assertIn("probability", tok)
             self.assertIn("top_probs", tok)
+
+    def test_speculative_greedy_matches_plain_decoding(self):
+        """En greedy, le décodage spéculatif produit exactement le même texte."""
+        self.engine.initialize(self.config, self.corpus)
+        draft = EngineService("draft")
+        draft.initialize(
+            Config(d_model=16, n_heads=2, n_layers=1, d_ff=32, seq_len=16, seed=7), self.corpus
+        )
+        for options in ({}, {"repetition_penalty": 1.5, "min_new_tokens": 3}):
+            plain = self.engine.generate_text(
+                "Le chat ", max_tokens=20, sampling_strategy="greedy", **options
+            )
+            stats = {}
+            fast = self.engine.generate_text(
+                "Le chat ",
+                max_tokens=20,
+                sampling_strategy="greedy",
+                draft=draft,
+                num_draft_tokens=3,
+                stats=stats,
+                **options,
+            )
+            self.assertEqual(fast, plain)
+            self.assertGreater(stats["target_forwards"], 0)
+
+    def test_speculative_identical_draft_accepts_everything(self):
+        self.engine.initialize(self.config, self.corpus)
+        draft = EngineService("draft")
+        draft.initialize(self.config, self.corpus)
+        stats = {}
+        self.engine.generate_text(
+            "Le ", max_tokens=8, sampling_strategy="greedy", draft=draft, stats=stats
+        )
+        self.assertEqual(stats["acceptance_rate"], 1.0)
+        self.assertLess(stats["target_forwards"], 8)
+
+    def test_speculative_rejects_other_tokenizer(self):
+        self.engine.initialize(self.config, self.corpus)
+        draft = EngineService("draft")
+        draft.initialize(self.config, "xyz")
+        with self.assertRaises(ValueError):
+            self.engine.generate_text("Le ", max_tokens=4, draft=draft)
@@ -153,3 +153,21 @@ class TestEvaluationAPI(TestCase):
 
         resp = self.client.post("/api/eval/attention/", {"text": "Le"}, format="json")
         self.assertEqual(resp.status_code, 400)
+
+    def test_profile(self):
+        resp = self.client.get("/api/eval/profile/?steps=2")
+        self.assertEqual(resp.status_code, 200)
+        names = [m["module"] for m in resp.data["modules"]]
+        self.assertEqual(names[0], "embedding")
+        self.assertIn("block0.attention", names)
+        self.assertIn("block0.ffn", names)
+        self.assertEqual(names[-1], "output_head")
+        for m in resp.data["modules"]:
+            self.assertEqual(m["forward_calls"], 2)
+        attn = next(m for m in resp.data["modules"] if m["module"] == "block0.attention")
+        self.assertGreater(attn["forward_flops"], 0)
+        self.assertGreater(attn["backward_ms"], 0)
+
+    def test_profile_bad_steps(self):
+        resp = self.client.get("/api/eval/profile/?steps=abc")
+        self.assertEqual(resp.status_code, 400)
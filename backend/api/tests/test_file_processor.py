@@ -1,8 +1,11 @@
 import io
+import os
+import tempfile
+from unittest import mock
 
 from django.test import TestCase
 
-from api.services.file_processor import extract_text, get_file_type
+from api.services.file_processor import _iter_pdf_pages, extract_text, get_file_type, iter_text
 
 
 class TestGetFileType(TestCase):
@@ -68,3 +71,49 @@ class TestExtractText(TestCase):
         file_obj = io.BytesIO(b"data")
         with self.assertRaises(ValueError):
             extract_text(file_obj, "xyz")
+
+
+class TestIterText(TestCase):
+    """iter_text() rend le même texte qu'extract_text(), par morceaux."""
+
+    def _write(self, content: bytes, suffix: str) -> str:
+        f = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+        f.write(content)
+        f.close()
+        self.addCleanup(os.unlink, f.name)
+        return f.name
+
+    def test_txt_chunks_match_extract_text(self):
+        content = ("Le chat dort.\r\nLe chien court. é" * 50).encode("utf-8")
+        path = self._write(content, ".txt")
+        calls = []
+        with mock.patch("api.services.file_processor.READ_CHUNK", 100):
+            pieces = list(iter_text(path, "txt", lambda d, t: calls.append((d, t))))
+        self.assertGreater(len(pieces), 1)
+        self.assertEqual("".join(pieces), extract_text(io.BytesIO(content), "txt"))
+        self.assertEqual(calls[-1], (len(content), len(content)))
+
+    def test_csv_matches_extract_text(self):
+        content = b'col1,col2\nval1,val2\n"a,b",c'
+        path = self._write(content, ".csv")
+        self.assertEqual("".join(iter_text(path, "csv")), extract_text(io.BytesIO(content), "csv"))
+
+    def test_pdf_pages_in_parallel(self):
+        import PyPDF2
+
+        writer = PyPDF2.PdfWriter()
+        for _ in range(5):
+            writer.add_blank_page(width=72, height=72)
+        buf = io.BytesIO()
+        writer.write(buf)
+        path = self._write(buf.getvalue(), ".pdf")
+        calls = []
+        pages = list(
+            _iter_pdf_pages(path, lambda d, t: calls.append((d, t)), workers=2, pages_per_task=2)
+        )
+        self.assertEqual(pages, [""] * 5)
+        self.assertEqual(calls, [(2, 5), (4, 5), (5, 5)])
+
+    def test_unsupported_type(self):
+        with self.assertRaises(ValueError):
+            list(iter_text("x", "xyz"))
@@ -69,7 +69,7 @@ class TestGenerationAPI(TestCase):
     def test_chat_sessions_empty(self):
         resp = self.client.get("/api/chat/sessions/")
         self.assertEqual(resp.status_code, 200)
-        self.assertEqual(len(resp.data), 0)
+        self.assertEqual(len(resp.data["results"]), 0)
 
     def test_chat_message(self):
         resp = self.client.post(
@@ -101,10 +101,39 @@ class TestGenerationAPI(TestCase):
         ChatMessage.objects.create(session_id=sid, role="assistant", content="World")
         resp = self.client.get("/api/chat/sessions/")
         self.assertEqual(resp.status_code, 200)
-        sessions = [s for s in resp.data if s["session_id"] == str(sid)]
+        sessions = [s for s in resp.data["results"] if s["session_id"] == str(sid)]
         self.assertEqual(len(sessions), 1)
         self.assertEqual(sessions[0]["message_count"], 2)
 
+    def test_chat_sessions_aggregated_in_one_query(self):
+        ChatMessage.objects.all().delete()
+        sid = uuid.uuid4()
+        ChatMessage.objects.create(session_id=sid, role="user", content="x" * 150)
+        ChatMessage.objects.create(session_id=sid, role="assistant", content="Réponse")
+        for _ in range(5):
+            ChatMessage.objects.create(session_id=uuid.uuid4(), role="user", content="Autre")
+        with self.assertNumQueries(1):
+            resp = self.client.get("/api/chat/sessions/")
+        self.assertEqual(len(resp.data["results"]), 6)
+        session = next(s for s in resp.data["results"] if s["session_id"] == str(sid))
+        self.assertEqual(session["first_message"], "x" * 100)
+        self.assertEqual(session["message_count"], 2)
+
+    def test_chat_sessions_cursor_pagination(self):
+        ChatMessage.objects.all().delete()
+        created = [uuid.uuid4() for _ in range(7)]
+        for sid in created:
+            ChatMessage.objects.create(session_id=sid, role="user", content="Salut")
+        seen = []
+        url = "/api/chat/sessions/?page_size=3"
+        while url:
+            resp = self.client.get(url)
+            self.assertLessEqual(len(resp.data["results"]), 3)
+            seen.extend(s["session_id"] for s in resp.data["results"])
+            url = resp.data["next"]
+        # Plus récentes d'abord, chacune une seule fois
+        self.assertEqual(seen, [str(sid) for sid in reversed(created)])
+
     def test_chat_session_detail(self):
         ChatMessage.objects.create(session_id=self.session_id, role="user", content="Bonjour")
         resp = self.client.get(f"/api/chat/{self.session_id}/")
@@ -117,3 +146,73 @@ class TestGenerationAPI(TestCase):
         resp = self.client.delete(f"/api/chat/{self.session_id}/")
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(ChatMessage.objects.filter(session_id=self.session_id).count(), 0)
+
+    def test_generate_speculative_with_draft(self):
+        registry = ModelRegistry()
+        corpus = "Le chat mange le poisson. Le chien mange la viande."
+        draft_config = Config(d_model=16, n_heads=2, n_layers=1, d_ff=32, seq_len=16, seed=1)
+        registry.get_engine("draft-config").initialize(draft_config, corpus)
+
+        resp = self.client.post(
+            "/api/generate/",
+            {
+                "config_id": "test-config",
+                "prompt": "Le ",
+                "max_tokens": 10,
+                "draft_config_id": "draft-config",
+                "num_draft_tokens": 3,
+            },
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        stats = resp.data["speculation"]
+        self.assertGreater(stats["draft_tokens"], 0)
+        self.assertLessEqual(stats["accepted_tokens"], stats["draft_tokens"])
+        self.assertGreaterEqual(stats["acceptance_rate"], 0.0)
+        self.assertLessEqual(stats["acceptance_rate"], 1.0)
+
+    def test_generate_draft_must_differ_from_target(self):
+        resp = self.client.post(
+            "/api/generate/",
+            {"config_id": "test-config", "prompt": "Le ", "draft_config_id": "test-config"},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 400)
+
+    def test_generate_beam_search_n_best(self):
+        resp = self.client.post(
+            "/api/generate/",
+            {"prompt": "Le ", "max_tokens": 6, "num_beams": 3, "num_return_sequences": 2},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        sequences = resp.data["sequences"]
+        self.assertEqual(len(sequences), 2)
+        self.assertGreaterEqual(sequences[0]["score"], sequences[1]["score"])
+        self.assertEqual(resp.data["generated_text"], sequences[0]["text"])
+
+    def test_generate_num_return_sequences_sampling(self):
+        resp = self.client.post(
+            "/api/generate/",
+            {"prompt": "Le ", "max_tokens": 6, "num_return_sequences": 4},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.data["sequences"]), 4)
+        for seq in resp.data["sequences"]:
+            self.assertTrue(seq["text"].startswith("Le "))
+            self.assertIsNone(seq["score"])
+
+    def test_generate_num_return_sequences_invalid_strategy(self):
+        resp = self.client.post(
+            "/api/generate/",
+            {
+                "prompt": "Le ",
+                "max_tokens": 6,
+                "num_return_sequences": 2,
+                "sampling_strategy": "bogus",
+            },
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("error", resp.data)
@@ -0,0 +1,98 @@
+import threading
+import time
+import uuid
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.models import ChatMessage
+from api.services.engine_service import EngineService
+from api.services.inference_pool import InferenceExecutor, QueueFullError
+from api.services.model_registry import ModelRegistry
+from config import Config
+
+
+class TestInferenceExecutor(TestCase):
+    def test_queue_depth_is_bounded(self):
+        executor = InferenceExecutor(max_workers=1, max_queue=2)
+        release = threading.Event()
+        futures = [executor.submit(release.wait), executor.submit(lambda: 42)]
+        with self.assertRaises(QueueFullError) as ctx:
+            executor.submit(lambda: 0)
+        self.assertGreaterEqual(ctx.exception.retry_after, 1)
+
+        release.set()
+        self.assertEqual(futures[1].result(timeout=5), 42)
+        futures[0].result(timeout=5)
+        self.assertEqual(executor.depth, 0)
+        self.assertEqual(executor.submit(lambda: 7).result(timeout=5), 7)
+        executor.shutdown()
+
+    def test_engine_executor_does_not_wait_for_init_lock(self):
+        engine = EngineService("pool-lock")
+        got = []
+        with engine._init_lock:  # comme pendant initialize() / load_weights()
+            reader = threading.Thread(target=lambda: got.append(engine.executor))
+            reader.start()
+            reader.join(timeout=5)
+        self.assertIsInstance(got[0], InferenceExecutor)
+        engine.shutdown_executor()
+
+
+class TestAsyncInferenceViews(TestCase):
+    corpus = "Le chat mange le poisson. Le chien mange la viande."
+
+    def setUp(self):
+        ModelRegistry._instance = None
+        self.client = APIClient()
+        config = Config(d_model=32, n_heads=2, n_layers=1, d_ff=64, seq_len=16, seed=42)
+        self.engine = ModelRegistry().get_engine("pool-config")
+        self.engine.initialize(config, self.corpus)
+
+    def tearDown(self):
+        ModelRegistry().clear()
+        ModelRegistry._instance = None
+
+    def test_full_queue_returns_429_with_retry_after(self):
+        self.engine._executor = InferenceExecutor(max_workers=1, max_queue=0)
+        resp = self.client.post("/api/generate/", {"prompt": "Le "}, format="json")
+        self.assertEqual(resp.status_code, 429)
+        self.assertGreaterEqual(int(resp["Retry-After"]), 1)
+
+        resp = self.client.post("/api/eval/perplexity/", {"text": "Le chat"}, format="json")
+        self.assertEqual(resp.status_code, 429)
+
+    def test_rejected_chat_message_is_not_saved(self):
+        self.engine._executor = InferenceExecutor(max_workers=1, max_queue=0)
+        resp = self.client.post("/api/chat/messages/", {"content": "Le "}, format="json")
+        self.assertEqual(resp.status_code, 429)
+        self.assertFalse(ChatMessage.objects.exists())
+
+    @override_settings(INFERENCE_TIMEOUT=0.05)
+    def test_slow_generation_times_out(self):
+        def slow(*args, **kwargs):
+            time.sleep(0.5)
+            return "trop tard"
+
+        with mock.patch.object(self.engine, "generate_text", side_effect=slow):
+            resp = self.client.post("/api/generate/", {"prompt": "Le "}, format="json")
+            self.assertEqual(resp.status_code, 504)
+            session_id = uuid.uuid4()
+            resp = self.client.post(
+                f"/api/chat/{session_id}/messages/", {"content": "Le "}, format="json"
+            )
+        self.assertEqual(resp.status_code, 504)
+        self.assertFalse(ChatMessage.objects.filter(session_id=session_id).exists())
+
+    def test_async_views_keep_drf_behaviour(self):
+        self.assertEqual(self.client.get("/api/generate/").status_code, 405)
+        resp = self.client.get("/api/eval/parameters/", {"config_id": "pool-config"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("ETag", resp)
+        resp = self.client.get(
+            "/api/eval/parameters/",
+            {"config_id": "pool-config"},
+            HTTP_IF_NONE_MATCH=resp["ETag"],
+        )
+        self.assertEqual(resp.status_code, 304)
@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.models import ModelConfig, TrainingRun
+from api.services.model_registry import ModelRegistry
+from api.services.training_service import TrainingService
+from config import Config
+from training.metrics import TRAIN_PHASES, metrics
+
+
+def _small_config(**kw):
+    return Config(
+        d_model=32, n_heads=2, n_layers=1, d_ff=64, seq_len=16, batch_size=4, seed=42, **kw
+    )
+
+
+class TestThroughputMetrics(TestCase):
+    """Instrumentation du débit d'entraînement et de la latence de génération."""
+
+    corpus = "Le chat mange le poisson. Le chien mange la viande. " * 5
+
+    def setUp(self):
+        ModelRegistry._instance = None
+        metrics.reset()
+        self.client = APIClient()
+        self.engine = ModelRegistry().get_engine("metrics-config")
+        self.engine.initialize(_small_config(max_epochs=2), self.corpus)
+
+    def tearDown(self):
+        ModelRegistry().clear()
+        ModelRegistry._instance = None
+
+    def test_epoch_complete_has_throughput(self):
+        db_config = ModelConfig.objects.create(name="metrics", d_model=32, n_heads=2)
+        run = TrainingRun.objects.create(config=db_config, total_epochs=2, status="pending")
+        svc = TrainingService(config_id="metrics-config")
+        with (
+            mock.patch.object(svc, "_broadcast") as broadcast,
+            mock.patch.object(svc, "_auto_save"),
+        ):
+            svc._train_loop(self.engine, str(run.pk), 2)
+
+        epochs = [
+            c.args[0]
+            for c in broadcast.call_args_list
+            if c.args[0]["type"] == "training.epoch_complete"
+        ]
+        self.assertEqual(len(epochs), 2)
+        for msg in epochs:
+            self.assertGreater(msg["tokens_per_second"], 0)
+            self.assertGreater(msg["epoch_seconds"], 0)
+            self.assertEqual(set(msg["step_time_ms"]), set(TRAIN_PHASES))
+            self.assertGreater(msg["step_time_ms"]["forward"], 0)
+
+        steps = 2 * self.engine.data_loader.num_batches
+        self.assertEqual(
+            metrics.get("minillm_train_steps_total", config_id="metrics-config"), steps
+        )
+        self.assertEqual(
+            metrics.get("minillm_train_tokens_total", config_id="metrics-config"),
+            steps * 4 * 16,
+        )
+
+    def test_generation_metrics_and_endpoint(self):
+        resp = self.client.post(
+            "/api/generate/",
+            {"prompt": "Le", "max_tokens": 5, "min_new_tokens": 5, "config_id": "metrics-config"},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            metrics.get("minillm_generation_tokens_total", config_id="metrics-config"), 5
+        )
+
+        resp = self.client.get("/api/metrics/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp["Content-Type"].startswith("text/plain"))
+        body = resp.content.decode("utf-8")
+        self.assertIn("# TYPE minillm_generation_ttft_seconds summary", body)
+        self.assertIn('minillm_generation_ttft_seconds_count{config_id="metrics-config"} 1', body)
+        self.assertIn('minillm_generation_requests_total{config_id="metrics-config"} 1', body)
+        self.assertIn("minillm_models_loaded 1", body)
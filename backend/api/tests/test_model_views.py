@@ -165,3 +165,43 @@ class TestModelAPI(TestCase):
         self.assertEqual(resp.status_code, 204)
         self.assertFalse(TrainedModel.objects.filter(pk=model_id).exists())
         self.assertFalse(os.path.exists(weights_path))
+
+    def test_quantize_model(self):
+        engine = ModelRegistry().get_engine(str(self.db_config.pk))
+        version = engine.weight_version
+        resp = self.client.post(f"/api/models/active/{self.db_config.pk}/quantize/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["quantized_layers"], 7)
+        self.assertTrue(engine.is_quantized)
+        self.assertIsNone(engine.optimizer)
+        self.assertNotEqual(engine.weight_version, version)
+
+        resp = self.client.get(f"/api/models/current/?config_id={self.db_config.pk}")
+        self.assertTrue(resp.data["quantized"])
+        text = engine.generate_text("Le", max_tokens=5, sampling_strategy="greedy")
+        self.assertIsInstance(text, str)
+
+    def test_quantize_model_not_found(self):
+        resp = self.client.post(f"/api/models/active/{uuid.uuid4()}/quantize/")
+        self.assertEqual(resp.status_code, 404)
+
+    def test_load_model_quantized(self):
+        resp = self.client.post(
+            "/api/models/save/",
+            {"name": "int8", "config_id": str(self.db_config.pk)},
+            format="json",
+        )
+        model_id = resp.data["id"]
+        try:
+            resp = self.client.post(
+                f"/api/models/{model_id}/load/", {"quantize": True}, format="json"
+            )
+            self.assertEqual(resp.status_code, 200)
+            self.assertTrue(resp.data["quantized"])
+            engine = ModelRegistry().get_engine(str(self.db_config.pk))
+            self.assertTrue(engine.is_quantized)
+            self.assertIsNone(engine.optimizer)
+        finally:
+            model = TrainedModel.objects.get(pk=model_id)
+            if os.path.exists(model.weights_path):
+                os.unlink(model.weights_path)
@@ -0,0 +1,102 @@
+from unittest import mock
+
+import numpy as np
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.services.model_registry import ModelRegistry
+from api.services.payload_encoding import (
+    decode_array,
+    encode_array,
+    msgpack,
+    pack_ws_message,
+    unpack_ws_message,
+    wants_msgpack,
+)
+from config import Config
+
+
+class TestEncodeArray(TestCase):
+    def test_json_is_nested_list(self):
+        arr = np.arange(6, dtype=np.float64).reshape(2, 3)
+        self.assertEqual(encode_array(arr, "json"), [[0.0, 1.0, 2.0], [3.0, 4.0, 5.0]])
+
+    def test_f32_roundtrip(self):
+        arr = np.random.randn(4, 5)
+        payload = encode_array(arr, "f32")
+        self.assertEqual(payload["dtype"], "float32")
+        self.assertEqual(payload["shape"], [4, 5])
+        np.testing.assert_allclose(decode_array(payload), arr, rtol=1e-6)
+
+    def test_f16_roundtrip_and_size(self):
+        arr = np.random.randn(64, 64)
+        payload = encode_array(arr, "f16")
+        np.testing.assert_allclose(decode_array(payload), arr, atol=2e-3, rtol=1e-3)
+        # 2 octets/valeur, +33% base64
+        self.assertLess(len(payload["data"]), 64 * 64 * 2 * 4 // 3 + 8)
+
+    def test_ws_json_roundtrip(self):
+        kwargs = pack_ws_message({"type": "token", "token": "a"}, use_msgpack=False)
+        self.assertIn("text_data", kwargs)
+        self.assertEqual(unpack_ws_message(text_data=kwargs["text_data"])["token"], "a")
+
+    def test_ws_msgpack_roundtrip(self):
+        if msgpack is None:
+            self.skipTest("msgpack non installé")
+        self.assertTrue(wants_msgpack({"query_string": b"encoding=msgpack"}))
+        self.assertFalse(wants_msgpack({"query_string": b""}))
+        kwargs = pack_ws_message({"type": "token", "token": "é"}, use_msgpack=True)
+        self.assertIsInstance(kwargs["bytes_data"], bytes)
+        self.assertEqual(unpack_ws_message(bytes_data=kwargs["bytes_data"])["token"], "é")
+
+    def test_ws_binary_frame_without_msgpack(self):
+        with mock.patch("api.services.payload_encoding.msgpack", None):
+            self.assertEqual(unpack_ws_message(bytes_data=b'{"prompt": "Le"}')["prompt"], "Le")
+            with self.assertRaises(ValueError):
+                unpack_ws_message(bytes_data=b"\x81\xa6prompt")
+
+
+class TestEncodedEndpoints(TestCase):
+    def setUp(self):
+        ModelRegistry._instance = None
+        self.client = APIClient()
+        engine = ModelRegistry().get_engine("test-config")
+        engine.initialize(
+            Config(d_model=32, n_heads=2, n_layers=1, d_ff=64, seq_len=16, seed=42),
+            "Le chat mange le poisson. Le chien mange la viande.",
+        )
+
+    def tearDown(self):
+        ModelRegistry().clear()
+        ModelRegistry._instance = None
+
+    def test_weights_default_json(self):
+        resp = self.client.get("/api/eval/weights/")
+        self.assertIsInstance(resp.data["matrices"][0]["values"], list)
+
+    def test_weights_query_param(self):
+        resp = self.client.get("/api/eval/weights/?encoding=f16")
+        m = resp.data["matrices"][0]
+        self.assertEqual(m["values"]["dtype"], "float16")
+        self.assertEqual(decode_array(m["values"]).shape, (m["rows"], m["cols"]))
+
+    def test_weights_accept_header(self):
+        resp = self.client.get("/api/eval/weights/", HTTP_ACCEPT="application/vnd.minillm.f32+json")
+        self.assertEqual(resp.data["matrices"][0]["values"]["dtype"], "float32")
+
+    def test_encodings_cached_separately(self):
+        r1 = self.client.get("/api/eval/weights/")
+        r2 = self.client.get("/api/eval/weights/?encoding=f16")
+        self.assertNotEqual(r1["ETag"], r2["ETag"])
+        self.assertIsInstance(r1.data["matrices"][0]["values"], list)
+
+    def test_attention_encoded(self):
+        resp = self.client.post(
+            "/api/eval/attention/", {"text": "Le chat", "encoding": "f32"}, format="json"
+        )
+        item = resp.data["attention"][0]
+        self.assertEqual(decode_array(item["weights"]).shape, (7, 7))
+
+    def test_unknown_encoding_falls_back_to_json(self):
+        resp = self.client.get("/api/eval/weights/?encoding=bogus")
+        self.assertIsInstance(resp.data["matrices"][0]["values"], list)
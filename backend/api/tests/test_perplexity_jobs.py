@@ -0,0 +1,158 @@
+import time
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.models import TrainingData
+from api.services.model_registry import ModelRegistry
+from api.services.result_cache import ResultCache, eval_cache
+from config import Config
+
+CORPUS = "\n".join(f"{a}+{b}={a + b}" for a in range(10) for b in range(10))
+
+
+class TestSlidingPerplexityAPI(TestCase):
+    """Perplexité par fenêtres glissantes en job background."""
+
+    def setUp(self):
+        ModelRegistry._instance = None
+        self.client = APIClient()
+        self.engine = ModelRegistry().get_engine("test-config")
+        self.engine.initialize(
+            Config(d_model=32, n_heads=2, n_layers=1, d_ff=64, seq_len=16, seed=42), CORPUS
+        )
+
+    def tearDown(self):
+        ModelRegistry().clear()
+        ModelRegistry._instance = None
+
+    def _wait(self, job_id, timeout=10.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            resp = self.client.get(f"/api/eval/perplexity/jobs/{job_id}/")
+            if resp.data["status"] != "running":
+                return resp.data
+            time.sleep(0.05)
+        self.fail("job non terminé")
+
+    def test_long_text_job_then_cached(self):
+        resp = self.client.post(
+            "/api/eval/perplexity/long/", {"text": CORPUS, "stride": 8}, format="json"
+        )
+        self.assertEqual(resp.status_code, 202)
+        job = self._wait(resp.data["job_id"])
+        self.assertEqual(job["status"], "completed")
+        result = job["result"]
+        self.assertGreater(result["n_tokens"], self.engine.config.seq_len)
+        self.assertGreater(result["perplexity"], 1.0)
+
+        resp = self.client.post(
+            "/api/eval/perplexity/long/", {"text": CORPUS, "stride": 8}, format="json"
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["result"], result)
+
+    def test_training_data_record(self):
+        data = TrainingData.objects.create(
+            name="holdout",
+            original_filename="holdout.txt",
+            file_type="txt",
+            file_size=len(CORPUS),
+            extracted_text=CORPUS,
+            char_count=len(CORPUS),
+        )
+        resp = self.client.post(
+            "/api/eval/perplexity/long/", {"data_id": str(data.pk)}, format="json"
+        )
+        self.assertEqual(resp.status_code, 202)
+        self.assertEqual(resp.data["source"], f"data:{data.pk}")
+        job = self._wait(resp.data["job_id"])
+        self.assertEqual(job["status"], "completed")
+        self.assertEqual(job["windows_done"], job["windows_total"])
+
+    def test_training_data_not_ready(self):
+        data = TrainingData.objects.create(
+            name="pending",
+            original_filename="pending.txt",
+            file_type="txt",
+            file_size=len(CORPUS),
+            status=TrainingData.Status.PENDING,
+        )
+        resp = self.client.post(
+            "/api/eval/perplexity/long/", {"data_id": str(data.pk)}, format="json"
+        )
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.data["status"], "pending")
+
+    def test_weight_change_invalidates_cache(self):
+        resp = self.client.post("/api/eval/perplexity/long/", {"text": CORPUS}, format="json")
+        self._wait(resp.data["job_id"])
+        self.engine.bump_weight_version()
+        resp = self.client.post("/api/eval/perplexity/long/", {"text": CORPUS}, format="json")
+        self.assertEqual(resp.status_code, 202)
+        self._wait(resp.data["job_id"])
+
+    def test_weights_changed_during_job_not_cached(self):
+        version = self.engine.weight_version
+        forward = self.engine.model.forward
+        calls = []
+
+        def forward_then_step(x):
+            # Simule un pas d'entraînement entre deux batches de l'évaluation
+            calls.append(1)
+            if len(calls) == 1:
+                self.engine.bump_weight_version()
+            return forward(x)
+
+        with mock.patch.object(self.engine.model, "forward", side_effect=forward_then_step):
+            resp = self.client.post(
+                "/api/eval/perplexity/long/", {"text": CORPUS, "batch_size": 2}, format="json"
+            )
+            job = self._wait(resp.data["job_id"])
+        self.assertGreater(len(calls), 1)
+        self.assertEqual(job["status"], "completed")
+        self.assertTrue(job["result"]["weights_changed"])
+        self.assertNotIn("weight_version", job["result"])
+        key = ResultCache.make_key(
+            "test-config", version, "perplexity", (job["source"], job["stride"])
+        )
+        self.assertIsNone(eval_cache.get(key))
+
+    def test_out_of_vocab_fails_job(self):
+        resp = self.client.post("/api/eval/perplexity/long/", {"text": "@@@"}, format="json")
+        job = self._wait(resp.data["job_id"])
+        self.assertEqual(job["status"], "failed")
+        self.assertTrue(job["error"])
+
+    def test_equivalent_strides_share_cache(self):
+        resp = self.client.post("/api/eval/perplexity/long/", {"text": CORPUS}, format="json")
+        self.assertEqual(resp.data["stride"], 16)
+        job = self._wait(resp.data["job_id"])
+        for stride in (0, 16, 1000):
+            resp = self.client.post(
+                "/api/eval/perplexity/long/", {"text": CORPUS, "stride": stride}, format="json"
+            )
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp.data["result"], job["result"])
+
+    def test_non_numeric_stride_or_batch_size(self):
+        for body in ({"stride": "abc"}, {"batch_size": "abc"}):
+            resp = self.client.post(
+                "/api/eval/perplexity/long/", {"text": CORPUS, **body}, format="json"
+            )
+            self.assertEqual(resp.status_code, 400)
+
+    def test_missing_source(self):
+        resp = self.client.post("/api/eval/perplexity/long/", {}, format="json")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_unknown_data_id(self):
+        resp = self.client.post(
+            "/api/eval/perplexity/long/", {"data_id": "not-a-uuid"}, format="json"
+        )
+        self.assertEqual(resp.status_code, 404)
+
+    def test_unknown_job(self):
+        resp = self.client.get("/api/eval/perplexity/jobs/nope/")
+        self.assertEqual(resp.status_code, 404)
@@ -0,0 +1,121 @@
+import numpy as np
+from django.test import TestCase
+
+from api.services.engine_service import EngineService
+from api.services.prefix_cache import PrefixCache, prefix_cache
+from config import Config
+from training.metrics import metrics
+
+
+def _kv(tokens, n_layers=2):
+    """Faux K/V : la valeur à la position t est le token t."""
+    arr = np.array(tokens, dtype=np.float64).reshape(1, 1, -1, 1)
+    return [(arr, arr + 0.5) for _ in range(n_layers)]
+
+
+class TestPrefixCache(TestCase):
+    def test_longest_prefix_from_any_entry(self):
+        cache = PrefixCache()
+        cache.insert("m", 1, [1, 2, 3, 4], _kv([1, 2, 3, 4]))
+        cache.insert("m", 1, [1, 2, 7], _kv([1, 2, 7]))
+
+        n, kv = cache.lookup("m", 1, [1, 2, 3, 9, 9])
+        self.assertEqual(n, 3)
+        np.testing.assert_array_equal(kv[0][0].ravel(), [1, 2, 3])
+        np.testing.assert_array_equal(kv[1][1].ravel(), [1.5, 2.5, 3.5])
+        # Préfixe strict d'une entrée plus longue : couvert sans entrée propre
+        self.assertEqual(cache.lookup("m", 1, [1, 2])[0], 2)
+        self.assertEqual(cache.lookup("m", 1, [1, 2, 7, 5])[0], 3)
+        self.assertEqual(cache.lookup("m", 1, [5, 1]), (0, None))
+
+    def test_keyed_by_weight_version(self):
+        cache = PrefixCache()
+        cache.insert("m", 1, [1, 2, 3], _kv([1, 2, 3]))
+        self.assertEqual(cache.lookup("m", 2, [1, 2, 3]), (0, None))
+        # Nouvelle version du même modèle : les anciennes entrées sont libérées
+        cache.insert("m", 2, [4, 5], _kv([4, 5]))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.lookup("m", 1, [1, 2, 3]), (0, None))
+        cache.insert("other", 1, [1, 2], _kv([1, 2]))
+        self.assertEqual(len(cache), 2)
+        cache.invalidate("m")
+        self.assertEqual(len(cache), 1)
+
+    def test_covered_sequence_not_duplicated(self):
+        cache = PrefixCache()
+        cache.insert("m", 1, [1, 2, 3], _kv([1, 2, 3]))
+        cache.insert("m", 1, [1, 2], _kv([1, 2]))
+        self.assertEqual(len(cache), 1)
+
+    def test_lru_eviction_under_byte_cap(self):
+        entry_bytes = sum(K.nbytes + V.nbytes for K, V in _kv([0, 0]))
+        cache = PrefixCache(max_bytes=2 * entry_bytes)
+        cache.insert("m", 1, [1, 2], _kv([1, 2]))
+        cache.insert("m", 1, [3, 4], _kv([3, 4]))
+        cache.lookup("m", 1, [1, 2])  # [1, 2] redevient la plus récente
+        cache.insert("m", 1, [5, 6], _kv([5, 6]))
+
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.nbytes, cache.max_bytes)
+        self.assertEqual(cache.lookup("m", 1, [3, 4]), (0, None))
+        self.assertEqual(cache.lookup("m", 1, [1, 2])[0], 2)
+        self.assertEqual(cache.lookup("m", 1, [5, 6])[0], 2)
+
+    def test_eviction_prunes_split_edges(self):
+        cache = PrefixCache()
+        cache.insert("m", 1, [1, 2, 3], _kv([1, 2, 3]))
+        cache.insert("m", 1, [1, 2, 4], _kv([1, 2, 4]))
+        cache._remove(next(iter(cache._entries)))
+        self.assertEqual(cache.lookup("m", 1, [1, 2, 3])[0], 2)
+        self.assertEqual(cache.lookup("m", 1, [1, 2, 4])[0], 3)
+
+
+class TestEnginePrefixReuse(TestCase):
+    corpus = "Le chat mange le poisson. Le chien mange la viande."
+
+    def setUp(self):
+        prefix_cache.invalidate()
+        self.engine = EngineService("prefix-test")
+        config = Config(d_model=32, n_heads=2, n_layers=1, d_ff=64, seq_len=64, seed=42)
+        self.engine.initialize(config, self.corpus)
+
+    def _counter(self, name):
+        return metrics.get(name, config_id="prefix-test")
+
+    def test_shared_prompt_prefix_is_not_recomputed(self):
+        self.engine.generate_text("Le chat mange", max_tokens=3, sampling_strategy="greedy")
+        cached = self._counter("minillm_generation_cached_prefix_tokens_total")
+        computed = self._counter("minillm_generation_prefill_tokens_total")
+
+        self.engine.generate_text("Le chat mange la", max_tokens=3, sampling_strategy="greedy")
+        n_prompt = len(self.engine._prompt_tokens("Le chat mange la"))
+        reused = self._counter("minillm_generation_cached_prefix_tokens_total") - cached
+        self.assertEqual(reused, len(self.engine._prompt_tokens("Le chat mange")))
+        self.assertEqual(
+            self._counter("minillm_generation_prefill_tokens_total") - computed,
+            n_prompt - reused,
+        )
+
+    def test_cached_generation_matches_full_forward(self):
+        prompt = "Le chien mange"
+        first = self.engine.generate_text(prompt, max_tokens=8, sampling_strategy="greedy")
+        again = self.engine.generate_text(prompt, max_tokens=8, sampling_strategy="greedy")
+        self.assertEqual(first, again)
+
+        # Référence sans cache : forward complet à chaque pas
+        model, tok = self.engine.model, self.engine.tokenizer
+        tokens = self.engine._prompt_tokens(prompt)
+        for _ in range(8):
+            logits = model.forward(np.array([tokens]), last_only=True)
+            nxt = int(np.argmax(logits[0, -1]))
+            if nxt == tok.eos_id:
+                break
+            tokens.append(nxt)
+        self.assertEqual(first, tok.decode(tokens))
+
+    def test_new_weights_invalidate_prefix(self):
+        self.engine.generate_text("Le chat", max_tokens=2)
+        cached = self._counter("minillm_generation_cached_prefix_tokens_total")
+        self.engine.bump_weight_version()
+        self.engine.generate_text("Le chat", max_tokens=2)
+        self.assertEqual(self._counter("minillm_generation_cached_prefix_tokens_total"), cached)
@@ -0,0 +1,127 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.services.engine_service import EngineService
+from api.services.model_registry import ModelRegistry
+from api.services.result_cache import ResultCache, eval_cache
+from config import Config
+
+
+def _small_config():
+    return Config(d_model=32, n_heads=2, n_layers=1, d_ff=64, seq_len=16, batch_size=4, seed=42)
+
+
+class TestWeightVersion(TestCase):
+    """Le compteur de version change à chaque modification des poids."""
+
+    corpus = "Le chat mange le poisson. Le chien mange la viande."
+
+    def test_initialize_bumps_version(self):
+        engine = EngineService()
+        self.assertEqual(engine.weight_version, 0)
+        engine.initialize(_small_config(), self.corpus)
+        v1 = engine.weight_version
+        self.assertGreater(v1, 0)
+        engine.initialize(_small_config(), self.corpus)
+        self.assertNotEqual(engine.weight_version, v1)
+
+    def test_versions_unique_across_engines(self):
+        e1, e2 = EngineService(), EngineService()
+        e1.initialize(_small_config(), self.corpus)
+        e2.initialize(_small_config(), self.corpus)
+        self.assertNotEqual(e1.weight_version, e2.weight_version)
+
+    def test_load_bumps_version(self):
+        import os
+        import tempfile
+
+        engine = EngineService()
+        engine.initialize(_small_config(), self.corpus)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "w.npz")
+            vocab = engine.save_weights(path)
+            before = engine.weight_version
+            engine.load_weights(path, vocab, _small_config())
+        self.assertNotEqual(engine.weight_version, before)
+
+
+class TestResultCache(TestCase):
+    def test_lru_eviction(self):
+        cache = ResultCache(max_entries=2)
+        for i in range(3):
+            cache.put(("c", i, "x", ()), i)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(("c", 0, "x", ())))
+        self.assertEqual(cache.get(("c", 2, "x", ())), 2)
+
+    def test_invalidate_by_config(self):
+        cache = ResultCache()
+        cache.put(("a", 1, "x", ()), 1)
+        cache.put(("b", 1, "x", ()), 2)
+        cache.invalidate("a")
+        self.assertIsNone(cache.get(("a", 1, "x", ())))
+        self.assertEqual(cache.get(("b", 1, "x", ())), 2)
+
+    def test_etag_depends_on_version(self):
+        k1 = ResultCache.make_key("c", 1, "weights")
+        k2 = ResultCache.make_key("c", 2, "weights")
+        self.assertNotEqual(ResultCache.etag_for(k1), ResultCache.etag_for(k2))
+
+
+class TestEvaluationCaching(TestCase):
+    """Les polls identiques sont servis depuis le cache, avec ETag/304."""
+
+    def setUp(self):
+        ModelRegistry._instance = None
+        self.client = APIClient()
+        self.engine = ModelRegistry().get_engine("test-config")
+        self.engine.initialize(_small_config(), "Le chat mange le poisson. Le chien mange.")
+
+    def tearDown(self):
+        ModelRegistry().clear()
+        ModelRegistry._instance = None
+
+    def test_identical_polls_computed_once(self):
+        with mock.patch.object(
+            self.engine, "get_embedding_vectors_2d", wraps=self.engine.get_embedding_vectors_2d
+        ) as spy:
+            r1 = self.client.get("/api/eval/embeddings/")
+            r2 = self.client.get("/api/eval/embeddings/")
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(r1.data, r2.data)
+        self.assertEqual(r1["ETag"], r2["ETag"])
+
+    def test_version_bump_recomputes(self):
+        r1 = self.client.get("/api/eval/weights/")
+        self.engine.bump_weight_version()
+        with mock.patch.object(
+            self.engine, "get_weight_matrices", wraps=self.engine.get_weight_matrices
+        ) as spy:
+            r2 = self.client.get("/api/eval/weights/")
+        self.assertEqual(spy.call_count, 1)
+        self.assertNotEqual(r1["ETag"], r2["ETag"])
+
+    def test_if_none_match_returns_304(self):
+        r1 = self.client.get("/api/eval/parameters/")
+        self.assertEqual(r1.status_code, 200)
+        r2 = self.client.get("/api/eval/parameters/", HTTP_IF_NONE_MATCH=r1["ETag"])
+        self.assertEqual(r2.status_code, 304)
+        self.assertEqual(r2["ETag"], r1["ETag"])
+
+    def test_stale_etag_returns_payload(self):
+        r1 = self.client.get("/api/eval/parameters/")
+        self.engine.bump_weight_version()
+        r2 = self.client.get("/api/eval/parameters/", HTTP_IF_NONE_MATCH=r1["ETag"])
+        self.assertEqual(r2.status_code, 200)
+        self.assertIn("parameters", r2.data)
+
+    def test_unload_invalidates(self):
+        self.client.get("/api/eval/embeddings/")
+        self.assertGreater(len(eval_cache), 0)
+        ModelRegistry().remove("test-config")
+        self.assertEqual(
+            [k for k in eval_cache._entries if k[0] == "test-config"],
+            [],
+        )
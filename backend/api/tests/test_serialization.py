@@ -11,6 +11,7 @@ from api.services.serialization import (
     save_tokenizer_vocab,
 )
 from config import Config
+from modules.quantization import is_quantized, quantize_model
 from modules.tokenizer import CharTokenizer
 from modules.transformer_model import TransformerModel
 
@@ -80,6 +81,53 @@ class TestSerialization(TestCase):
         finally:
             os.unlink(path)
 
+    def test_tied_embeddings_single_tensor(self):
+        """Avec tie_embeddings, output_head n'est pas sérialisé séparément."""
+        config = Config(
+            d_model=32,
+            n_heads=2,
+            n_layers=1,
+            d_ff=64,
+            seq_len=16,
+            vocab_size=self.tokenizer.vocab_size,
+            tie_embeddings=True,
+        )
+        model = TransformerModel(config)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "tied.npz")
+            save_model_weights(model, path)
+            saved = np.load(path)
+            self.assertEqual(sum(saved[k].size for k in saved.files), model.count_parameters())
+
+            restored = TransformerModel(config)
+            restored.embedding.W[:] = 0
+            load_model_weights(restored, path)
+            np.testing.assert_array_equal(restored.output_head.W, model.output_head.W)
+
+    def test_load_mha_checkpoint_into_grouped_query(self):
+        """Un checkpoint multi-head se charge en GQA en moyennant les têtes K/V."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "mha.npz")
+            save_model_weights(self.model, path)
+
+            config = Config(
+                d_model=32,
+                n_heads=2,
+                n_kv_heads=1,
+                n_layers=1,
+                d_ff=64,
+                seq_len=16,
+                vocab_size=self.tokenizer.vocab_size,
+            )
+            gqa = TransformerModel(config)
+            load_model_weights(gqa, path)
+
+            src, dst = self.model.blocks[0].attention, gqa.blocks[0].attention
+            np.testing.assert_array_equal(dst.W_q.W, src.W_q.W)
+            expected = src.W_k.W.reshape(32, 1, 2, 16).mean(axis=2).reshape(32, 16)
+            np.testing.assert_allclose(dst.W_k.W, expected)
+            self.assertEqual(gqa.forward(np.array([[1, 2, 3]])).shape[-1], config.vocab_size)
+
     def test_save_tokenizer_vocab(self):
         """Le vocab exporté contient tous les caractères (sans BOS/EOS)."""
         vocab_data = save_tokenizer_vocab(self.tokenizer)
@@ -152,3 +200,21 @@ class TestSerialization(TestCase):
             )
         finally:
             os.unlink(path)
+
+    def test_quantized_weights_roundtrip(self):
+        """Un checkpoint int8 quantifie le modèle qui le charge."""
+        quantize_model(self.model)
+        with tempfile.NamedTemporaryFile(suffix=".npz", delete=False) as f:
+            path = f.name
+        try:
+            save_model_weights(self.model, path)
+            self.assertEqual(np.load(path)["module_6_W_int8"].dtype, np.int8)
+
+            np.random.seed(99)
+            new_model = TransformerModel(self.config)
+            load_model_weights(new_model, path)
+            self.assertTrue(is_quantized(new_model))
+            x = np.array([[1, 2, 3, 4]])
+            np.testing.assert_array_equal(new_model.forward(x), self.model.forward(x))
+        finally:
+            os.unlink(path)
@@ -1,6 +1,8 @@
 import time
+from unittest import mock
 
-from django.test import TransactionTestCase
+import numpy as np
+from django.test import TestCase, TransactionTestCase
 
 from api.models import ModelConfig, TrainingRun
 from api.services.engine_service import EngineService
@@ -148,3 +150,66 @@ class TestTrainingService(TransactionTestCase):
         )
         with self.assertRaises(RuntimeError):
             self.training_svc.start(self.engine, str(run2.pk), 5)
+
+
+class TestLazyAdamTraining(TestCase):
+    """Entraînement avec lazy_adam activé depuis la ModelConfig."""
+
+    corpus = "Le chat mange le poisson. Le chien mange la viande. " * 5
+
+    def setUp(self):
+        self.db_config = ModelConfig.objects.create(
+            name="lazy_adam",
+            d_model=16,
+            n_heads=2,
+            n_layers=1,
+            d_ff=32,
+            seq_len=8,
+            batch_size=2,
+            weight_decay=0.01,
+            lazy_adam=True,
+        )
+        self.engine = EngineService()
+        self.engine.initialize(self.db_config.to_engine_config(), self.corpus)
+        self.svc = TrainingService(config_id=str(self.db_config.pk))
+        self.run = TrainingRun.objects.create(
+            config=self.db_config, total_epochs=2, status="pending"
+        )
+
+    def _assert_flushed(self):
+        optimizer = self.engine.optimizer
+        self.assertTrue(optimizer.lazy)
+        for last in optimizer.last_step.values():
+            self.assertTrue(np.all(last == optimizer.t))
+
+    def test_trains_and_flushes(self):
+        with (
+            mock.patch.object(self.svc, "_broadcast"),
+            mock.patch.object(self.svc, "_auto_save"),
+        ):
+            self.svc._train_loop(self.engine, str(self.run.pk), 2)
+        self.run.refresh_from_db()
+        self.assertEqual(self.run.status, "completed")
+        self.assertEqual(len(self.svc.loss_history), 2)
+        self._assert_flushed()
+
+    def test_flushes_when_training_fails(self):
+        loader = self.engine.data_loader
+        next_batch = loader.next_batch
+        calls = []
+
+        def failing_next_batch():
+            calls.append(1)
+            if len(calls) > 3:
+                raise RuntimeError("boom")
+            return next_batch()
+
+        with (
+            mock.patch.object(self.svc, "_broadcast"),
+            mock.patch.object(loader, "next_batch", side_effect=failing_next_batch),
+        ):
+            self.svc._train_loop(self.engine, str(self.run.pk), 2)
+        self.run.refresh_from_db()
+        self.assertEqual(self.run.status, "failed")
+        self.assertEqual(self.engine.optimizer.t, 3)
+        self._assert_flushed()
@@ -96,6 +96,18 @@ class TestTrainingAPI(TransactionTestCase):
         self.assertEqual(resp.status_code, 400)
         self.assertIn("Corpus trop petit", resp.data["error"])
 
+    def test_training_start_ignores_unready_data(self):
+        """Les fichiers dont l'extraction n'est pas terminée sont exclus du corpus."""
+        self.data.status = TrainingData.Status.PROCESSING
+        self.data.save()
+        resp = self.client.post(
+            "/api/training/start/",
+            {"config_id": str(self.config.pk)},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("Corpus trop petit", resp.data["error"])
+
     def test_training_stop(self):
         # Start first
         self.client.post(
@@ -215,3 +227,14 @@ class TestTrainingAPI(TransactionTestCase):
             format="json",
         )
         time.sleep(1)
+
+    def test_training_continue_refused_when_quantized(self):
+        engine = ModelRegistry().get_engine(str(self.config.pk))
+        engine.initialize(self.config.to_engine_config(), self.data.extracted_text)
+        engine.quantize()
+        resp = self.client.post(
+            "/api/training/start/",
+            {"config_id": str(self.config.pk), "continue_training": True},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 409)
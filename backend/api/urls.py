@@ -13,7 +13,9 @@ from api.views.data_views import (
     DataDetailView,
     DataListView,
     config_data_link,
+    corpus_text,
     corpus_view,
+    data_retry,
     data_sample,
     data_toggle,
     data_upload,
@@ -25,6 +27,9 @@ from api.views.evaluation_views import (
     eval_generation_weights,
     eval_parameters,
     eval_perplexity,
+    eval_perplexity_job,
+    eval_perplexity_long,
+    eval_profile,
     eval_tokenize,
     eval_weight_matrices,
 )
@@ -35,12 +40,14 @@ from api.views.generation_views import (
     chat_sessions,
     generate_text,
 )
+from api.views.metrics_views import metrics_view
 from api.views.model_views import (
     ModelDeleteView,
     ModelListView,
     active_models,
     current_model_info,
     model_load,
+    model_quantize,
     model_save,
     unload_model,
 )
@@ -75,8 +82,10 @@ urlpatterns = [
     path("data/upload/", data_upload, name="data-upload"),
     path("data/sample/", data_sample, name="data-sample"),
     path("data/corpus/", corpus_view, name="data-corpus"),
+    path("data/corpus/text/", corpus_text, name="data-corpus-text"),
     path("data/<uuid:pk>/", DataDetailView.as_view(), name="data-detail"),
     path("data/<uuid:pk>/toggle/", data_toggle, name="data-toggle"),
+    path("data/<uuid:pk>/retry/", data_retry, name="data-retry"),
     # Training
     path("training/initialize/", model_initialize, name="model-initialize"),
     path("training/start/", training_start, name="training-start"),
@@ -96,6 +105,7 @@ urlpatterns = [
     path("models/<uuid:pk>/load/", model_load, name="model-load"),
     path("models/active/", active_models, name="models-active"),
     path("models/active/<uuid:config_id>/", unload_model, name="model-unload"),
+    path("models/active/<uuid:config_id>/quantize/", model_quantize, name="model-quantize"),
     # Generation / Chat
     path("generate/", generate_text, name="generate"),
     path("chat/sessions/", chat_sessions, name="chat-sessions"),
@@ -105,11 +115,16 @@ urlpatterns = [
     # Evaluation
     path("eval/attention/", eval_attention, name="eval-attention"),
     path("eval/perplexity/", eval_perplexity, name="eval-perplexity"),
+    path("eval/perplexity/long/", eval_perplexity_long, name="eval-perplexity-long"),
+    path("eval/perplexity/jobs/<str:job_id>/", eval_perplexity_job, name="eval-perplexity-job"),
     path("eval/embeddings/", eval_embeddings, name="eval-embeddings"),
     path("eval/parameters/", eval_parameters, name="eval-parameters"),
     path("eval/weights/", eval_weight_matrices, name="eval-weights"),
     path("eval/generation-weights/", eval_generation_weights, name="eval-generation-weights"),
     path("eval/tokenize/", eval_tokenize, name="eval-tokenize"),
+    path("eval/profile/", eval_profile, name="eval-profile"),
+    # Metrics (Prometheus)
+    path("metrics/", metrics_view, name="metrics"),
     # Documentation
     path("docs/modules/", module_list, name="docs-modules"),
     path("docs/modules/<slug:slug>/", module_detail, name="docs-module-detail"),
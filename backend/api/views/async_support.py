@@ -0,0 +1,82 @@
+"""@async_api_view : l'équivalent async de @api_view de DRF.
+
+DRF ne sait pas exécuter une vue coroutine. Ce décorateur garde son
+comportement (parsing, authentification, négociation du rendu, gestion
+des exceptions) en exécutant ces étapes synchrones via sync_to_async,
+puis attend la vue async. Le thread des vues sync et la boucle ASGI restent
+libres pendant le calcul, délégué par la vue à run_inference().
+
+QueueFullError devient une réponse 429 avec Retry-After, InferenceTimeoutError une 504.
+"""
+
+import functools
+
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from api.services.inference_pool import InferenceTimeoutError, QueueFullError
+
+
+def async_api_view(http_method_names, renderer_classes=None):
+    """Décore `async def view(request, *args, **kwargs)` -> Response.
+
+    request est une Request DRF déjà authentifiée et dont le corps est
+    parsé : la vue peut lire request.data / request.user sans accès base.
+    Les autres accès ORM passent par les méthodes async (aget, acreate...)
+    ou sync_to_async.
+    """
+    allowed = [m.lower() for m in http_method_names]
+
+    def decorator(func):
+        cls = type(
+            f"{func.__name__}_view",
+            (APIView,),
+            {"http_method_names": allowed + ["options"]},
+        )
+        if renderer_classes is not None:
+            cls.renderer_classes = renderer_classes
+
+        def prepare(django_request, args, kwargs):
+            self = cls()
+            self.args, self.kwargs = args, kwargs
+            self.headers = self.default_response_headers
+            request = self.initialize_request(django_request, *args, **kwargs)
+            self.request = request
+            try:
+                self.initial(request, *args, **kwargs)
+                method = request.method.lower()
+                if method == "options":
+                    return self, request, self.options(request)
+                if method not in allowed:
+                    raise MethodNotAllowed(request.method)
+                request.data  # parse le corps hors de la boucle d'événements
+            except Exception as exc:
+                return self, request, self.handle_exception(exc)
+            return self, request, None
+
+        @functools.wraps(func)
+        async def view(django_request, *args, **kwargs):
+            self, request, response = await sync_to_async(prepare)(django_request, args, kwargs)
+            if response is None:
+                try:
+                    response = await func(request, *args, **kwargs)
+                except QueueFullError as exc:
+                    response = Response(
+                        {"error": str(exc)},
+                        status=429,
+                        headers={"Retry-After": str(exc.retry_after)},
+                    )
+                except InferenceTimeoutError as exc:
+                    response = Response({"error": str(exc)}, status=504)
+                except Exception as exc:
+                    response = await sync_to_async(self.handle_exception)(exc)
+            return self.finalize_response(request, response, *args, **kwargs)
+
+        # csrf_exempt() de Django 4.2 renverrait une vue sync : attribut direct
+        view.csrf_exempt = True
+        view.cls = cls
+        return view
+
+    return decorator
@@ -1,22 +1,31 @@
+import itertools
+
+from django.http import StreamingHttpResponse
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, parser_classes
 from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 
 from api.models import ConfigTrainingData, ModelConfig, TrainingData
-from api.serializers import TrainingDataSerializer
-from api.services.file_processor import extract_text, get_file_type
+from api.serializers import TrainingDataListSerializer, TrainingDataSerializer
+from api.services.file_processor import get_file_type
+from api.services.ingestion import ingestion
 
 
 class DataListView(generics.ListAPIView):
-    queryset = TrainingData.objects.all()
-    serializer_class = TrainingDataSerializer
+    queryset = TrainingData.objects.defer("charset")
+    serializer_class = TrainingDataListSerializer
 
 
 class DataDetailView(generics.RetrieveDestroyAPIView):
     queryset = TrainingData.objects.all()
     serializer_class = TrainingDataSerializer
 
+    def perform_destroy(self, instance):
+        if instance.text_file:
+            instance.text_file.delete(save=False)
+        instance.delete()
+
 
 @api_view(["POST"])
 @parser_classes([MultiPartParser])
@@ -30,20 +39,15 @@ def data_upload(request):
     except ValueError as e:
         return Response({"error": str(e)}, status=400)
 
-    try:
-        text = extract_text(file, file_type)
-        file.seek(0)  # Reset pour la sauvegarde
-    except Exception as e:
-        return Response({"error": f"Erreur d'extraction : {e}"}, status=400)
-
+    # Extraction en arrière-plan : le statut se suit sur data/<id>/ ou ws/data/
     data = TrainingData.objects.create(
         name=request.data.get("name", file.name),
         original_filename=file.name,
         file=file,
         file_type=file_type,
         file_size=file.size,
-        extracted_text=text,
-        char_count=len(text),
+        status=TrainingData.Status.PENDING,
+        progress=0.0,
     )
 
     # Auto-link to config if config_id is provided
@@ -59,7 +63,26 @@ def data_upload(request):
         except ModelConfig.DoesNotExist:
             pass
 
-    return Response(TrainingDataSerializer(data).data, status=201)
+    ingestion.submit(data.pk)
+    return Response(TrainingDataSerializer(data).data, status=202)
+
+
+@api_view(["POST"])
+def data_retry(request, pk):
+    """Relance l'extraction d'un fichier en échec (statut "failed")."""
+    try:
+        data = TrainingData.objects.get(pk=pk)
+    except TrainingData.DoesNotExist:
+        return Response({"error": "Fichier non trouvé"}, status=404)
+    if not data.file:
+        return Response({"error": "Aucun fichier à extraire"}, status=400)
+    if not ingestion.retry(data):
+        return Response(
+            {"error": "Seule une extraction en échec peut être relancée", "status": data.status},
+            status=409,
+        )
+    data.refresh_from_db()
+    return Response(TrainingDataSerializer(data).data, status=202)
 
 
 @api_view(["PATCH"])
@@ -147,13 +170,11 @@ def data_sample(request):
     return Response(TrainingDataSerializer(data).data, status=status.HTTP_201_CREATED)
 
 
-@api_view(["GET"])
-def corpus_view(request):
-    """Retourne le corpus fusionné.
+PREVIEW_CHARS = 10000
 
-    Si config_id est fourni, retourne les données liées à cette config.
-    Sinon, retourne les données globalement actives (fallback).
-    """
+
+def _corpus_queryset(request):
+    """Données du corpus : liées à config_id si fourni, sinon globalement actives."""
     config_id = request.query_params.get("config_id")
     if config_id:
         try:
@@ -168,15 +189,91 @@ def corpus_view(request):
             data_qs = TrainingData.objects.none()
     else:
         data_qs = TrainingData.objects.filter(is_active=True)
+    # Le texte en base n'est chargé que pour les fichiers effectivement lus
+    return data_qs.filter(status=TrainingData.Status.READY).defer("extracted_text")
 
-    texts = [d.extracted_text for d in data_qs]
-    corpus = "\n".join(texts)
+
+def iter_corpus(files, offset: int = 0, limit: int | None = None):
+    """Texte du corpus (fichiers joints par "\n") de offset à offset + limit.
+
+    Les fichiers entièrement avant offset sont sautés grâce à char_count,
+    sans être lus ; la lecture s'arrête dès que limit caractères sont rendus.
+    """
+    end = None if limit is None else offset + limit
+    pos = 0  # position du début du fichier courant dans le corpus
+    for i, data in enumerate(files):
+        if end is not None and pos >= end:
+            return
+        sep = "\n" if i < len(files) - 1 else ""
+        if pos + data.char_count + len(sep) <= offset:
+            pos += data.char_count + len(sep)
+            continue
+        for chunk in itertools.chain(data.iter_text(), [sep]):
+            lo, hi = max(offset - pos, 0), len(chunk)
+            if end is not None:
+                hi = min(hi, end - pos)
+            if lo < hi:
+                yield chunk[lo:hi]
+            pos += len(chunk)
+            if end is not None and pos >= end:
+                return
+
+
+@api_view(["GET"])
+def corpus_view(request):
+    """Statistiques et aperçu du corpus fusionné.
+
+    Si config_id est fourni, utilise les données liées à cette config.
+    Sinon, les données globalement actives (fallback). Les statistiques
+    viennent des champs calculés à l'ingestion : O(fichiers), pas
+    O(caractères). Le texte complet est servi par data/corpus/text/.
+    """
+    files = list(_corpus_queryset(request))
+    charset = set().union(*(d.charset for d in files))
+    if len(files) > 1:
+        charset.add("\n")  # séparateur entre fichiers
     return Response(
         {
-            "text": corpus[:10000],
-            "total_chars": len(corpus),
-            "unique_chars": len(set(corpus)) if corpus else 0,
-            "file_count": data_qs.count(),
-            "full_text": corpus,
+            "text": "".join(iter_corpus(files, limit=PREVIEW_CHARS)),
+            "total_chars": sum(d.char_count for d in files) + max(len(files) - 1, 0),
+            "unique_chars": len(charset),
+            "file_count": len(files),
+            "files": [
+                {
+                    "id": str(d.pk),
+                    "name": d.name,
+                    "char_count": d.char_count,
+                    "unique_chars": d.unique_chars,
+                }
+                for d in files
+            ],
         }
     )
+
+
+@api_view(["GET"])
+def corpus_text(request):
+    """Texte du corpus en flux text/plain, paginé par ?offset=&limit= (caractères).
+
+    Mêmes filtres que corpus_view. En-têtes : X-Total-Chars et
+    Content-Range (chars début-fin/total) de la page rendue.
+    """
+    try:
+        offset = max(int(request.query_params.get("offset", 0)), 0)
+        limit = request.query_params.get("limit")
+        limit = max(int(limit), 0) if limit is not None else None
+    except ValueError:
+        return Response({"error": "offset et limit doivent être des entiers"}, status=400)
+
+    files = list(_corpus_queryset(request))
+    total = sum(d.char_count for d in files) + max(len(files) - 1, 0)
+    stop = total if limit is None else min(total, offset + limit)
+    response = StreamingHttpResponse(
+        iter_corpus(files, offset, limit), content_type="text/plain; charset=utf-8"
+    )
+    response["X-Total-Chars"] = str(total)
+    if offset < stop:
+        response["Content-Range"] = f"chars {offset}-{stop - 1}/{total}"
+    else:
+        response["Content-Range"] = f"chars */{total}"
+    return response
@@ -365,6 +365,12 @@ MODULES_DOC = [
                     "description": "Longueur max pour le masque causal",
                     "default": "512",
                 },
+                {
+                    "name": "n_kv_heads",
+                    "type": "int",
+                    "description": "Têtes K/V partagées par groupe de têtes de requête (1 = multi-query)",
+                    "default": "n_heads",
+                },
             ],
             "methods": [
                 {
@@ -395,12 +401,12 @@ MODULES_DOC = [
                 {
                     "name": "W_k",
                     "type": "Linear",
-                    "description": "Projection Key : (d_model, d_model)",
+                    "description": "Projection Key : (d_model, n_kv_heads * d_k)",
                 },
                 {
                     "name": "W_v",
                     "type": "Linear",
-                    "description": "Projection Value : (d_model, d_model)",
+                    "description": "Projection Value : (d_model, n_kv_heads * d_k)",
                 },
                 {
                     "name": "W_o",
@@ -434,7 +440,7 @@ MODULES_DOC = [
         "key_shapes": {
             "input": "(batch_size, seq_len, d_model)",
             "output": "(batch_size, seq_len, d_model)",
-            "parameters": "W_q, W_k, W_v, W_o: chacun (d_model, d_model)",
+            "parameters": "W_q, W_o: (d_model, d_model) ; W_k, W_v: (d_model, n_kv_heads * d_k)",
             "attention_weights": "(batch_size, n_heads, seq_len, seq_len)",
         },
         "data_flow": {
@@ -671,31 +677,32 @@ MODULES_DOC = [
         "class_interface": {
             "class_name": "CrossEntropyLoss",
             "parent_class": None,
-            "constructor": [],
+            "constructor": [
+                {
+                    "name": "chunk_size",
+                    "type": "int | None",
+                    "description": "Positions (B·T) traitées par bloc pour borner la mémoire (None = tout)",
+                },
+            ],
             "methods": [
                 {
                     "name": "forward",
                     "signature": "forward(logits: np.ndarray, targets: np.ndarray) -> float",
-                    "description": "Calcule la cross-entropy avec le trick log-sum-exp pour la stabilité",
+                    "description": "Calcule la cross-entropy (trick log-sum-exp) et, dans la même passe, le gradient",
                     "returns": "float (loss scalaire)",
                 },
                 {
                     "name": "backward",
                     "signature": "backward() -> np.ndarray",
-                    "description": "Retourne le gradient (softmax - one_hot) / N — point de départ de la rétropropagation",
+                    "description": "Retourne le gradient (softmax - one_hot) / N calculé au forward, sans copie — point de départ de la rétropropagation",
                     "returns": "(batch_size, seq_len, vocab_size)",
                 },
             ],
             "properties": [
                 {
-                    "name": "_cache_probs",
-                    "type": "np.ndarray",
-                    "description": "Probabilités softmax mises en cache pour le backward",
-                },
-                {
-                    "name": "_cache_targets",
+                    "name": "_grad",
                     "type": "np.ndarray",
-                    "description": "Targets mis en cache pour le backward",
+                    "description": "Buffer réutilisé où le forward écrit directement le gradient (softmax - one_hot) / N",
                 },
             ],
         },
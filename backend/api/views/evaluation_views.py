@@ -1,7 +1,19 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from api.models import TrainingData
+from api.services.evaluation_jobs import PerplexityJobService, perplexity_jobs
+from api.services.inference_pool import run_inference
 from api.services.model_registry import ModelRegistry
+from api.services.payload_encoding import ENCODED_RENDERERS, resolve_encoding
+from api.services.result_cache import ResultCache, eval_cache
+from api.views.async_support import async_api_view
+from generation.logits_processors import processor_options
+from training.perplexity import clamp_stride
 
 
 def _get_engine(request):
@@ -36,6 +48,44 @@ def _check_model_available(engine, config_id=None):
     return None
 
 
+def _available_engine(request):
+    """(engine, config_id, erreur) ; synchrone, la registry peut lire la base."""
+    engine, config_id = _get_engine(request)
+    return engine, config_id, _check_model_available(engine, config_id)
+
+
+def _loaded_engine(request):
+    """Comme _available_engine, sans refuser pendant l'entraînement (lecture de copies)."""
+    engine, config_id = _get_engine(request)
+    if not engine or not engine.is_ready:
+        return engine, config_id, Response({"error": "Aucun modèle chargé"}, status=400)
+    return engine, config_id, None
+
+
+async def _cached_response(request, engine, config_id, name, compute, args=()):
+    """Sert un résultat depuis le cache versionné, avec support ETag / 304.
+
+    La clé inclut la version des poids : tant qu'aucun pas d'optimizer,
+    load ou init n'a eu lieu, les polls identiques sont servis depuis la
+    mémoire. Le calcul passe par le pool d'inférence de l'engine. Si les
+    poids changent pendant le calcul, le résultat est renvoyé sans être
+    mis en cache.
+    """
+    version = engine.weight_version
+    key = ResultCache.make_key(config_id, version, name, args)
+    etag = ResultCache.etag_for(key)
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status=304, headers={"ETag": etag})
+
+    payload = eval_cache.get(key)
+    if payload is None:
+        payload = await run_inference(engine, compute)
+        if engine.weight_version != version:
+            return Response(payload)
+        eval_cache.put(key, payload)
+    return Response(payload, headers={"ETag": etag})
+
+
 def _validate_tokens(engine, text):
     """Valide que chaque token du texte est dans le vocabulaire."""
     try:
@@ -47,10 +97,9 @@ def _validate_tokens(engine, text):
     return None
 
 
-@api_view(["POST"])
-def eval_attention(request):
-    engine, config_id = _get_engine(request)
-    err = _check_model_available(engine, config_id)
+@async_api_view(["POST"], renderer_classes=ENCODED_RENDERERS)
+async def eval_attention(request):
+    engine, config_id, err = await sync_to_async(_available_engine)(request)
     if err:
         return err
 
@@ -62,14 +111,15 @@ def eval_attention(request):
     if err:
         return err
 
-    results = engine.get_attention_weights(text)
+    results = await run_inference(
+        engine, engine.get_attention_weights, text, encoding=resolve_encoding(request)
+    )
     return Response({"attention": results})
 
 
-@api_view(["POST"])
-def eval_perplexity(request):
-    engine, config_id = _get_engine(request)
-    err = _check_model_available(engine, config_id)
+@async_api_view(["POST"])
+async def eval_perplexity(request):
+    engine, config_id, err = await sync_to_async(_available_engine)(request)
     if err:
         return err
 
@@ -81,8 +131,8 @@ def eval_perplexity(request):
     if err:
         return err
 
-    loss = engine.compute_loss_on_text(text)
-    perplexity = engine.compute_perplexity(text)
+    loss = await run_inference(engine, engine.compute_loss_on_text, text)
+    perplexity = await run_inference(engine, engine.compute_perplexity, text)
     return Response(
         {
             "text": text,
@@ -92,50 +142,146 @@ def eval_perplexity(request):
     )
 
 
-@api_view(["GET"])
-def eval_embeddings(request):
+@api_view(["POST"])
+def eval_perplexity_long(request):
+    """Perplexité par fenêtres glissantes sur un texte long ou un TrainingData entier.
+
+    Body : text | data_id, stride (défaut seq_len), batch_size (défaut 8).
+    Retourne le résultat directement s'il est en cache pour la version
+    courante des poids, sinon lance un job (202) dont la progression est
+    diffusée sur ws/evaluation/ et consultable via eval/perplexity/jobs/<id>/.
+    """
     engine, config_id = _get_engine(request)
-    if not engine or not engine.is_ready:
-        return Response({"error": "Aucun modèle chargé"}, status=400)
+    err = _check_model_available(engine, config_id)
+    if err:
+        return err
 
-    # Safe during training — reads weight copies
-    points = engine.get_embedding_vectors_2d()
-    return Response({"embeddings": points})
+    data_id = request.data.get("data_id")
+    if data_id:
+        try:
+            data = TrainingData.objects.get(pk=data_id)
+        except (TrainingData.DoesNotExist, ValueError, ValidationError):
+            return Response({"error": "Données non trouvées"}, status=404)
+        if data.status != TrainingData.Status.READY:
+            return Response(
+                {"error": "Extraction du texte en cours ou échouée", "status": data.status},
+                status=409,
+            )
+        text = data.read_text()
+        source_key = f"data:{data.pk}"
+    else:
+        text = request.data.get("text", "")
+        if not text:
+            return Response({"error": "text ou data_id requis"}, status=400)
+        source_key = "text:" + hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    try:
+        stride = int(request.data.get("stride") or 0)
+        batch_size = max(1, int(request.data.get("batch_size", 8)))
+    except (TypeError, ValueError):
+        return Response({"error": "stride et batch_size doivent être des entiers"}, status=400)
+    # Clé de cache sur le stride effectif : None, 0, seq_len ou plus donnent le même résultat
+    stride = clamp_stride(stride, engine.config.seq_len)
+
+    cached = eval_cache.get(PerplexityJobService.cache_key(config_id, engine, source_key, stride))
+    if cached is not None:
+        return Response({"status": "completed", "source": source_key, "result": cached})
+
+    job = perplexity_jobs.start(engine, config_id, source_key, text, stride, batch_size)
+    return Response(job, status=202)
 
 
 @api_view(["GET"])
-def eval_parameters(request):
-    engine, config_id = _get_engine(request)
-    if not engine or not engine.is_ready:
-        return Response({"error": "Aucun modèle chargé"}, status=400)
+def eval_perplexity_job(request, job_id):
+    """État d'un job de perplexité (progression, résultat ou erreur)."""
+    job = perplexity_jobs.get(job_id)
+    if job is None:
+        return Response({"error": "Job non trouvé"}, status=404)
+    return Response(job)
+
+
+@async_api_view(["GET"])
+async def eval_embeddings(request):
+    engine, config_id, err = await sync_to_async(_loaded_engine)(request)
+    if err:
+        return err
 
     # Safe during training — reads weight copies
-    stats = engine.get_parameter_stats()
-    return Response(
-        {
-            "parameters": stats,
+    return await _cached_response(
+        request,
+        engine,
+        config_id,
+        "embeddings",
+        lambda: {"embeddings": engine.get_embedding_vectors_2d()},
+    )
+
+
+@async_api_view(["GET"])
+async def eval_parameters(request):
+    engine, config_id, err = await sync_to_async(_loaded_engine)(request)
+    if err:
+        return err
+
+    # Safe during training — reads weight copies
+    return await _cached_response(
+        request,
+        engine,
+        config_id,
+        "parameters",
+        lambda: {
+            "parameters": engine.get_parameter_stats(),
             "total": engine.model.count_parameters(),
-        }
+        },
     )
 
 
-@api_view(["GET"])
-def eval_weight_matrices(request):
+@async_api_view(["GET"], renderer_classes=ENCODED_RENDERERS)
+async def eval_weight_matrices(request):
     """Retourne les matrices de poids pour visualisation dot-matrix temps réel."""
-    engine, config_id = _get_engine(request)
-    if not engine or not engine.is_ready:
-        return Response({"error": "Aucun modèle chargé"}, status=400)
+    engine, config_id, err = await sync_to_async(_loaded_engine)(request)
+    if err:
+        return err
 
     # Safe during training — reads weight copies
-    matrices = engine.get_weight_matrices()
-    return Response({"matrices": matrices})
+    encoding = resolve_encoding(request)
+    return await _cached_response(
+        request,
+        engine,
+        config_id,
+        "weights",
+        lambda: {"matrices": engine.get_weight_matrices(encoding)},
+        args=(encoding,),
+    )
 
 
-@api_view(["POST"])
-def eval_generation_weights(request):
+@async_api_view(["GET"])
+async def eval_profile(request):
+    """Profil forward/backward par module (temps, FLOPs estimés, mémoire allouée)."""
+    engine, config_id, err = await sync_to_async(_available_engine)(request)
+    if err:
+        return err
+
+    try:
+        steps = min(max(1, int(request.query_params.get("steps", 3))), 50)
+    except ValueError:
+        return Response({"error": "steps doit être un entier"}, status=400)
+    if engine.is_quantized:
+        return Response({"error": "Modèle quantifié : profil indisponible"}, status=409)
+    modules = await run_inference(engine, engine.profile_modules, steps)
+    return Response(
+        {
+            "steps": steps,
+            "batch_size": engine.config.batch_size,
+            "seq_len": engine.config.seq_len,
+            "modules": modules,
+        }
+    )
+
+
+@async_api_view(["POST"], renderer_classes=ENCODED_RENDERERS)
+async def eval_generation_weights(request):
     """Génère du texte et retourne les poids d'attention pour chaque token."""
-    engine, config_id = _get_engine(request)
-    err = _check_model_available(engine, config_id)
+    engine, config_id, err = await sync_to_async(_available_engine)(request)
     if err:
         return err
 
@@ -150,7 +296,15 @@ def eval_generation_weights(request):
     max_tokens = int(request.data.get("max_tokens", 50))
     temperature = float(request.data.get("temperature", 0.8))
 
-    results = engine.get_generation_weights(prompt, max_tokens, temperature)
+    results = await run_inference(
+        engine,
+        engine.get_generation_weights,
+        prompt,
+        max_tokens,
+        temperature,
+        encoding=resolve_encoding(request),
+        **processor_options(request.data),
+    )
     return Response(results)
 
 
@@ -1,11 +1,19 @@
 import uuid
 
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Count, Min, OuterRef, Subquery, UUIDField
+from django.db.models.functions import Substr
 from rest_framework.decorators import api_view
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 
 from api.models import ChatMessage, ModelConfig
 from api.serializers import ChatMessageSerializer
+from api.services.inference_pool import run_inference
 from api.services.model_registry import ModelRegistry
+from api.views.async_support import async_api_view
+from generation.logits_processors import processor_options
 
 
 def _get_user_or_none(request):
@@ -34,17 +42,17 @@ def _check_model_available(engine, config_id=None):
     return None
 
 
-@api_view(["POST"])
-def generate_text(request):
-    config_id = request.data.get("config_id")
+def _resolve_engine(config_id):
+    """Engine demandé (ou actif) et erreur éventuelle ; peut recharger depuis la base."""
     registry = ModelRegistry()
+    engine = registry.get_engine(config_id) if config_id else registry.get_active_engine()
+    return engine, _check_model_available(engine, config_id)
 
-    if config_id:
-        engine = registry.get_engine(config_id)
-    else:
-        engine = registry.get_active_engine()
 
-    err = _check_model_available(engine, config_id)
+@async_api_view(["POST"])
+async def generate_text(request):
+    config_id = request.data.get("config_id")
+    engine, err = await sync_to_async(_resolve_engine)(config_id)
     if err:
         return err
 
@@ -54,31 +62,98 @@ def generate_text(request):
     sampling_strategy = request.data.get("sampling_strategy", "temperature")
     top_k = int(request.data.get("top_k", 10))
     top_p = float(request.data.get("top_p", 0.9))
-    min_new_tokens = int(request.data.get("min_new_tokens", 0))
+    options = processor_options(request.data)
 
     if not prompt:
         return Response({"error": "prompt requis"}, status=400)
 
-    text = engine.generate_text(
-        prompt,
-        max_tokens,
-        temperature,
-        sampling_strategy=sampling_strategy,
-        top_k=top_k,
-        top_p=top_p,
-        min_new_tokens=min_new_tokens,
-    )
-    return Response(
-        {
-            "prompt": prompt,
-            "generated_text": text,
-            "generated_length": len(text) - len(prompt),
-        }
-    )
+    # Décodage spéculatif : un modèle chargé plus petit sert de brouillon
+    draft = None
+    draft_config_id = request.data.get("draft_config_id")
+    num_draft_tokens = max(1, int(request.data.get("num_draft_tokens", 4)))
+    stats = {}
+    num_beams = max(1, int(request.data.get("num_beams", 1)))
+    num_return_sequences = max(1, int(request.data.get("num_return_sequences", 1)))
+    if num_beams > 1 or num_return_sequences > 1:
+        if draft_config_id:
+            return Response(
+                {"error": "draft_config_id est incompatible avec num_beams / num_return_sequences"},
+                status=400,
+            )
+        if 1 < num_beams < num_return_sequences:
+            return Response({"error": "num_return_sequences doit être <= num_beams"}, status=400)
+        try:
+            sequences = await run_inference(
+                engine,
+                engine.generate_sequences,
+                prompt,
+                max_tokens,
+                temperature,
+                sampling_strategy=sampling_strategy,
+                top_k=top_k,
+                top_p=top_p,
+                num_beams=num_beams,
+                length_penalty=float(request.data.get("length_penalty", 1.0)),
+                num_return_sequences=num_return_sequences,
+                **options,
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        text = sequences[0]["text"]
+        return Response(
+            {
+                "prompt": prompt,
+                "generated_text": text,
+                "generated_length": len(text) - len(prompt),
+                "sequences": sequences,
+            }
+        )
+
+    try:
+        if draft_config_id:
+            draft = await sync_to_async(ModelRegistry().get_engine)(draft_config_id)
+        text = await run_inference(
+            engine,
+            engine.generate_text,
+            prompt,
+            max_tokens,
+            temperature,
+            sampling_strategy=sampling_strategy,
+            top_k=top_k,
+            top_p=top_p,
+            draft=draft,
+            num_draft_tokens=num_draft_tokens,
+            stats=stats,
+            **options,
+        )
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+    payload = {
+        "prompt": prompt,
+        "generated_text": text,
+        "generated_length": len(text) - len(prompt),
+    }
+    if draft is not None:
+        payload["speculation"] = stats
+    return Response(payload)
+
+
+class ChatSessionPagination(CursorPagination):
+    """Sessions les plus récentes d'abord ; ?cursor= pour la page suivante."""
+
+    ordering = ("-started_at", "session_id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
 
 
 @api_view(["GET"])
 def chat_sessions(request):
+    """Liste paginée des sessions, en une seule requête SQL par page.
+
+    GROUP BY session_id : date de début (Min), nombre de messages (Count),
+    et premier message / config via une sous-requête corrélée.
+    """
     config_id = request.query_params.get("config_id")
     user = _get_user_or_none(request)
 
@@ -88,24 +163,34 @@ def chat_sessions(request):
     if user:
         qs = qs.filter(user=user)
 
-    # Use set() to deduplicate (SQLite UUIDField + distinct() can return duplicates)
-    session_ids = list({str(sid) for sid in qs.values_list("session_id", flat=True)})
-    result = []
-    for sid in session_ids:
-        msgs = qs.filter(session_id=sid)
-        first_msg = msgs.first()
-        result.append(
+    first = qs.filter(session_id=OuterRef("session_id")).order_by("created_at")
+    sessions = (
+        qs.order_by()
+        .values("session_id")
+        .annotate(
+            started_at=Min("created_at"),
+            message_count=Count("id"),
+            first_message=Subquery(
+                first.annotate(preview=Substr("content", 1, 100)).values("preview")[:1]
+            ),
+            first_config_id=Subquery(first.values("config_id")[:1], output_field=UUIDField()),
+        )
+    )
+
+    paginator = ChatSessionPagination()
+    page = paginator.paginate_queryset(sessions, request)
+    return paginator.get_paginated_response(
+        [
             {
-                "session_id": sid,
-                "config_id": str(first_msg.config_id)
-                if first_msg and first_msg.config_id
-                else None,
-                "first_message": first_msg.content[:100] if first_msg else "",
-                "message_count": msgs.count(),
-                "created_at": first_msg.created_at.isoformat() if first_msg else None,
+                "session_id": str(row["session_id"]),
+                "config_id": str(row["first_config_id"]) if row["first_config_id"] else None,
+                "first_message": row["first_message"] or "",
+                "message_count": row["message_count"],
+                "created_at": row["started_at"].isoformat(),
             }
-        )
-    return Response(result)
+            for row in page
+        ]
+    )
 
 
 @api_view(["GET", "DELETE"])
@@ -122,28 +207,19 @@ def chat_session_detail(request, session_id):
     return Response(ChatMessageSerializer(qs, many=True).data)
 
 
-def _do_chat_message(request, session_id):
+async def _do_chat_message(request, session_id):
     """Shared logic for sending a chat message in an existing or new session."""
     config_id = request.data.get("config_id")
-    registry = ModelRegistry()
     user = _get_user_or_none(request)
 
-    if config_id:
-        engine = registry.get_engine(config_id)
-    else:
-        engine = registry.get_active_engine()
-
-    err = _check_model_available(engine, config_id)
+    engine, err = await sync_to_async(_resolve_engine)(config_id)
     if err:
         return err
 
     # Resolve config object for FK
     config_obj = None
     if config_id:
-        try:
-            config_obj = ModelConfig.objects.get(pk=config_id)
-        except ModelConfig.DoesNotExist:
-            pass
+        config_obj = await ModelConfig.objects.filter(pk=config_id).afirst()
 
     content = request.data.get("content", "")
     temperature = float(request.data.get("temperature", 0.8))
@@ -151,52 +227,58 @@ def _do_chat_message(request, session_id):
     sampling_strategy = request.data.get("sampling_strategy", "temperature")
     top_k = int(request.data.get("top_k", 10))
     top_p = float(request.data.get("top_p", 0.9))
-    min_new_tokens = int(request.data.get("min_new_tokens", 0))
+    options = processor_options(request.data)
 
     if not content:
         return Response({"error": "content requis"}, status=400)
 
-    # Sauvegarder le message utilisateur
-    ChatMessage.objects.create(
-        session_id=session_id,
-        config=config_obj,
-        user=user,
-        role="user",
-        content=content,
-    )
-
     # Générer la réponse
-    generated = engine.generate_text(
+    generated = await run_inference(
+        engine,
+        engine.generate_text,
         content,
         max_tokens,
         temperature,
         sampling_strategy=sampling_strategy,
         top_k=top_k,
         top_p=top_p,
-        min_new_tokens=min_new_tokens,
-    )
-
-    # Sauvegarder la réponse
-    assistant_msg = ChatMessage.objects.create(
-        session_id=session_id,
-        config=config_obj,
-        user=user,
-        role="assistant",
-        content=generated,
-        temperature_used=temperature,
-        max_tokens_used=max_tokens,
+        **options,
     )
 
-    return Response(ChatMessageSerializer(assistant_msg).data)
-
-
-@api_view(["POST"])
-def chat_message(request, session_id):
-    return _do_chat_message(request, session_id)
-
-
-@api_view(["POST"])
-def chat_new_message(request):
+    # Sauvegarder le tour complet seulement après une génération réussie :
+    # un 429 / 504 ne laisse pas de message utilisateur sans réponse
+    @sync_to_async
+    def save_turn():
+        with transaction.atomic():
+            ChatMessage.objects.create(
+                session_id=session_id,
+                config=config_obj,
+                user=user,
+                role="user",
+                content=content,
+            )
+            return ChatMessage.objects.create(
+                session_id=session_id,
+                config=config_obj,
+                user=user,
+                role="assistant",
+                content=generated,
+                temperature_used=temperature,
+                max_tokens_used=max_tokens,
+            )
+
+    assistant_msg = await save_turn()
+
+    return Response(await sync_to_async(lambda: ChatMessageSerializer(assistant_msg).data)())
+
+
+@async_api_view(["POST"])
+async def chat_message(request, session_id):
+    return await _do_chat_message(request, session_id)
+
+
+@async_api_view(["POST"])
+async def chat_new_message(request):
     """Create a new chat session and send the first message."""
     session_id = uuid.uuid4()
-    return _do_chat_message(request, session_id)
+    return await _do_chat_message(request, session_id)
@@ -0,0 +1,23 @@
+from django.http import HttpResponse
+from rest_framework.decorators import api_view
+
+from api.services.model_registry import ModelRegistry
+from api.services.result_cache import eval_cache
+from training.metrics import describe, metrics
+
+describe("minillm_models_loaded", "gauge", "Modèles chargés en mémoire")
+describe(
+    "minillm_eval_cache_hits_total", "counter", "Résultats d'évaluation servis depuis le cache"
+)
+describe("minillm_eval_cache_misses_total", "counter", "Résultats d'évaluation recalculés")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@api_view(["GET"])
+def metrics_view(request):
+    """Métriques de débit et de latence au format texte Prometheus."""
+    metrics.set("minillm_models_loaded", len(ModelRegistry().list_active()))
+    metrics.set("minillm_eval_cache_hits_total", eval_cache.hits)
+    metrics.set("minillm_eval_cache_misses_total", eval_cache.misses)
+    return HttpResponse(metrics.render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
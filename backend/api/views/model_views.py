@@ -81,7 +81,8 @@ def model_load(request, pk):
     registry = ModelRegistry()
     engine = registry.get_engine(config_id)
     config = saved.config.to_engine_config()
-    engine.load_weights(saved.weights_path, saved.vocab_json, config)
+    quantize = bool(request.data.get("quantize", False))
+    engine.load_weights(saved.weights_path, saved.vocab_json, config, quantize=quantize)
 
     return Response(
         {
@@ -89,10 +90,25 @@ def model_load(request, pk):
             "config_id": config_id,
             "total_parameters": engine.model.count_parameters(),
             "vocab_size": engine.tokenizer.vocab_size,
+            "quantized": engine.is_quantized,
         }
     )
 
 
+@api_view(["POST"])
+def model_quantize(request, config_id):
+    """Quantifie en int8 un modèle en mémoire (inférence uniquement)."""
+    registry = ModelRegistry()
+    if not registry.has_engine(config_id):
+        return Response({"error": "Modèle non trouvé en mémoire"}, status=404)
+    engine = registry.get_engine(config_id)
+    try:
+        n_layers = engine.quantize()
+    except ValueError as e:
+        return Response({"error": str(e)}, status=409)
+    return Response({"config_id": str(config_id), "quantized": True, "quantized_layers": n_layers})
+
+
 @api_view(["GET"])
 def current_model_info(request):
     config_id = request.query_params.get("config_id")
@@ -116,6 +132,7 @@ def current_model_info(request):
             "n_layers": engine.config.n_layers,
             "d_ff": engine.config.d_ff,
             "seq_len": engine.config.seq_len,
+            "quantized": engine.is_quantized,
         }
     )
 
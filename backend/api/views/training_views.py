@@ -5,6 +5,7 @@ from rest_framework.response import Response
 from api.models import ConfigTrainingData, ModelConfig, TrainingData, TrainingRun
 from api.serializers import TrainingRunSerializer
 from api.services.model_registry import ModelRegistry
+from api.services.payload_encoding import resolve_encoding
 
 
 def _build_corpus(config_obj, active_only=True):
@@ -12,6 +13,8 @@ def _build_corpus(config_obj, active_only=True):
 
     If active_only=True (default), only uses data where the link is_active=True.
     If active_only=False, uses all linked data regardless of is_active status.
+    Only data whose extraction is finished (status READY) is used, like the
+    corpus shown by data/corpus/.
     """
     filter_kwargs = {"config": config_obj}
     if active_only:
@@ -20,10 +23,10 @@ def _build_corpus(config_obj, active_only=True):
     linked_ids = ConfigTrainingData.objects.filter(
         **filter_kwargs,
     ).values_list("training_data_id", flat=True)
-    data_qs = TrainingData.objects.filter(pk__in=linked_ids)
+    data_qs = TrainingData.objects.filter(pk__in=linked_ids, status=TrainingData.Status.READY)
 
     if data_qs.exists():
-        return "\n".join(d.extracted_text for d in data_qs)
+        return "\n".join(d.read_text() for d in data_qs)
 
     return ""
 
@@ -63,6 +66,7 @@ def model_initialize(request):
             tokenizer_mismatch
             or engine.config.d_model != new_config.d_model
             or engine.config.n_heads != new_config.n_heads
+            or engine.config.n_kv_heads != new_config.n_kv_heads
             or engine.config.n_layers != new_config.n_layers
             or engine.config.d_ff != new_config.d_ff
             or engine.config.seq_len != new_config.seq_len
@@ -159,11 +163,18 @@ def training_start(request):
             tokenizer_mismatch
             or engine.config.d_model != config.d_model
             or engine.config.n_heads != config.n_heads
+            or engine.config.n_kv_heads != config.n_kv_heads
             or engine.config.n_layers != config.n_layers
             or engine.config.d_ff != config.d_ff
             or engine.config.seq_len != config.seq_len
         )
 
+    if continue_training and engine.is_quantized and not arch_changed:
+        return Response(
+            {"error": "Modèle quantifié (inférence uniquement) : rechargez les poids flottants"},
+            status=409,
+        )
+
     if continue_training and engine.is_ready and not arch_changed:
         # Réutiliser le modèle existant, juste mettre à jour le data loader
         engine.update_corpus(corpus, config)
@@ -182,6 +193,9 @@ def training_start(request):
         status="pending",
     )
 
+    # Encodage des weight_snapshot diffusés sur WebSocket (opt-in compact)
+    training_svc.snapshot_encoding = resolve_encoding(request)
+
     # Lancer l'entraînement
     training_svc.start(engine, str(run.pk), config.max_epochs)
 
@@ -8,6 +8,9 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 django_asgi_app = get_asgi_application()
 
 from api.routing import websocket_urlpatterns
+from api.services.ingestion import resume_on_startup
+
+resume_on_startup()
 
 application = ProtocolTypeRouter(
     {
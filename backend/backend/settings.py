@@ -124,6 +124,15 @@ SIMPLE_JWT = {
 MEDIA_ROOT = os.path.join(ENGINE_ROOT, "media")
 MEDIA_URL = "/media/"
 
+# Inférence (vues async) : threads et file par modèle, délai max par requête (s)
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", 2))
+INFERENCE_MAX_QUEUE = int(os.environ.get("INFERENCE_MAX_QUEUE", 8))
+INFERENCE_TIMEOUT = float(os.environ.get("INFERENCE_TIMEOUT", 120))
+
+# Extraction des fichiers uploadés : fichiers traités en parallèle, processus par PDF
+INGESTION_WORKERS = int(os.environ.get("INGESTION_WORKERS", 2))
+INGESTION_PDF_WORKERS = int(os.environ.get("INGESTION_PDF_WORKERS", min(4, os.cpu_count() or 1)))
+
 # Model weights storage
 MODEL_WEIGHTS_DIR = os.path.join(ENGINE_ROOT, "saved_models")
 os.makedirs(MODEL_WEIGHTS_DIR, exist_ok=True)
@@ -0,0 +1,14 @@
+"""Micro-benchmarks du moteur NumPy avec suivi des régressions.
+
+Usage :
+    python -m benchmarks run --grid default --output results.json
+    python -m benchmarks compare benchmarks/baseline.json results.json
+    python -m benchmarks quantize --data data
+
+Chaque cas (voir benchmarks.cases) est mesuré sur une grille
+(d_model, n_heads, seq_len, batch) ; les résultats sont écrits en JSON et
+`compare` signale les cas dont le temps médian dépasse celui de la
+baseline au-delà d'un seuil (10 % par défaut). `quantize` compare la
+perplexité et la vitesse d'un modèle flottant et de sa version int8
+(voir benchmarks.quantization).
+"""
@@ -0,0 +1,93 @@
+"""CLI : python -m benchmarks {run,compare} (voir benchmarks/__init__.py)."""
+
+import argparse
+import sys
+
+from benchmarks.cases import CASES
+from benchmarks.runner import DEFAULT_THRESHOLD, GRIDS, compare, load, run, save
+
+
+def _print_result(key, result):
+    line = f"{key:<70}{1000 * result['median_s']:>10.3f} ms"
+    if "items_per_second" in result:
+        line += f"{result['items_per_second']:>14,.0f} tok/s"
+    print(line, flush=True)
+
+
+def cmd_run(args) -> int:
+    report = run(GRIDS[args.grid], only=args.only, min_time=args.min_time, progress=_print_result)
+    save(report, args.output)
+    print(f"\n{len(report['results'])} mesures écrites dans {args.output}")
+    return 0
+
+
+def cmd_compare(args) -> int:
+    diff = compare(load(args.baseline), load(args.current), args.threshold)
+    for key, ratio in diff["regressions"]:
+        print(f"REGRESSION  {key:<70} x{ratio:.2f}")
+    for key, ratio in diff["improvements"]:
+        print(f"improvement {key:<70} x{ratio:.2f}")
+    for key in diff["missing"]:
+        print(f"missing     {key}")
+    for key in diff["new"]:
+        print(f"new         {key}")
+    n = len(diff["regressions"])
+    print(f"\n{n} régression(s) au-delà de +{100 * args.threshold:.0f} %")
+    return 1 if n else 0
+
+
+def cmd_quantize(args) -> int:
+    from benchmarks.quantization import run_report
+
+    report = run_report(args.data, epochs=args.epochs, repeats=args.repeats)
+    print(f"{'':<8}{'perplexité':>12}{'temps':>12}{'tok/s':>12}{'poids':>12}")
+    for variant in ("float", "int8"):
+        r = report[variant]
+        print(
+            f"{variant:<8}{r['perplexity']:>12.3f}{1000 * r['seconds']:>9.1f} ms"
+            f"{r['tokens_per_second']:>12,.0f}{r['weight_bytes'] / 1024:>9.0f} Ko"
+        )
+    print(
+        f"\nperplexité x{report['perplexity_ratio']:.4f}, vitesse x{report['speedup']:.2f}, "
+        f"poids /{report['compression']:.1f}"
+    )
+    if args.output:
+        save(report, args.output)
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Exécute les benchmarks et écrit un rapport JSON")
+    p_run.add_argument("--grid", choices=sorted(GRIDS), default="default")
+    p_run.add_argument(
+        "--only",
+        nargs="*",
+        metavar="PREFIX",
+        help=f"Préfixes de cas à exécuter (parmi : {', '.join(CASES)})",
+    )
+    p_run.add_argument("--min-time", type=float, default=0.2, help="Secondes min par mesure")
+    p_run.add_argument("--output", default="benchmark_results.json")
+    p_run.set_defaults(func=cmd_run)
+
+    p_cmp = sub.add_parser("compare", help="Signale les régressions face à une baseline")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    p_cmp.set_defaults(func=cmd_compare)
+
+    p_q = sub.add_parser("quantize", help="Perplexité et vitesse : float contre int8")
+    p_q.add_argument("--data", default="data", help="Fichier ou dossier de .txt")
+    p_q.add_argument("--epochs", type=int, default=3)
+    p_q.add_argument("--repeats", type=int, default=3, help="Mesures par variante (médiane)")
+    p_q.add_argument("--output", default=None, help="Rapport JSON (optionnel)")
+    p_q.set_defaults(func=cmd_quantize)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
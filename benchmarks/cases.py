@@ -0,0 +1,188 @@
+"""Cas de benchmark : un setup par cas, qui retourne la fonction à chronométrer.
+
+Chaque setup reçoit les paramètres de la grille qu'il déclare et retourne
+une fonction sans argument. Si cette fonction retourne un entier, c'est le
+nombre d'éléments traités par appel (tokens), utilisé pour le débit.
+"""
+
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+
+from config import Config
+from generation.generator import Generator
+from modules.attention import MultiHeadAttention
+from modules.layernorm import LayerNorm
+from modules.linear import Linear
+from modules.loss import CrossEntropyLoss
+from modules.tokenizers.char_tokenizer import CharTokenizer
+from modules.transformer_block import TransformerBlock
+from modules.transformer_model import TransformerModel
+from optim.adam import Adam
+from training.data_loader import DataLoader
+
+VOCAB_SIZE = 256  # vocabulaire des cas qui produisent des logits
+GEN_TOKENS = 16  # tokens générés par appel pour le cas generation
+
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz ,.\n"
+
+
+@dataclass
+class Case:
+    name: str
+    params: tuple[str, ...]  # clés de la grille utilisées par ce cas
+    setup: Callable[..., Callable[[], int | None]]
+
+
+CASES: dict[str, Case] = {}
+
+
+def case(name: str, *params: str):
+    """Enregistre un setup de benchmark sous `name`."""
+
+    def decorator(setup):
+        CASES[name] = Case(name, params, setup)
+        return setup
+
+    return decorator
+
+
+def _rng():
+    return np.random.default_rng(0)
+
+
+def _forward_backward(name: str, make_module):
+    """Enregistre `name.forward` et `name.backward` pour un module (B, T, D) -> (B, T, D)."""
+    params = ("d_model", "n_heads", "seq_len", "batch")
+
+    @case(f"{name}.forward", *params)
+    def forward(d_model, n_heads, seq_len, batch):
+        module = make_module(d_model, n_heads, seq_len)
+        x = _rng().standard_normal((batch, seq_len, d_model))
+
+        def run():
+            module.forward(x)
+            return batch * seq_len
+
+        return run
+
+    @case(f"{name}.backward", *params)
+    def backward(d_model, n_heads, seq_len, batch):
+        module = make_module(d_model, n_heads, seq_len)
+        x = _rng().standard_normal((batch, seq_len, d_model))
+        grad = np.ones_like(module.forward(x))
+
+        def run():
+            module.backward(grad)
+            return batch * seq_len
+
+        return run
+
+
+_forward_backward("linear", lambda d, h, t: Linear(d, d))
+_forward_backward("attention", lambda d, h, t: MultiHeadAttention(d, h, t))
+_forward_backward("layernorm", lambda d, h, t: LayerNorm(d))
+_forward_backward("transformer_block", lambda d, h, t: TransformerBlock(d, h, 4 * d, t))
+
+
+@case("cross_entropy.forward", "seq_len", "batch")
+def cross_entropy_forward(seq_len, batch):
+    rng = _rng()
+    loss_fn = CrossEntropyLoss()
+    logits = rng.standard_normal((batch, seq_len, VOCAB_SIZE))
+    targets = rng.integers(0, VOCAB_SIZE, size=(batch, seq_len))
+
+    def run():
+        loss_fn.forward(logits, targets)
+        return batch * seq_len
+
+    return run
+
+
+@case("cross_entropy.forward_backward", "seq_len", "batch")
+def cross_entropy_forward_backward(seq_len, batch):
+    # forward() calcule aussi le gradient, backward() ne fait que le rendre :
+    # chronométrés ensemble pour rester comparables d'une version à l'autre
+    rng = _rng()
+    loss_fn = CrossEntropyLoss()
+    logits = rng.standard_normal((batch, seq_len, VOCAB_SIZE))
+    targets = rng.integers(0, VOCAB_SIZE, size=(batch, seq_len))
+
+    def run():
+        loss_fn.forward(logits, targets)
+        loss_fn.backward()
+        return batch * seq_len
+
+    return run
+
+
+def _model(d_model, n_heads, seq_len, vocab_size=VOCAB_SIZE, n_layers=2):
+    config = Config(
+        d_model=d_model,
+        n_heads=n_heads,
+        n_layers=n_layers,
+        d_ff=4 * d_model,
+        seq_len=seq_len,
+        vocab_size=vocab_size,
+        seed=0,
+    )
+    return config, TransformerModel(config)
+
+
+@case("adam.step", "d_model", "n_heads", "seq_len")
+def adam_step(d_model, n_heads, seq_len):
+    _, model = _model(d_model, n_heads, seq_len)
+    optimizer = Adam(model.all_modules())
+    rng = _rng()
+    for module in model.all_modules():
+        for grad in module.gradients.values():
+            grad[...] = rng.standard_normal(grad.shape)
+    return optimizer.step
+
+
+@case("data_loader.next_batch", "seq_len", "batch")
+def data_loader_next_batch(seq_len, batch):
+    data = _rng().integers(0, VOCAB_SIZE, size=100_000)
+    loader = DataLoader(data, seq_len, batch)
+
+    def run():
+        loader.next_batch()
+        return batch * seq_len
+
+    return run
+
+
+def _text(n_chars: int) -> str:
+    idx = _rng().integers(0, len(_ALPHABET), size=n_chars)
+    return "".join(_ALPHABET[i] for i in idx)
+
+
+@case("tokenizer.encode", "seq_len", "batch")
+def tokenizer_encode(seq_len, batch):
+    text = _text(seq_len * batch)
+    tokenizer = CharTokenizer(_ALPHABET)
+    return lambda: len(tokenizer.encode(text))
+
+
+@case("tokenizer.decode", "seq_len", "batch")
+def tokenizer_decode(seq_len, batch):
+    tokenizer = CharTokenizer(_ALPHABET)
+    ids = tokenizer.encode(_text(seq_len * batch))
+    return lambda: len(tokenizer.decode(ids))
+
+
+@case("generation", "d_model", "n_heads", "seq_len")
+def generation(d_model, n_heads, seq_len):
+    tokenizer = CharTokenizer(_ALPHABET)
+    config, model = _model(d_model, n_heads, seq_len, vocab_size=tokenizer.vocab_size)
+    generator = Generator(model, tokenizer, config)
+    prompt = _text(seq_len // 2)
+
+    def run():
+        np.random.seed(0)
+        out = generator.generate(prompt, max_tokens=GEN_TOKENS, sampling_strategy="temperature")
+        # Le modèle peut émettre EOS avant GEN_TOKENS : compter les tokens réels
+        return max(1, len(out) - len(prompt))
+
+    return run
@@ -0,0 +1,111 @@
+"""Rapport perplexité / vitesse : modèle flottant contre modèle int8.
+
+Usage :
+    python -m benchmarks quantize --data data --epochs 3
+
+Un modèle caractère est entraîné sur les fichiers .txt de --data (les
+derniers 10 % de chaque fichier sont gardés pour l'évaluation), puis
+évalué deux fois sur le texte réservé : tel quel et après quantize_model().
+Le rapport donne la perplexité, le temps de forward et la mémoire des
+poids quantifiables de chaque variante.
+"""
+
+import copy
+import os
+import time
+
+import numpy as np
+
+from config import Config
+from modules.loss import CrossEntropyLoss
+from modules.quantization import QuantizedLinear, quantizable_layers, quantize_model
+from modules.tokenizers.char_tokenizer import CharTokenizer
+from modules.transformer_model import TransformerModel
+from optim.adam import Adam
+from training.data_loader import DataLoader
+from training.perplexity import evaluate_perplexity
+from training.trainer import Trainer
+
+
+def target_weight_bytes(model) -> int:
+    """Octets occupés par les poids des couches quantifiables."""
+    total = 0
+    for parent, name in quantizable_layers(model):
+        layer = getattr(parent, name)
+        if isinstance(layer, QuantizedLinear):
+            total += layer.W_int8.nbytes + layer.W_scale.nbytes
+        else:
+            total += layer.W.nbytes
+    return total
+
+
+def _measure(model, tokens, seq_len: int, repeats: int) -> dict:
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = evaluate_perplexity(model, tokens, seq_len)
+        times.append(time.perf_counter() - t0)
+    seconds = float(np.median(times))
+    return {
+        "perplexity": result["perplexity"],
+        "seconds": seconds,
+        "tokens_per_second": result["n_tokens"] / seconds if seconds else 0.0,
+        "weight_bytes": target_weight_bytes(model),
+    }
+
+
+def quantization_report(model, tokens, seq_len: int, repeats: int = 3) -> dict:
+    """Compare le modèle et sa copie quantifiée int8 sur tokens.
+
+    Le modèle passé n'est pas modifié.
+
+    Returns:
+        dict {"float": ..., "int8": ..., "perplexity_ratio", "speedup",
+        "compression"}
+    """
+    quantized = copy.deepcopy(model)
+    quantize_model(quantized)
+    report = {
+        "float": _measure(model, tokens, seq_len, repeats),
+        "int8": _measure(quantized, tokens, seq_len, repeats),
+    }
+    f, q = report["float"], report["int8"]
+    report["perplexity_ratio"] = q["perplexity"] / f["perplexity"]
+    report["speedup"] = f["seconds"] / q["seconds"] if q["seconds"] else 0.0
+    report["compression"] = f["weight_bytes"] / q["weight_bytes"]
+    return report
+
+
+def _read_corpus(path: str) -> tuple[str, str]:
+    """(texte d'entraînement, texte réservé) : 10 % de fin de chaque fichier."""
+    if os.path.isdir(path):
+        files = sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(".txt"))
+    else:
+        files = [path]
+    train, held_out = [], []
+    for name in files:
+        with open(name, encoding="utf-8") as f:
+            text = f.read()
+        cut = int(len(text) * 0.9)
+        train.append(text[:cut])
+        held_out.append(text[cut:])
+    return "\n".join(train), "\n".join(held_out)
+
+
+def run_report(data_path: str, epochs: int = 3, repeats: int = 3, config: Config = None) -> dict:
+    """Entraîne un petit modèle sur data_path puis produit quantization_report()."""
+    train_text, eval_text = _read_corpus(data_path)
+    tokenizer = CharTokenizer(train_text + eval_text)
+    config = config or Config()
+    config.vocab_size = tokenizer.vocab_size
+    config.max_epochs = epochs
+    np.random.seed(config.seed)
+
+    model = TransformerModel(config)
+    data = np.array(tokenizer.encode(train_text), dtype=np.int64)
+    data_loader = DataLoader(data, config.seq_len, config.batch_size)
+    optimizer = Adam(model.all_modules(), lr=config.learning_rate)
+    Trainer(model, CrossEntropyLoss(), optimizer, data_loader, config).train()
+
+    tokens = np.array(tokenizer.encode(eval_text), dtype=np.int64)
+    return quantization_report(model, tokens, config.seq_len, repeats)
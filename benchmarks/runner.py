@@ -0,0 +1,138 @@
+"""Exécution des cas sur une grille, export JSON et comparaison à une baseline."""
+
+import itertools
+import json
+import platform
+import statistics
+import time
+
+import numpy as np
+
+from benchmarks.cases import CASES
+
+# Grilles (d_model, n_heads, seq_len, batch) ; les combinaisons où n_heads
+# ne divise pas d_model sont ignorées.
+GRIDS = {
+    "quick": {"d_model": [32], "n_heads": [2], "seq_len": [16], "batch": [4]},
+    "default": {"d_model": [64, 128], "n_heads": [4], "seq_len": [32, 64], "batch": [8, 16]},
+    "full": {
+        "d_model": [64, 128, 256],
+        "n_heads": [2, 4, 8],
+        "seq_len": [32, 64, 128],
+        "batch": [8, 32],
+    },
+}
+
+DEFAULT_THRESHOLD = 0.10  # +10 % de temps médian = régression
+
+
+def grid_points(grid: dict) -> list[dict]:
+    keys = list(grid)
+    points = [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+    return [p for p in points if p["d_model"] % p["n_heads"] == 0]
+
+
+def result_key(name: str, params: dict) -> str:
+    """Identifiant stable d'une mesure, ex. 'linear.forward[d_model=64,batch=8]'."""
+    return f"{name}[{','.join(f'{k}={v}' for k, v in params.items())}]"
+
+
+def time_callable(fn, min_time: float = 0.2, min_repeat: int = 5, max_repeat: int = 1000) -> dict:
+    """Chronomètre `fn` (après un appel de warm-up) jusqu'à min_time secondes.
+
+    Returns:
+        dict avec median_s, min_s, mean_s, repeat et items (retour de fn)
+    """
+    items = fn()
+    times = []
+    total = 0.0
+    while len(times) < max_repeat and (len(times) < min_repeat or total < min_time):
+        t0 = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - t0
+        times.append(elapsed)
+        total += elapsed
+
+    result = {
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        "mean_s": total / len(times),
+        "repeat": len(times),
+    }
+    if isinstance(items, int):
+        result["items_per_call"] = items
+        result["items_per_second"] = items / result["median_s"]
+    return result
+
+
+def run(
+    grid: dict,
+    only: list[str] | None = None,
+    min_time: float = 0.2,
+    progress=None,
+) -> dict:
+    """Exécute les cas sélectionnés sur la grille.
+
+    Un cas qui n'utilise qu'une partie des paramètres (ex. tokenizer :
+    seq_len et batch) n'est mesuré qu'une fois par combinaison distincte.
+    """
+    results = {}
+    for case in CASES.values():
+        if only and not any(case.name.startswith(prefix) for prefix in only):
+            continue
+        for point in grid_points(grid):
+            params = {k: point[k] for k in case.params}
+            key = result_key(case.name, params)
+            if key in results:
+                continue
+            np.random.seed(0)
+            measure = time_callable(case.setup(**params), min_time=min_time)
+            results[key] = {"case": case.name, "params": params, **measure}
+            if progress:
+                progress(key, results[key])
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "grid": grid,
+        },
+        "results": results,
+    }
+
+
+def save(report: dict, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> dict:
+    """Compare les temps médians de deux rapports.
+
+    Returns:
+        dict avec regressions / improvements (listes de (clé, ratio)),
+        missing (clés absentes du rapport courant) et new (nouvelles clés).
+        ratio = médiane courante / médiane baseline.
+    """
+    base, cur = baseline["results"], current["results"]
+    regressions, improvements = [], []
+    for key in sorted(set(base) & set(cur)):
+        ratio = cur[key]["median_s"] / base[key]["median_s"]
+        if ratio > 1 + threshold:
+            regressions.append((key, ratio))
+        elif ratio < 1 / (1 + threshold):
+            improvements.append((key, ratio))
+    return {
+        "regressions": regressions,
+        "improvements": improvements,
+        "missing": sorted(set(base) - set(cur)),
+        "new": sorted(set(cur) - set(base)),
+    }
@@ -18,10 +18,14 @@ class Config:
     # --- Dimensions du modèle ---
     d_model: int = 64  # Dimension des embeddings
     n_heads: int = 4  # Nombre de têtes d'attention (doit diviser d_model)
+    n_kv_heads: int = 0  # Têtes K/V (0 = n_heads ; 1 = multi-query ; sinon grouped-query)
     n_layers: int = 2  # Nombre de blocs Transformer empilés
     d_ff: int = 256  # Dimension du réseau feedforward (convention: 4 * d_model)
     seq_len: int = 64  # Longueur de séquence (contexte max)
+    pos_encoding: str = "sinusoidal"  # sinusoidal | rope | alibi
+    max_context: int = 0  # Contexte de génération (0 = seq_len ; > seq_len avec rope/alibi)
     vocab_size: int = 0  # Auto-calculé par le tokenizer
+    tie_embeddings: bool = False  # output_head partage la matrice d'embedding
 
     # --- Entraînement ---
     batch_size: int = 16
@@ -29,12 +33,18 @@ class Config:
     max_epochs: int = 100
     grad_clip: float = 1.0
     lr_schedule: str = "constant"  # constant | cosine | cosine_restarts
+    fused_loss: bool = False  # forward_loss : tête + cross-entropy par blocs, sans logits complets
+    packed_batches: bool = False  # fenêtres remplies de documents entiers, attention par document
+    bucketed_batches: bool = (
+        False  # batches de longueur variable groupés par longueur (padding masqué)
+    )
 
     # --- Adam ---
     beta1: float = 0.9
     beta2: float = 0.999
     epsilon: float = 1e-8
     weight_decay: float = 0.0
+    lazy_adam: bool = False  # Embedding : ne met à jour que les lignes vues dans le batch
 
     # --- Tokenizer ---
     tokenizer_type: str = "character"  # character | gpt4 | claude
@@ -9,7 +9,9 @@ import { MemoryRouter } from "react-router-dom";
 import PlaygroundChat from "@/components/playground/PlaygroundChat";
 
 vi.mock("@/api/generation", () => ({
-  getChatSessions: vi.fn().mockResolvedValue({ data: [] }),
+  getChatSessions: vi
+    .fn()
+    .mockResolvedValue({ data: { next: null, previous: null, results: [] } }),
   getChatMessages: vi.fn().mockResolvedValue({ data: [] }),
   sendChatMessage: vi.fn().mockResolvedValue({
     data: {
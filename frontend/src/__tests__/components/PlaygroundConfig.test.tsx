@@ -15,18 +15,26 @@ vi.mock("@/api/config", () => {
     name: "Test Config",
     d_model: 64,
     n_heads: 4,
+    n_kv_heads: 0,
     n_layers: 2,
     d_ff: 256,
     seq_len: 64,
+    pos_encoding: "sinusoidal",
+    max_context: 0,
     vocab_size: 50,
+    tie_embeddings: false,
     batch_size: 16,
     learning_rate: 0.001,
     max_epochs: 100,
     grad_clip: 1.0,
+    fused_loss: false,
+    packed_batches: false,
+    bucketed_batches: false,
     beta1: 0.9,
     beta2: 0.999,
     epsilon: 1e-8,
     weight_decay: 0.0,
+    lazy_adam: false,
     lr_schedule: "constant",
     max_gen_len: 200,
     temperature: 0.8,
@@ -50,7 +50,7 @@ const EMPTY_CORPUS = {
   total_chars: 0,
   unique_chars: 0,
   file_count: 0,
-  full_text: "",
+  files: [],
 };
 
 describe("PlaygroundData", () => {
@@ -224,7 +224,9 @@ describe("PlaygroundData", () => {
         total_chars: 500,
         unique_chars: 20,
         file_count: 1,
-        full_text: "Le chat mange",
+        files: [
+          { id: "1", name: "train.txt", char_count: 500, unique_chars: 20 },
+        ],
       },
     });
     mockGetConfig.mockResolvedValue({
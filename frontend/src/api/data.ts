@@ -12,13 +12,40 @@ export const uploadFile = (file: File, name?: string, configId?: string) => {
     headers: { "Content-Type": "multipart/form-data" },
   });
 };
+export const getDataFile = (id: string) =>
+  api.get<TrainingData>(`/data/${id}/`);
+
+/** Attend la fin de l'extraction en arrière-plan d'un fichier uploadé. */
+export async function waitForIngestion(
+  id: string,
+  intervalMs = 1000,
+): Promise<TrainingData> {
+  for (;;) {
+    const { data } = await getDataFile(id);
+    if (data.status === "ready" || data.status === "failed") return data;
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
 export const deleteFile = (id: string) => api.delete(`/data/${id}/`);
 export const toggleFile = (id: string) =>
   api.patch<TrainingData>(`/data/${id}/toggle/`);
+/** Relance l'extraction d'un fichier en échec. */
+export const retryIngestion = (id: string) =>
+  api.post<TrainingData>(`/data/${id}/retry/`);
 export const getCorpus = (configId?: string) =>
   api.get<Corpus>("/data/corpus/", {
     params: configId ? { config_id: configId } : {},
   });
+/** Texte du corpus, page [offset, offset + limit) en caractères. */
+export const getCorpusText = (
+  configId?: string,
+  offset = 0,
+  limit?: number,
+) =>
+  api.get<string>("/data/corpus/text/", {
+    params: { config_id: configId, offset, limit },
+    responseType: "text",
+  });
 export const loadSampleData = () => api.post<TrainingData>("/data/sample/");
 
 // Per-config data linking
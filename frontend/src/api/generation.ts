@@ -8,7 +8,24 @@ export interface SamplingParams {
   top_k?: number;
   top_p?: number;
   min_new_tokens?: number;
+  stop?: string | string[];
+  repetition_penalty?: number;
+  frequency_penalty?: number;
+  presence_penalty?: number;
+  bad_words?: string[];
   config_id?: string;
+  draft_config_id?: string;
+  num_draft_tokens?: number;
+  num_beams?: number;
+  length_penalty?: number;
+  num_return_sequences?: number;
+}
+
+export interface SpeculationStats {
+  draft_tokens: number;
+  accepted_tokens: number;
+  target_forwards: number;
+  acceptance_rate: number;
 }
 
 export const generateText = (prompt: string, params?: SamplingParams) =>
@@ -16,11 +33,18 @@ export const generateText = (prompt: string, params?: SamplingParams) =>
     prompt: string;
     generated_text: string;
     generated_length: number;
+    speculation?: SpeculationStats;
+    sequences?: { text: string; score: number | null }[];
   }>("/generate/", { prompt, ...params });
 
-export const getChatSessions = (configId?: string) =>
-  api.get<ChatSession[]>("/chat/sessions/", {
-    params: configId ? { config_id: configId } : {},
+/** Sessions les plus récentes d'abord ; cursor = lien `next` de la page précédente. */
+export const getChatSessions = (configId?: string, cursor?: string) =>
+  api.get<{
+    next: string | null;
+    previous: string | null;
+    results: ChatSession[];
+  }>(cursor ?? "/chat/sessions/", {
+    params: cursor ? {} : configId ? { config_id: configId } : {},
   });
 export const getChatMessages = (sessionId: string) =>
   api.get<ChatMessage[]>(`/chat/${sessionId}/`);
@@ -12,13 +12,14 @@ export const saveModel = (
     config_id: configId,
     description,
   });
-export const loadModel = (id: string) =>
+export const loadModel = (id: string, quantize = false) =>
   api.post<{
     message: string;
     config_id: string;
     total_parameters: number;
     vocab_size: number;
-  }>(`/models/${id}/load/`);
+    quantized: boolean;
+  }>(`/models/${id}/load/`, { quantize });
 export const deleteModel = (id: string) => api.delete(`/models/${id}/`);
 export const getCurrentModel = (configId?: string) =>
   api.get<CurrentModel>(
@@ -28,3 +29,9 @@ export const getCurrentModel = (configId?: string) =>
 export const getActiveModels = () => api.get<ActiveModel[]>("/models/active/");
 export const unloadModel = (configId: string) =>
   api.delete(`/models/active/${configId}/`);
+export const quantizeModel = (configId: string) =>
+  api.post<{
+    config_id: string;
+    quantized: boolean;
+    quantized_layers: number;
+  }>(`/models/active/${configId}/quantize/`);
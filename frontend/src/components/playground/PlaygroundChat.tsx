@@ -80,7 +80,7 @@ export default function PlaygroundChat({ configId }: Props) {
   async function loadSessions() {
     try {
       const res = await getChatSessions(configId ?? undefined);
-      const s = res.data;
+      const s = res.data.results;
       setSessions(s);
       if (s.length > 0 && !sessionId) {
         setSession(s[0].session_id);
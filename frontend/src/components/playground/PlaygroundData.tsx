@@ -28,6 +28,7 @@ import {
 import {
   getDataFiles,
   uploadFile,
+  waitForIngestion,
   deleteFile,
   getCorpus,
   loadSampleData,
@@ -107,7 +108,11 @@ export default function PlaygroundData({ configId, onDataChanged }: Props) {
     setUploading(true);
     setError(null);
     try {
-      await uploadFile(file, undefined, configId ?? undefined);
+      const { data } = await uploadFile(file, undefined, configId ?? undefined);
+      const ingested = await waitForIngestion(data.id);
+      if (ingested.status === "failed") {
+        setError(ingested.error_message || t("playground.data.uploadError"));
+      }
       await onDataChanged?.();
       await loadData();
     } catch {
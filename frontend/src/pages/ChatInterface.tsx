@@ -58,7 +58,7 @@ export default function ChatInterface() {
   const loadSessions = async () => {
     try {
       const res = await getChatSessions();
-      setSessions(res.data);
+      setSessions(res.data.results);
     } catch {
       /* empty */
     }
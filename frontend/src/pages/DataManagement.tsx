@@ -17,6 +17,7 @@ import {
 import {
   getDataFiles,
   uploadFile,
+  waitForIngestion,
   deleteFile,
   toggleFile,
   getCorpus,
@@ -70,8 +71,14 @@ export default function DataManagement() {
     setUploading(true);
     setError(null);
     try {
+      const failed: string[] = [];
       for (let i = 0; i < fileList.length; i++) {
-        await uploadFile(fileList[i]);
+        const { data } = await uploadFile(fileList[i]);
+        const ingested = await waitForIngestion(data.id);
+        if (ingested.status === "failed") failed.push(ingested.original_filename);
+      }
+      if (failed.length > 0) {
+        setError(`Text extraction failed: ${failed.join(", ")}`);
       }
       await fetchData();
     } catch {
@@ -4,18 +4,26 @@ export interface ModelConfig {
   description: string;
   d_model: number;
   n_heads: number;
+  n_kv_heads: number;
   n_layers: number;
   d_ff: number;
   seq_len: number;
+  pos_encoding: "sinusoidal" | "rope" | "alibi";
+  max_context: number;
   vocab_size: number;
+  tie_embeddings: boolean;
   batch_size: number;
   learning_rate: number;
   max_epochs: number;
   grad_clip: number;
+  fused_loss: boolean;
+  packed_batches: boolean;
+  bucketed_batches: boolean;
   beta1: number;
   beta2: number;
   epsilon: number;
   weight_decay: number;
+  lazy_adam: boolean;
   lr_schedule: "constant" | "cosine" | "cosine_restarts";
   tokenizer_type: "character" | "gpt4" | "claude";
   max_gen_len: number;
@@ -41,16 +49,27 @@ export interface TrainingData {
   file_size: number;
   extracted_text: string;
   char_count: number;
+  unique_chars: number;
+  status: "pending" | "processing" | "ready" | "failed";
+  progress: number;
+  error_message: string;
   is_active: boolean;
   created_at: string;
 }
 
+export interface CorpusFile {
+  id: string;
+  name: string;
+  char_count: number;
+  unique_chars: number;
+}
+
 export interface Corpus {
   text: string;
   total_chars: number;
   unique_chars: number;
   file_count: number;
-  full_text: string;
+  files: CorpusFile[];
 }
 
 export interface ChatSession {
@@ -21,6 +21,7 @@ export interface CurrentModel {
   n_layers?: number;
   d_ff?: number;
   seq_len?: number;
+  quantized?: boolean;
 }
 
 export interface ActiveModel {
@@ -30,4 +31,5 @@ export interface ActiveModel {
   is_active: boolean;
   total_parameters: number;
   last_loss: number | null;
+  quantized?: boolean;
 }
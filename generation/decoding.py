@@ -0,0 +1,165 @@
+"""Décodages batchés : beam search et échantillonnage de plusieurs séquences.
+
+Toutes les séquences candidates avancent ensemble comme un batch (B, T) :
+un seul forward par pas, quel que soit le nombre de beams ou de séquences.
+Tant que le contexte tient dans context_length, le forward est incrémental
+(TransformerModel.forward_cached, un token par ligne) ; au-delà, fenêtre
+glissante et forward complet, comme la génération simple.
+
+beam_search() garde les num_beams préfixes de meilleure log-probabilité.
+Une hypothèse qui produit EOS est retirée du batch et notée
+    score = log P(séquence) / longueur ** length_penalty
+(length_penalty > 1 favorise les séquences longues, < 1 les courtes).
+
+sample_sequences() tire n séquences indépendantes avec une stratégie de
+sampling.py, un token par ligne et par pas (sample_batch).
+"""
+
+import numpy as np
+
+from generation.sampling import sample_batch
+
+
+def _next_logits(model, seqs: np.ndarray, past):
+    """Logits (B, V) du prochain token de chaque ligne, et le cache K/V à jour."""
+    if seqs.shape[1] > model.context_length:
+        window = seqs[:, -model.context_length :]
+        return model.forward(window, last_only=True)[:, -1], None
+    if past is None:
+        logits, past = model.forward_cached(seqs)
+    else:
+        logits, past = model.forward_cached(seqs[:, -1:], past)
+    return logits[:, -1].copy(), past
+
+
+def _log_softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    return shifted - np.log(np.exp(shifted).sum(axis=-1, keepdims=True))
+
+
+def beam_search(
+    model,
+    prompt_tokens: list[int],
+    eos_id: int,
+    max_tokens: int = 50,
+    num_beams: int = 4,
+    length_penalty: float = 1.0,
+    num_return_sequences: int = 1,
+    processors=None,
+) -> list[tuple[list[int], float]]:
+    """Beam search vectorisé.
+
+    Args:
+        model: TransformerModel
+        prompt_tokens: prompt encodé (BOS compris)
+        eos_id: token de fin ; une hypothèse qui le produit est terminée
+        max_tokens: nombre max de tokens générés
+        num_beams: largeur du faisceau
+        length_penalty: exposant de normalisation par la longueur
+        num_return_sequences: taille de la liste n-best (<= num_beams)
+        processors: LogitsProcessorList appliquée aux logits de chaque beam
+    Returns:
+        liste n-best de (tokens générés sans EOS, score), meilleur d'abord
+    """
+    num_return_sequences = min(num_return_sequences, num_beams)
+    seqs = np.array([prompt_tokens])  # un seul beam au départ : pas de doublons
+    scores = np.zeros(1)  # log P cumulée de chaque beam
+    n_prompt = len(prompt_tokens)
+    finished: list[tuple[float, list[int]]] = []
+    past = None
+
+    def normalized(score, length):
+        return score / max(length, 1) ** length_penalty
+
+    for step in range(max_tokens):
+        logits, past = _next_logits(model, seqs, past)
+        if processors:
+            logits = processors(seqs, step, logits)
+        log_probs = scores[:, None] + _log_softmax(logits)  # (W, V)
+
+        # 2 * num_beams candidats suffisent : au plus num_beams finissent par EOS
+        vocab = log_probs.shape[1]
+        flat = log_probs.ravel()
+        n_cand = min(2 * num_beams, flat.size)
+        cand = np.argpartition(-flat, n_cand - 1)[:n_cand]
+        cand = cand[np.argsort(-flat[cand])]
+        cand = cand[np.isfinite(flat[cand])]
+
+        beam_idx, tokens, new_scores = [], [], []
+        for c in cand:
+            beam, token = divmod(int(c), vocab)
+            if token == eos_id:
+                generated = seqs[beam, n_prompt:].tolist()
+                finished.append((normalized(flat[c], step + 1), generated))
+            else:
+                beam_idx.append(beam)
+                tokens.append(token)
+                new_scores.append(flat[c])
+            if len(beam_idx) == num_beams:
+                break
+        if not beam_idx:
+            break
+
+        beam_idx = np.array(beam_idx)
+        seqs = np.concatenate([seqs[beam_idx], np.array(tokens)[:, None]], axis=1)
+        scores = np.array(new_scores)
+        if past is not None:
+            past = [(K[beam_idx], V[beam_idx]) for K, V in past]
+
+        # Arrêt anticipé : aucun beam vivant ne peut plus dépasser les n-best
+        finished.sort(key=lambda h: -h[0])
+        del finished[num_beams:]
+        if len(finished) >= num_beams and length_penalty > 0:
+            best_live = normalized(scores.max(), step + 1)
+            if best_live <= finished[-1][0]:
+                break
+
+    # Beams non terminés (max_tokens atteint) : candidats au même titre
+    for score, row in zip(scores, seqs):
+        finished.append((normalized(score, len(row) - n_prompt), row[n_prompt:].tolist()))
+    finished.sort(key=lambda h: -h[0])
+    return [(tokens, float(score)) for score, tokens in finished[:num_return_sequences]]
+
+
+def sample_sequences(
+    model,
+    prompt_tokens: list[int],
+    eos_id: int,
+    num_return_sequences: int,
+    max_tokens: int = 50,
+    strategy: str = "temperature",
+    temperature: float = 1.0,
+    top_k: int = 10,
+    top_p: float = 0.9,
+    processors=None,
+    rng=None,
+) -> list[list[int]]:
+    """Échantillonne num_return_sequences continuations en un seul batch.
+
+    Les lignes terminées (EOS) restent dans le batch, complétées par -1
+    (ignoré par les processeurs), jusqu'à ce que toutes aient fini.
+
+    Returns:
+        une liste de tokens générés (sans EOS) par séquence
+    """
+    if rng is not None and not isinstance(rng, np.random.Generator):
+        rng = np.random.default_rng(rng)  # une seule suite de tirages
+    n = num_return_sequences
+    seqs = np.repeat(np.array([prompt_tokens]), n, axis=0)
+    history = seqs.copy()  # -1 après EOS, pour les processeurs
+    done = np.zeros(n, dtype=bool)
+    past = None
+    for step in range(max_tokens):
+        logits, past = _next_logits(model, seqs, past)
+        if processors:
+            logits = processors(history, step, logits)
+        tokens = sample_batch(logits, strategy, temperature, top_k, top_p, rng)
+        done |= tokens == eos_id
+        # Les lignes finies continuent avec un token quelconque (ignoré)
+        seqs = np.concatenate([seqs, np.where(done, eos_id, tokens)[:, None]], axis=1)
+        history = np.concatenate([history, np.where(done, -1, tokens)[:, None]], axis=1)
+        if done.all():
+            break
+
+    n_prompt = len(prompt_tokens)
+    return [[int(t) for t in row[n_prompt:] if t >= 0] for row in history]
@@ -1,6 +1,7 @@
 import numpy as np
 
 from config import Config
+from generation.decoding import beam_search, sample_sequences
 from generation.sampling import sample_token
 from modules.tokenizers.base import BaseTokenizer
 
@@ -28,7 +29,10 @@ class Generator:
         sampling_strategy: str = None,
         top_k: int = None,
         top_p: float = None,
-    ) -> str:
+        num_beams: int = 1,
+        length_penalty: float = 1.0,
+        num_return_sequences: int = 1,
+    ) -> str | list[str]:
         """Génère du texte à partir d'un prompt.
 
         Args:
@@ -38,8 +42,13 @@ class Generator:
             sampling_strategy: 'greedy', 'temperature', 'top_k', 'top_p'
             top_k: nombre de tokens candidats pour top_k
             top_p: seuil de probabilité cumulée pour top_p
+            num_beams: > 1 pour un beam search (remplace l'échantillonnage)
+            length_penalty: normalisation des scores par la longueur (beam search)
+            num_return_sequences: nombre de textes retournés ; n-best du beam
+                                  search, ou n échantillons tirés en un batch
         Returns:
-            texte complet (prompt + texte généré)
+            texte complet (prompt + texte généré), ou liste de
+            num_return_sequences textes si num_return_sequences > 1
         """
         if max_tokens is None:
             max_tokens = self.config.max_gen_len
@@ -54,10 +63,37 @@ class Generator:
 
         tokens = [self.tokenizer.bos_id] + self.tokenizer.encode(prompt)
 
+        if num_beams > 1 or num_return_sequences > 1:
+            if num_beams > 1:
+                results = beam_search(
+                    self.model,
+                    tokens,
+                    self.tokenizer.eos_id,
+                    max_tokens,
+                    num_beams,
+                    length_penalty,
+                    num_return_sequences,
+                )
+                outputs = [generated for generated, _ in results]
+            else:
+                outputs = sample_sequences(
+                    self.model,
+                    tokens,
+                    self.tokenizer.eos_id,
+                    num_return_sequences,
+                    max_tokens,
+                    sampling_strategy,
+                    temperature,
+                    top_k,
+                    top_p,
+                )
+            texts = [self.tokenizer.decode(tokens + generated) for generated in outputs]
+            return texts if num_return_sequences > 1 else texts[0]
+
         for _ in range(max_tokens):
-            context = tokens[-self.config.seq_len :]
+            context = tokens[-self.model.context_length :]
             x = np.array([context])
-            logits = self.model.forward(x)
+            logits = self.model.forward(x, last_only=True)
             next_logits = logits[0, -1, :]
 
             next_token = sample_token(
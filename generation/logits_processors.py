@@ -0,0 +1,223 @@
+"""Chaîne de traitements des logits avant échantillonnage, et arrêt sur chaînes.
+
+Chaque processeur reçoit l'historique des tokens (B, L) (prompt + tokens
+générés ; -1 = padding), le nombre de tokens déjà générés et les logits
+(B, V) du prochain token, qu'il modifie en place :
+- RepetitionPenalty : pénalité multiplicative (CTRL) et pénalités de
+  fréquence / présence (OpenAI), comptes par ligne en un seul bincount
+- MinNewTokens : interdit EOS tant que min_new_tokens n'est pas atteint
+- BanTokens : interdit des tokens, ou des séquences (mots interdits) dont
+  le dernier token est bloqué quand l'historique se termine par le début
+
+LogitsProcessorList les applique dans l'ordre ; build_processors()
+construit la chaîne à partir des paramètres de génération.
+
+StopSequences n'agit pas sur les logits : il détokenise au fil de l'eau
+(un morceau de texte par token) et détecte les chaînes d'arrêt, en
+retenant le texte qui pourrait être le début de l'une d'elles.
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+class LogitsProcessor(ABC):
+    """Interface : modifie les logits (B, V) en place et les retourne."""
+
+    @abstractmethod
+    def __call__(self, history: np.ndarray, n_generated: int, logits: np.ndarray) -> np.ndarray:
+        pass
+
+
+class LogitsProcessorList(list):
+    """Liste de processeurs appliqués dans l'ordre."""
+
+    def __call__(self, history: np.ndarray, n_generated: int, logits: np.ndarray) -> np.ndarray:
+        for processor in self:
+            logits = processor(history, n_generated, logits)
+        return logits
+
+
+def token_counts(history: np.ndarray, vocab_size: int) -> np.ndarray:
+    """Occurrences de chaque token par ligne, shape (B, V), en un bincount.
+
+    Les positions négatives (padding) sont ignorées.
+    """
+    B = history.shape[0]
+    valid = history >= 0
+    rows = np.broadcast_to(np.arange(B)[:, None], history.shape)
+    flat = rows[valid] * vocab_size + history[valid]
+    return np.bincount(flat, minlength=B * vocab_size).reshape(B, vocab_size)
+
+
+class RepetitionPenalty(LogitsProcessor):
+    """Décourage les tokens déjà présents dans l'historique.
+
+    - penalty > 1 : logit / penalty si positif, logit * penalty sinon
+    - frequency_penalty : logit -= frequency_penalty * nombre d'occurrences
+    - presence_penalty : logit -= presence_penalty si le token est apparu
+    """
+
+    def __init__(
+        self, penalty: float = 1.0, frequency_penalty: float = 0.0, presence_penalty: float = 0.0
+    ):
+        self.penalty = penalty
+        self.frequency_penalty = frequency_penalty
+        self.presence_penalty = presence_penalty
+
+    def __call__(self, history, n_generated, logits):
+        counts = token_counts(history, logits.shape[1])
+        seen = counts > 0
+        if self.penalty != 1.0:
+            penalized = np.where(logits > 0, logits / self.penalty, logits * self.penalty)
+            logits[seen] = penalized[seen]
+        if self.frequency_penalty:
+            logits -= self.frequency_penalty * counts
+        if self.presence_penalty:
+            logits -= self.presence_penalty * seen
+        return logits
+
+
+class MinNewTokens(LogitsProcessor):
+    """Masque EOS tant que moins de min_new_tokens tokens ont été générés."""
+
+    def __init__(self, min_new_tokens: int, eos_id: int):
+        self.min_new_tokens = min_new_tokens
+        self.eos_id = eos_id
+
+    def __call__(self, history, n_generated, logits):
+        if n_generated < self.min_new_tokens:
+            logits[:, self.eos_id] = -np.inf
+        return logits
+
+
+class BanTokens(LogitsProcessor):
+    """Interdit des tokens isolés ou des séquences de tokens.
+
+    Args:
+        sequences: listes de token IDs ; une séquence de longueur 1 est
+                   toujours interdite, une plus longue voit son dernier
+                   token bloqué quand l'historique se termine par le reste
+    """
+
+    def __init__(self, sequences: list[list[int]]):
+        self.single = np.array([s[0] for s in sequences if len(s) == 1], dtype=np.int64)
+        self.multi = [(np.array(s[:-1]), s[-1]) for s in sequences if len(s) > 1]
+
+    def __call__(self, history, n_generated, logits):
+        if self.single.size:
+            logits[:, self.single] = -np.inf
+        for prefix, last in self.multi:
+            n = len(prefix)
+            if history.shape[1] >= n:
+                match = np.all(history[:, -n:] == prefix, axis=1)
+                logits[match, last] = -np.inf
+        return logits
+
+
+def build_processors(
+    tokenizer,
+    min_new_tokens: int = 0,
+    repetition_penalty: float = 1.0,
+    frequency_penalty: float = 0.0,
+    presence_penalty: float = 0.0,
+    bad_words: list[str] | None = None,
+) -> LogitsProcessorList:
+    """Chaîne de processeurs pour les paramètres de génération donnés."""
+    processors = LogitsProcessorList()
+    if repetition_penalty != 1.0 or frequency_penalty or presence_penalty:
+        processors.append(
+            RepetitionPenalty(repetition_penalty, frequency_penalty, presence_penalty)
+        )
+    if min_new_tokens > 0:
+        processors.append(MinNewTokens(min_new_tokens, tokenizer.eos_id))
+    sequences = [tokenizer.encode(w) for w in bad_words or [] if w]
+    sequences = [s for s in sequences if s]
+    if sequences:
+        processors.append(BanTokens(sequences))
+    return processors
+
+
+def processor_options(data) -> dict:
+    """Extrait d'un payload (dict) les options de processeurs et de stop.
+
+    stop et bad_words acceptent une chaîne ou une liste de chaînes.
+    Retourne les kwargs de EngineService.generate_text & co.
+    """
+
+    def strings(value):
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [value]
+        return [str(v) for v in value]
+
+    return {
+        "min_new_tokens": int(data.get("min_new_tokens", 0)),
+        "stop": strings(data.get("stop")),
+        "repetition_penalty": float(data.get("repetition_penalty", 1.0)),
+        "frequency_penalty": float(data.get("frequency_penalty", 0.0)),
+        "presence_penalty": float(data.get("presence_penalty", 0.0)),
+        "bad_words": strings(data.get("bad_words")),
+    }
+
+
+class StopSequences:
+    """Détection incrémentale de chaînes d'arrêt, une ligne par séquence.
+
+    push() ajoute le texte d'un nouveau token et retourne la partie qui
+    peut être émise : le texte qui pourrait commencer une chaîne d'arrêt
+    est retenu jusqu'à ce qu'il soit levé. Seule la fin du texte (au plus
+    la longueur de la plus longue chaîne) est examinée à chaque token.
+    """
+
+    def __init__(self, stops: list[str], batch_size: int = 1):
+        self.stops = [s for s in stops if s]
+        self.max_len = max((len(s) for s in self.stops), default=0)
+        self.text = [""] * batch_size
+        self.emitted = [0] * batch_size
+        self.cut: list[int | None] = [None] * batch_size
+
+    @property
+    def stopped(self) -> np.ndarray:
+        return np.array([c is not None for c in self.cut])
+
+    def push(self, row: int, piece: str) -> str:
+        """Ajoute le texte d'un token ; retourne le texte émettable."""
+        if self.cut[row] is not None:
+            return ""
+        text = self.text[row] + piece
+        self.text[row] = text
+        if not self.stops:
+            end = len(text)
+        else:
+            start = max(0, len(text) - len(piece) - self.max_len + 1)
+            found = [i for i in (text.find(s, start) for s in self.stops) if i >= 0]
+            if found:
+                end = self.cut[row] = min(found)
+            else:
+                end = len(text) - self._held(text)
+        out = text[self.emitted[row] : end]
+        self.emitted[row] = max(self.emitted[row], end)
+        return out
+
+    def flush(self, row: int) -> str:
+        """Fin de génération sans arrêt : émet le texte retenu."""
+        end = len(self.text[row]) if self.cut[row] is None else self.cut[row]
+        out = self.text[row][self.emitted[row] : end]
+        self.emitted[row] = max(self.emitted[row], end)
+        return out
+
+    def output(self, row: int) -> str:
+        """Texte généré de la ligne, coupé avant la chaîne d'arrêt."""
+        cut = self.cut[row]
+        return self.text[row] if cut is None else self.text[row][:cut]
+
+    def _held(self, text: str) -> int:
+        """Longueur du plus long suffixe de text qui commence une chaîne d'arrêt."""
+        for k in range(min(self.max_len - 1, len(text)), 0, -1):
+            suffix = text[-k:]
+            if any(s.startswith(suffix) for s in self.stops):
+                return k
+        return 0
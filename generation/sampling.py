@@ -5,11 +5,202 @@ Quatre stratégies disponibles :
 - temperature : ajuste la distribution puis échantillonne
 - top_k : ne considère que les K tokens les plus probables
 - top_p : ne considère que les tokens couvrant P% de la probabilité cumulée
+
+Chaque stratégie existe en version batchée (suffixe _batch) : logits
+(B, V), une ligne par séquence, paramètres scalaires ou par ligne
+(tableaux (B,) de températures, k, p). Les versions batchées :
+- sélectionnent partiellement (np.argpartition) au lieu de trier tout le
+  vocabulaire, et ne trient que les candidats retenus ;
+- tirent tous les tokens en une passe d'inverse-CDF (un uniforme par
+  ligne) au lieu d'un np.random.choice par séquence ;
+- acceptent un np.random.Generator (ou une seed) pour un échantillonnage
+  reproductible et indépendant de l'état global ; sans rng, l'état global
+  np.random est utilisé (Config.seed).
+Les fonctions sur un seul vecteur (V,) délèguent aux versions batchées.
 """
 
 import numpy as np
 
-from modules.softmax import softmax
+STRATEGIES = ("greedy", "temperature", "top_k", "top_p")
+
+# Nombre de candidats examinés au premier essai par top_p (doublé si besoin)
+TOP_P_CANDIDATES = 64
+
+
+def _per_row(value, n_rows: int, dtype) -> np.ndarray:
+    """Scalaire ou tableau -> tableau (B,) de paramètres par ligne."""
+    return np.broadcast_to(np.asarray(value, dtype=dtype), (n_rows,))
+
+
+def _uniform(rng, n_rows: int) -> np.ndarray:
+    """Uniformes dans [0, 1) depuis rng ou l'état global.
+
+    Une seed (int) crée un Generator neuf à chaque appel : pour une
+    séquence de tirages, passer un np.random.Generator.
+    """
+    if rng is None:
+        return np.random.random(n_rows)
+    if not isinstance(rng, np.random.Generator):
+        rng = np.random.default_rng(rng)
+    return rng.random(n_rows)
+
+
+def _softmax_rows(scaled: np.ndarray) -> np.ndarray:
+    """Softmax par ligne (les -inf donnent une probabilité nulle)."""
+    e = np.exp(scaled - np.max(scaled, axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+def _inverse_cdf(probs: np.ndarray, rng=None, u: np.ndarray | None = None) -> np.ndarray:
+    """Un tirage par ligne de probs (B, n) : premier indice où CDF > u."""
+    cdf = np.cumsum(probs, axis=-1)
+    if u is None:
+        u = _uniform(rng, probs.shape[0])
+    return np.minimum((cdf <= u[:, None] * cdf[:, -1:]).sum(axis=-1), probs.shape[1] - 1)
+
+
+def _scale(logits: np.ndarray, temperature) -> np.ndarray:
+    t = _per_row(temperature, logits.shape[0], np.float64)
+    return logits / np.maximum(t, 1e-8)[:, None]
+
+
+def _top_candidates(logits: np.ndarray, m: int) -> np.ndarray:
+    """Indices des m plus grands logits de chaque ligne, triés par score décroissant."""
+    V = logits.shape[1]
+    if m < V:
+        idx = np.argpartition(-logits, m - 1, axis=1)[:, :m]
+    else:
+        idx = np.broadcast_to(np.arange(V), logits.shape)
+    order = np.argsort(-np.take_along_axis(logits, idx, axis=1), axis=1)
+    return np.take_along_axis(idx, order, axis=1)
+
+
+def greedy_batch(logits: np.ndarray) -> np.ndarray:
+    """Token le plus probable de chaque ligne, shape (B,)."""
+    return np.argmax(logits, axis=-1)
+
+
+def temperature_sample_batch(logits: np.ndarray, temperature=1.0, rng=None) -> np.ndarray:
+    """Échantillonnage avec température par ligne, shape (B,)."""
+    return _inverse_cdf(_softmax_rows(_scale(logits, temperature)), rng)
+
+
+def top_k_sample_batch(logits: np.ndarray, k=10, temperature=1.0, rng=None) -> np.ndarray:
+    """Top-k par ligne : argpartition sur max(k) candidats, puis masque à k_b."""
+    B, V = logits.shape
+    k = np.clip(_per_row(k, B, np.int64), 1, V)
+    cand = _top_candidates(logits, int(k.max()))  # (B, k_max)
+    scaled = _scale(np.take_along_axis(logits, cand, axis=1), temperature)
+    scaled[np.arange(cand.shape[1])[None, :] >= k[:, None]] = -np.inf
+    chosen = _inverse_cdf(_softmax_rows(scaled), rng)
+    return cand[np.arange(B), chosen]
+
+
+def top_p_sample_batch(logits: np.ndarray, p=0.9, temperature=1.0, rng=None) -> np.ndarray:
+    """Nucleus par ligne, sans trier tout le vocabulaire.
+
+    Seuls les TOP_P_CANDIDATES meilleurs tokens sont triés ; les lignes
+    dont ces candidats n'atteignent pas la masse p (distribution plate)
+    repassent par un tri complet. La normalisation utilise la somme exacte
+    sur tout le vocabulaire.
+    """
+    B, V = logits.shape
+    p = _per_row(p, B, np.float64)
+    scaled = _scale(logits, temperature)
+    max_ = scaled.max(axis=1, keepdims=True)
+    log_z = max_[:, 0] + np.log(np.exp(scaled - max_).sum(axis=1))
+    u = _uniform(rng, B)
+
+    def nucleus(rows, m):
+        cand = _top_candidates(scaled[rows], m)
+        probs = np.exp(np.take_along_axis(scaled[rows], cand, axis=1) - log_z[rows, None])
+        cumsum = np.cumsum(probs, axis=1)
+        covered = cumsum[:, -1] >= p[rows]
+        # Garde les tokens jusqu'au premier qui fait atteindre p (inclus)
+        cutoff = np.minimum((cumsum < p[rows, None]).sum(axis=1) + 1, m)
+        probs[np.arange(m)[None, :] >= cutoff[:, None]] = 0.0
+        chosen = cand[np.arange(len(cand)), _inverse_cdf(probs, u=u[rows])]
+        return chosen, covered
+
+    tokens, covered = nucleus(np.arange(B), min(TOP_P_CANDIDATES, V))
+    if not covered.all() and V > TOP_P_CANDIDATES:
+        rest = np.flatnonzero(~covered)
+        tokens[rest], _ = nucleus(rest, V)
+    return tokens
+
+
+def sample_batch(
+    logits: np.ndarray,
+    strategy: str = "temperature",
+    temperature=1.0,
+    top_k=10,
+    top_p=0.9,
+    rng=None,
+) -> np.ndarray:
+    """Échantillonne un token par ligne de logits (B, V).
+
+    Args:
+        logits: scores bruts (B, V)
+        strategy: 'greedy', 'temperature', 'top_k', 'top_p'
+        temperature, top_k, top_p: scalaires ou tableaux (B,) par ligne
+        rng: np.random.Generator ou seed (None = état global np.random)
+
+    Returns:
+        indices des tokens choisis, shape (B,)
+    """
+    logits = np.asarray(logits, dtype=np.float64)
+    if strategy == "greedy":
+        return greedy_batch(logits)
+    elif strategy == "temperature":
+        return temperature_sample_batch(logits, temperature, rng)
+    elif strategy == "top_k":
+        return top_k_sample_batch(logits, top_k, temperature, rng)
+    elif strategy == "top_p":
+        return top_p_sample_batch(logits, top_p, temperature, rng)
+    else:
+        raise ValueError(
+            f"Stratégie '{strategy}' inconnue. Choix : greedy, temperature, top_k, top_p"
+        )
+
+
+def strategy_probs(
+    logits: np.ndarray,
+    strategy: str = "temperature",
+    temperature=1.0,
+    top_k=10,
+    top_p=0.9,
+) -> np.ndarray:
+    """Distribution (B, V) dont sample_batch() tire ses tokens.
+
+    greedy : un pic sur l'argmax ; top_k / top_p : probabilités renormalisées
+    sur les candidats retenus, avec les mêmes règles de coupure. Sert au
+    décodage spéculatif, qui compare les distributions de deux modèles.
+    """
+    logits = np.asarray(logits, dtype=np.float64)
+    B, V = logits.shape
+    probs = np.zeros((B, V))
+    if strategy == "greedy":
+        probs[np.arange(B), greedy_batch(logits)] = 1.0
+        return probs
+    if strategy not in STRATEGIES:
+        raise ValueError(
+            f"Stratégie '{strategy}' inconnue. Choix : greedy, temperature, top_k, top_p"
+        )
+    full = _softmax_rows(_scale(logits, temperature))
+    if strategy == "temperature":
+        return full
+    if strategy == "top_k":
+        k = np.clip(_per_row(top_k, B, np.int64), 1, V)
+        cand = _top_candidates(logits, int(k.max()))
+        keep = np.arange(cand.shape[1])[None, :] < k[:, None]
+    else:
+        cand = _top_candidates(logits, V)
+        cumsum = np.cumsum(np.take_along_axis(full, cand, axis=1), axis=1)
+        cutoff = (cumsum < _per_row(top_p, B, np.float64)[:, None]).sum(axis=1) + 1
+        keep = np.arange(V)[None, :] < cutoff[:, None]
+    kept = np.where(keep, np.take_along_axis(full, cand, axis=1), 0.0)
+    np.put_along_axis(probs, cand, kept, axis=1)
+    return probs / probs.sum(axis=1, keepdims=True)
 
 
 def greedy(logits: np.ndarray) -> int:
@@ -17,46 +208,31 @@ def greedy(logits: np.ndarray) -> int:
     return int(np.argmax(logits))
 
 
-def temperature_sample(logits: np.ndarray, temperature: float = 1.0) -> int:
+def temperature_sample(logits: np.ndarray, temperature: float = 1.0, rng=None) -> int:
     """Échantillonnage avec ajustement de température.
 
     temperature < 1 : plus conservateur (pics plus marqués)
     temperature > 1 : plus créatif (distribution plus uniforme)
     """
-    scaled = logits / max(temperature, 1e-8)
-    probs = softmax(scaled)
-    return int(np.random.choice(len(probs), p=probs))
+    return int(temperature_sample_batch(np.asarray(logits)[None], temperature, rng)[0])
 
 
-def top_k_sample(logits: np.ndarray, k: int = 10, temperature: float = 1.0) -> int:
+def top_k_sample(logits: np.ndarray, k: int = 10, temperature: float = 1.0, rng=None) -> int:
     """Ne considère que les K tokens les plus probables.
 
     Filtre les tokens improbables avant d'échantillonner,
     réduisant le risque de générer des incohérences.
     """
-    k = min(k, len(logits))
-    top_k_idx = np.argsort(logits)[-k:]
-    top_k_logits = logits[top_k_idx] / max(temperature, 1e-8)
-    probs = softmax(top_k_logits)
-    chosen = np.random.choice(len(probs), p=probs)
-    return int(top_k_idx[chosen])
+    return int(top_k_sample_batch(np.asarray(logits)[None], k, temperature, rng)[0])
 
 
-def top_p_sample(logits: np.ndarray, p: float = 0.9, temperature: float = 1.0) -> int:
+def top_p_sample(logits: np.ndarray, p: float = 0.9, temperature: float = 1.0, rng=None) -> int:
     """Échantillonnage nucleus — garde les tokens couvrant P% de probabilité.
 
     Plus adaptatif que top_k : garde peu de tokens quand un domine,
     et plus de tokens quand la distribution est plate.
     """
-    scaled = logits / max(temperature, 1e-8)
-    probs = softmax(scaled)
-    sorted_idx = np.argsort(probs)[::-1]
-    cumsum = np.cumsum(probs[sorted_idx])
-    cutoff = int(np.searchsorted(cumsum, p)) + 1
-    top_idx = sorted_idx[:cutoff]
-    top_probs = probs[top_idx]
-    top_probs = top_probs / top_probs.sum()
-    return int(np.random.choice(top_idx, p=top_probs))
+    return int(top_p_sample_batch(np.asarray(logits)[None], p, temperature, rng)[0])
 
 
 def sample_token(
@@ -65,6 +241,7 @@ def sample_token(
     temperature: float = 1.0,
     top_k: int = 10,
     top_p: float = 0.9,
+    rng=None,
 ) -> int:
     """Point d'entrée unifié pour l'échantillonnage.
 
@@ -74,19 +251,9 @@ def sample_token(
         temperature: température pour temperature/top_k/top_p
         top_k: nombre de tokens pour top_k
         top_p: seuil de probabilité cumulée pour top_p
+        rng: np.random.Generator ou seed (None = état global np.random)
 
     Returns:
         Index du token sélectionné
     """
-    if strategy == "greedy":
-        return greedy(logits)
-    elif strategy == "temperature":
-        return temperature_sample(logits, temperature)
-    elif strategy == "top_k":
-        return top_k_sample(logits, k=top_k, temperature=temperature)
-    elif strategy == "top_p":
-        return top_p_sample(logits, p=top_p, temperature=temperature)
-    else:
-        raise ValueError(
-            f"Stratégie '{strategy}' inconnue. Choix : greedy, temperature, top_k, top_p"
-        )
+    return int(sample_batch(np.asarray(logits)[None], strategy, temperature, top_k, top_p, rng)[0])
@@ -0,0 +1,50 @@
+"""Décodage spéculatif : vérification des tokens proposés par un modèle brouillon.
+
+Un petit modèle (brouillon) propose k tokens x_1..x_k en échantillonnant
+ses distributions q_i ; le modèle cible calcule en un seul forward ses
+distributions p_i aux k + 1 positions. Chaque x_i est accepté avec la
+probabilité min(1, p_i(x_i) / q_i(x_i)) ; au premier rejet, le token est
+retiré dans le résidu normalisé max(0, p_i - q_i). Si les k sont acceptés,
+un token bonus est tiré dans p_{k+1}.
+
+Les tokens produits suivent alors exactement la distribution du modèle
+cible (Leviathan et al., Chen et al.) : p et q sont les distributions des
+stratégies d'échantillonnage (cf. sampling.strategy_probs), donc greedy,
+top_k et top_p gardent leur sens. Le gain vient de ce qu'un forward du
+modèle cible valide en moyenne plusieurs tokens.
+"""
+
+import numpy as np
+
+from generation.sampling import _inverse_cdf, _uniform
+
+
+def sample_from(probs: np.ndarray, rng=None) -> int:
+    """Tire un token dans une distribution (V,)."""
+    return int(_inverse_cdf(probs[None], rng)[0])
+
+
+def verify_draft(
+    p: np.ndarray, q: np.ndarray, draft_tokens: list[int], rng=None
+) -> tuple[int, int]:
+    """Échantillonnage par rejet des tokens proposés.
+
+    Args:
+        p: (k + 1, V) distributions du modèle cible après chaque préfixe
+        q: (k, V) distributions du brouillon ayant produit draft_tokens
+        draft_tokens: les k tokens proposés
+        rng: np.random.Generator ou seed (None = état global np.random)
+    Returns:
+        (n_accepted, token) : nombre de tokens proposés acceptés, puis le
+        token suivant (correction au premier rejet, ou bonus)
+    """
+    k = len(draft_tokens)
+    u = _uniform(rng, k)
+    for i, x in enumerate(draft_tokens):
+        if u[i] * q[i, x] < p[i, x]:  # u < p / q, sans division par zéro
+            continue
+        residual = np.maximum(p[i] - q[i], 0.0)
+        if residual.sum() <= 0:  # p == q à l'arrondi près
+            residual = p[i]
+        return i, sample_from(residual, rng)
+    return k, sample_from(p[k], rng)
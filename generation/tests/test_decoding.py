@@ -0,0 +1,81 @@
+"""Tests du beam search et de l'échantillonnage batché."""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from config import Config
+from generation.decoding import beam_search, sample_sequences
+from generation.logits_processors import LogitsProcessorList, MinNewTokens
+from modules.transformer_model import TransformerModel
+
+EOS = 4
+
+
+@pytest.fixture
+def model():
+    config = Config(d_model=16, n_heads=2, n_layers=2, d_ff=32, seq_len=4, vocab_size=5, seed=3)
+    return TransformerModel(config)
+
+
+def _log_prob(model, prompt, generated):
+    total = 0.0
+    for i, token in enumerate(generated):
+        context = (prompt + generated[:i])[-model.context_length :]
+        logits = model.forward(np.array([context]), last_only=True)[0, -1]
+        logits = logits - logits.max()
+        total += logits[token] - np.log(np.exp(logits).sum())
+    return total
+
+
+@pytest.mark.parametrize("length_penalty", [0.0, 1.0, 2.0])
+def test_wide_beam_is_exhaustive_search(model, length_penalty):
+    """Avec un faisceau couvrant tout l'espace, le meilleur score est exact."""
+    prompt, max_tokens = [0, 1], 3
+    candidates = []
+    for n in range(1, max_tokens + 1):
+        for seq in itertools.product(range(5), repeat=n):
+            if EOS in seq[:-1] or (n < max_tokens and seq[-1] != EOS):
+                continue
+            score = _log_prob(model, prompt, list(seq)) / n**length_penalty
+            candidates.append((score, [t for t in seq if t != EOS]))
+    candidates.sort(key=lambda c: -c[0])
+
+    results = beam_search(
+        model,
+        prompt,
+        EOS,
+        max_tokens,
+        num_beams=125,
+        length_penalty=length_penalty,
+        num_return_sequences=3,
+    )
+    assert [r[0] for r in results] == [c[1] for c in candidates[:3]]
+    np.testing.assert_allclose([r[1] for r in results], [c[0] for c in candidates[:3]])
+
+
+def test_beam_search_beyond_context_length(model):
+    results = beam_search(model, [0, 1, 2], EOS, max_tokens=6, num_beams=3, num_return_sequences=3)
+    assert len(results) == 3
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_beam_search_min_new_tokens(model):
+    processors = LogitsProcessorList([MinNewTokens(3, EOS)])
+    for tokens, _ in beam_search(
+        model, [0], EOS, max_tokens=5, num_beams=4, num_return_sequences=4, processors=processors
+    ):
+        assert len(tokens) >= 3
+
+
+def test_sample_sequences_batch(model):
+    greedy = sample_sequences(model, [0, 1], EOS, 3, max_tokens=6, strategy="greedy")
+    assert greedy[0] == greedy[1] == greedy[2]
+
+    samples = sample_sequences(model, [0, 1], EOS, 8, max_tokens=6, temperature=1.5, rng=0)
+    assert len(samples) == 8
+    assert all(len(s) <= 6 and EOS not in s for s in samples)
+    assert samples == sample_sequences(model, [0, 1], EOS, 8, max_tokens=6, temperature=1.5, rng=0)
+    assert len({tuple(s) for s in samples}) > 1
@@ -0,0 +1,96 @@
+"""Tests pour la chaîne de processeurs de logits et les chaînes d'arrêt."""
+
+import numpy as np
+
+from generation.logits_processors import (
+    BanTokens,
+    LogitsProcessorList,
+    MinNewTokens,
+    RepetitionPenalty,
+    StopSequences,
+    processor_options,
+    token_counts,
+)
+
+
+class TestTokenCounts:
+    def test_counts_per_row_ignore_padding(self):
+        history = np.array([[1, 1, 3, -1], [0, 2, 2, 2]])
+        counts = token_counts(history, 4)
+        np.testing.assert_array_equal(counts, [[0, 2, 0, 1], [1, 0, 3, 0]])
+
+
+class TestRepetitionPenalty:
+    def test_multiplicative_penalty_on_seen_tokens(self):
+        logits = np.array([[2.0, -2.0, 2.0, -2.0]])
+        RepetitionPenalty(penalty=2.0)(np.array([[0, 1]]), 2, logits)
+        np.testing.assert_allclose(logits, [[1.0, -4.0, 2.0, -2.0]])
+
+    def test_frequency_and_presence(self):
+        logits = np.zeros((1, 3))
+        RepetitionPenalty(frequency_penalty=0.5, presence_penalty=1.0)(
+            np.array([[2, 2, 2, 0]]), 4, logits
+        )
+        np.testing.assert_allclose(logits, [[-1.5, 0.0, -2.5]])
+
+
+class TestMinNewTokens:
+    def test_masks_eos_until_min_length(self):
+        proc = MinNewTokens(2, eos_id=3)
+        logits = np.zeros((2, 4))
+        proc(np.zeros((2, 1), dtype=int), 1, logits)
+        assert np.all(logits[:, 3] == -np.inf)
+        logits = np.zeros((2, 4))
+        proc(np.zeros((2, 1), dtype=int), 2, logits)
+        assert np.all(logits == 0)
+
+
+class TestBanTokens:
+    def test_single_and_sequence_bans(self):
+        proc = BanTokens([[4], [1, 2]])
+        history = np.array([[0, 1], [0, 3]])
+        logits = proc(history, 0, np.zeros((2, 5)))
+        assert np.all(logits[:, 4] == -np.inf)
+        # [1, 2] : 2 interdit seulement après 1
+        assert logits[0, 2] == -np.inf
+        assert logits[1, 2] == 0
+
+    def test_chain_applies_in_order(self):
+        chain = LogitsProcessorList([RepetitionPenalty(penalty=2.0), BanTokens([[0]])])
+        logits = chain(np.array([[1]]), 1, np.array([[1.0, 4.0, 1.0]]))
+        np.testing.assert_allclose(logits, [[-np.inf, 2.0, 1.0]])
+
+
+class TestStopSequences:
+    def test_stops_and_cuts_before_stop_string(self):
+        stops = StopSequences(["\n\n", "FIN"])
+        emitted = "".join(stops.push(0, c) for c in "abc\nde\n\nxyz")
+        assert stops.stopped[0]
+        assert stops.output(0) == "abc\nde"
+        assert emitted == "abc\nde"
+
+    def test_holds_partial_match_until_resolved(self):
+        stops = StopSequences(["END"])
+        assert stops.push(0, "ab") == "ab"
+        assert stops.push(0, "E") == ""  # peut commencer "END"
+        assert stops.push(0, "N") == ""
+        assert stops.push(0, "x") == "ENx"  # fausse alerte : le texte est relâché
+        assert not stops.stopped[0]
+
+    def test_stop_inside_multi_char_piece(self):
+        stops = StopSequences(["."])
+        assert stops.push(0, "un. deux") == "un"
+        assert stops.output(0) == "un"
+
+    def test_flush_without_stop(self):
+        stops = StopSequences(["END"])
+        assert stops.push(0, "fin E") == "fin "
+        assert stops.flush(0) == "E"
+
+
+def test_processor_options_accepts_strings_or_lists():
+    opts = processor_options({"stop": "\n", "bad_words": ["a", "b"], "repetition_penalty": "1.2"})
+    assert opts["stop"] == ["\n"]
+    assert opts["bad_words"] == ["a", "b"]
+    assert opts["repetition_penalty"] == 1.2
+    assert opts["min_new_tokens"] == 0
@@ -5,6 +5,8 @@ import pytest
 
 from generation.sampling import (
     greedy,
+    greedy_batch,
+    sample_batch,
     sample_token,
     temperature_sample,
     top_k_sample,
@@ -112,3 +114,55 @@ class TestSampleToken:
         logits = np.array([1.0, 2.0])
         with pytest.raises(ValueError, match="inconnue"):
             sample_token(logits, strategy="nonexistent")
+
+
+class TestBatchedSampling:
+    def test_greedy_per_row(self):
+        logits = np.array([[1.0, 3.0, 2.0], [5.0, 0.0, 1.0]])
+        np.testing.assert_array_equal(greedy_batch(logits), [1, 0])
+
+    def test_seeded_generator_is_reproducible(self):
+        logits = np.random.default_rng(0).normal(size=(8, 50))
+        a = sample_batch(logits, "top_p", temperature=1.0, rng=np.random.default_rng(7))
+        b = sample_batch(logits, "top_p", temperature=1.0, rng=np.random.default_rng(7))
+        np.testing.assert_array_equal(a, b)
+        assert a.shape == (8,)
+
+    def test_per_row_top_k(self):
+        """k par ligne : k=1 équivaut à greedy, k=3 reste dans le top 3."""
+        logits = np.random.default_rng(1).normal(size=(2, 100))
+        rng = np.random.default_rng(0)
+        top3 = set(np.argsort(logits[1])[-3:])
+        for _ in range(50):
+            tokens = sample_batch(logits, "top_k", top_k=np.array([1, 3]), rng=rng)
+            assert tokens[0] == np.argmax(logits[0])
+            assert tokens[1] in top3
+
+    def test_per_row_temperature(self):
+        logits = np.tile(np.array([1.0, 5.0, 2.0]), (2, 1))
+        rng = np.random.default_rng(0)
+        tokens = np.array(
+            [
+                sample_batch(logits, "temperature", temperature=[0.01, 100.0], rng=rng)
+                for _ in range(200)
+            ]
+        )
+        assert np.all(tokens[:, 0] == 1)
+        assert len(set(tokens[:, 1])) == 3
+
+    @pytest.mark.parametrize("p", [0.3, 0.9, 0.999])
+    def test_top_p_matches_full_sort_distribution(self, p):
+        """Le nucleus par sélection partielle garde les mêmes tokens qu'un tri complet."""
+        logits = np.random.default_rng(2).normal(scale=0.5, size=(1, 300))
+        probs = np.exp(logits[0] - logits[0].max())
+        probs /= probs.sum()
+        order = np.argsort(probs)[::-1]
+        cutoff = int(np.searchsorted(np.cumsum(probs[order]), p)) + 1
+        nucleus = set(order[:cutoff])
+
+        tokens = sample_batch(
+            np.repeat(logits, 2000, axis=0), "top_p", top_p=p, rng=np.random.default_rng(3)
+        )
+        assert set(tokens) <= nucleus
+        if cutoff <= 5:
+            assert set(tokens) == nucleus
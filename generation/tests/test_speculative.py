@@ -0,0 +1,40 @@
+"""Tests du décodage spéculatif (échantillonnage par rejet)."""
+
+import numpy as np
+import pytest
+
+from generation.sampling import sample_batch, strategy_probs
+from generation.speculative import verify_draft
+
+
+@pytest.mark.parametrize("strategy", ["greedy", "temperature", "top_k", "top_p"])
+def test_strategy_probs_matches_sampler(strategy):
+    logits = np.random.RandomState(0).randn(1, 12) * 2
+    probs = strategy_probs(logits, strategy, temperature=0.7, top_k=4, top_p=0.8)
+    assert probs.sum() == pytest.approx(1.0)
+
+    rng = np.random.default_rng(0)
+    draws = sample_batch(np.repeat(logits, 20000, axis=0), strategy, 0.7, 4, 0.8, rng)
+    freq = np.bincount(draws, minlength=12) / draws.size
+    np.testing.assert_allclose(freq, probs[0], atol=0.015)
+
+
+def test_verify_draft_preserves_target_distribution():
+    """Brouillon tiré dans q, vérifié contre p : le premier token suit p."""
+    rng = np.random.default_rng(0)
+    p = np.array([[0.5, 0.3, 0.2], [0.1, 0.1, 0.8]])
+    q = np.array([[0.2, 0.2, 0.6]])
+
+    counts = np.zeros(3)
+    n = 30000
+    for x in rng.choice(3, size=n, p=q[0]):
+        n_accepted, token = verify_draft(p, q, [int(x)], rng)
+        counts[x if n_accepted else token] += 1
+    np.testing.assert_allclose(counts / n, p[0], atol=0.015)
+
+
+def test_verify_draft_greedy():
+    p = np.eye(4)[[2, 1, 3]]  # argmax de la cible : 2, 1, puis bonus 3
+    assert verify_draft(p, np.eye(4)[[2, 1]], [2, 1]) == (2, 3)
+    assert verify_draft(p, np.eye(4)[[2, 0]], [2, 0]) == (1, 1)
+    assert verify_draft(p, np.eye(4)[[0, 1]], [0, 1]) == (0, 2)
@@ -4,6 +4,7 @@
 Usage:
     python main.py              # Entraîne et génère du texte
     python main.py --epochs 200 # Changer le nombre d'epochs
+    python main.py --profile    # Temps/FLOPs/mémoire par module sur quelques pas
 """
 
 import argparse
@@ -32,6 +33,10 @@ def main():
     parser.add_argument("--prompt", default="Le chat ", help="Prompt de génération")
     parser.add_argument("--temperature", type=float, default=None, help="Température")
     parser.add_argument("--max-gen", type=int, default=None, help="Tokens max à générer")
+    parser.add_argument(
+        "--profile", action="store_true", help="Profile forward/backward par module puis quitte"
+    )
+    parser.add_argument("--profile-steps", type=int, default=10, help="Pas d'entraînement profilés")
     args = parser.parse_args()
 
     # 1. Charger les données
@@ -80,9 +85,13 @@ def main():
 
     # 6. Optimizer et data loader
     loss_fn = CrossEntropyLoss()
-    optimizer = Adam(model.all_modules(), lr=config.learning_rate)
+    optimizer = Adam(model.all_modules(), lr=config.learning_rate, lazy=config.lazy_adam)
     data_loader = DataLoader(data, config.seq_len, config.batch_size)
 
+    if args.profile:
+        profile(model, loss_fn, optimizer, data_loader, args.profile_steps)
+        return
+
     # 7. Entraînement
     print(f"=== Entraînement ({config.max_epochs} epochs) ===")
     trainer = Trainer(model, loss_fn, optimizer, data_loader, config)
@@ -99,5 +108,22 @@ def main():
     print(f"Texte généré:\n{generated}")
 
 
+def profile(model, loss_fn, optimizer, data_loader, steps: int):
+    """Exécute quelques pas d'entraînement sous profiler et affiche le détail par module."""
+    from autograd.backprop import Backprop
+    from modules.profiler import ModuleProfiler
+
+    backprop = Backprop(model, loss_fn)
+    print(f"=== Profiling ({steps} pas) ===")
+    with ModuleProfiler(model) as prof:
+        for _ in range(steps):
+            x, y = data_loader.next_batch()
+            backprop.forward(x, y, data_loader.segment_ids)
+            backprop.backward()
+            optimizer.step()
+            backprop.zero_grad()
+    print(prof.format_table())
+
+
 if __name__ == "__main__":
     main()
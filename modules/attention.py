@@ -16,18 +16,55 @@ class MultiHeadAttention(BaseModule):
 
     Le masque causal empêche de "regarder dans le futur".
     Multi-head = on fait ça n_heads fois en parallèle.
+
+    Encodage de position appliqué dans l'attention (pos_encoding) :
+    - "sinusoidal" : rien ici (table ajoutée aux embeddings par le modèle)
+    - "rope"  : rotation de Q et K par paires de dimensions, d'angle
+                pos * base^(-2i/d_k) ; le score Q·K ne dépend que de i - j
+    - "alibi" : biais -pente_h * (i - j) ajouté aux scores, une pente par tête
+    Rotations et biais sont calculés à la volée à partir des positions
+    absolues (start_pos + t) : aucune table limitée à max_seq_len, et une
+    clé tournée à sa position reste valide dans un cache de clés.
+
+    segment_ids (B, T) optionnel : séquences packées (plusieurs documents
+    par fenêtre). Un token n'attend que les tokens de son propre segment,
+    ce qui rend le masque causal bloc-diagonal.
+
+    Grouped-query attention (n_kv_heads < n_heads) : K et V n'ont que
+    n_kv_heads têtes, chacune partagée par n_heads / n_kv_heads têtes de
+    requête consécutives (n_kv_heads = 1 : multi-query). Les projections
+    W_k, W_v et un cache de clés/valeurs rétrécissent d'autant ; au
+    backward, les gradients des têtes d'un groupe s'additionnent.
     """
 
-    def __init__(self, d_model: int, n_heads: int, max_seq_len: int = 512):
+    POS_ENCODINGS = ("sinusoidal", "rope", "alibi")
+    ROPE_BASE = 10000.0
+
+    def __init__(
+        self,
+        d_model: int,
+        n_heads: int,
+        max_seq_len: int = 512,
+        pos_encoding: str = "sinusoidal",
+        n_kv_heads: int | None = None,
+    ):
+        n_kv_heads = n_kv_heads or n_heads
         assert d_model % n_heads == 0, "d_model doit être divisible par n_heads"
+        assert n_heads % n_kv_heads == 0, "n_kv_heads doit diviser n_heads"
+        assert pos_encoding in self.POS_ENCODINGS, f"pos_encoding inconnu : {pos_encoding}"
         self.d_model = d_model
         self.n_heads = n_heads
+        self.n_kv_heads = n_kv_heads
+        self.group_size = n_heads // n_kv_heads  # têtes de requête par tête K/V
         self.d_k = d_model // n_heads
+        self.pos_encoding = pos_encoding
+        if pos_encoding == "rope":
+            assert self.d_k % 2 == 0, "RoPE demande une dimension par tête paire"
 
         # Projections linéaires (sans biais pour simplifier)
         self.W_q = Linear(d_model, d_model, bias=False)
-        self.W_k = Linear(d_model, d_model, bias=False)
-        self.W_v = Linear(d_model, d_model, bias=False)
+        self.W_k = Linear(d_model, n_kv_heads * self.d_k, bias=False)
+        self.W_v = Linear(d_model, n_kv_heads * self.d_k, bias=False)
         self.W_o = Linear(d_model, d_model, bias=False)
 
         # Masque causal pré-calculé
@@ -36,14 +73,19 @@ class MultiHeadAttention(BaseModule):
         # Cache pour backward
         self._cache = {}
 
-    def forward(self, x: np.ndarray) -> np.ndarray:
+    def forward(
+        self, x: np.ndarray, start_pos: int = 0, segment_ids: np.ndarray | None = None
+    ) -> np.ndarray:
         """
         Args:
             x: (batch_size, seq_len, d_model)
+            start_pos: position absolue du premier token (RoPE/ALiBi)
+            segment_ids: (batch_size, seq_len) document de chaque token
         Returns:
             (batch_size, seq_len, d_model)
         """
         B, T, D = x.shape
+        positions = np.arange(start_pos, start_pos + T)
 
         # Projections linéaires
         Q = self.W_q.forward(x)  # (B, T, D)
@@ -52,15 +94,30 @@ class MultiHeadAttention(BaseModule):
 
         # Reshape multi-head : (B, T, D) -> (B, n_heads, T, d_k)
         Q = Q.reshape(B, T, self.n_heads, self.d_k).transpose(0, 2, 1, 3)
-        K = K.reshape(B, T, self.n_heads, self.d_k).transpose(0, 2, 1, 3)
-        V = V.reshape(B, T, self.n_heads, self.d_k).transpose(0, 2, 1, 3)
-
-        # Scaled dot-product attention
-        scores = (Q @ K.transpose(0, 1, 3, 2)) / np.sqrt(self.d_k)  # (B, H, T, T)
-        scores = scores + self._causal_mask[:T, :T]  # masque causal
+        K = K.reshape(B, T, self.n_kv_heads, self.d_k).transpose(0, 2, 1, 3)
+        V = V.reshape(B, T, self.n_kv_heads, self.d_k).transpose(0, 2, 1, 3)
+
+        if self.pos_encoding == "rope":
+            cos, sin = self._rope_angles(positions)
+            Q = self._rotate(Q, cos, sin)
+            K = self._rotate(K, cos, sin)
+
+        # Scaled dot-product attention. GQA : les têtes de requête sont
+        # groupées (B, H_kv, G, T, d_k) et K/V diffusés sur G, sans copie
+        Q_g = self._grouped(Q)
+        scores = Q_g @ K[:, :, None].transpose(0, 1, 2, 4, 3)  # (B, H_kv, G, T, T)
+        scores = scores.reshape(B, self.n_heads, T, T) / np.sqrt(self.d_k)  # (B, H, T, T)
+        scores = scores + self._causal(T)  # masque causal
+        if segment_ids is not None:
+            # Masque bloc-diagonal : pas d'attention entre documents packés
+            other_doc = segment_ids[:, None, :, None] != segment_ids[:, None, None, :]
+            scores = np.where(other_doc, -np.inf, scores)  # (B, H, T, T)
+        if self.pos_encoding == "alibi":
+            scores = scores + self._alibi_bias(positions)
 
         attn_weights = softmax(scores, axis=-1)  # (B, H, T, T)
-        attn_out = attn_weights @ V  # (B, H, T, d_k)
+        attn_out = self._grouped(attn_weights) @ V[:, :, None]  # (B, H_kv, G, T, d_k)
+        attn_out = attn_out.reshape(B, self.n_heads, T, self.d_k)  # (B, H, T, d_k)
 
         # Reshape back : (B, H, T, d_k) -> (B, T, D)
         attn_out = attn_out.transpose(0, 2, 1, 3).reshape(B, T, D)
@@ -69,6 +126,7 @@ class MultiHeadAttention(BaseModule):
 
         # Cache pour backward
         self._cache = {
+            "positions": positions,
             "Q": Q,
             "K": K,
             "V": V,
@@ -77,6 +135,55 @@ class MultiHeadAttention(BaseModule):
         }
         return output
 
+    def forward_cached(
+        self, x: np.ndarray, past: tuple[np.ndarray, np.ndarray] | None = None
+    ) -> tuple[np.ndarray, tuple[np.ndarray, np.ndarray]]:
+        """Forward incrémental (inférence) avec cache de clés/valeurs.
+
+        Seuls les nouveaux tokens x sont projetés ; les clés (déjà tournées
+        pour RoPE) et valeurs des positions précédentes viennent de past.
+        Le premier token de x est à la position start_pos = longueur de past.
+
+        Args:
+            x: (batch_size, T_new, d_model)
+            past: (K, V) de shape (batch_size, n_kv_heads, start_pos, d_k), ou None
+        Returns:
+            output (batch_size, T_new, d_model), et (K, V) de toutes les
+            positions [0, start_pos + T_new), à repasser au pas suivant
+        """
+        B, T, D = x.shape
+        start_pos = 0 if past is None else past[0].shape[2]
+        positions = np.arange(start_pos, start_pos + T)
+
+        Q = self.W_q.forward(x).reshape(B, T, self.n_heads, self.d_k).transpose(0, 2, 1, 3)
+        K = self.W_k.forward(x).reshape(B, T, self.n_kv_heads, self.d_k).transpose(0, 2, 1, 3)
+        V = self.W_v.forward(x).reshape(B, T, self.n_kv_heads, self.d_k).transpose(0, 2, 1, 3)
+        if self.pos_encoding == "rope":
+            cos, sin = self._rope_angles(positions)
+            Q = self._rotate(Q, cos, sin)
+            K = self._rotate(K, cos, sin)
+        if past is not None:
+            K = np.concatenate([past[0], K], axis=2)  # (B, H_kv, S, d_k)
+            V = np.concatenate([past[1], V], axis=2)
+        S = K.shape[2]
+        key_positions = np.arange(S)
+
+        scores = self._grouped(Q) @ K[:, :, None].transpose(0, 1, 2, 4, 3)  # (B, H_kv, G, T, S)
+        scores = scores.reshape(B, self.n_heads, T, S) / np.sqrt(self.d_k)
+        # Masque causal décalé : la requête i voit les clés j <= start_pos + i
+        scores = np.where(key_positions[None, :] > positions[:, None], -np.inf, scores)
+        if self.pos_encoding == "alibi":
+            scores = scores + self._alibi_bias(positions, key_positions)
+
+        attn_weights = softmax(scores, axis=-1)  # (B, H, T, S)
+        attn_out = self._grouped(attn_weights) @ V[:, :, None]  # (B, H_kv, G, T, d_k)
+        attn_out = attn_out.reshape(B, self.n_heads, T, self.d_k).transpose(0, 2, 1, 3)
+        output = self.W_o.forward(attn_out.reshape(B, T, D))
+
+        # Pas de backward en mode incrémental : seuls les poids sont gardés
+        self._cache = {"attn_weights": attn_weights}
+        return output, (K, V)
+
     def backward(self, grad_output: np.ndarray) -> np.ndarray:
         """Propage les gradients à travers toute l'attention.
 
@@ -108,9 +215,12 @@ class MultiHeadAttention(BaseModule):
 
         # 3. Through attn_weights @ V
         # d_attn_weights = d_attn_out @ V^T    (B, H, T, T)
-        # dV = attn_weights^T @ d_attn_out      (B, H, T, d_k)
-        d_attn_weights = d_attn_out @ V.transpose(0, 1, 3, 2)
-        dV = attn_weights.transpose(0, 1, 3, 2) @ d_attn_out
+        # dV = attn_weights^T @ d_attn_out      (B, H_kv, T, d_k), somme sur le groupe
+        d_out_g = self._grouped(d_attn_out)
+        d_attn_weights = (d_out_g @ V[:, :, None].transpose(0, 1, 2, 4, 3)).reshape(
+            attn_weights.shape
+        )
+        dV = (self._grouped(attn_weights).transpose(0, 1, 2, 4, 3) @ d_out_g).sum(axis=2)
 
         # 4. Softmax backward: dS = attn * (dA - sum(dA * attn))
         sum_term = np.sum(d_attn_weights * attn_weights, axis=-1, keepdims=True)
@@ -119,14 +229,23 @@ class MultiHeadAttention(BaseModule):
         # 5. Scaling backward
         d_scores = d_scores / np.sqrt(d_k)
 
-        # 6. Q @ K^T backward
-        dQ = d_scores @ K  # (B, H, T, d_k)
-        dK = d_scores.transpose(0, 1, 3, 2) @ Q  # (B, H, T, d_k)
+        # 6. Q @ K^T backward (dK : somme sur les têtes de requête du groupe)
+        d_scores_g = self._grouped(d_scores)
+        dQ = (d_scores_g @ K[:, :, None]).reshape(B, self.n_heads, T, d_k)  # (B, H, T, d_k)
+        dK = (d_scores_g.transpose(0, 1, 2, 4, 3) @ self._grouped(Q)).sum(
+            axis=2
+        )  # (B, H_kv, T, d_k)
+
+        # 6b. RoPE backward : rotation inverse (la rotation est orthogonale)
+        if self.pos_encoding == "rope":
+            cos, sin = self._rope_angles(self._cache["positions"])
+            dQ = self._rotate(dQ, cos, -sin)
+            dK = self._rotate(dK, cos, -sin)
 
         # 7. Reverse multi-head reshape: (B, H, T, d_k) -> (B, T, D)
         dQ = dQ.transpose(0, 2, 1, 3).reshape(B, T, D)
-        dK = dK.transpose(0, 2, 1, 3).reshape(B, T, D)
-        dV = dV.transpose(0, 2, 1, 3).reshape(B, T, D)
+        dK = dK.transpose(0, 2, 1, 3).reshape(B, T, self.n_kv_heads * d_k)
+        dV = dV.transpose(0, 2, 1, 3).reshape(B, T, self.n_kv_heads * d_k)
 
         # 8. Through projection layers
         dX_q = self.W_q.backward(dQ)
@@ -136,6 +255,56 @@ class MultiHeadAttention(BaseModule):
         # Q, K, V partagent le même input x -> somme des gradients
         return dX_q + dX_k + dX_v
 
+    def _grouped(self, x: np.ndarray) -> np.ndarray:
+        """(B, H, ...) -> (B, H_kv, G, ...) : têtes de requête par groupe K/V."""
+        return x.reshape(x.shape[0], self.n_kv_heads, self.group_size, *x.shape[2:])
+
+    def _causal(self, seq_len: int) -> np.ndarray:
+        """Masque causal (T, T) ; construit à la volée au-delà de max_seq_len."""
+        if seq_len <= self._causal_mask.shape[0]:
+            return self._causal_mask[:seq_len, :seq_len]
+        return np.triu(np.full((seq_len, seq_len), -np.inf), k=1)
+
+    def _rope_angles(self, positions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """cos/sin des angles RoPE, shape (T, d_k/2)."""
+        inv_freq = self.ROPE_BASE ** (-np.arange(0, self.d_k, 2) / self.d_k)
+        angles = positions[:, None] * inv_freq[None, :]
+        return np.cos(angles), np.sin(angles)
+
+    @staticmethod
+    def _rotate(x: np.ndarray, cos: np.ndarray, sin: np.ndarray) -> np.ndarray:
+        """Tourne chaque paire (x[2i], x[2i+1]) de x (B, H, T, d_k)."""
+        x1, x2 = x[..., 0::2], x[..., 1::2]
+        out = np.empty_like(x)
+        out[..., 0::2] = x1 * cos - x2 * sin
+        out[..., 1::2] = x1 * sin + x2 * cos
+        return out
+
+    def alibi_slopes(self) -> np.ndarray:
+        """Pentes géométriques 2^(-8h/H), h = 1..H (Press et al.)."""
+        return 2.0 ** (-8.0 * np.arange(1, self.n_heads + 1) / self.n_heads)
+
+    def _alibi_bias(
+        self, positions: np.ndarray, key_positions: np.ndarray | None = None
+    ) -> np.ndarray:
+        """Biais (H, T, S) = -pente_h * (i - j), pénalise les clés éloignées."""
+        if key_positions is None:
+            key_positions = positions
+        distance = positions[:, None] - key_positions[None, :]  # (T, S)
+        return -self.alibi_slopes()[:, None, None] * np.maximum(distance, 0)
+
+    def adapt_checkpoint(self, name: str, saved: np.ndarray) -> np.ndarray | None:
+        """Convertit un poids K/V multi-head (D, D) vers n_kv_heads têtes.
+
+        Les têtes d'un groupe sont moyennées (mean-pooling, Ainslie et al.),
+        ce qui permet de charger un checkpoint MHA dans un modèle GQA/MQA.
+        Retourne None si le poids n'est pas concerné.
+        """
+        if name not in ("W_k.W", "W_v.W") or saved.shape != (self.d_model, self.d_model):
+            return None
+        heads = saved.reshape(self.d_model, self.n_kv_heads, self.group_size, self.d_k)
+        return heads.mean(axis=2).reshape(self.d_model, self.n_kv_heads * self.d_k)
+
     def get_attention_weights(self) -> np.ndarray:
         """Retourne les poids d'attention pour visualisation.
         Shape: (batch_size, n_heads, seq_len, seq_len)
@@ -15,6 +15,10 @@ class BaseModule(ABC):
     Les propriétés parameters/gradients retournent des REFERENCES
     aux arrays internes (pas des copies), pour que l'optimizer
     puisse les modifier in-place.
+
+    set_hook()/clear_hook() permettent d'intercepter forward/backward
+    d'une instance (ex: profiling). Sans hook, aucun surcoût : ce sont
+    les méthodes de classe qui sont appelées directement.
     """
 
     @abstractmethod
@@ -32,3 +36,28 @@ class BaseModule(ABC):
     @property
     def gradients(self) -> dict[str, np.ndarray]:
         return {}
+
+    def zero_grad(self) -> None:
+        """Remet les gradients à zéro (in-place)."""
+        for g in self.gradients.values():
+            g *= 0
+
+    def set_hook(self, hook, name: str = None) -> None:
+        """Intercepte forward/backward de cette instance.
+
+        Args:
+            hook: callable hook(name, phase, fn, args, kwargs) qui doit
+                  appeler fn(*args, **kwargs) et retourner son résultat.
+                  phase vaut "forward" ou "backward".
+            name: nom du module dans les rapports (défaut : nom de classe)
+        """
+        name = name or type(self).__name__
+        forward = type(self).forward.__get__(self)
+        backward = type(self).backward.__get__(self)
+        self.forward = lambda *args, **kwargs: hook(name, "forward", forward, args, kwargs)
+        self.backward = lambda *args, **kwargs: hook(name, "backward", backward, args, kwargs)
+
+    def clear_hook(self) -> None:
+        """Retire le hook : forward/backward redeviennent les méthodes de classe."""
+        self.__dict__.pop("forward", None)
+        self.__dict__.pop("backward", None)
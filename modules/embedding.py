@@ -9,12 +9,18 @@ class Embedding(BaseModule):
     Chaque token a un vecteur de dimension d_model, stocké dans une
     matrice W de shape (vocab_size, d_model). Le forward est un simple
     lookup par index.
+
+    Le gradient est creux : seules les lignes des tokens du batch sont
+    non nulles. backward() ne touche que ces lignes (listées dans
+    touched_rows) au lieu de réallouer toute la matrice, ce qui compte
+    avec les vocabulaires BPE de plusieurs dizaines de milliers d'entrées.
     """
 
     def __init__(self, vocab_size: int, d_model: int):
         self.W = np.random.randn(vocab_size, d_model) * 0.02
         self._dW = np.zeros_like(self.W)
         self._cache_indices = None
+        self._grad_rows = np.empty(0, dtype=np.int64)
 
     def forward(self, x: np.ndarray) -> np.ndarray:
         """
@@ -29,13 +35,52 @@ class Embedding(BaseModule):
     def backward(self, grad_output: np.ndarray) -> np.ndarray:
         """Accumule les gradients pour chaque ligne d'embedding utilisée.
 
-        Utilise np.add.at (et non +=) pour gérer correctement les
-        indices dupliqués dans un même batch.
+        Les indices dupliqués sont sommés par segments : tri des
+        positions par token (np.unique), puis np.add.reduceat sur chaque
+        groupe. Seules les lignes du batch précédent et du batch courant
+        sont écrites dans _dW.
         """
-        self._dW = np.zeros_like(self.W)
-        np.add.at(self._dW, self._cache_indices, grad_output)
+        rows, summed = self.sparse_gradient(self._cache_indices, grad_output)
+        if self._dW.shape != self.W.shape:
+            self._dW = np.zeros_like(self.W)
+        else:
+            self._dW[self._grad_rows] = 0
+        self._dW[rows] = summed
+        self._grad_rows = rows
         return None  # pas de gradient en dessous de l'embedding
 
+    @staticmethod
+    def sparse_gradient(indices: np.ndarray, grad_output: np.ndarray):
+        """Gradient creux : (lignes uniques triées, gradients sommés par ligne).
+
+        Args:
+            indices: (...) token IDs
+            grad_output: (..., d_model)
+        Returns:
+            rows: (n_unique,) ; summed: (n_unique, d_model)
+        """
+        flat_idx = indices.ravel()
+        flat_grad = grad_output.reshape(flat_idx.size, -1)
+        rows, inverse = np.unique(flat_idx, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        starts = np.searchsorted(inverse[order], np.arange(rows.size))
+        summed = np.add.reduceat(flat_grad[order], starts, axis=0)
+        return rows, summed
+
+    def add_dense_gradient(self, grad: np.ndarray) -> None:
+        """Ajoute un gradient dense (vocab_size, d_model), ex. tête de sortie liée."""
+        self._dW += grad
+        self._grad_rows = np.arange(self.W.shape[0])
+
+    @property
+    def touched_rows(self) -> dict[str, np.ndarray]:
+        """Lignes de W dont le gradient est non nul depuis le dernier zero_grad()."""
+        return {"W": self._grad_rows}
+
+    def zero_grad(self) -> None:
+        self._dW[self._grad_rows] = 0
+        self._grad_rows = np.empty(0, dtype=np.int64)
+
     @property
     def parameters(self) -> dict[str, np.ndarray]:
         return {"W": self.W}
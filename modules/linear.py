@@ -69,3 +69,38 @@ class Linear(BaseModule):
         if self.use_bias:
             grads["b"] = self._db
         return grads
+
+
+class TiedLinear(Linear):
+    """Tête de sortie liée à l'embedding (weight tying) : Y = X @ E^T.
+
+    Ne possède aucun paramètre propre : W est une vue transposée de
+    embedding.W, donc l'optimizer, la sérialisation et count_parameters ne
+    voient qu'un seul tenseur. Le gradient de cette utilisation (dW_head)
+    est ajouté à celui de l'embedding par TransformerModel.backward.
+    """
+
+    def __init__(self, embedding):
+        self.embedding = embedding
+        self.use_bias = False
+        self._cache_input = None
+        self.dW_head = None  # (vocab_size, d_model), même layout que embedding.W
+
+    @property
+    def W(self) -> np.ndarray:
+        return self.embedding.W.T  # (d_model, vocab_size), vue sans copie
+
+    def backward(self, grad_output: np.ndarray) -> np.ndarray:
+        x = self._cache_input
+        x_flat = x.reshape(-1, x.shape[-1])  # (N, d_model)
+        grad_flat = grad_output.reshape(-1, grad_output.shape[-1])  # (N, vocab_size)
+        self.dW_head = grad_flat.T @ x_flat  # (vocab_size, d_model)
+        return grad_output @ self.embedding.W
+
+    @property
+    def parameters(self) -> dict[str, np.ndarray]:
+        return {}
+
+    @property
+    def gradients(self) -> dict[str, np.ndarray]:
+        return {}
@@ -1,5 +1,49 @@
 import numpy as np
 
+# Cible des positions de padding : ni loss ni gradient
+IGNORE_INDEX = -100
+
+
+def count_targets(targets: np.ndarray) -> int:
+    """Nombre de vraies cibles (hors IGNORE_INDEX), au moins 1."""
+    return max(1, int(np.count_nonzero(targets != IGNORE_INDEX)))
+
+
+def softmax_cross_entropy_(z: np.ndarray, targets: np.ndarray, n_total: int) -> float:
+    """Cross-entropy d'un bloc de lignes, gradient écrit en place dans z.
+
+    Args:
+        z: (n, V) logits du bloc, écrasés par (softmax - one_hot) / n_total
+        targets: (n,) token IDs cibles (IGNORE_INDEX = position ignorée)
+        n_total: nombre total de vraies cibles (normalisation de la moyenne)
+    Returns:
+        somme des -log p(cible) du bloc
+    """
+    ignored = targets == IGNORE_INDEX
+    if ignored.any():
+        targets = np.where(ignored, 0, targets)
+    else:
+        ignored = None
+    rows = np.arange(z.shape[0])
+    z -= np.max(z, axis=-1, keepdims=True)  # stabilité
+    target_shifted = z[rows, targets]  # z[cible] - max
+    np.exp(z, out=z)
+    sum_exp = np.sum(z, axis=-1, keepdims=True)
+
+    # -log p(cible) = log(sum exp(z - max)) - (z[cible] - max)
+    nll = np.log(sum_exp[:, 0]) - target_shifted
+    if ignored is not None:
+        nll[ignored] = 0.0
+    nll_sum = float(np.sum(nll))
+
+    # Gradient : (softmax - one_hot) / N
+    z /= sum_exp
+    z[rows, targets] -= 1.0
+    z /= n_total
+    if ignored is not None:
+        z[ignored] = 0.0
+    return nll_sum
+
 
 class CrossEntropyLoss:
     """Cross-entropy loss fusionnée avec softmax (log-sum-exp trick).
@@ -7,13 +51,28 @@ class CrossEntropyLoss:
     Forward : -mean(log_softmax(logits)[targets])
     Backward : (softmax(logits) - one_hot(targets)) / N
 
+    Les positions de cible IGNORE_INDEX (padding) n'ont ni loss ni
+    gradient ; N est le nombre de vraies cibles.
+
     La fusion softmax + cross-entropy donne un gradient élégant et
     numériquement stable.
+
+    Le forward calcule loss ET gradient en une passe, en écrivant le
+    gradient directement dans un buffer (B, T, V) réutilisé d'un pas à
+    l'autre : aucun log_probs ni probs complet n'est gardé en cache, et
+    backward() ne copie rien. Avec chunk_size, les lignes (B·T) sont
+    traitées par blocs : les temporaires ne dépassent pas chunk_size × V,
+    quelle que soit la taille du vocabulaire.
     """
 
-    def __init__(self):
-        self._cache_probs = None
-        self._cache_targets = None
+    def __init__(self, chunk_size: int | None = None):
+        """
+        Args:
+            chunk_size: nombre de positions (B·T) traitées à la fois
+                        (None = toutes d'un coup)
+        """
+        self.chunk_size = chunk_size
+        self._grad = None  # buffer (B, T, V) réutilisé
         self._cache_B = 0
         self._cache_T = 0
 
@@ -26,47 +85,33 @@ class CrossEntropyLoss:
             loss: scalaire
         """
         B, T, V = logits.shape
+        N = B * T
+        n_valid = count_targets(targets)
+        if self._grad is None or self._grad.shape != logits.shape:
+            self._grad = np.empty(logits.shape, dtype=np.result_type(logits, np.float32))
+
+        flat_logits = logits.reshape(N, V)
+        flat_targets = targets.reshape(N)
+        flat_grad = self._grad.reshape(N, V)
+        step = self.chunk_size or N
+
+        nll_sum = 0.0
+        for start in range(0, N, step):
+            g = flat_grad[start : start + step]
+            np.copyto(g, flat_logits[start : start + step])
+            nll_sum += softmax_cross_entropy_(g, flat_targets[start : start + step], n_valid)
 
-        # Log-softmax via log-sum-exp trick (stabilité numérique)
-        logits_max = np.max(logits, axis=-1, keepdims=True)
-        log_sum_exp = logits_max + np.log(
-            np.sum(np.exp(logits - logits_max), axis=-1, keepdims=True)
-        )
-        log_probs = logits - log_sum_exp  # (B, T, V)
-
-        # Negative log likelihood aux positions cibles
-        target_log_probs = log_probs[
-            np.arange(B)[:, None],
-            np.arange(T)[None, :],
-            targets,
-        ]  # (B, T)
-
-        loss = -np.mean(target_log_probs)
-
-        # Cache pour backward
-        self._cache_probs = np.exp(log_probs)  # softmax probas
-        self._cache_targets = targets
         self._cache_B = B
         self._cache_T = T
-
-        return float(loss)
+        return nll_sum / n_valid
 
     def backward(self) -> np.ndarray:
         """
         Returns:
             grad_logits: (batch_size, seq_len, vocab_size)
             = (softmax - one_hot) / N
+
+        Le tableau retourné est le buffer interne : il est réécrit au
+        prochain forward (copier si on veut le conserver).
         """
-        B, T = self._cache_B, self._cache_T
-        grad = self._cache_probs.copy()
-
-        # Soustraire 1 aux positions cibles (one-hot)
-        grad[
-            np.arange(B)[:, None],
-            np.arange(T)[None, :],
-            self._cache_targets,
-        ] -= 1.0
-
-        # Moyenne sur batch et séquence
-        grad /= B * T
-        return grad
+        return self._grad
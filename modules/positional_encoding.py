@@ -21,13 +21,18 @@ class PositionalEncoding(BaseModule):
         self.pe[:, 0::2] = np.sin(pos * div)
         self.pe[:, 1::2] = np.cos(pos * div)
 
-    def forward(self, x: np.ndarray) -> np.ndarray:
+    def forward(self, x: np.ndarray, positions: np.ndarray | None = None) -> np.ndarray:
         """
         Args:
             x: (batch_size, seq_len, d_model)
+            positions: (batch_size, seq_len) position de chaque token
+                       (défaut : 0..seq_len-1 ; séquences packées : position
+                       dans le document)
         Returns:
             x + PE, même shape
         """
+        if positions is not None:
+            return x + self.pe[positions]
         T = x.shape[1]
         return x + self.pe[:T, :]
 
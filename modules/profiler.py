@@ -0,0 +1,157 @@
+"""Profiling par module : temps, FLOPs estimés et mémoire allouée.
+
+Usage :
+    with ModuleProfiler(model) as prof:
+        loss, _ = backprop.forward(x, y)
+        backprop.backward()
+    print(prof.format_table())
+
+Le profiler installe un hook (BaseModule.set_hook) sur chaque module
+feuille du modèle et le retire en sortie : hors profiling, le coût est nul.
+
+Les FLOPs sont des estimations analytiques (1 multiply-add = 2 FLOPs) à
+partir des shapes ; la mémoire est mesurée avec tracemalloc (NumPy y
+déclare ses allocations) comme le pic alloué pendant l'appel.
+"""
+
+import time
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+
+from modules.attention import MultiHeadAttention
+from modules.embedding import Embedding
+from modules.feedforward import FeedForward
+from modules.layernorm import LayerNorm
+from modules.linear import Linear
+from modules.positional_encoding import PositionalEncoding
+
+
+def _rows(x: np.ndarray) -> int:
+    """Nombre de vecteurs traités (produit des dims batch)."""
+    return int(np.prod(x.shape[:-1])) if x.ndim > 1 else 1
+
+
+def estimate_flops(module, phase: str, args: tuple) -> int:
+    """Estimation des FLOPs d'un appel forward/backward.
+
+    Le backward d'une couche linéaire coûte ~2x son forward (dX et dW).
+    """
+    x = args[0] if args else None
+    if not isinstance(x, np.ndarray):
+        return 0
+
+    if isinstance(module, Linear):
+        d_in, d_out = module.W.shape
+        fwd = 2 * _rows(x) * d_in * d_out
+        return fwd if phase == "forward" else 2 * fwd
+
+    if isinstance(module, MultiHeadAttention):
+        B, T = x.shape[0], x.shape[1]
+        D = module.d_model
+        D_kv = module.n_kv_heads * module.d_k
+        proj = 2 * 2 * B * T * D * (D + D_kv)  # Q, O (D x D) ; K, V (D x D_kv)
+        attn = 2 * 2 * B * T * T * D  # Q@K^T et A@V
+        softmax = 5 * B * module.n_heads * T * T
+        fwd = proj + attn + softmax
+        return fwd if phase == "forward" else 2 * fwd
+
+    if isinstance(module, FeedForward):
+        d_model, d_ff = module.linear1.W.shape
+        fwd = 2 * 2 * _rows(x) * d_model * d_ff + _rows(x) * d_ff  # 2 matmuls + ReLU
+        return fwd if phase == "forward" else 2 * fwd
+
+    if isinstance(module, LayerNorm):
+        return (8 if phase == "forward" else 12) * x.size
+
+    if isinstance(module, Embedding):
+        # Lookup : pas d'arithmétique ; backward : accumulation des gradients
+        return 0 if phase == "forward" else x.size
+
+    if isinstance(module, PositionalEncoding):
+        return x.size if phase == "forward" else 0
+
+    return 0
+
+
+class ModuleProfiler:
+    """Profile forward/backward de chaque module d'un TransformerModel.
+
+    Args:
+        model: TransformerModel (doit exposer set_hook/clear_hook/named_modules)
+        track_memory: mesure la mémoire allouée via tracemalloc (plus lent)
+    """
+
+    def __init__(self, model, track_memory: bool = True):
+        self.model = model
+        self.track_memory = track_memory
+        self._modules = dict(model.named_modules())
+        self._order = list(self._modules)
+        self.stats = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "flops": 0, "bytes": 0})
+        self._started_tracemalloc = False
+
+    def __enter__(self):
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self.model.set_hook(self._hook)
+        return self
+
+    def __exit__(self, *exc):
+        self.model.clear_hook()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        return False
+
+    def _hook(self, name, phase, fn, args, kwargs):
+        if self.track_memory:
+            tracemalloc.reset_peak()
+            mem_before = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        result = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - t0
+
+        entry = self.stats[(name, phase)]
+        entry["calls"] += 1
+        entry["seconds"] += elapsed
+        entry["flops"] += estimate_flops(self._modules[name], phase, args)
+        if self.track_memory:
+            entry["bytes"] += max(0, tracemalloc.get_traced_memory()[1] - mem_before)
+        return result
+
+    def report(self) -> list[dict]:
+        """Une ligne par module, dans l'ordre du forward."""
+        total = sum(e["seconds"] for e in self.stats.values()) or 1.0
+        rows = []
+        for name in self._order:
+            row = {"module": name}
+            seconds = 0.0
+            for phase in ("forward", "backward"):
+                e = self.stats.get(
+                    (name, phase), {"calls": 0, "seconds": 0.0, "flops": 0, "bytes": 0}
+                )
+                row[f"{phase}_calls"] = e["calls"]
+                row[f"{phase}_ms"] = 1000 * e["seconds"]
+                row[f"{phase}_flops"] = e["flops"]
+                row[f"{phase}_bytes"] = e["bytes"]
+                seconds += e["seconds"]
+            row["percent"] = 100 * seconds / total
+            rows.append(row)
+        return rows
+
+    def format_table(self) -> str:
+        header = (
+            f"{'module':<20}{'fwd ms':>10}{'bwd ms':>10}{'%':>7}"
+            f"{'fwd MFLOP':>12}{'bwd MFLOP':>12}{'fwd MB':>9}{'bwd MB':>9}"
+        )
+        lines = [header, "-" * len(header)]
+        for r in self.report():
+            lines.append(
+                f"{r['module']:<20}{r['forward_ms']:>10.2f}{r['backward_ms']:>10.2f}"
+                f"{r['percent']:>7.1f}{r['forward_flops'] / 1e6:>12.2f}"
+                f"{r['backward_flops'] / 1e6:>12.2f}{r['forward_bytes'] / 2**20:>9.2f}"
+                f"{r['backward_bytes'] / 2**20:>9.2f}"
+            )
+        return "\n".join(lines)
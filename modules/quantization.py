@@ -0,0 +1,138 @@
+"""Quantification int8 des poids pour l'inférence (post-training).
+
+Chaque colonne j de W (d_in, d_out), c'est-à-dire chaque neurone de
+sortie, reçoit son échelle :
+
+    scale_j = max_i |W[i, j]| / 127        W_int8 = round(W / scale)
+
+Une échelle par canal de sortie suit les écarts de norme entre neurones
+(une seule échelle pour toute la matrice écraserait les petites colonnes).
+Comme scale ne dépend que de j :
+
+    X @ (W_int8 * scale) = (X @ W_int8) * scale
+
+Le forward convertit W_int8 en flottant par tuiles de colonnes et applique
+l'échelle après le produit : la matrice flottante complète n'est jamais
+matérialisée, seule une tuile (d_in, tile) l'est à la fois. Les poids
+occupent 1 octet au lieu de 8 (float64), plus une échelle par colonne.
+
+Inférence uniquement : backward() lève une erreur, et les modules
+quantifiés n'ont pas de gradients. Une tête de sortie liée à l'embedding
+(TiedLinear) n'est pas quantifiée : elle partage la matrice d'embedding,
+qui reste flottante pour le lookup.
+"""
+
+import numpy as np
+
+from modules.base_module import BaseModule
+from modules.linear import Linear, TiedLinear
+
+QUANTIZE_TARGETS = ("attention", "ffn", "output_head")
+
+
+def quantize_weight(weight: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Quantifie weight (d_in, d_out) en int8 symétrique, une échelle par colonne.
+
+    Returns:
+        (W_int8, scale) : (d_in, d_out) int8 et (d_out,) float
+    """
+    scale = np.abs(weight).max(axis=0) / 127.0
+    scale[scale == 0] = 1.0  # colonne nulle : n'importe quelle échelle convient
+    w_int8 = np.clip(np.rint(weight / scale), -127, 127).astype(np.int8)
+    return w_int8, scale
+
+
+class QuantizedLinear(BaseModule):
+    """Couche linéaire à poids int8 : Y = (X @ W_int8) * scale + b.
+
+    Args:
+        w_int8: (d_in, d_out) int8
+        w_scale: (d_out,) échelle par canal de sortie
+        b: (d_out,) biais flottant, ou None
+        tile: nombre de colonnes déquantifiées à la fois
+    """
+
+    def __init__(self, w_int8: np.ndarray, w_scale: np.ndarray, b=None, tile: int = 256):
+        self.W_int8 = w_int8
+        self.W_scale = w_scale
+        self.use_bias = b is not None
+        if self.use_bias:
+            self.b = b
+        self.tile = tile
+
+    @classmethod
+    def from_linear(cls, linear: Linear, tile: int = 256) -> "QuantizedLinear":
+        w_int8, scale = quantize_weight(linear.W)
+        b = linear.b.copy() if linear.use_bias else None
+        return cls(w_int8, scale, b, tile)
+
+    @property
+    def W(self) -> np.ndarray:
+        """Matrice déquantifiée (d_in, d_out), recalculée à chaque accès."""
+        return self.W_int8 * self.W_scale
+
+    def forward(self, x: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            x: (..., d_in)
+        Returns:
+            (..., d_out)
+        """
+        d_out = self.W_int8.shape[1]
+        dtype = np.result_type(x.dtype, self.W_scale.dtype)
+        out = np.empty(x.shape[:-1] + (d_out,), dtype=dtype)
+        for j in range(0, d_out, self.tile):
+            cols = slice(j, j + self.tile)
+            out[..., cols] = (x @ self.W_int8[:, cols].astype(dtype)) * self.W_scale[cols]
+        if self.use_bias:
+            out += self.b
+        return out
+
+    def backward(self, grad_output: np.ndarray) -> np.ndarray:
+        raise RuntimeError("QuantizedLinear est réservé à l'inférence (pas de backward)")
+
+    @property
+    def parameters(self) -> dict[str, np.ndarray]:
+        params = {"W_int8": self.W_int8, "W_scale": self.W_scale}
+        if self.use_bias:
+            params["b"] = self.b
+        return params
+
+
+def quantizable_layers(model, targets=QUANTIZE_TARGETS) -> list[tuple[object, str]]:
+    """(module parent, attribut) de chaque Linear visé."""
+    found = []
+    for block in model.blocks:
+        if "attention" in targets:
+            found.extend((block.attention, name) for name in ("W_q", "W_k", "W_v", "W_o"))
+        if "ffn" in targets:
+            found.extend((block.ffn, name) for name in ("linear1", "linear2"))
+    if "output_head" in targets and not isinstance(model.output_head, TiedLinear):
+        found.append((model, "output_head"))
+    return found
+
+
+def quantize_model(model, targets=QUANTIZE_TARGETS, tile: int = 256) -> int:
+    """Remplace en place les Linear visés par des QuantizedLinear.
+
+    Args:
+        model: TransformerModel
+        targets: parmi "attention", "ffn", "output_head"
+    Returns:
+        nombre de couches quantifiées (celles qui l'étaient déjà sont ignorées)
+    """
+    n = 0
+    for parent, name in quantizable_layers(model, targets):
+        layer = getattr(parent, name)
+        if isinstance(layer, Linear):
+            setattr(parent, name, QuantizedLinear.from_linear(layer, tile))
+            n += 1
+    return n
+
+
+def is_quantized(model) -> bool:
+    """Vrai si au moins une couche du modèle est quantifiée."""
+    return any(
+        isinstance(getattr(parent, name), QuantizedLinear)
+        for parent, name in quantizable_layers(model)
+    )
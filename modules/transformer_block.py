@@ -17,26 +17,35 @@ class TransformerBlock(BaseModule):
     "sauter" les sous-couches, stabilisant l'entraînement.
     """
 
-    def __init__(self, d_model: int, n_heads: int, d_ff: int, max_seq_len: int = 512):
+    def __init__(
+        self,
+        d_model: int,
+        n_heads: int,
+        d_ff: int,
+        max_seq_len: int = 512,
+        pos_encoding: str = "sinusoidal",
+        n_kv_heads: int | None = None,
+    ):
         self.ln1 = LayerNorm(d_model)
-        self.attention = MultiHeadAttention(d_model, n_heads, max_seq_len)
+        self.attention = MultiHeadAttention(d_model, n_heads, max_seq_len, pos_encoding, n_kv_heads)
         self.ln2 = LayerNorm(d_model)
         self.ffn = FeedForward(d_model, d_ff)
 
         self._cache_residual1 = None
         self._cache_residual2 = None
 
-    def forward(self, x: np.ndarray) -> np.ndarray:
+    def forward(self, x: np.ndarray, segment_ids: np.ndarray | None = None) -> np.ndarray:
         """
         Args:
             x: (batch_size, seq_len, d_model)
+            segment_ids: (batch_size, seq_len) documents packés (masque d'attention)
         Returns:
             (batch_size, seq_len, d_model)
         """
         # Sub-block 1: Attention + residual
         residual = x
         x_norm = self.ln1.forward(x)
-        attn_out = self.attention.forward(x_norm)
+        attn_out = self.attention.forward(x_norm, segment_ids=segment_ids)
         x = residual + attn_out
 
         # Sub-block 2: FFN + residual
@@ -47,6 +56,17 @@ class TransformerBlock(BaseModule):
 
         return x
 
+    def forward_cached(self, x: np.ndarray, past=None):
+        """Forward incrémental (inférence), cf. MultiHeadAttention.forward_cached.
+
+        Returns:
+            (batch_size, T_new, d_model), et le cache (K, V) mis à jour
+        """
+        attn_out, present = self.attention.forward_cached(self.ln1.forward(x), past)
+        x = x + attn_out
+        x = x + self.ffn.forward(self.ln2.forward(x))
+        return x, present
+
     def backward(self, grad_output: np.ndarray) -> np.ndarray:
         """Backward à travers le bloc.
 
@@ -3,7 +3,8 @@ import numpy as np
 from config import Config
 from modules.embedding import Embedding
 from modules.layernorm import LayerNorm
-from modules.linear import Linear
+from modules.linear import Linear, TiedLinear
+from modules.loss import count_targets, softmax_cross_entropy_
 from modules.positional_encoding import PositionalEncoding
 from modules.transformer_block import TransformerBlock
 
@@ -19,6 +20,10 @@ class TransformerModel:
 
     Les logits sont les scores bruts AVANT softmax,
     de shape (batch_size, seq_len, vocab_size).
+
+    Avec config.tie_embeddings, la projection finale réutilise la matrice
+    d'embedding (logits = h @ E^T) : un seul tenseur (vocab_size, d_model)
+    au lieu de deux, dont les gradients des deux usages s'additionnent.
     """
 
     def __init__(self, config: Config):
@@ -26,43 +31,195 @@ class TransformerModel:
         np.random.seed(config.seed)
 
         self.embedding = Embedding(config.vocab_size, config.d_model)
-        self.pos_enc = PositionalEncoding(config.seq_len, config.d_model)
+        # RoPE/ALiBi sont appliqués dans l'attention : pas de table ajoutée
+        self.pos_enc = None
+        if config.pos_encoding == "sinusoidal":
+            self.pos_enc = PositionalEncoding(config.seq_len, config.d_model)
 
         self.blocks = [
-            TransformerBlock(config.d_model, config.n_heads, config.d_ff, config.seq_len)
+            TransformerBlock(
+                config.d_model,
+                config.n_heads,
+                config.d_ff,
+                config.seq_len,
+                config.pos_encoding,
+                config.n_kv_heads,
+            )
             for _ in range(config.n_layers)
         ]
 
         self.final_ln = LayerNorm(config.d_model)
-        self.output_head = Linear(config.d_model, config.vocab_size, bias=False)
+        if getattr(config, "tie_embeddings", False):
+            self.output_head = TiedLinear(self.embedding)
+        else:
+            self.output_head = Linear(config.d_model, config.vocab_size, bias=False)
+        self._cache_grad_hidden = None  # d_hidden calculé par forward_loss()
 
-    def forward(self, token_ids: np.ndarray) -> np.ndarray:
+    def forward(
+        self,
+        token_ids: np.ndarray,
+        last_only: bool = False,
+        logits_positions=None,
+        segment_ids: np.ndarray | None = None,
+    ) -> np.ndarray:
         """
         Args:
             token_ids: (batch_size, seq_len) entiers
+            last_only: ne projeter que la dernière position (génération)
+            logits_positions: positions à projeter (int, slice ou indices) ;
+                              last_only équivaut à slice(-1, None)
+            segment_ids: (batch_size, seq_len) document de chaque token
+                         (séquences packées, cf. DataLoader(packed=True))
         Returns:
-            logits: (batch_size, seq_len, vocab_size)
+            logits: (batch_size, seq_len, vocab_size), ou
+                    (batch_size, n_positions, vocab_size) si positions restreintes
+
+        Avec des positions restreintes, final_ln et output_head ne voient
+        que ces positions : le coût de la projection est divisé par T, mais
+        le cache de backward est incomplet (usage inférence uniquement).
         """
+        h = self._trunk(token_ids, segment_ids)  # (B, T, D)
+        if last_only:
+            logits_positions = slice(-1, None)
+        if logits_positions is not None:
+            if isinstance(logits_positions, int):
+                logits_positions = [logits_positions]
+            h = h[:, logits_positions]  # (B, P, D)
+
+        h = self.final_ln.forward(h)
+        logits = self.output_head.forward(h)  # (B, T, V) ou (B, P, V)
+        return logits
+
+    def _trunk(self, token_ids: np.ndarray, segment_ids: np.ndarray | None = None) -> np.ndarray:
+        """Embedding -> blocs : (B, T, D) avant le LayerNorm final."""
         h = self.embedding.forward(token_ids)  # (B, T, D)
-        h = self.pos_enc.forward(h)  # (B, T, D)
+        if self.pos_enc is not None:
+            # Séquences packées : chaque document repart de la position 0
+            positions = None if segment_ids is None else self.segment_positions(segment_ids)
+            h = self.pos_enc.forward(h, positions)  # (B, T, D)
 
         for block in self.blocks:
-            h = block.forward(h)  # (B, T, D)
+            h = block.forward(h, segment_ids)  # (B, T, D)
 
-        h = self.final_ln.forward(h)  # (B, T, D)
-        logits = self.output_head.forward(h)  # (B, T, V)
-        return logits
+        return h
+
+    def forward_cached(self, token_ids: np.ndarray, past: list | None = None, last_only=True):
+        """Forward incrémental pour la génération, avec cache de clés/valeurs.
+
+        Seuls les nouveaux tokens sont traités ; past contient, pour chaque
+        bloc, les (K, V) des tokens précédents (shape (B, n_kv_heads, S, d_k)).
+        Les logits sont ceux de forward(contexte complet, last_only=True).
+        Le contexte total ne doit pas dépasser context_length.
+
+        Args:
+            token_ids: (batch_size, T_new) nouveaux tokens
+            past: liste de (K, V) par bloc, ou None (début de séquence)
+            last_only: False pour les logits de chaque nouveau token
+                       (vérification du décodage spéculatif)
+        Returns:
+            logits (batch_size, 1, vocab_size) de la dernière position
+            (ou (batch_size, T_new, vocab_size)), et la liste des (K, V)
+            par bloc couvrant tout le contexte
+        """
+        start_pos = 0 if past is None else past[0][0].shape[2]
+        T = token_ids.shape[1]
+        h = self.embedding.forward(token_ids)  # (B, T_new, D)
+        if self.pos_enc is not None:
+            h = self.pos_enc.forward(h, np.arange(start_pos, start_pos + T)[None, :])
+
+        present = []
+        for i, block in enumerate(self.blocks):
+            h, kv = block.forward_cached(h, None if past is None else past[i])
+            present.append(kv)
+
+        if last_only:
+            h = h[:, -1:]
+        h = self.final_ln.forward(h)
+        return self.output_head.forward(h), present
+
+    @staticmethod
+    def segment_positions(segment_ids: np.ndarray) -> np.ndarray:
+        """Position de chaque token dans son segment, shape (B, T).
+
+        Ex. segments [0, 0, 0, 1, 1, 2] -> positions [0, 1, 2, 0, 1, 0].
+        """
+        B, T = segment_ids.shape
+        t = np.broadcast_to(np.arange(T), (B, T))
+        new_segment = np.ones((B, T), dtype=bool)
+        new_segment[:, 1:] = segment_ids[:, 1:] != segment_ids[:, :-1]
+        seg_start = np.maximum.accumulate(np.where(new_segment, t, 0), axis=1)
+        return t - seg_start
+
+    def forward_loss(
+        self,
+        token_ids: np.ndarray,
+        targets: np.ndarray,
+        chunk_size: int = 128,
+        segment_ids: np.ndarray | None = None,
+    ) -> float:
+        """Forward d'entraînement fusionné : projection finale + cross-entropy.
+
+        Les logits sont calculés par blocs de chunk_size positions
+        (chunk_size × V au plus) et jamais matérialisés en entier. Chaque
+        bloc produit directement sa part de d_hidden et de dW_out ; le
+        backward continue ensuite avec backward_loss().
+
+        Args:
+            token_ids: (batch_size, seq_len) entiers
+            targets: (batch_size, seq_len) token IDs cibles
+            segment_ids: (batch_size, seq_len) documents packés, cf. forward()
+        Returns:
+            loss moyen (scalaire), identique à CrossEntropyLoss(forward(x))
+        """
+        h = self.final_ln.forward(self._trunk(token_ids, segment_ids))
+        B, T, D = h.shape
+        N = B * T
+        h_flat = h.reshape(N, D)
+        t_flat = targets.reshape(N)
+        n_valid = count_targets(t_flat)
+        W = self.output_head.W  # (D, V)
+
+        grad_hidden = np.empty_like(h_flat)
+        dW = np.zeros_like(W)
+        dW_chunk = np.empty_like(W)
+        buf = np.empty((min(chunk_size, N), W.shape[1]), dtype=np.result_type(h, W))
+        nll_sum = 0.0
+        for start in range(0, N, chunk_size):
+            h_c = h_flat[start : start + chunk_size]
+            z = buf[: h_c.shape[0]]
+            np.matmul(h_c, W, out=z)  # logits du bloc -> gradient des logits en place
+            nll_sum += softmax_cross_entropy_(z, t_flat[start : start + chunk_size], n_valid)
+            np.matmul(z, W.T, out=grad_hidden[start : start + chunk_size])
+            np.matmul(h_c.T, z, out=dW_chunk)
+            dW += dW_chunk
+
+        if isinstance(self.output_head, TiedLinear):
+            self.output_head.dW_head = dW.T
+        else:
+            self.output_head._dW = dW
+        self._cache_grad_hidden = grad_hidden.reshape(B, T, D)
+        return nll_sum / n_valid
+
+    def backward_loss(self) -> None:
+        """Backward après forward_loss() : part de d_hidden déjà calculé."""
+        self._backward_from_hidden(self._cache_grad_hidden)
+        self._cache_grad_hidden = None
 
     def backward(self, grad_logits: np.ndarray) -> None:
         """Propage les gradients en sens inverse à travers tout le modèle."""
-        grad = self.output_head.backward(grad_logits)
+        self._backward_from_hidden(self.output_head.backward(grad_logits))
+
+    def _backward_from_hidden(self, grad: np.ndarray) -> None:
         grad = self.final_ln.backward(grad)
 
         for block in reversed(self.blocks):
             grad = block.backward(grad)
 
-        grad = self.pos_enc.backward(grad)
+        if self.pos_enc is not None:
+            grad = self.pos_enc.backward(grad)
         self.embedding.backward(grad)
+        if isinstance(self.output_head, TiedLinear):
+            self.embedding.add_dense_gradient(self.output_head.dW_head)
 
     def all_modules(self):
         """Retourne la liste plate de tous les modules avec paramètres.
@@ -76,6 +233,46 @@ class TransformerModel:
         modules.append(self.output_head)
         return modules
 
+    def named_modules(self) -> list[tuple[str, object]]:
+        """Liste (nom, module) de tous les modules feuilles, dans l'ordre du forward.
+
+        Utilisé pour le profiling et les rapports par couche.
+        """
+        named = [("embedding", self.embedding)]
+        if self.pos_enc is not None:
+            named.append(("pos_enc", self.pos_enc))
+        for i, block in enumerate(self.blocks):
+            named.extend(
+                [
+                    (f"block{i}.ln1", block.ln1),
+                    (f"block{i}.attention", block.attention),
+                    (f"block{i}.ln2", block.ln2),
+                    (f"block{i}.ffn", block.ffn),
+                ]
+            )
+        named.extend([("final_ln", self.final_ln), ("output_head", self.output_head)])
+        return named
+
+    def set_hook(self, hook) -> None:
+        """Installe un hook forward/backward sur chaque module (voir BaseModule.set_hook)."""
+        for name, module in self.named_modules():
+            module.set_hook(hook, name)
+
+    def clear_hook(self) -> None:
+        for _, module in self.named_modules():
+            module.clear_hook()
+
+    @property
+    def context_length(self) -> int:
+        """Nombre max de tokens de contexte en génération.
+
+        L'encodage sinusoïdal est limité à la table (seq_len) ; RoPE et
+        ALiBi acceptent config.max_context > seq_len sans réentraînement.
+        """
+        if self.pos_enc is not None:
+            return self.config.seq_len
+        return max(self.config.max_context, self.config.seq_len)
+
     def count_parameters(self) -> int:
         """Nombre total de paramètres entraînables."""
         total = 0
@@ -7,6 +7,15 @@ class Adam:
     Maintient des moyennes mobiles exponentielles du gradient (m)
     et du gradient au carré (v), avec correction du biais
     pour les premiers pas.
+
+    Mode lazy (lazy=True) : pour les modules à gradient creux (ceux qui
+    exposent touched_rows, ex. Embedding), seules les lignes présentes
+    dans le batch sont mises à jour. Les pas sautés par une ligne sont
+    rattrapés à sa prochaine mise à jour (décroissance différée) :
+        m *= beta1^k, v *= beta2^k, w *= prod(1 - lr_s * weight_decay)
+    pour les k pas où la ligne n'a pas reçu de gradient. C'est exact pour
+    les moments et le weight decay ; seul le déplacement dû à l'inertie
+    (m_hat / sqrt(v_hat) avec g = 0) est omis, comme dans LazyAdam.
     """
 
     def __init__(
@@ -17,6 +26,7 @@ class Adam:
         beta2: float = 0.999,
         eps: float = 1e-8,
         weight_decay: float = 0.0,
+        lazy: bool = False,
     ):
         self.modules = modules
         self.lr = lr
@@ -24,6 +34,7 @@ class Adam:
         self.beta2 = beta2
         self.eps = eps
         self.weight_decay = weight_decay
+        self.lazy = lazy
         self.t = 0  # compteur de pas
 
         # Initialiser les moments à zéro
@@ -35,15 +46,34 @@ class Adam:
                 self.m[key] = np.zeros_like(param)
                 self.v[key] = np.zeros_like(param)
 
+        # Mode lazy : dernier pas appliqué à chaque ligne, et log cumulé
+        # des facteurs de weight decay (log_keep[t] = sum_{s<=t} log(1 - lr_s * wd))
+        self.last_step = {}
+        self.log_keep = np.zeros(1024)
+        if lazy:
+            for module in modules:
+                for name in getattr(module, "touched_rows", {}):
+                    rows = module.parameters[name].shape[0]
+                    self.last_step[(id(module), name)] = np.zeros(rows, dtype=np.int64)
+
     def step(self):
         """Met à jour tous les paramètres avec Adam."""
         self.t += 1  # incrémenter AVANT la correction
+        if self.lazy:
+            if self.t >= self.log_keep.size:
+                self.log_keep = np.concatenate([self.log_keep, np.zeros(self.log_keep.size)])
+            decay = np.log1p(-self.lr * self.weight_decay)
+            self.log_keep[self.t] = self.log_keep[self.t - 1] + decay
 
         for module in self.modules:
             params = module.parameters
             grads = module.gradients
+            touched = getattr(module, "touched_rows", {}) if self.lazy else {}
             for name in params:
                 key = (id(module), name)
+                if name in touched:
+                    self._lazy_step(key, params[name], grads[name], touched[name])
+                    continue
                 g = grads[name]
 
                 # Mise à jour des moments
@@ -61,8 +91,52 @@ class Adam:
                 # Mise à jour du paramètre
                 params[name] -= self.lr * m_hat / (np.sqrt(v_hat) + self.eps)
 
+    def _lazy_step(self, key, param, grad, rows):
+        """Adam sur les seules lignes `rows`, après rattrapage des pas sautés."""
+        self._catch_up(key, param, rows, self.t - 1)
+
+        g = grad[rows]
+        m = self.beta1 * self.m[key][rows] + (1 - self.beta1) * g
+        v = self.beta2 * self.v[key][rows] + (1 - self.beta2) * g**2
+        self.m[key][rows] = m
+        self.v[key][rows] = v
+
+        m_hat = m / (1 - self.beta1**self.t)
+        v_hat = v / (1 - self.beta2**self.t)
+        w = param[rows]
+        if self.weight_decay > 0:
+            w -= self.lr * self.weight_decay * w
+        param[rows] = w - self.lr * m_hat / (np.sqrt(v_hat) + self.eps)
+        self.last_step[key][rows] = self.t
+
+    def _catch_up(self, key, param, rows, until: int):
+        """Applique aux lignes `rows` la décroissance des pas (last, until]."""
+        last = self.last_step[key]
+        skipped = until - last[rows]
+        if not np.any(skipped > 0):
+            return
+        self.m[key][rows] *= (self.beta1**skipped)[:, None]
+        self.v[key][rows] *= (self.beta2**skipped)[:, None]
+        if self.weight_decay > 0:
+            keep = np.exp(self.log_keep[until] - self.log_keep[last[rows]])
+            param[rows] *= keep[:, None]
+        last[rows] = until
+
+    def flush(self):
+        """Rattrape la décroissance différée de toutes les lignes (mode lazy).
+
+        À appeler avant de lire les poids ou l'état de l'optimizer : après
+        flush(), ils sont identiques à ceux d'un Adam qui aurait vu les
+        lignes inactives avec un gradient nul (inertie mise à part).
+        """
+        for module in self.modules:
+            for name in getattr(module, "touched_rows", {}):
+                key = (id(module), name)
+                if key in self.last_step:
+                    rows = np.arange(self.last_step[key].size)
+                    self._catch_up(key, module.parameters[name], rows, self.t)
+
     def zero_grad(self):
         """Remet tous les gradients à zéro."""
         for module in self.modules:
-            for name in module.gradients:
-                module.gradients[name] *= 0
+            module.zero_grad()
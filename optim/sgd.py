@@ -19,5 +19,4 @@ class SGD:
     def zero_grad(self):
         """Remet tous les gradients à zéro."""
         for module in self.modules:
-            for name in module.gradients:
-                module.gradients[name] *= 0
+            module.zero_grad()
@@ -61,3 +61,53 @@ def test_adam_converges_faster_than_sgd():
     assert adam_losses[-1] < sgd_losses[-1], (
         f"Adam final loss ({adam_losses[-1]:.4f}) should be < SGD final loss ({sgd_losses[-1]:.4f})"
     )
+
+
+def _embedding_pair(vocab_size=20, d_model=4, **kwargs):
+    from modules.embedding import Embedding
+
+    np.random.seed(0)
+    dense, lazy = Embedding(vocab_size, d_model), Embedding(vocab_size, d_model)
+    lazy.W[...] = dense.W
+    return (dense, Adam([dense], **kwargs)), (lazy, Adam([lazy], lazy=True, **kwargs))
+
+
+def _step(emb, optimizer, x, grad):
+    emb.forward(x)
+    emb.backward(grad)
+    optimizer.step()
+    optimizer.zero_grad()
+
+
+def test_lazy_adam_matches_dense_when_all_rows_touched():
+    pair = _embedding_pair(lr=0.01, weight_decay=0.1)
+    for _ in range(5):
+        x = np.concatenate([np.arange(20), np.random.randint(0, 20, 10)])[None]
+        grad = np.random.randn(1, x.shape[1], 4)
+        for emb, optimizer in pair:
+            _step(emb, optimizer, x, grad)
+    np.testing.assert_allclose(pair[0][0].W, pair[1][0].W)
+
+
+def test_lazy_adam_defers_decay_of_untouched_rows():
+    (dense, dense_opt), (lazy, lazy_opt) = _embedding_pair(lr=0.01, weight_decay=0.1)
+    w_before = lazy.W.copy()
+    x = np.array([[0, 1, 1, 2]])
+    for _ in range(4):
+        grad = np.random.randn(1, 4, 4)
+        _step(dense, dense_opt, x, grad)
+        _step(lazy, lazy_opt, x, grad)
+
+    # Lignes jamais vues : inchangées tant que la décroissance est différée
+    np.testing.assert_array_equal(lazy.W[3:], w_before[3:])
+    lazy_opt.flush()
+    np.testing.assert_allclose(lazy.W, dense.W)
+
+    # Une ligne touchée puis oubliée : moments décrus comme avec g = 0
+    _step(dense, dense_opt, np.array([[5]]), np.ones((1, 1, 4)))
+    _step(lazy, lazy_opt, np.array([[5]]), np.ones((1, 1, 4)))
+    lazy_opt.flush()
+    key_d, key_l = (id(dense), "W"), (id(lazy), "W")
+    np.testing.assert_allclose(lazy_opt.m[key_l], dense_opt.m[key_d])
+    np.testing.assert_allclose(lazy_opt.v[key_l], dense_opt.v[key_d])
+    np.testing.assert_allclose(lazy.W[3:], dense.W[3:])
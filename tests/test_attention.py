@@ -120,3 +120,110 @@ def test_numerical_gradient_W_v():
 
     err = numerical_gradient_check(attn.W_v.W, attn.W_v.gradients["W"], loss_fn)
     assert err < 1e-5, f"W_v gradient error: {err}"
+
+
+@pytest.mark.parametrize("pos_encoding", ["rope", "alibi"])
+@pytest.mark.parametrize("weight", ["W_q", "W_k", "W_v"])
+def test_numerical_gradient_positional(pos_encoding, weight):
+    np.random.seed(0)
+    attn = MultiHeadAttention(d_model=8, n_heads=2, pos_encoding=pos_encoding)
+    x = np.random.randn(2, 5, 8)
+
+    def loss_fn():
+        return np.sum(attn.forward(x) ** 2)
+
+    out = attn.forward(x)
+    attn.backward(2 * out)
+
+    layer = getattr(attn, weight)
+    err = numerical_gradient_check(layer.W, layer.gradients["W"], loss_fn)
+    assert err < 1e-5, f"{pos_encoding} {weight} gradient error: {err}"
+
+
+@pytest.mark.parametrize("pos_encoding", ["rope", "alibi"])
+def test_relative_positions_shift_invariant(pos_encoding):
+    """RoPE et ALiBi ne dépendent que de i - j : décaler start_pos ne change rien."""
+    np.random.seed(0)
+    attn = MultiHeadAttention(d_model=8, n_heads=2, pos_encoding=pos_encoding)
+    x = np.random.randn(1, 6, 8)
+    np.testing.assert_allclose(attn.forward(x), attn.forward(x, start_pos=1000), atol=1e-10)
+
+
+@pytest.mark.parametrize("pos_encoding", ["rope", "alibi"])
+def test_context_longer_than_max_seq_len(pos_encoding):
+    np.random.seed(0)
+    attn = MultiHeadAttention(d_model=8, n_heads=2, max_seq_len=4, pos_encoding=pos_encoding)
+    x = np.random.randn(1, 10, 8)
+    out = attn.forward(x)
+    assert out.shape == (1, 10, 8)
+    # Causalité préservée au-delà de la table pré-calculée
+    np.testing.assert_allclose(attn.forward(x[:, :7])[:, -1], out[:, 6], atol=1e-12)
+
+
+def test_rope_matches_explicit_rotation():
+    """Le score RoPE q_i·k_j égale q·R(j - i)·k pour une tête."""
+    np.random.seed(0)
+    attn = MultiHeadAttention(d_model=4, n_heads=1, pos_encoding="rope")
+    q, k = np.random.randn(1, 1, 1, 4), np.random.randn(1, 1, 1, 4)
+    cos_i, sin_i = attn._rope_angles(np.array([7]))
+    cos_j, sin_j = attn._rope_angles(np.array([3]))
+    score = np.sum(attn._rotate(q, cos_i, sin_i) * attn._rotate(k, cos_j, sin_j))
+    cos_d, sin_d = attn._rope_angles(np.array([3 - 7]))
+    assert score == pytest.approx(np.sum(q * attn._rotate(k, cos_d, sin_d)))
+
+
+@pytest.mark.parametrize("pos_encoding", ["sinusoidal", "rope", "alibi"])
+def test_segment_ids_isolate_documents(pos_encoding):
+    """Séquences packées : chaque document est traité comme s'il était seul."""
+    np.random.seed(3)
+    attn = MultiHeadAttention(d_model=16, n_heads=2, max_seq_len=16, pos_encoding=pos_encoding)
+    x = np.random.randn(1, 9, 16)
+    seg = np.array([[0, 0, 0, 0, 1, 1, 1, 1, 1]])
+    out = attn.forward(x, segment_ids=seg)
+
+    np.testing.assert_allclose(out[:, :4], attn.forward(x[:, :4]), atol=1e-12)
+    # RoPE/ALiBi sont relatifs : le décalage du 2e document ne change rien
+    np.testing.assert_allclose(out[:, 4:], attn.forward(x[:, 4:]), atol=1e-12)
+    # Aucun poids d'attention entre documents
+    attn.forward(x, segment_ids=seg)
+    assert np.all(attn.get_attention_weights()[..., 4:, :4] == 0)
+
+
+@pytest.mark.parametrize("n_kv_heads", [1, 2])
+@pytest.mark.parametrize("weight", ["W_q", "W_k", "W_v", "W_o"])
+def test_numerical_gradient_grouped_query(n_kv_heads, weight):
+    np.random.seed(0)
+    attn = MultiHeadAttention(d_model=8, n_heads=4, n_kv_heads=n_kv_heads, pos_encoding="rope")
+    x = np.random.randn(2, 5, 8)
+
+    def loss_fn():
+        return np.sum(attn.forward(x) ** 2)
+
+    out = attn.forward(x)
+    attn.backward(2 * out)
+
+    layer = getattr(attn, weight)
+    err = numerical_gradient_check(layer.W, layer.gradients["W"], loss_fn)
+    assert err < 1e-5, f"GQA {weight} gradient error: {err}"
+
+
+def test_grouped_query_matches_mha_with_shared_heads():
+    """GQA = MHA dont les têtes K/V d'un groupe sont identiques."""
+    np.random.seed(1)
+    gqa = MultiHeadAttention(d_model=16, n_heads=4, n_kv_heads=2)
+    mha = MultiHeadAttention(d_model=16, n_heads=4)
+    assert gqa.W_k.W.shape == (16, 8)
+    mha.W_q.W[:] = gqa.W_q.W
+    mha.W_o.W[:] = gqa.W_o.W
+    for name in ("W_k", "W_v"):
+        heads = getattr(gqa, name).W.reshape(16, 2, 1, 4)
+        getattr(mha, name).W[:] = np.repeat(heads, 2, axis=2).reshape(16, 16)
+
+    x = np.random.randn(2, 6, 16)
+    np.testing.assert_allclose(gqa.forward(x), mha.forward(x), atol=1e-12)
+    grad = np.random.randn(2, 6, 16)
+    np.testing.assert_allclose(gqa.backward(grad), mha.backward(grad), atol=1e-12)
+
+    # Checkpoint MHA -> GQA : moyenne des têtes du groupe (ici identiques)
+    np.testing.assert_allclose(gqa.adapt_checkpoint("W_k.W", mha.W_k.W), gqa.W_k.W)
+    assert gqa.adapt_checkpoint("W_q.W", mha.W_q.W) is None
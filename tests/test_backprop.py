@@ -71,3 +71,23 @@ def test_multiple_steps_converge():
         bp.zero_grad()
 
     assert losses[-1] < losses[0] * 0.5, f"Loss should halve: {losses[0]:.4f} -> {losses[-1]:.4f}"
+
+
+def test_fused_loss_config_skips_logits():
+    np.random.seed(42)
+    config = Config(
+        d_model=8, n_heads=2, n_layers=1, d_ff=32, seq_len=8, vocab_size=5, seed=42, fused_loss=True
+    )
+    model = TransformerModel(config)
+    bp = Backprop(model, CrossEntropyLoss())
+    optimizer = Adam(model.all_modules(), lr=0.01)
+    x = np.random.randint(0, 5, (2, 8))
+    targets = np.random.randint(0, 5, (2, 8))
+
+    loss1, logits = bp.forward(x, targets)
+    assert logits is None
+    bp.backward()
+    optimizer.step()
+    bp.zero_grad()
+    loss2, _ = bp.forward(x, targets)
+    assert loss2 < loss1
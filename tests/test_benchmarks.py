@@ -0,0 +1,49 @@
+from benchmarks.__main__ import main
+from benchmarks.runner import compare, grid_points, load, result_key, run, save
+
+
+def _report(**medians):
+    return {"results": {k: {"median_s": v} for k, v in medians.items()}}
+
+
+def test_grid_skips_invalid_heads():
+    points = grid_points({"d_model": [12], "n_heads": [4, 5], "seq_len": [8], "batch": [2]})
+    assert points == [{"d_model": 12, "n_heads": 4, "seq_len": 8, "batch": 2}]
+
+
+def test_run_dedupes_partial_params():
+    grid = {"d_model": [16, 32], "n_heads": [2], "seq_len": [8], "batch": [2]}
+    report = run(grid, only=["tokenizer.encode", "linear.forward"], min_time=0.0)
+    keys = set(report["results"])
+    assert keys == {
+        result_key("tokenizer.encode", {"seq_len": 8, "batch": 2}),
+        result_key("linear.forward", {"d_model": 16, "n_heads": 2, "seq_len": 8, "batch": 2}),
+        result_key("linear.forward", {"d_model": 32, "n_heads": 2, "seq_len": 8, "batch": 2}),
+    }
+    for result in report["results"].values():
+        assert result["median_s"] > 0
+        assert result["items_per_call"] == 16
+
+
+def test_compare_flags_regressions():
+    baseline = _report(a=1.0, b=1.0, c=1.0, gone=1.0)
+    current = _report(a=1.05, b=1.5, c=0.5, fresh=1.0)
+    diff = compare(baseline, current, threshold=0.10)
+    assert diff["regressions"] == [("b", 1.5)]
+    assert diff["improvements"] == [("c", 0.5)]
+    assert diff["missing"] == ["gone"]
+    assert diff["new"] == ["fresh"]
+
+
+def test_cli_compare_exit_code(tmp_path):
+    current = tmp_path / "results.json"
+    baseline = tmp_path / "baseline.json"
+    args = ["run", "--grid", "quick", "--only", "layernorm", "--min-time", "0"]
+    assert main(args + ["--output", str(current)]) == 0
+    assert main(["compare", str(current), str(current)]) == 0
+
+    report = load(str(current))
+    for result in report["results"].values():
+        result["median_s"] /= 2
+    save(report, str(baseline))
+    assert main(["compare", str(baseline), str(current)]) == 1
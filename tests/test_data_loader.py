@@ -47,3 +47,90 @@ def test_num_batches(loader):
     n = loader.num_batches
     assert n > 0
     assert n == 99 // (4 * 8)  # (100-1) // (4*8) = 3
+
+
+def _docs_corpus(lengths, bos=0):
+    """Corpus de documents [bos, k, k, ...] (k = numéro du document + 1)."""
+    parts = [np.array([bos] + [k + 1] * (n - 1), dtype=np.int64) for k, n in enumerate(lengths)]
+    return np.concatenate(parts)
+
+
+def test_packed_segments_follow_documents():
+    np.random.seed(0)
+    data = _docs_corpus([5, 3, 7, 4, 6, 2, 9, 5])
+    loader = DataLoader(data, seq_len=8, batch_size=2, packed=True, bos_id=0)
+    x, y = loader.next_batch()
+    seg = loader.segment_ids
+    assert seg.shape == x.shape
+    assert np.all(seg[:, 0] == 0)
+    assert np.all(np.diff(seg, axis=1) >= 0)
+    # Un nouveau segment commence exactement à chaque BOS (hors position 0)
+    np.testing.assert_array_equal(np.diff(seg, axis=1) == 1, x[:, 1:] == 0)
+    # Les fenêtres se suivent dans le flux : pas de recouvrement ni de padding
+    np.testing.assert_array_equal(y[0, :-1], x[0, 1:])
+    assert y[0, -1] == x[1, 0]
+
+
+def test_packed_epoch_covers_corpus_once():
+    np.random.seed(1)
+    data = _docs_corpus([4] * 16)  # 64 tokens
+    loader = DataLoader(data, seq_len=8, batch_size=2, packed=True, bos_id=0)
+    seen = np.concatenate([loader.next_batch()[0].ravel() for _ in range(loader.num_batches)])
+    assert len(seen) == 48
+    # Documents entiers et mélangés : chaque document apparaît au plus une fois
+    counts = np.bincount(seen, minlength=17)[1:]
+    assert np.all(counts <= 3)
+
+
+def test_packed_small_corpus_wraps():
+    data = _docs_corpus([3, 3])
+    loader = DataLoader(data, seq_len=4, batch_size=3, packed=True, bos_id=0)
+    x, y = loader.next_batch()
+    assert x.shape == (3, 4)
+    assert np.all(np.diff(loader.segment_ids, axis=1) >= 0)
+
+
+def test_unpacked_has_no_segments(loader):
+    loader.next_batch()
+    assert loader.segment_ids is None
+
+
+def test_bucketed_batches_group_by_length():
+    np.random.seed(0)
+    data = _docs_corpus([3, 9, 4, 8, 3, 9, 4, 8])
+    loader = DataLoader(data, seq_len=16, batch_size=2, bucketed=True, bos_id=0, pad_id=0)
+    assert loader.num_batches == 4
+    widths = set()
+    for _ in range(loader.num_batches):
+        x, y = loader.next_batch()
+        lengths = loader.lengths
+        widths.add(x.shape[1])
+        # Même longueur dans un bucket : aucun padding ici
+        assert x.shape[1] == lengths.max() < 16
+        np.testing.assert_array_equal(y[:, :-1], x[:, 1:])
+    assert widths == {2, 3, 7, 8}
+    stats = loader.padding_stats()
+    assert stats["padded_tokens"] == 0
+    assert stats["real_tokens"] == 2 * (2 + 3 + 7 + 8)
+    assert stats["flops_saved"] == pytest.approx(1 - 40 / (4 * 2 * 16))
+
+
+def test_bucketed_padding_uses_ignore_index():
+    from modules.loss import IGNORE_INDEX
+
+    data = _docs_corpus([3, 5])
+    loader = DataLoader(data, seq_len=16, batch_size=2, bucketed=True, bos_id=0, pad_id=7)
+    x, y = loader.next_batch()
+    np.testing.assert_array_equal(loader.lengths, [2, 4])
+    np.testing.assert_array_equal(x[0], [0, 1, 7, 7])
+    np.testing.assert_array_equal(y[0], [1, 1, IGNORE_INDEX, IGNORE_INDEX])
+    assert loader.padding_stats()["padded_tokens"] == 2
+
+
+def test_bucketed_splits_long_documents():
+    data = _docs_corpus([11])
+    loader = DataLoader(data, seq_len=4, batch_size=8, bucketed=True, bos_id=0)
+    x, y = loader.next_batch()
+    # 10 cibles réparties en morceaux de 4, 4 et 2, chacune vue une fois
+    assert sorted(loader.lengths) == [2, 4, 4]
+    assert int((y != -100).sum()) == 10
@@ -81,3 +81,28 @@ def test_numerical_gradient(emb):
 
     err = numerical_gradient_check(emb.W, emb.gradients["W"], loss_fn)
     assert err < 1e-5, f"Numerical gradient error: {err}"
+
+
+def test_sparse_gradient_matches_add_at(emb):
+    x = np.array([[1, 3, 1, 1], [3, 9, 0, 1]])
+    grad = np.random.randn(2, 4, 8)
+    expected = np.zeros_like(emb.W)
+    np.add.at(expected, x, grad)
+
+    emb.forward(x)
+    emb.backward(grad)
+    np.testing.assert_allclose(emb.gradients["W"], expected)
+    np.testing.assert_array_equal(emb.touched_rows["W"], [0, 1, 3, 9])
+
+
+def test_backward_overwrites_previous_rows(emb):
+    emb.forward(np.array([[0, 1]]))
+    emb.backward(np.ones((1, 2, 8)))
+    emb.forward(np.array([[2]]))
+    emb.backward(np.ones((1, 1, 8)))
+    assert not np.any(emb.gradients["W"][[0, 1]])
+    assert np.all(emb.gradients["W"][2] == 1)
+
+    emb.zero_grad()
+    assert not np.any(emb.gradients["W"])
+    assert emb.touched_rows["W"].size == 0
@@ -64,3 +64,18 @@ def test_all_tokens_valid(setup):
     # (decode filtre BOS/EOS, donc seuls les chars normaux restent)
     for ch in result:
         assert ch in tok.char_to_idx, f"Character '{ch}' not in vocabulary"
+
+
+def test_beam_search_n_best(setup):
+    gen, _ = setup
+    results = gen.generate("abc", max_tokens=6, num_beams=4, num_return_sequences=3)
+    assert isinstance(results, list) and len(results) == 3
+    assert all(r.startswith("abc") for r in results)
+    assert isinstance(gen.generate("abc", max_tokens=6, num_beams=4), str)
+
+
+def test_num_return_sequences_sampling(setup):
+    gen, _ = setup
+    results = gen.generate("abc", max_tokens=10, num_return_sequences=5, temperature=1.5)
+    assert len(results) == 5
+    assert all(r.startswith("abc") for r in results)
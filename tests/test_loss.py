@@ -90,3 +90,57 @@ def test_numerical_stability(loss_fn):
     assert np.isfinite(loss)
     grad = loss_fn.backward()
     assert np.all(np.isfinite(grad))
+
+
+def _reference(logits, targets):
+    """Implémentation directe (log_probs et probs complets) pour comparaison."""
+    B, T, V = logits.shape
+    m = logits.max(axis=-1, keepdims=True)
+    log_probs = logits - (m + np.log(np.exp(logits - m).sum(axis=-1, keepdims=True)))
+    b, t = np.arange(B)[:, None], np.arange(T)[None, :]
+    grad = np.exp(log_probs)
+    grad[b, t, targets] -= 1.0
+    return -log_probs[b, t, targets].mean(), grad / (B * T)
+
+
+@pytest.mark.parametrize("chunk_size", [None, 1, 3, 8, 100])
+def test_chunked_matches_reference(chunk_size):
+    rng = np.random.default_rng(0)
+    logits = rng.standard_normal((2, 4, 50)) * 5
+    targets = rng.integers(0, 50, (2, 4))
+    loss_fn = CrossEntropyLoss(chunk_size=chunk_size)
+    expected_loss, expected_grad = _reference(logits, targets)
+    assert loss_fn.forward(logits, targets) == pytest.approx(expected_loss)
+    np.testing.assert_allclose(loss_fn.backward(), expected_grad, atol=1e-12)
+
+
+def test_gradient_buffer_reused(loss_fn):
+    logits = np.random.randn(2, 4, 10)
+    targets = np.random.randint(0, 10, (2, 4))
+    loss_fn.forward(logits, targets)
+    first = loss_fn.backward()
+    loss_fn.forward(logits * 2, targets)
+    assert loss_fn.backward() is first
+    assert not np.shares_memory(first, logits)
+
+
+def test_ignore_index_skips_padding():
+    """Positions IGNORE_INDEX : ni loss ni gradient, moyenne sur les vraies cibles."""
+    from modules.loss import IGNORE_INDEX
+
+    np.random.seed(2)
+    logits = np.random.randn(2, 5, 7)
+    targets = np.random.randint(0, 7, size=(2, 5))
+    padded = targets.copy()
+    padded[0, 3:] = IGNORE_INDEX
+
+    loss_fn = CrossEntropyLoss()
+    loss = loss_fn.forward(logits, padded)
+    grad = loss_fn.backward()
+    assert np.all(grad[0, 3:] == 0)
+
+    ref = CrossEntropyLoss()
+    real = np.concatenate([logits[0, :3], logits[1]])[None]
+    expected = ref.forward(real, np.concatenate([targets[0, :3], targets[1]])[None])
+    assert loss == pytest.approx(expected)
+    np.testing.assert_allclose(grad[1], ref.backward()[0, 3:])
@@ -0,0 +1,60 @@
+import numpy as np
+
+from config import Config
+from modules.loss import CrossEntropyLoss
+from modules.transformer_model import TransformerModel
+from optim.adam import Adam
+from training.data_loader import DataLoader
+from training.metrics import MetricsRegistry, PhaseTimer, metrics
+from training.trainer import Trainer
+
+
+def test_counter_gauge_summary_render():
+    reg = MetricsRegistry()
+    reg.inc("minillm_train_tokens_total", 10, config_id="a")
+    reg.inc("minillm_train_tokens_total", 5, config_id="a")
+    reg.set("minillm_train_tokens_per_second", 123.5, config_id="a")
+    reg.observe("minillm_generation_token_seconds", 0.5, count=2)
+    text = reg.render_prometheus()
+    assert "# TYPE minillm_train_tokens_total counter" in text
+    assert 'minillm_train_tokens_total{config_id="a"} 15' in text
+    assert 'minillm_train_tokens_per_second{config_id="a"} 123.5' in text
+    assert "minillm_generation_token_seconds_sum 0.5" in text
+    assert "minillm_generation_token_seconds_count 2" in text
+
+
+def test_label_escaping():
+    reg = MetricsRegistry()
+    reg.inc("custom_total", source='a"b\\c')
+    assert 'custom_total{source="a\\"b\\\\c"} 1' in reg.render_prometheus()
+
+
+def test_phase_timer_excludes_pause():
+    timer = PhaseTimer()
+    timer.add("forward", 0.2)
+    timer.add("paused", 1e6)
+    timer.step_done(tokens=100)
+    summary = timer.summary()
+    assert summary["step_time_ms"]["forward"] == 200.0
+    assert summary["epoch_seconds"] < 0  # pause retranchée du temps écoulé
+
+
+def test_trainer_reports_throughput():
+    np.random.seed(0)
+    config = Config(d_model=16, n_heads=2, n_layers=1, d_ff=32, seq_len=8, batch_size=2)
+    config.vocab_size = 10
+    config.log_every = 100
+    model = TransformerModel(config)
+    data = np.random.randint(0, 10, size=200)
+    loader = DataLoader(data, config.seq_len, config.batch_size)
+    trainer = Trainer(model, CrossEntropyLoss(), Adam(model.all_modules()), loader, config)
+
+    before = metrics.get("minillm_train_tokens_total", source="trainer")
+    trainer.train(num_epochs=2)
+
+    assert len(trainer.throughput_history) == 2
+    for t in trainer.throughput_history:
+        assert t["tokens_per_second"] > 0
+        assert t["step_time_ms"]["backward"] > 0
+    tokens = 2 * loader.num_batches * config.batch_size * config.seq_len
+    assert metrics.get("minillm_train_tokens_total", source="trainer") - before == tokens
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from config import Config
+from modules.loss import CrossEntropyLoss
+from modules.transformer_model import TransformerModel
+from training.perplexity import count_windows, evaluate_perplexity, sliding_windows
+
+
+@pytest.fixture
+def model():
+    config = Config(d_model=16, n_heads=2, n_layers=1, d_ff=32, seq_len=8, vocab_size=12, seed=0)
+    return TransformerModel(config)
+
+
+@pytest.mark.parametrize("n,stride,batch", [(50, 8, 3), (50, 3, 4), (9, 8, 1), (23, 5, 2)])
+def test_every_target_counted_once(n, stride, batch):
+    tokens = np.arange(n)
+    seen = []
+    for x, y, mask in sliding_windows(tokens, seq_len=8, stride=stride, batch_size=batch):
+        assert x.shape == y.shape == mask.shape
+        np.testing.assert_array_equal(y, x + 1)
+        seen.extend(y[mask].tolist())
+    assert sorted(seen) == list(range(1, n))
+
+
+def test_count_windows_matches_generator():
+    tokens = np.arange(40)
+    n_windows = sum(x.shape[0] for x, _, _ in sliding_windows(tokens, 8, 3, 4))
+    assert n_windows == count_windows(40, 8, 3)
+
+
+def test_short_text_matches_cross_entropy(model):
+    rng = np.random.default_rng(0)
+    tokens = rng.integers(0, 12, size=8)
+    result = evaluate_perplexity(model, tokens, seq_len=8)
+    expected = CrossEntropyLoss().forward(model.forward(tokens[None, :-1]), tokens[None, 1:])
+    assert result["n_tokens"] == 7
+    assert result["loss"] == pytest.approx(expected)
+    assert result["perplexity"] == pytest.approx(np.exp(expected))
+
+
+def test_long_text_disjoint_windows(model):
+    rng = np.random.default_rng(1)
+    tokens = rng.integers(0, 12, size=33)  # 32 cibles = 4 fenêtres de 8
+    result = evaluate_perplexity(model, tokens, seq_len=8, batch_size=3)
+    loss_fn = CrossEntropyLoss()
+    losses = [
+        loss_fn.forward(model.forward(tokens[None, i : i + 8]), tokens[None, i + 1 : i + 9])
+        for i in range(0, 32, 8)
+    ]
+    assert result["n_windows"] == 4
+    assert result["n_tokens"] == 32
+    assert result["loss"] == pytest.approx(np.mean(losses))
+
+
+def test_progress_reported(model):
+    calls = []
+    evaluate_perplexity(
+        model,
+        np.arange(30) % 12,
+        seq_len=8,
+        stride=4,
+        batch_size=2,
+        progress=lambda d, t: calls.append((d, t)),
+    )
+    assert calls[-1][0] == calls[-1][1] == count_windows(30, 8, 4)
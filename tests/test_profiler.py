@@ -0,0 +1,45 @@
+import numpy as np
+
+from autograd.backprop import Backprop
+from config import Config
+from modules.loss import CrossEntropyLoss
+from modules.profiler import ModuleProfiler
+from modules.transformer_model import TransformerModel
+
+
+def _setup():
+    config = Config(d_model=16, n_heads=2, n_layers=2, d_ff=32, seq_len=8, vocab_size=12, seed=0)
+    model = TransformerModel(config)
+    rng = np.random.default_rng(0)
+    x = rng.integers(0, 12, size=(2, 8))
+    y = rng.integers(0, 12, size=(2, 8))
+    return model, Backprop(model, CrossEntropyLoss()), x, y
+
+
+def test_report_covers_every_module():
+    model, backprop, x, y = _setup()
+    with ModuleProfiler(model) as prof:
+        backprop.forward(x, y)
+        backprop.backward()
+
+    rows = prof.report()
+    assert [r["module"] for r in rows] == [name for name, _ in model.named_modules()]
+    for r in rows:
+        assert r["forward_calls"] == 1
+    attn = next(r for r in rows if r["module"] == "block1.attention")
+    assert attn["forward_flops"] > 0
+    assert attn["backward_flops"] == 2 * attn["forward_flops"]
+    assert attn["backward_calls"] == 1
+    assert abs(sum(r["percent"] for r in rows) - 100) < 1e-6
+    assert "block0.ffn" in prof.format_table()
+
+
+def test_hooks_removed_and_outputs_unchanged():
+    model, backprop, x, y = _setup()
+    expected, _ = backprop.forward(x, y)
+    with ModuleProfiler(model, track_memory=False):
+        profiled, _ = backprop.forward(x, y)
+    assert profiled == expected
+    for _, module in model.named_modules():
+        assert "forward" not in vars(module)
+        assert "backward" not in vars(module)
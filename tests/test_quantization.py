@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from config import Config
+from modules.linear import Linear, TiedLinear
+from modules.quantization import (
+    QuantizedLinear,
+    is_quantized,
+    quantize_model,
+    quantize_weight,
+)
+from modules.transformer_model import TransformerModel
+
+
+def _model(**kwargs):
+    config = Config(
+        d_model=16, n_heads=2, n_layers=2, d_ff=32, seq_len=8, vocab_size=12, seed=0, **kwargs
+    )
+    np.random.seed(0)
+    return TransformerModel(config)
+
+
+def test_quantize_weight_per_column_error_bound():
+    np.random.seed(0)
+    W = np.random.randn(20, 6) * np.array([0.01, 0.1, 1.0, 10.0, 0.5, 2.0])
+    W[:, 4] = 0.0
+    w_int8, scale = quantize_weight(W)
+    assert w_int8.dtype == np.int8
+    assert scale.shape == (6,)
+    # Erreur d'arrondi au plus une demi-échelle, colonne par colonne
+    assert np.all(np.abs(w_int8 * scale - W) <= scale / 2 + 1e-12)
+    assert np.all(w_int8[:, 4] == 0)
+
+
+@pytest.mark.parametrize("tile", [256, 3])
+def test_quantized_linear_matches_dequantized_matmul(tile):
+    np.random.seed(1)
+    lin = Linear(8, 10)
+    lin.b[:] = np.random.randn(10)
+    q = QuantizedLinear.from_linear(lin, tile=tile)
+    x = np.random.randn(2, 5, 8)
+    np.testing.assert_allclose(q.forward(x), x @ q.W + lin.b, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(q.forward(x), lin.forward(x), atol=0.05)
+
+
+def test_quantized_linear_is_inference_only():
+    q = QuantizedLinear.from_linear(Linear(4, 3, bias=False))
+    assert set(q.parameters) == {"W_int8", "W_scale"}
+    assert q.gradients == {}
+    with pytest.raises(RuntimeError):
+        q.backward(np.zeros((1, 3)))
+
+
+def test_quantize_model_targets_and_logits():
+    model = _model()
+    x = np.array([[1, 2, 3, 4, 5, 6]])
+    ref = model.forward(x)
+
+    assert quantize_model(model) == 2 * 6 + 1
+    assert is_quantized(model)
+    assert isinstance(model.output_head, QuantizedLinear)
+    assert isinstance(model.blocks[0].ffn.linear1, QuantizedLinear)
+    assert quantize_model(model) == 0  # déjà quantifié
+
+    out = model.forward(x)
+    assert np.abs(out - ref).max() < 0.05 * np.abs(ref).max()
+    # Le forward incrémental passe aussi par les couches int8
+    cached, _ = model.forward_cached(x)
+    np.testing.assert_allclose(cached[:, -1], out[:, -1], atol=1e-10)
+
+
+def test_quantize_model_keeps_tied_head():
+    model = _model(tie_embeddings=True)
+    assert quantize_model(model) == 2 * 6
+    assert isinstance(model.output_head, TiedLinear)
+
+
+def test_quantize_model_subset():
+    model = _model()
+    assert quantize_model(model, targets=("ffn",)) == 4
+    assert isinstance(model.blocks[0].attention.W_q, Linear)
+    assert isinstance(model.output_head, Linear)
@@ -0,0 +1,43 @@
+import copy
+
+import numpy as np
+
+from autograd.backprop import Backprop
+from config import Config
+from modules.loss import CrossEntropyLoss
+from modules.transformer_model import TransformerModel
+from training.regularization import apply_weight_decay, clip_gradients
+
+
+def _model_with_grads():
+    np.random.seed(0)
+    config = Config(d_model=16, n_heads=2, n_layers=1, d_ff=32, seq_len=8, vocab_size=50, seed=0)
+    model = TransformerModel(config)
+    x = np.random.randint(0, 5, size=(2, 8))  # peu de lignes d'embedding touchées
+    y = np.random.randint(0, 5, size=(2, 8))
+    backprop = Backprop(model, CrossEntropyLoss())
+    backprop.forward(x, y)
+    backprop.backward()
+    return model
+
+
+def test_lazy_clip_matches_dense_clip():
+    model = _model_with_grads()
+    dense = copy.deepcopy(model)
+    norm = clip_gradients(model, 0.01, lazy=True)
+    assert np.isclose(norm, clip_gradients(dense, 0.01))
+    for a, b in zip(model.all_modules(), dense.all_modules()):
+        for name in a.gradients:
+            np.testing.assert_allclose(a.gradients[name], b.gradients[name])
+
+
+def test_lazy_weight_decay_skips_sparse_embedding():
+    model = _model_with_grads()
+    embedding = model.embedding.W.copy()
+    linear = model.output_head.W.copy()
+    apply_weight_decay(model, 0.1, 0.5, lazy=True)
+    np.testing.assert_array_equal(model.embedding.W, embedding)
+    np.testing.assert_allclose(model.output_head.W, linear * 0.95)
+
+    apply_weight_decay(model, 0.1, 0.5)
+    np.testing.assert_allclose(model.embedding.W, embedding * 0.95)
@@ -53,3 +53,191 @@ def test_all_modules_list(model):
     modules = model.all_modules()
     # embedding + (ln1, attn, ln2, ffn) * 2 + final_ln + output_head
     assert len(modules) == 1 + 4 * 2 + 1 + 1  # = 11
+
+
+def _tied_model():
+    config = Config(
+        d_model=8,
+        n_heads=2,
+        n_layers=1,
+        d_ff=16,
+        seq_len=6,
+        vocab_size=11,
+        seed=0,
+        tie_embeddings=True,
+    )
+    return TransformerModel(config)
+
+
+def test_tied_embeddings_share_one_tensor():
+    tied = _tied_model()
+    untied = TransformerModel(
+        Config(d_model=8, n_heads=2, n_layers=1, d_ff=16, seq_len=6, vocab_size=11, seed=0)
+    )
+    assert np.shares_memory(tied.output_head.W, tied.embedding.W)
+    assert tied.output_head.parameters == {}
+    assert tied.count_parameters() == untied.count_parameters() - 8 * 11
+
+    tied.embedding.W[3] += 1.0
+    np.testing.assert_array_equal(tied.output_head.W[:, 3], tied.embedding.W[3])
+
+
+def test_tied_embeddings_gradient_accumulates_both_uses():
+    from modules.loss import CrossEntropyLoss
+    from tests.helpers import numerical_gradient_check
+
+    model = _tied_model()
+    loss_fn = CrossEntropyLoss()
+    rng = np.random.default_rng(0)
+    x = rng.integers(0, 11, size=(2, 6))
+    y = rng.integers(0, 11, size=(2, 6))
+
+    loss_fn.forward(model.forward(x), y)
+    model.backward(loss_fn.backward())
+    grad = model.embedding.gradients["W"].copy()
+
+    err = numerical_gradient_check(
+        model.embedding.W, grad, lambda: loss_fn.forward(model.forward(x), y)
+    )
+    assert err < 1e-5
+
+
+@pytest.mark.parametrize("tie", [False, True])
+@pytest.mark.parametrize("chunk_size", [1, 5, 256])
+def test_forward_loss_matches_unfused(tie, chunk_size):
+    from modules.loss import CrossEntropyLoss
+
+    config = Config(
+        d_model=8,
+        n_heads=2,
+        n_layers=1,
+        d_ff=16,
+        seq_len=6,
+        vocab_size=11,
+        seed=0,
+        tie_embeddings=tie,
+    )
+    rng = np.random.default_rng(0)
+    x = rng.integers(0, 11, size=(2, 6))
+    y = rng.integers(0, 11, size=(2, 6))
+
+    reference = TransformerModel(config)
+    loss_fn = CrossEntropyLoss()
+    expected = loss_fn.forward(reference.forward(x), y)
+    reference.backward(loss_fn.backward())
+
+    fused = TransformerModel(config)
+    assert fused.forward_loss(x, y, chunk_size=chunk_size) == pytest.approx(expected)
+    fused.backward_loss()
+
+    for ref_mod, mod in zip(reference.all_modules(), fused.all_modules()):
+        for name, grad in ref_mod.gradients.items():
+            np.testing.assert_allclose(mod.gradients[name], grad, atol=1e-12)
+
+
+def test_last_only_matches_full_forward(model):
+    x = np.array([[0, 1, 2, 3, 4], [5, 6, 7, 8, 9]])
+    full = model.forward(x)
+    last = model.forward(x, last_only=True)
+    assert last.shape == (2, 1, 10)
+    np.testing.assert_allclose(last[:, -1], full[:, -1])
+
+    picked = model.forward(x, logits_positions=[1, 3])
+    np.testing.assert_allclose(picked, full[:, [1, 3]])
+    np.testing.assert_allclose(model.forward(x, logits_positions=2)[:, 0], full[:, 2])
+
+
+@pytest.mark.parametrize("pos_encoding", ["rope", "alibi"])
+def test_relative_encodings_extend_context(pos_encoding):
+    config = Config(
+        d_model=8,
+        n_heads=2,
+        n_layers=1,
+        d_ff=16,
+        seq_len=4,
+        vocab_size=10,
+        pos_encoding=pos_encoding,
+        max_context=12,
+    )
+    model = TransformerModel(config)
+    assert model.pos_enc is None
+    assert model.context_length == 12
+    logits = model.forward(np.arange(10)[None, :], last_only=True)
+    assert logits.shape == (1, 1, 10)
+
+
+def test_sinusoidal_context_is_seq_len(model):
+    model.config.max_context = 100
+    assert model.context_length == 16
+
+
+@pytest.mark.parametrize("pos_encoding", ["sinusoidal", "rope"])
+def test_packed_documents_match_separate_forwards(pos_encoding):
+    config = Config(
+        d_model=16,
+        n_heads=2,
+        n_layers=2,
+        d_ff=32,
+        seq_len=12,
+        vocab_size=11,
+        seed=0,
+        pos_encoding=pos_encoding,
+    )
+    model = TransformerModel(config)
+    doc_a = np.array([[1, 4, 2, 7, 3]])
+    doc_b = np.array([[1, 9, 5, 6, 8, 2, 10]])
+    packed = np.concatenate([doc_a, doc_b], axis=1)
+    seg = np.array([[0] * 5 + [1] * 7])
+
+    logits = model.forward(packed, segment_ids=seg)
+    np.testing.assert_allclose(logits[:, :5], model.forward(doc_a), atol=1e-10)
+    np.testing.assert_allclose(logits[:, 5:], model.forward(doc_b), atol=1e-10)
+
+
+def test_segment_positions():
+    seg = np.array([[0, 0, 0, 1, 1, 2], [0, 1, 1, 1, 1, 1]])
+    np.testing.assert_array_equal(
+        TransformerModel.segment_positions(seg), [[0, 1, 2, 0, 1, 0], [0, 0, 1, 2, 3, 4]]
+    )
+
+
+def test_right_padding_does_not_change_real_tokens():
+    """Padding à droite + IGNORE_INDEX : logits et loss des vrais tokens inchangés."""
+    from modules.loss import IGNORE_INDEX, CrossEntropyLoss
+
+    config = Config(d_model=16, n_heads=2, n_layers=1, d_ff=32, seq_len=8, vocab_size=9, seed=0)
+    model = TransformerModel(config)
+    x = np.array([[1, 4, 2, 7, 0, 0]])
+    y = np.array([[4, 2, 7, 3, IGNORE_INDEX, IGNORE_INDEX]])
+
+    np.testing.assert_allclose(model.forward(x)[:, :4], model.forward(x[:, :4]), atol=1e-12)
+    unpadded = CrossEntropyLoss().forward(model.forward(x[:, :4]), y[:, :4])
+    assert CrossEntropyLoss().forward(model.forward(x), y) == pytest.approx(unpadded)
+    assert model.forward_loss(x, y, chunk_size=4) == pytest.approx(unpadded)
+
+
+@pytest.mark.parametrize(
+    "pos_encoding,n_kv_heads", [("sinusoidal", 0), ("rope", 1), ("alibi", 2), ("alibi", 0)]
+)
+def test_forward_cached_matches_full_forward(pos_encoding, n_kv_heads):
+    """Prompt en morceaux + cache K/V : mêmes logits que le forward complet."""
+    config = Config(
+        d_model=16,
+        n_heads=4,
+        n_layers=2,
+        d_ff=32,
+        seq_len=12,
+        vocab_size=10,
+        pos_encoding=pos_encoding,
+        n_kv_heads=n_kv_heads,
+    )
+    model = TransformerModel(config)
+    x = np.random.RandomState(0).randint(0, 10, (2, 10))
+
+    logits, past = model.forward_cached(x[:, :4])
+    np.testing.assert_allclose(logits, model.forward(x[:, :4], last_only=True), atol=1e-12)
+    logits, past = model.forward_cached(x[:, 4:9], past)
+    logits, past = model.forward_cached(x[:, 9:], past)
+    np.testing.assert_allclose(logits, model.forward(x, last_only=True), atol=1e-12)
+    assert len(past) == 2
+    assert past[0][0].shape == (2, n_kv_heads or 4, 10, 4)
@@ -1,5 +1,7 @@
 import numpy as np
 
+from modules.loss import IGNORE_INDEX
+
 
 class DataLoader:
     """Prépare des batches (input, target) pour le next-token prediction.
@@ -11,18 +13,70 @@ class DataLoader:
     Utilise du random sampling : chaque batch pioche des fenêtres
     aléatoires dans le corpus pour une meilleure couverture des données,
     surtout sur les petits corpus.
+
+    Mode packed (packed=True) : le corpus est découpé en documents (chacun
+    commence par bos_id), mélangés à chaque epoch puis mis bout à bout ;
+    les fenêtres sont prises à la suite dans ce flux, sans recouvrement ni
+    padding. segment_ids (B, T) donne pour chaque token le numéro de son
+    document dans la fenêtre : passé au modèle, il restreint l'attention
+    au document courant (masque causal bloc-diagonal). Seul un document à
+    cheval sur deux fenêtres est coupé, ses deux parties restant isolées.
+
+    Mode bucketed (bucketed=True) : chaque document (tronqué à seq_len + 1
+    tokens, les plus longs étant découpés) est un exemple. Les exemples
+    sont triés par longueur et groupés par B : un batch a la longueur de
+    son plus long exemple (<= seq_len) au lieu de seq_len. Le padding est
+    à droite : x reçoit pad_id, y reçoit IGNORE_INDEX (ignoré par la loss,
+    normalisée par les vrais tokens) ; le masque causal empêche déjà les
+    vrais tokens de voir le padding. lengths (B,) donne la longueur réelle
+    de chaque séquence, padding_stats() le calcul économisé.
     """
 
-    def __init__(self, data: np.ndarray, seq_len: int, batch_size: int):
+    def __init__(
+        self,
+        data: np.ndarray,
+        seq_len: int,
+        batch_size: int,
+        packed: bool = False,
+        bos_id: int | None = None,
+        bucketed: bool = False,
+        pad_id: int = 0,
+    ):
         """
         Args:
             data: tableau 1D d'entiers (le corpus entier tokenisé)
             seq_len: longueur de chaque séquence
             batch_size: nombre de séquences par batch
+            packed: fenêtres remplies de documents entiers + segment_ids
+            bos_id: token de début de document (modes packed/bucketed ;
+                    None = tout le corpus est un seul document)
+            bucketed: batches de longueur variable, groupés par longueur
+            pad_id: token d'input des positions de padding (mode bucketed)
         """
+        assert not (packed and bucketed), "packed et bucketed sont exclusifs"
         self.data = data
         self.seq_len = seq_len
         self.batch_size = batch_size
+        self.packed = packed
+        self.bucketed = bucketed
+        self.bos_id = bos_id
+        self.pad_id = pad_id
+        self.segment_ids: np.ndarray | None = None  # du dernier batch (mode packed)
+        self.lengths: np.ndarray | None = None  # du dernier batch (mode bucketed)
+        self._padding = {"real_tokens": 0, "padded_tokens": 0, "fixed_tokens": 0}
+
+        if packed or bucketed:
+            if bos_id is not None:
+                starts = np.flatnonzero(data == bos_id)
+                if starts.size == 0 or starts[0] != 0:
+                    starts = np.concatenate([[0], starts])
+            else:
+                starts = np.array([0])
+            self._doc_bounds = np.append(starts, len(data))
+        if bucketed:
+            self._build_buckets()
+        if packed or bucketed:
+            self.reset()
 
     def next_batch(self) -> tuple[np.ndarray, np.ndarray]:
         """Retourne un batch (x, y) de shape (batch_size, seq_len).
@@ -31,6 +85,11 @@ class DataLoader:
         Cela garantit une couverture uniforme des données, même pour
         les petits corpus.
         """
+        if self.packed:
+            return self._next_packed_batch()
+        if self.bucketed:
+            return self._next_bucketed_batch()
+
         B, T = self.batch_size, self.seq_len
         x = np.zeros((B, T), dtype=np.int64)
         y = np.zeros((B, T), dtype=np.int64)
@@ -51,13 +110,130 @@ class DataLoader:
 
         return x, y
 
+    def _next_packed_batch(self) -> tuple[np.ndarray, np.ndarray]:
+        """Batch de B fenêtres consécutives du flux de documents mélangés."""
+        B, T = self.batch_size, self.seq_len
+        n = len(self._stream)
+        if n < T + 1:
+            x = np.zeros((B, T), dtype=np.int64)
+            y = np.zeros((B, T), dtype=np.int64)
+            seg = np.zeros((B, T), dtype=np.int64)
+            usable = n - 1
+            x[:, :usable] = self._stream[:usable]
+            y[:, :usable] = self._stream[1:n]
+            seg[:, :usable] = self._doc_ids[:usable]
+            self.segment_ids = seg
+            return x, y
+
+        span = n - 1  # positions utilisables comme input (la cible est décalée de 1)
+        if self._cursor + B * T > span and B * T <= span:
+            self.reset()
+        # Flux plus court qu'un batch : les fenêtres bouclent sur le flux,
+        # chaque tour comptant comme de nouveaux documents
+        idx = self._cursor + np.arange(B)[:, None] * T + np.arange(T)[None, :]  # (B, T)
+        self._cursor = (self._cursor + B * T) % span
+        wrap, pos = np.divmod(idx, span)
+        x = self._stream[pos]
+        y = self._stream[pos + 1]
+        # Renuméroter les documents à partir de 0 dans chaque fenêtre
+        doc = self._doc_ids[pos] + wrap * (self._doc_ids[-1] + 1)
+        self.segment_ids = doc - doc[:, :1]
+        return x, y
+
+    def _build_buckets(self):
+        """Exemples (start, longueur) triés par longueur, groupés par batch."""
+        T = self.seq_len
+        starts, lengths = [], []
+        for begin, end in zip(self._doc_bounds[:-1], self._doc_bounds[1:]):
+            # Document trop long : morceaux de T + 1 tokens se chevauchant
+            # d'un token, pour que chaque token serve de cible une fois
+            for s in range(begin, max(begin + 1, end - 1), T):
+                n = min(T + 1, end - s)
+                if n >= 2:
+                    starts.append(s)
+                    lengths.append(n)
+        order = np.argsort(lengths, kind="stable")
+        self._examples = np.array(starts, dtype=np.int64)[order]
+        self._example_lengths = np.array(lengths, dtype=np.int64)[order] - 1  # longueur de x
+        n_batches = -(-len(order) // self.batch_size)
+        self._bucket_slices = [
+            slice(i * self.batch_size, (i + 1) * self.batch_size) for i in range(n_batches)
+        ]
+
+    def _next_bucketed_batch(self) -> tuple[np.ndarray, np.ndarray]:
+        """Batch d'exemples de longueurs voisines, paddé à la plus longue."""
+        if not self._bucket_slices:
+            raise ValueError("Aucun exemple d'au moins 2 tokens dans le corpus")
+        if self._cursor >= len(self._batch_order):
+            self.reset()
+        sl = self._bucket_slices[self._batch_order[self._cursor]]
+        self._cursor += 1
+
+        starts = self._examples[sl]
+        lengths = self._example_lengths[sl]
+        B, T = len(starts), int(lengths.max())
+        offsets = np.arange(T)
+        valid = offsets[None, :] < lengths[:, None]  # (B, T)
+        idx = np.where(valid, starts[:, None] + offsets[None, :], 0)
+        x = np.where(valid, self.data[idx], self.pad_id)
+        y = np.where(valid, self.data[idx + 1], IGNORE_INDEX)
+
+        self.lengths = lengths
+        self._padding["real_tokens"] += int(lengths.sum())
+        self._padding["padded_tokens"] += B * T - int(lengths.sum())
+        self._padding["fixed_tokens"] += self.batch_size * self.seq_len
+        return x, y
+
+    def padding_stats(self, reset: bool = False) -> dict:
+        """Calcul économisé par le mode bucketed depuis le dernier reset.
+
+        fixed_tokens est ce qu'auraient coûté des batches (batch_size,
+        seq_len). Les couches linéaires (l'essentiel des FLOPs) sont
+        proportionnelles au nombre de positions : flops_saved est donc la
+        fraction de FLOPs économisée (l'attention, quadratique, gagne plus).
+        """
+        stats = dict(self._padding)
+        computed = stats["real_tokens"] + stats["padded_tokens"]
+        fixed = stats["fixed_tokens"]
+        stats["flops_saved"] = 1.0 - computed / fixed if fixed else 0.0
+        stats["padding_ratio"] = stats["padded_tokens"] / computed if computed else 0.0
+        if reset:
+            self._padding = {k: 0 for k in self._padding}
+        return stats
+
+    @property
+    def batch_tokens(self) -> int | None:
+        """Vrais tokens du dernier batch (mode bucketed), None sinon."""
+        return None if self.lengths is None else int(self.lengths.sum())
+
     def reset(self):
-        """Appelé au début de chaque epoch (no-op avec random sampling)."""
-        pass
+        """Appelé au début de chaque epoch.
+
+        No-op avec random sampling ; en mode packed, re-mélange l'ordre
+        des documents et repart du début du flux ; en mode bucketed,
+        re-mélange l'ordre des batches.
+        """
+        if self.bucketed:
+            self._batch_order = np.random.permutation(len(self._bucket_slices))
+            self._cursor = 0
+            return
+        if not self.packed:
+            return
+        bounds = self._doc_bounds
+        order = np.random.permutation(len(bounds) - 1)
+        lengths = (bounds[1:] - bounds[:-1])[order]
+        # Indices du flux sans boucle Python : offset de chaque document + rang
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        idx = np.repeat(bounds[order] - offsets, lengths) + np.arange(lengths.sum())
+        self._stream = self.data[idx]
+        self._doc_ids = np.repeat(np.arange(len(order)), lengths)
+        self._cursor = 0
 
     @property
     def num_batches(self) -> int:
         """Nombre de batches par epoch (approximatif)."""
+        if self.bucketed:
+            return max(1, len(self._bucket_slices))
         total_tokens = len(self.data) - 1  # -1 car target est décalé
         tokens_per_batch = self.batch_size * self.seq_len
         return max(1, total_tokens // tokens_per_batch)
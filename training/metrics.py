@@ -0,0 +1,221 @@
+"""Registre de métriques léger (débit, latences) exportable au format Prometheus.
+
+Trois types, comme Prometheus :
+- counter : valeur cumulée (tokens traités, requêtes)
+- gauge   : dernière valeur observée (tokens/s de la dernière epoch)
+- summary : durées cumulées (_sum) et nombre d'observations (_count)
+
+Les hooks de timing coûtent deux appels à time.perf_counter() par phase :
+négligeable devant un forward NumPy.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Description des métriques connues : nom -> (type, aide)
+METRICS = {
+    "minillm_train_steps_total": ("counter", "Pas d'optimisation effectués"),
+    "minillm_train_tokens_total": ("counter", "Tokens d'entraînement traités"),
+    "minillm_train_tokens_per_second": ("gauge", "Débit d'entraînement de la dernière epoch"),
+    "minillm_train_step_phase_seconds": (
+        "summary",
+        "Temps passé par phase d'un pas d'entraînement (data, forward, backward, "
+        "optimizer, lock_wait)",
+    ),
+    "minillm_generation_requests_total": ("counter", "Générations lancées"),
+    "minillm_generation_tokens_total": ("counter", "Tokens générés"),
+    "minillm_generation_ttft_seconds": ("summary", "Temps jusqu'au premier token généré"),
+    "minillm_generation_token_seconds": ("summary", "Temps par token généré"),
+    "minillm_generation_lock_wait_seconds": ("summary", "Attente du model_lock avant génération"),
+    "minillm_generation_prefill_tokens_total": (
+        "counter",
+        "Tokens de prompt traités par un forward (hors préfixe en cache)",
+    ),
+    "minillm_generation_cached_prefix_tokens_total": (
+        "counter",
+        "Tokens de prompt repris du cache de préfixes",
+    ),
+}
+
+TRAIN_PHASES = ("data", "forward", "backward", "optimizer", "lock_wait")
+
+
+def describe(name: str, kind: str, help_text: str) -> None:
+    """Déclare une métrique supplémentaire (type + aide pour l'export)."""
+    METRICS[name] = (kind, help_text)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    """Registre thread-safe de counters, gauges et summaries étiquetés."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: dict[str, dict[tuple, float]] = defaultdict(dict)
+        self._counts: dict[str, dict[tuple, int]] = defaultdict(dict)
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[name][key] = self._values[name].get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self._lock:
+            self._values[name][_label_key(labels)] = float(value)
+
+    def observe(self, name: str, seconds: float, count: int = 1, **labels) -> None:
+        """Ajoute `count` observations totalisant `seconds` à un summary."""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[name][key] = self._values[name].get(key, 0.0) + seconds
+            self._counts[name][key] = self._counts[name].get(key, 0) + count
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def get(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._values[name].get(_label_key(labels), 0.0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+            self._counts.clear()
+
+    def render_prometheus(self) -> str:
+        """Exporte toutes les métriques au format texte Prometheus 0.0.4."""
+        lines = []
+        with self._lock:
+            for name in sorted(self._values):
+                kind, help_text = METRICS.get(name, ("untyped", ""))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(self._values[name].items()):
+                    if kind == "summary":
+                        lines.append(f"{name}_sum{_format_labels(key)} {value:.9g}")
+                        count = self._counts[name].get(key, 0)
+                        lines.append(f"{name}_count{_format_labels(key)} {count}")
+                    else:
+                        lines.append(f"{name}{_format_labels(key)} {value:.9g}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: tuple) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+class PhaseTimer:
+    """Accumule le temps passé par phase sur une epoch.
+
+    Usage :
+        timer = PhaseTimer()
+        with timer.phase("forward"):
+            ...
+        timer.totals  # {"forward": secondes, ...}
+
+    La phase spéciale "paused" est exclue du temps écoulé (débit réel).
+    """
+
+    def __init__(self):
+        self.totals: dict[str, float] = defaultdict(float)
+        self.steps = 0
+        self.tokens = 0
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[name] += time.perf_counter() - t0
+
+    def add(self, name: str, seconds: float) -> None:
+        self.totals[name] += seconds
+
+    def step_done(self, tokens: int) -> None:
+        self.steps += 1
+        self.tokens += tokens
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def summary(self) -> dict:
+        """Débit et temps moyen par phase (ms/pas) pour l'epoch écoulée."""
+        elapsed = self.elapsed - self.totals.get("paused", 0.0)
+        steps = max(self.steps, 1)
+        return {
+            "tokens_per_second": self.tokens / elapsed if elapsed > 0 else 0.0,
+            "epoch_seconds": elapsed,
+            "step_time_ms": {p: 1000 * self.totals.get(p, 0.0) / steps for p in TRAIN_PHASES},
+        }
+
+    def publish(self, registry: "MetricsRegistry", **labels) -> dict:
+        """Pousse les totaux de l'epoch dans le registre et retourne summary()."""
+        summary = self.summary()
+        for p in TRAIN_PHASES:
+            if p in self.totals:
+                registry.observe(
+                    "minillm_train_step_phase_seconds",
+                    self.totals[p],
+                    count=self.steps,
+                    phase=p,
+                    **labels,
+                )
+        registry.inc("minillm_train_steps_total", self.steps, **labels)
+        registry.inc("minillm_train_tokens_total", self.tokens, **labels)
+        registry.set("minillm_train_tokens_per_second", summary["tokens_per_second"], **labels)
+        return summary
+
+
+class GenerationTimer:
+    """Mesure lock wait, time-to-first-token et ms/token d'une génération."""
+
+    def __init__(self, registry: "MetricsRegistry", **labels):
+        self.registry = registry
+        self.labels = labels
+        self.n_tokens = 0
+        self._start = self._last = time.perf_counter()
+
+    def lock_acquired(self) -> None:
+        now = time.perf_counter()
+        self.registry.observe(
+            "minillm_generation_lock_wait_seconds", now - self._start, **self.labels
+        )
+        self._last = now
+
+    def token(self) -> None:
+        """À appeler après chaque token échantillonné."""
+        now = time.perf_counter()
+        if self.n_tokens == 0:
+            self.registry.observe(
+                "minillm_generation_ttft_seconds", now - self._start, **self.labels
+            )
+        self.registry.observe("minillm_generation_token_seconds", now - self._last, **self.labels)
+        self._last = now
+        self.n_tokens += 1
+
+    def finish(self) -> None:
+        self.registry.inc("minillm_generation_requests_total", **self.labels)
+        self.registry.inc("minillm_generation_tokens_total", self.n_tokens, **self.labels)
+
+
+# Registre global du processus
+metrics = MetricsRegistry()
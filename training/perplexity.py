@@ -0,0 +1,123 @@
+"""Évaluation de la perplexité sur des textes plus longs que seq_len.
+
+Le modèle ne voit que seq_len tokens à la fois. Pour scorer un texte
+arbitrairement long, on le découpe en fenêtres glissantes de longueur
+seq_len, décalées de `stride` tokens :
+
+    tokens : [t0 t1 t2 t3 t4 t5 t6 t7 t8 t9]
+    seq_len=4, stride=2
+    fenêtre 0 : t0..t3 -> prédit t1..t4   (tout est compté)
+    fenêtre 1 : t2..t5 -> prédit t3..t6   (seuls t5, t6 sont nouveaux)
+    fenêtre 2 : ...
+
+Chaque token cible n'est compté qu'une seule fois, avec le plus de
+contexte possible. stride=seq_len : fenêtres disjointes (rapide) ;
+stride petit : plus de contexte par token (plus précis, plus lent).
+Les fenêtres sont regroupées en batches (B, seq_len) pour le forward.
+"""
+
+import numpy as np
+
+
+def window_starts(n_tokens: int, seq_len: int, stride: int) -> list[int]:
+    """Positions de début des fenêtres (toutes de longueur identique)."""
+    L = min(seq_len, n_tokens - 1)
+    if L < 1:
+        return []
+    last = n_tokens - 1 - L
+    starts = list(range(0, last + 1, stride))
+    if starts[-1] != last:
+        starts.append(last)  # dernière fenêtre alignée sur la fin du texte
+    return starts
+
+
+def clamp_stride(stride: int | None, length: int) -> int:
+    """Stride effectif dans [1, length] ; None ou 0 : fenêtres disjointes (length)."""
+    return max(1, min(stride or length, length))
+
+
+def sliding_windows(tokens, seq_len: int, stride: int = None, batch_size: int = 8):
+    """Génère des batches (x, y, mask) de fenêtres glissantes.
+
+    Args:
+        tokens: séquence 1D de token IDs
+        seq_len: longueur de contexte du modèle
+        stride: décalage entre fenêtres (défaut : seq_len, fenêtres disjointes)
+        batch_size: nombre de fenêtres par batch
+    Yields:
+        x, y: (B, L) entrées et cibles
+        mask: (B, L) booléen — True pour les cibles à compter
+    """
+    tokens = np.asarray(tokens, dtype=np.int64)
+    n = len(tokens)
+    L = min(seq_len, n - 1)
+    stride = clamp_stride(stride, L) if L >= 1 else 1
+    starts = window_starts(n, seq_len, stride)
+
+    scored_until = 0  # dernière position cible déjà comptée
+    offsets = np.arange(L)
+    for i in range(0, len(starts), batch_size):
+        batch = np.array(starts[i : i + batch_size])
+        idx = batch[:, None] + offsets[None, :]  # (B, L)
+        x = tokens[idx]
+        y = tokens[idx + 1]
+        target_pos = idx + 1
+        # Une cible est nouvelle si elle dépasse tout ce qui a déjà été scoré,
+        # y compris par les fenêtres précédentes du même batch
+        prev_end = np.maximum.accumulate(np.concatenate([[scored_until], batch[:-1] + L]))
+        mask = target_pos > prev_end[:, None]
+        scored_until = int(batch[-1] + L)
+        yield x, y, mask
+
+
+def count_windows(n_tokens: int, seq_len: int, stride: int = None) -> int:
+    L = min(seq_len, n_tokens - 1)
+    if L < 1:
+        return 0
+    return len(window_starts(n_tokens, seq_len, clamp_stride(stride, L)))
+
+
+def masked_nll(logits: np.ndarray, targets: np.ndarray, mask: np.ndarray) -> tuple[float, int]:
+    """Somme des -log p(cible) sur les positions masquées.
+
+    Returns:
+        (somme des NLL, nombre de tokens comptés)
+    """
+    logits_max = np.max(logits, axis=-1, keepdims=True)
+    log_sum_exp = logits_max[..., 0] + np.log(np.sum(np.exp(logits - logits_max), axis=-1))
+    target_logits = np.take_along_axis(logits, targets[..., None], axis=-1)[..., 0]
+    nll = log_sum_exp - target_logits  # (B, L)
+    return float(np.sum(nll[mask])), int(np.sum(mask))
+
+
+def evaluate_perplexity(
+    model, tokens, seq_len: int, stride: int = None, batch_size: int = 8, progress=None
+) -> dict:
+    """Perplexité d'un modèle sur une séquence de longueur arbitraire.
+
+    Args:
+        progress: callable optionnel (windows_done, windows_total)
+    Returns:
+        dict avec loss, perplexity, n_tokens, n_windows
+    """
+    total = count_windows(len(tokens), seq_len, stride)
+    nll_sum, n_scored, done = 0.0, 0, 0
+    for x, y, mask in sliding_windows(tokens, seq_len, stride, batch_size):
+        logits = model.forward(x)
+        s, c = masked_nll(logits, y, mask)
+        nll_sum += s
+        n_scored += c
+        done += x.shape[0]
+        if progress is not None:
+            progress(done, total)
+    return summarize_nll(nll_sum, n_scored, total)
+
+
+def summarize_nll(nll_sum: float, n_tokens: int, n_windows: int) -> dict:
+    loss = nll_sum / n_tokens if n_tokens else 0.0
+    return {
+        "loss": float(loss),
+        "perplexity": float(np.exp(loss)),
+        "n_tokens": int(n_tokens),
+        "n_windows": int(n_windows),
+    }
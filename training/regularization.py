@@ -0,0 +1,54 @@
+"""Weight decay découplé et clipping des gradients, partagés par les boucles
+d'entraînement (training.trainer.Trainer et le TrainingService du backend).
+
+En lazy Adam (optimizer.lazy), les paramètres à gradient creux (ceux listés
+dans module.touched_rows, ex. Embedding) ne sont jamais parcourus en entier :
+- weight decay : ils sont ignorés, l'optimizer leur applique déjà une
+  décroissance différée ligne par ligne ;
+- clipping : seules les lignes touchées sont lues et mises à l'échelle
+  (les autres ont un gradient nul).
+Le coût par pas ne dépend donc plus de vocab_size.
+"""
+
+import numpy as np
+
+
+def _sparse_rows(module, lazy: bool) -> dict[str, np.ndarray]:
+    return getattr(module, "touched_rows", {}) if lazy else {}
+
+
+def apply_weight_decay(model, weight_decay: float, lr: float, lazy: bool = False) -> None:
+    """Decoupled weight decay (AdamW) : w *= (1 - wd * lr)."""
+    decay_factor = 1.0 - weight_decay * lr
+    for module in model.all_modules():
+        sparse = _sparse_rows(module, lazy)
+        for name, param in module.parameters.items():
+            if name not in sparse:
+                param *= decay_factor
+
+
+def clip_gradients(model, max_norm: float, lazy: bool = False) -> float:
+    """Clip les gradients par norme globale.
+
+    Returns:
+        norme globale avant clipping
+    """
+    all_grads = []  # (gradient, lignes touchées ou None)
+    for module in model.all_modules():
+        sparse = _sparse_rows(module, lazy)
+        for name, g in module.gradients.items():
+            all_grads.append((g, sparse.get(name)))
+    if not all_grads:
+        return 0.0
+
+    total_norm = float(
+        np.sqrt(sum(np.sum((g if rows is None else g[rows]) ** 2) for g, rows in all_grads))
+    )
+    if total_norm > max_norm:
+        scale = max_norm / (total_norm + 1e-8)
+        for g, rows in all_grads:
+            if rows is None:
+                g *= scale
+            else:
+                g[rows] *= scale
+    return total_norm
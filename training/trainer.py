@@ -1,9 +1,9 @@
-import numpy as np
-
 from autograd.backprop import Backprop
 from config import Config
 from training.data_loader import DataLoader
 from training.lr_scheduler import create_scheduler
+from training.metrics import PhaseTimer, metrics
+from training.regularization import apply_weight_decay, clip_gradients
 
 
 class Trainer:
@@ -24,6 +24,7 @@ class Trainer:
         self.data_loader = data_loader
         self.config = config
         self.loss_history = []
+        self.throughput_history = []  # PhaseTimer.summary() par epoch
 
     def train(self, num_epochs: int = None) -> list[float]:
         """Lance l'entraînement.
@@ -41,59 +42,62 @@ class Trainer:
         scheduler = create_scheduler(
             self.config.lr_schedule, self.config.learning_rate, total_steps
         )
+        lazy = getattr(self.optimizer, "lazy", False)
 
         for epoch in range(num_epochs):
             self.data_loader.reset()
             epoch_loss = 0.0
+            timer = PhaseTimer()
 
             for step in range(steps_per_epoch):
-                x, y = self.data_loader.next_batch()
+                with timer.phase("data"):
+                    x, y = self.data_loader.next_batch()
 
                 # Get current LR from scheduler
                 current_lr = scheduler.step()
 
-                loss, _ = self.backprop.forward(x, y)
-                self.backprop.backward()
+                with timer.phase("forward"):
+                    loss, _ = self.backprop.forward(x, y, self.data_loader.segment_ids)
+                with timer.phase("backward"):
+                    self.backprop.backward()
 
-                if self.config.grad_clip > 0:
-                    self._clip_gradients()
+                with timer.phase("optimizer"):
+                    if self.config.grad_clip > 0:
+                        clip_gradients(self.backprop.model, self.config.grad_clip, lazy)
 
-                # Update optimizer LR and step
-                self.optimizer.lr = current_lr
-                self.optimizer.step()
+                    # Update optimizer LR and step
+                    self.optimizer.lr = current_lr
+                    self.optimizer.step()
 
-                # Decoupled weight decay (AdamW style)
-                if self.config.weight_decay > 0:
-                    decay_factor = 1.0 - self.config.weight_decay * current_lr
-                    for module in self.backprop.model.all_modules():
-                        for name, param in module.parameters.items():
-                            param *= decay_factor
+                    # Decoupled weight decay (AdamW style)
+                    if self.config.weight_decay > 0:
+                        apply_weight_decay(
+                            self.backprop.model, self.config.weight_decay, current_lr, lazy
+                        )
 
-                self.backprop.zero_grad()
+                    self.backprop.zero_grad()
 
+                timer.step_done(self.data_loader.batch_tokens or x.size)
                 epoch_loss += loss
 
             avg_loss = epoch_loss / steps_per_epoch
             self.loss_history.append(avg_loss)
+            throughput = timer.publish(metrics, source="trainer")
+            if self.data_loader.bucketed:
+                throughput["padding"] = self.data_loader.padding_stats(reset=True)
+            self.throughput_history.append(throughput)
 
             if (epoch + 1) % self.config.log_every == 0 or epoch == 0:
-                print(f"Epoch {epoch + 1:4d}/{num_epochs} | Loss: {avg_loss:.4f}")
-
+                line = (
+                    f"Epoch {epoch + 1:4d}/{num_epochs} | Loss: {avg_loss:.4f} "
+                    f"| {throughput['tokens_per_second']:,.0f} tok/s"
+                )
+                if "padding" in throughput:
+                    line += (
+                        f" | FLOPs économisés : {100 * throughput['padding']['flops_saved']:.0f}%"
+                    )
+                print(line)
+
+        if lazy:
+            self.optimizer.flush()
         return self.loss_history
-
-    def _clip_gradients(self):
-        """Clip les gradients par norme globale."""
-        all_grads = []
-        for module in self.backprop.model.all_modules():
-            for g in module.gradients.values():
-                all_grads.append(g.ravel())
-
-        if not all_grads:
-            return
-
-        total_norm = np.sqrt(sum(np.sum(g**2) for g in all_grads))
-        if total_norm > self.config.grad_clip:
-            scale = self.config.grad_clip / (total_norm + 1e-8)
-            for module in self.backprop.model.all_modules():
-                for name in module.gradients:
-                    module.gradients[name] *= scale